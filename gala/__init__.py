@@ -2,12 +2,23 @@
 Gala.
 """
 
+import os
 import sys
 
 __author__ = 'adrn <adrianmpw@gmail.com>'
 
 from ._astropy_init import *
 
+
+def get_include():
+    """
+    Return the directory that contains gala's C headers and Cython declaration
+    files (e.g., ``potential/src/cpotential.h``), for compiling extension
+    modules against gala's C API.
+    """
+    return os.path.dirname(os.path.abspath(__file__))
+
+
 # Enforce Python version check during package import.
 # This is the same check as the one at the top of setup.py
 __minimum_python_version__ = "3.7"
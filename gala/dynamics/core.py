@@ -87,7 +87,7 @@ class PhaseSpacePosition:
     representation_mappings[r.UnitSphericalDifferential] = \
         representation_mappings[r.SphericalDifferential]
 
-    def __init__(self, pos, vel=None, frame=None):
+    def __init__(self, pos, vel=None, frame=None, copy=True):
         """
         Represents phase-space positions, i.e. positions and conjugate momenta
         (velocities).
@@ -123,6 +123,10 @@ class PhaseSpacePosition:
             the note above about the assumed meaning of the axes of this object.
         frame : :class:`~gala.potential.FrameBase` (optional)
             The reference frame of the input phase-space positions.
+        copy : bool (optional)
+            If False, Quantity or array inputs are stored without copying them
+            where possible, so that the object shares memory with the inputs.
+            Default is True.
 
         """
 
@@ -132,7 +136,7 @@ class PhaseSpacePosition:
         if not isinstance(pos, coord.BaseRepresentation):
             # assume Cartesian if not specified
             if not hasattr(pos, 'unit'):
-                pos = pos * u.one
+                pos = u.Quantity(pos, u.one, copy=False)
 
             # 3D coordinates get special treatment
             ndim = pos.shape[0]
@@ -143,10 +147,10 @@ class PhaseSpacePosition:
                     pos = getattr(coord, pos.__class__.__name__)(**kw)
 
                 else:
-                    pos = coord.CartesianRepresentation(pos)
+                    pos = coord.CartesianRepresentation(pos, copy=copy)
 
             else:
-                pos = rep_nd.NDCartesianRepresentation(pos)
+                pos = rep_nd.NDCartesianRepresentation(pos, copy=copy)
 
         else:
             ndim = 3
@@ -161,15 +165,15 @@ class PhaseSpacePosition:
         if not isinstance(vel, coord.BaseDifferential):
             # assume representation is same as pos if not specified
             if not hasattr(vel, 'unit'):
-                vel = vel * u.one
+                vel = u.Quantity(vel, u.one, copy=False)
 
             if ndim == 3:
                 name = pos.__class__.get_name()
                 Diff = coord.representation.DIFFERENTIAL_CLASSES[name]
-                vel = Diff(*vel)
+                vel = Diff(*vel, copy=copy)
             else:
                 Diff = rep_nd.NDCartesianDifferential
-                vel = Diff(vel)
+                vel = Diff(vel, copy=copy)
 
         # make sure shape is the same
         if pos.shape != vel.shape:
@@ -496,6 +500,8 @@ class PhaseSpacePosition:
             is represented in.
         **kwargs
             Any aditional keyword arguments passed to the class initializer.
+            With ``copy=False``, the object is created without copying ``w``
+            where possible.
 
         Returns
         -------
@@ -503,7 +509,8 @@ class PhaseSpacePosition:
 
         """.format(name=cls.__name__)
 
-        w = np.array(w)
+        # the class initializer copies the positions and velocities by default
+        w = np.asarray(w)
 
         ndim = w.shape[0]//2
         pos = w[:ndim]
@@ -513,8 +520,9 @@ class PhaseSpacePosition:
         # Dimensionless
         if units is not None and not isinstance(units, DimensionlessUnitSystem):
             units = UnitSystem(units)
-            pos = pos*units['length']
-            vel = vel*units['length']/units['time']  # from _core_units
+            pos = u.Quantity(pos, units['length'], copy=False)
+            vel = u.Quantity(vel, units['length']/units['time'],  # from _core_units
+                             copy=False)
 
         return cls(pos=pos, vel=vel, **kwargs)
 
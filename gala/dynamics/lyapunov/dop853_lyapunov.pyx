@@ -15,7 +15,11 @@ np.import_array()
 from libc.stdio cimport printf
 from libc.math cimport log
 
-from ...integrate.cyintegrators.dop853 cimport dop853_step
+from ...integrate.cyintegrators.dop853 cimport (Dop853State,
+                                                dop853_alloc_state,
+                                                dop853_free,
+                                                dop853_check_result,
+                                                dop853_step_state)
 from ...potential.potential.cpotential cimport CPotentialWrapper
 from ...potential.frame.cframe cimport CFrameWrapper
 
@@ -65,6 +69,7 @@ cpdef dop853_lyapunov_max(hamiltonian, double[::1] w0,
         CFrameType cf = (<CFrameWrapper>(hamiltonian.frame.c_instance)).cframe
 
         void *args
+        Dop853State *state
 
     # store initial conditions
     for i in range(norbits):
@@ -83,31 +88,37 @@ cpdef dop853_lyapunov_max(hamiltonian, double[::1] w0,
 
     # dummy counter for storing Lyapunov stuff, which only happens every few steps
     jiter = 0
-    for j in range(1, n_steps, 1):
-        dop853_step(&cp, &cf, <FcnEqDiff> Fwrapper,
-                    &w[0], t[j-1], t[j], dt0, ndim,
-                    norbits, 0, args, # 0 is for nbody, ignored here
-                    atol, rtol, nmax)
-
-        # store position of main orbit
-        for i in range(norbits):
-            for k in range(ndim):
-                all_w[j, i, k] = w[i*ndim + k]
-
-        if (j % n_steps_per_pullback) == 0:
-            # get magnitude of deviation vector
-            for i in range(1, norbits):
+    state = dop853_alloc_state(ndim*norbits, 0)
+    try:
+        for j in range(1, n_steps, 1):
+            dop853_check_result(
+                dop853_step_state(state, &cp, &cf, <FcnEqDiff> Fwrapper,
+                                  &w[0], t[j-1], t[j], dt0, ndim,
+                                  norbits, 0, args, # 0 is for nbody, ignored here
+                                  atol, rtol, nmax))
+
+            # store position of main orbit
+            for i in range(norbits):
                 for k in range(ndim):
-                    d1[i, k] = w[i*ndim + k] - w[k]
+                    all_w[j, i, k] = w[i*ndim + k]
 
-                d1_mag = six_norm(&d1[i, 0])
-                LEs[jiter, i-1] = log(d1_mag / d0)
+            if (j % n_steps_per_pullback) == 0:
+                # get magnitude of deviation vector
+                for i in range(1, norbits):
+                    for k in range(ndim):
+                        d1[i, k] = w[i*ndim + k] - w[k]
 
-                # renormalize offset orbits
-                for k in range(ndim):
-                    w[i*ndim + k] = w[k] + d0 * d1[i, k] / d1_mag
+                    d1_mag = six_norm(&d1[i, 0])
+                    LEs[jiter, i-1] = log(d1_mag / d0)
+
+                    # renormalize offset orbits
+                    for k in range(ndim):
+                        w[i*ndim + k] = w[k] + d0 * d1[i, k] / d1_mag
+
+                jiter += 1
 
-            jiter += 1
+    finally:
+        dop853_free(state)
 
     LEs = np.array([np.sum(LEs[:j],axis=0)/t[j*n_steps_per_pullback]
                     for j in range(1, niter)])
@@ -142,6 +153,7 @@ cpdef dop853_lyapunov_max_dont_save(hamiltonian, double[::1] w0,
         CFrameType cf = (<CFrameWrapper>(hamiltonian.frame.c_instance)).cframe
 
         void *args
+        Dop853State *state
 
     # store initial conditions
     for i in range(norbits):
@@ -157,26 +169,32 @@ cpdef dop853_lyapunov_max_dont_save(hamiltonian, double[::1] w0,
 
     # dummy counter for storing Lyapunov stuff, which only happens every few steps
     jiter = 0
-    for j in range(1, n_steps, 1):
-        dop853_step(&cp, &cf, <FcnEqDiff> Fwrapper,
-                    &w[0], t[j-1], t[j], dt0, ndim,
-                    norbits, 0, args, # 0 is for nbody, ignored here
-                    atol, rtol, nmax)
-
-        if (j % n_steps_per_pullback) == 0:
-            # get magnitude of deviation vector
-            for i in range(1, norbits):
-                for k in range(ndim):
-                    d1[i, k] = w[i*ndim + k] - w[k]
-
-                d1_mag = six_norm(&d1[i, 0])
-                LEs[jiter, i-1] = log(d1_mag / d0)
-
-                # renormalize offset orbits
-                for k in range(ndim):
-                    w[i*ndim + k] = w[k] + d0 * d1[i, k] / d1_mag
-
-            jiter += 1
+    state = dop853_alloc_state(ndim*norbits, 0)
+    try:
+        for j in range(1, n_steps, 1):
+            dop853_check_result(
+                dop853_step_state(state, &cp, &cf, <FcnEqDiff> Fwrapper,
+                                  &w[0], t[j-1], t[j], dt0, ndim,
+                                  norbits, 0, args, # 0 is for nbody, ignored here
+                                  atol, rtol, nmax))
+
+            if (j % n_steps_per_pullback) == 0:
+                # get magnitude of deviation vector
+                for i in range(1, norbits):
+                    for k in range(ndim):
+                        d1[i, k] = w[i*ndim + k] - w[k]
+
+                    d1_mag = six_norm(&d1[i, 0])
+                    LEs[jiter, i-1] = log(d1_mag / d0)
+
+                    # renormalize offset orbits
+                    for k in range(ndim):
+                        w[i*ndim + k] = w[k] + d0 * d1[i, k] / d1_mag
+
+                jiter += 1
+
+    finally:
+        dop853_free(state)
 
     LEs = np.array([np.sum(LEs[:j],axis=0)/t[j*n_steps_per_pullback] for j in range(1, niter)])
     return np.asarray(LEs)
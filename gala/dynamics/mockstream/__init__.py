@@ -1,4 +1,5 @@
 from .core import *
-from ._mockstream import mockstream_dop853
+from ._mockstream import (mockstream_dop853, mockstream_dop853_single_pass,
+                          mockstream_ensemble)
 from .mockstream_generator import *
 from .df import *
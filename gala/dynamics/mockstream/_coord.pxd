@@ -1,9 +1,10 @@
 # cython: language_level=3
 
 # cdef void cross(double[::1] x, double[::1] y, double[::1] z)
-cdef void cross(double *x, double *y, double *z)
-cdef double norm(double *x, int n)
-cdef void apply_3matrix(double[:, ::1] R, double *x, double *y, int transpose)
+cdef void cross(double *x, double *y, double *z) noexcept nogil
+cdef double norm(double *x, int n) noexcept nogil
+cdef void apply_3matrix(double[:, ::1] R, double *x, double *y,
+                        int transpose) noexcept nogil
 
 cdef void sat_rotation_matrix(double *w, double *R)
 
@@ -19,13 +19,13 @@ cdef extern from "math.h":
     double fmod(double y, double x) nogil
 
 
-cdef void cross(double *x, double *y, double *z):
+cdef void cross(double *x, double *y, double *z) noexcept nogil:
     z[0] = x[1]*y[2] - x[2]*y[1]
     z[1] = -x[0]*y[2] + x[2]*y[0]
     z[2] = x[0]*y[1] - x[1]*y[0]
 
 
-cdef double norm(double *x, int n):
+cdef double norm(double *x, int n) noexcept nogil:
     cdef:
         double val = 0.
         int i
@@ -37,7 +37,7 @@ cdef double norm(double *x, int n):
 
 
 cdef void apply_3matrix(double[:, ::1] R, double *x, double *y,
-                        int transpose):
+                        int transpose) noexcept nogil:
     cdef int i
     if transpose == 0:
         for i in range(3):
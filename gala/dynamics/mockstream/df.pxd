@@ -1,5 +1,7 @@
 # cython: language_level=3
 
+cimport numpy as np
+
 from ...potential.potential.cpotential cimport CPotential
 
 cdef class BaseStreamDF:
@@ -11,12 +13,16 @@ cdef class BaseStreamDF:
     cdef void get_rj_vj_R(self, CPotential *cpotential, double G,
                           double *prog_x, double *prog_v,
                           double prog_m, double t,
-                          double *rj, double *vj, double[:, ::1] R)
+                          double *rj, double *vj,
+                          double[:, ::1] R) noexcept nogil
 
     cdef void transform_from_sat(self, double[:, ::1] R,
                                  double *x, double *v,
                                  double *prog_x, double *prog_v,
-                                 double *out_x, double *out_v)
+                                 double *out_x, double *out_v) noexcept nogil
+
+    cdef np.ndarray _draw_normal(self, double[::1] prog_m, int[::1] nparticles,
+                                 int n_per_particle)
 
     cpdef _sample(self, potential,
                   double[:, ::1] prog_x, double[:, ::1] prog_v,
@@ -26,7 +26,8 @@ __all__ = ['BaseStreamDF', 'FardalStreamDF', 'StreaklineStreamDF',
            'LagrangeCloudStreamDF']
 
 cdef extern from "potential/src/cpotential.h":
-    double c_d2_dr2(CPotential *p, double t, double *q, double *epsilon) nogil
+    const double D2_DR2_STEP
+    double c_d2_dr2(CPotential *p, double t, double *q, double *epsilon, double h) nogil
 
 
 @cython.embedsignature(True)
@@ -63,13 +64,14 @@ cdef class BaseStreamDF:
     cdef void get_rj_vj_R(self, CPotential *cpotential, double G,
                           double *prog_x, double *prog_v,
                           double prog_m, double t,
-                          double *rj, double *vj, double[:, ::1] R): # outputs
+                          double *rj, double *vj,
+                          double[:, ::1] R) noexcept nogil: # outputs
         # NOTE: assuming ndim=3 throughout here
         cdef:
             int i
             double dist = norm(prog_x, 3)
             double L[3]
-            double Lmag, Om, d2r
+            double Lnorm, Om, d2r
 
         # angular momentum vector, L, and |L|
         cross(prog_x, prog_v, &L[0])
@@ -84,7 +86,7 @@ cdef class BaseStreamDF:
         # Note: we re-use the L array as the "epsilon" array needed by d2_dr2
         Om = Lnorm / dist**2
         d2r = c_d2_dr2(cpotential, t, prog_x,
-                       &L[0])
+                       &L[0], D2_DR2_STEP)
         rj[0] = (G * prog_m / (Om*Om - d2r)) ** (1/3.)
         vj[0] = Om * rj[0]
 
@@ -96,7 +98,9 @@ cdef class BaseStreamDF:
     cdef void transform_from_sat(self, double[:, ::1] R,
                                  double *x, double *v,
                                  double *prog_x, double *prog_v,
-                                 double *out_x, double *out_v):
+                                 double *out_x, double *out_v) noexcept nogil:
+        cdef int n
+
         # from satellite coordinates to global coordinates note: the 1 is
         # because above in get_rj_vj_R(), we compute the transpose of the
         # rotation matrix we actually need
@@ -108,6 +112,19 @@ cdef class BaseStreamDF:
             out_v[n] += prog_v[n]
 
 
+    cdef np.ndarray _draw_normal(self, double[::1] prog_m, int[::1] nparticles,
+                                 int n_per_particle):
+        """
+        Draw all of the standard normal variates needed to sample the
+        particles in one call, with shape ``(nparticles, n_per_particle)``.
+        The rows are in the order that the particles are generated in, so the
+        particles are the same as when drawing the variates one by one.
+        """
+        n = (self._lead + self._trail) * np.sum(
+            np.asarray(nparticles)[np.asarray(prog_m) != 0])
+        return np.ascontiguousarray(
+            self.random_state.standard_normal(size=(int(n), n_per_particle)))
+
     cpdef _sample(self, potential,
                   double[:, ::1] prog_x, double[:, ::1] prog_v,
                   double[::1] prog_t, double[::1] prog_m, int[::1] nparticles):
@@ -277,43 +294,44 @@ cdef class StreaklineStreamDF(BaseStreamDF):
             double G = potential.G
 
         j = 0
-        for i in range(ntimes):
-            if prog_m[i] == 0:
-                continue
-
-            self.get_rj_vj_R(&cpotential, G,
-                             &prog_x[i, 0], &prog_v[i, 0], prog_m[i], prog_t[i],
-                             &rj, &vj, R) # outputs
-
-            # Trailing tail
-            if self._trail == 1:
-                for k in range(nparticles[i]):
-                    tmp_x[0] = rj
-                    tmp_v[1] = vj
-                    particle_t1[j+k] = prog_t[i]
-
-                    self.transform_from_sat(R,
-                                            &tmp_x[0], &tmp_v[0],
-                                            &prog_x[i, 0], &prog_v[i, 0],
-                                            &particle_x[j+k, 0],
-                                            &particle_v[j+k, 0])
-
-                j += nparticles[i]
-
-            # Leading tail
-            if self._lead == 1:
-                for k in range(nparticles[i]):
-                    tmp_x[0] = -rj
-                    tmp_v[1] = -vj
-                    particle_t1[j+k] = prog_t[i]
-
-                    self.transform_from_sat(R,
-                                            &tmp_x[0], &tmp_v[0],
-                                            &prog_x[i, 0], &prog_v[i, 0],
-                                            &particle_x[j+k, 0],
-                                            &particle_v[j+k, 0])
-
-                j += nparticles[i]
+        with nogil:
+            for i in range(ntimes):
+                if prog_m[i] == 0:
+                    continue
+
+                self.get_rj_vj_R(&cpotential, G,
+                                 &prog_x[i, 0], &prog_v[i, 0], prog_m[i], prog_t[i],
+                                 &rj, &vj, R) # outputs
+
+                # Trailing tail
+                if self._trail == 1:
+                    for k in range(nparticles[i]):
+                        tmp_x[0] = rj
+                        tmp_v[1] = vj
+                        particle_t1[j+k] = prog_t[i]
+
+                        self.transform_from_sat(R,
+                                                &tmp_x[0], &tmp_v[0],
+                                                &prog_x[i, 0], &prog_v[i, 0],
+                                                &particle_x[j+k, 0],
+                                                &particle_v[j+k, 0])
+
+                    j += nparticles[i]
+
+                # Leading tail
+                if self._lead == 1:
+                    for k in range(nparticles[i]):
+                        tmp_x[0] = -rj
+                        tmp_v[1] = -vj
+                        particle_t1[j+k] = prog_t[i]
+
+                        self.transform_from_sat(R,
+                                                &tmp_x[0], &tmp_v[0],
+                                                &prog_x[i, 0], &prog_v[i, 0],
+                                                &particle_x[j+k, 0],
+                                                &particle_v[j+k, 0])
+
+                    j += nparticles[i]
 
         return particle_x, particle_v, particle_t1
 
@@ -360,6 +378,9 @@ cdef class FardalStreamDF(BaseStreamDF):
             CPotential cpotential = (<CPotentialWrapper>(potential.c_instance)).cpotential
             double G = potential.G
 
+            # all of the random variates, drawn up front
+            double[:, ::1] z = self._draw_normal(prog_m, nparticles, 4)
+
         k_mean[0] = 2. # R
         k_disp[0] = 0.5
 
@@ -373,49 +394,50 @@ cdef class FardalStreamDF(BaseStreamDF):
         k_disp[5] = 0.5
 
         j = 0
-        for i in range(ntimes):
-            if prog_m[i] == 0:
-                continue
-
-            self.get_rj_vj_R(&cpotential, G,
-                             &prog_x[i, 0], &prog_v[i, 0], prog_m[i], prog_t[i],
-                             &rj, &vj, R)  # outputs
-
-            # Trailing tail
-            if self._trail == 1:
-                for k in range(nparticles[i]):
-                    kx = self.random_state.normal(k_mean[0], k_disp[0])
-                    tmp_x[0] = kx * rj
-                    tmp_x[2] = self.random_state.normal(k_mean[2], k_disp[2]) * rj
-                    tmp_v[1] = kx * self.random_state.normal(k_mean[4], k_disp[4]) * vj
-                    tmp_v[2] = self.random_state.normal(k_mean[5], k_disp[5]) * vj
-                    particle_t1[j+k] = prog_t[i]
-
-                    self.transform_from_sat(R,
-                                            &tmp_x[0], &tmp_v[0],
-                                            &prog_x[i, 0], &prog_v[i, 0],
-                                            &particle_x[j+k, 0],
-                                            &particle_v[j+k, 0])
-
-                j += nparticles[i]
-
-            # Leading tail
-            if self._lead == 1:
-                for k in range(nparticles[i]):
-                    kx = self.random_state.normal(k_mean[0], k_disp[0])
-                    tmp_x[0] = kx * -rj
-                    tmp_x[2] = self.random_state.normal(k_mean[2], k_disp[2]) * -rj
-                    tmp_v[1] = kx * self.random_state.normal(k_mean[4], k_disp[4]) * -vj
-                    tmp_v[2] = self.random_state.normal(k_mean[5], k_disp[5]) * -vj
-                    particle_t1[j+k] = prog_t[i]
-
-                    self.transform_from_sat(R,
-                                            &tmp_x[0], &tmp_v[0],
-                                            &prog_x[i, 0], &prog_v[i, 0],
-                                            &particle_x[j+k, 0],
-                                            &particle_v[j+k, 0])
-
-                j += nparticles[i]
+        with nogil:
+            for i in range(ntimes):
+                if prog_m[i] == 0:
+                    continue
+
+                self.get_rj_vj_R(&cpotential, G,
+                                 &prog_x[i, 0], &prog_v[i, 0], prog_m[i], prog_t[i],
+                                 &rj, &vj, R)  # outputs
+
+                # Trailing tail
+                if self._trail == 1:
+                    for k in range(nparticles[i]):
+                        kx = k_mean[0] + k_disp[0] * z[j+k, 0]
+                        tmp_x[0] = kx * rj
+                        tmp_x[2] = (k_mean[2] + k_disp[2] * z[j+k, 1]) * rj
+                        tmp_v[1] = kx * (k_mean[4] + k_disp[4] * z[j+k, 2]) * vj
+                        tmp_v[2] = (k_mean[5] + k_disp[5] * z[j+k, 3]) * vj
+                        particle_t1[j+k] = prog_t[i]
+
+                        self.transform_from_sat(R,
+                                                &tmp_x[0], &tmp_v[0],
+                                                &prog_x[i, 0], &prog_v[i, 0],
+                                                &particle_x[j+k, 0],
+                                                &particle_v[j+k, 0])
+
+                    j += nparticles[i]
+
+                # Leading tail
+                if self._lead == 1:
+                    for k in range(nparticles[i]):
+                        kx = k_mean[0] + k_disp[0] * z[j+k, 0]
+                        tmp_x[0] = kx * -rj
+                        tmp_x[2] = (k_mean[2] + k_disp[2] * z[j+k, 1]) * -rj
+                        tmp_v[1] = kx * (k_mean[4] + k_disp[4] * z[j+k, 2]) * -vj
+                        tmp_v[2] = (k_mean[5] + k_disp[5] * z[j+k, 3]) * -vj
+                        particle_t1[j+k] = prog_t[i]
+
+                        self.transform_from_sat(R,
+                                                &tmp_x[0], &tmp_v[0],
+                                                &prog_x[i, 0], &prog_v[i, 0],
+                                                &particle_x[j+k, 0],
+                                                &particle_v[j+k, 0])
+
+                    j += nparticles[i]
 
         return particle_x, particle_v, particle_t1
 
@@ -471,47 +493,51 @@ cdef class LagrangeCloudStreamDF(BaseStreamDF):
             double G = potential.G
             double _v_disp = self.v_disp.decompose(potential.units).value
 
+            # all of the random variates, drawn up front
+            double[:, ::1] z = self._draw_normal(prog_m, nparticles, 3)
+
         j = 0
-        for i in range(ntimes):
-            if prog_m[i] == 0:
-                continue
-
-            self.get_rj_vj_R(&cpotential, G,
-                             &prog_x[i, 0], &prog_v[i, 0], prog_m[i], prog_t[i],
-                             &rj, &vj, R) # outputs
-
-            # Trailing tail
-            if self._trail == 1:
-                for k in range(nparticles[i]):
-                    tmp_x[0] = rj
-                    tmp_v[0] = self.random_state.normal(0, _v_disp)
-                    tmp_v[1] = self.random_state.normal(0, _v_disp)
-                    tmp_v[2] = self.random_state.normal(0, _v_disp)
-                    particle_t1[j + k] = prog_t[i]
-
-                    self.transform_from_sat(R,
-                                            &tmp_x[0], &tmp_v[0],
-                                            &prog_x[i, 0], &prog_v[i, 0],
-                                            &particle_x[j+k, 0],
-                                            &particle_v[j+k, 0])
-
-                j += nparticles[i]
-
-            # Leading tail
-            if self._lead == 1:
-                for k in range(nparticles[i]):
-                    tmp_x[0] = -rj
-                    tmp_v[0] = self.random_state.normal(0, _v_disp)
-                    tmp_v[1] = self.random_state.normal(0, _v_disp)
-                    tmp_v[2] = self.random_state.normal(0, _v_disp)
-                    particle_t1[j + k] = prog_t[i]
-
-                    self.transform_from_sat(R,
-                                            &tmp_x[0], &tmp_v[0],
-                                            &prog_x[i, 0], &prog_v[i, 0],
-                                            &particle_x[j+k, 0],
-                                            &particle_v[j+k, 0])
-
-                j += nparticles[i]
+        with nogil:
+            for i in range(ntimes):
+                if prog_m[i] == 0:
+                    continue
+
+                self.get_rj_vj_R(&cpotential, G,
+                                 &prog_x[i, 0], &prog_v[i, 0], prog_m[i], prog_t[i],
+                                 &rj, &vj, R) # outputs
+
+                # Trailing tail
+                if self._trail == 1:
+                    for k in range(nparticles[i]):
+                        tmp_x[0] = rj
+                        tmp_v[0] = _v_disp * z[j+k, 0]
+                        tmp_v[1] = _v_disp * z[j+k, 1]
+                        tmp_v[2] = _v_disp * z[j+k, 2]
+                        particle_t1[j + k] = prog_t[i]
+
+                        self.transform_from_sat(R,
+                                                &tmp_x[0], &tmp_v[0],
+                                                &prog_x[i, 0], &prog_v[i, 0],
+                                                &particle_x[j+k, 0],
+                                                &particle_v[j+k, 0])
+
+                    j += nparticles[i]
+
+                # Leading tail
+                if self._lead == 1:
+                    for k in range(nparticles[i]):
+                        tmp_x[0] = -rj
+                        tmp_v[0] = _v_disp * z[j+k, 0]
+                        tmp_v[1] = _v_disp * z[j+k, 1]
+                        tmp_v[2] = _v_disp * z[j+k, 2]
+                        particle_t1[j + k] = prog_t[i]
+
+                        self.transform_from_sat(R,
+                                                &tmp_x[0], &tmp_v[0],
+                                                &prog_x[i, 0], &prog_v[i, 0],
+                                                &particle_x[j+k, 0],
+                                                &particle_v[j+k, 0])
+
+                    j += nparticles[i]
 
         return particle_x, particle_v, particle_t1
@@ -16,29 +16,41 @@ import sys
 
 # Third-party
 import astropy.units as u
+from astropy.utils.decorators import deprecated
 import numpy as np
 cimport numpy as np
 np.import_array()
 from yaml import dump
 
 from libc.math cimport sqrt
+from libc.stdlib cimport malloc, free
 from cpython.exc cimport PyErr_CheckSignals
-
-from ...integrate.cyintegrators.dop853 cimport (dop853_step,
-                                                dop853_helper_save_all)
-from ...potential.potential.cpotential cimport CPotentialWrapper, CPotential
+from cython.parallel cimport prange, threadid
+
+from ...integrate.cyintegrators.ruth4 cimport c_composition_step
+from ...integrate.cyintegrators.dop853 cimport (dop853_helper_save_all,
+                                                Dop853State,
+                                                dop853_alloc_state,
+                                                dop853_free,
+                                                dop853_check_result,
+                                                dop853_step_state)
+from ...potential.potential.cpotential cimport (CPotentialWrapper, CPotential,
+                                                c_gradient, TRANSFORM_SHIFT)
 from ...potential.frame.cframe cimport CFrameWrapper, CFrameType
 from ...potential.potential.builtin.cybuiltin import NullWrapper
 
 from ...potential import Hamiltonian
 from ...potential.frame import StaticFrame
+from ...util import GalaDeprecationWarning
 from ...io import quantity_to_hdf5
 from ...potential.potential.io import to_dict
 
 from ..nbody.nbody cimport MAX_NBODY
 from .df cimport BaseStreamDF
 
-__all__ = ['mockstream_dop853', 'mockstream_dop853_animate']
+__all__ = ['mockstream_dop853', 'mockstream_dop853_single_pass',
+           'mockstream_symplectic', 'mockstream_ensemble',
+           'mockstream_dop853_animate']
 
 
 cdef extern from "dopri/dop853.h":
@@ -50,131 +62,589 @@ cdef extern from "dopri/dop853.h":
                                CPotential *p, CFrameType *fr,
                                unsigned norbits, unsigned nbody, void *args) nogil
 
-
-cpdef mockstream_dop853(nbody, double[::1] time,
-                        double[:, ::1] stream_w0, double[::1] stream_t1,
-                        double tfinal, int[::1] nstream,
-                        double atol=1E-10, double rtol=1E-10, int nmax=0,
-                        int progress=0):
+cdef extern from "hamiltonian/src/chamiltonian.h":
+    void hamiltonian_gradient(CPotential *p, CFrameType *fr, double t,
+                              double *q, double *grad) nogil
+
+# The gravitational field of the massive bodies along their stored orbits,
+#   passed as the args of Fwrapper_body_field(). The orbits are shared, and
+#   the rest is private to one integration.
+ctypedef struct BodyField:
+    double *t  # (ntimes, ) times of the stored orbits
+    int ntimes
+    double *w  # (ntimes, nbodies, 6) stored orbits of the bodies
+    int nbodies
+    int n_active  # number of bodies with a non-null potential
+    CPotential **pots  # copies of the body potentials, NULL if null
+    double *q  # (nbodies, 3) positions of the bodies at the current time
+    int j  # index of the last interval of stored times used
+
+
+cdef int body_field_init(BodyField *field, list particle_potentials,
+                         double[::1] t, double[:, :, ::1] w) except -1:
     """
-    Parameters
-    ----------
-    nbody : `~gala.dynamics.nbody.DirectNBody`
-    time : numpy.ndarray (ntimes, )
-    stream_w0 : numpy.ndarray (nstreamparticles, 6)
-    stream_t1 : numpy.ndarray (ntimes, )
-    nstream : numpy.ndarray (ntimes, )
-        The number of stream particles to be integrated from this timestep.
-        There should be no zero values.
+    Set up ``field`` for the stored orbits ``w`` of the massive bodies at
+    times ``t``. The potentials of the bodies are copied, with their origins
+    pointing at the interpolated positions of the bodies, so that the
+    potential objects themselves are not modified. Free with
+    ``body_field_free()``.
+    """
+    cdef:
+        int b, c
+        CPotential *src
+
+    field.t = &t[0]
+    field.ntimes = t.shape[0]
+    field.w = &w[0, 0, 0]
+    field.nbodies = w.shape[1]
+    field.n_active = 0
+    field.j = 0
+    field.q = <double *>malloc(3 * field.nbodies * sizeof(double))
+    field.pots = <CPotential **>malloc(field.nbodies * sizeof(CPotential *))
+    if field.q == NULL or field.pots == NULL:
+        body_field_free(field)
+        raise MemoryError("Failed to allocate the body field.")
+
+    for b in range(field.nbodies):
+        field.pots[b] = NULL
+
+    for b in range(field.nbodies):
+        src = &(<CPotentialWrapper>(particle_potentials[b].c_instance)).cpotential
+        if src.null == 1:
+            continue
+
+        field.pots[b] = <CPotential *>malloc(sizeof(CPotential))
+        if field.pots[b] == NULL:
+            body_field_free(field)
+            raise MemoryError("Failed to allocate the body field.")
+
+        field.pots[b][0] = src[0]
+        field.pots[b].q0 = <double **>malloc(src.n_components * sizeof(double *))
+        field.pots[b].transform = <int *>malloc(src.n_components * sizeof(int))
+        if field.pots[b].q0 == NULL or field.pots[b].transform == NULL:
+            body_field_free(field)
+            raise MemoryError("Failed to allocate the body field.")
+
+        for c in range(src.n_components):
+            field.pots[b].q0[c] = &field.q[3*b]
+            field.pots[b].transform[c] = src.transform[c] | TRANSFORM_SHIFT
+        field.n_active += 1
+
+    return 0
+
+cdef void body_field_free(BodyField *field):
+    cdef int b
+
+    if field.pots != NULL:
+        for b in range(field.nbodies):
+            if field.pots[b] != NULL:
+                free(field.pots[b].q0)
+                free(field.pots[b].transform)
+                free(field.pots[b])
+        free(field.pots)
+        field.pots = NULL
+
+    free(field.q)
+    field.q = NULL
+
+cdef void body_field_positions(BodyField *field, double t) noexcept nogil:
+    """
+    Interpolate the positions of the bodies at time ``t`` into ``field.q``,
+    using cubic Hermite interpolation of the stored positions and velocities.
+    """
+    cdef:
+        int b, k
+        int j = field.j
+        double sgn = 1. if field.t[field.ntimes-1] >= field.t[0] else -1.
+        double h, s, h00, h10, h01, h11
+        double *w0
+        double *w1
+
+    while j > 0 and (t - field.t[j]) * sgn < 0:
+        j -= 1
+    while j < field.ntimes - 2 and (t - field.t[j+1]) * sgn > 0:
+        j += 1
+    field.j = j
+
+    h = field.t[j+1] - field.t[j]
+    s = (t - field.t[j]) / h
+    h00 = (1 + 2*s) * (1 - s) * (1 - s)
+    h10 = s * (1 - s) * (1 - s) * h
+    h01 = s * s * (3 - 2*s)
+    h11 = s * s * (s - 1) * h
+
+    for b in range(field.nbodies):
+        w0 = &field.w[(j * field.nbodies + b) * 6]
+        w1 = &field.w[((j+1) * field.nbodies + b) * 6]
+        for k in range(3):
+            field.q[3*b + k] = (h00 * w0[k] + h10 * w0[3+k] +
+                                h01 * w1[k] + h11 * w1[3+k])
+
+cdef void body_field_gradient(BodyField *field, double t, double *q,
+                              double *grad) noexcept nogil:
+    """
+    Add the gradient of the potentials of the bodies at position ``q`` to
+    ``grad``. The positions of the bodies must already be interpolated to
+    time ``t`` with ``body_field_positions()``.
+    """
+    cdef:
+        int b, k
+        double tmp_grad[3]
 
-    Notes
-    -----
-    In code, ``nbodies`` are the massive bodies included from the ``nbody``
-    instance passed in. ``nstreamparticles`` are the stream test particles.
-    ``nstream`` is the array containing the number of stream particles released
-    at each timestep.
+    for b in range(field.nbodies):
+        if field.pots[b] == NULL:
+            continue
 
-    TODO
-    ----
-    - `dt0` should be customizable in the Python interface.
+        c_gradient(field.pots[b], t, q, &tmp_grad[0])
+        for k in range(3):
+            grad[k] = grad[k] + tmp_grad[k]
 
+cdef void Fwrapper_body_field(unsigned full_ndim, double t, double *w,
+                              double *f, CPotential *p, CFrameType *fr,
+                              unsigned norbits, unsigned nbody,
+                              void *args) noexcept nogil:
+    """
+    The equations of motion of test particles in the external potential plus
+    the field of the massive bodies along their stored orbits. Here, the
+    args are the ``BodyField``.
+    """
+    cdef:
+        BodyField *field = <BodyField *>args
+        unsigned ndim = full_ndim // norbits
+        int i, k
+        double grad[3]
+
+    for i in range(norbits):
+        hamiltonian_gradient(p, fr, t, &w[i*ndim], &f[i*ndim])
+
+    if field.n_active == 0:
+        return
+
+    body_field_positions(field, t)
+    for i in range(norbits):
+        for k in range(3):
+            grad[k] = 0.
+        body_field_gradient(field, t, &w[i*ndim], &grad[0])
+        for k in range(3):
+            f[i*ndim + 3 + k] = f[i*ndim + 3 + k] - grad[k]
+
+# The gradient for c_composition_step() of a stream particle in the external
+#   potential plus the field of the massive bodies
+ctypedef struct StreamGradient:
+    CPotential *p
+    BodyField *field
+
+cdef void mockstream_gradient(void *args, double t, double *q, int n,
+                              double *grad) noexcept nogil:
+    cdef StreamGradient *a = <StreamGradient *>args
+
+    c_gradient(a.p, t, q, grad)
+    if a.field.n_active > 0:
+        body_field_positions(a.field, t)
+        body_field_gradient(a.field, t, q, grad)
+
+
+@deprecated(since="v1.8",
+            name="mockstream_dop853",
+            alternative="mockstream_dop853_single_pass",
+            warning_type=GalaDeprecationWarning)
+def mockstream_dop853(nbody, time, stream_w0, stream_t1, tfinal, nstream,
+                      atol=1E-10, rtol=1E-10, nmax=0, progress=0):
+    """
+    Deprecated! Use ``mockstream_dop853_single_pass()`` instead, which gives
+    the same streams. The stream particles must be released at the times
+    ``time``, so ``stream_t1`` must be equal to ``time``. The bodies and
+    particles are integrated to ``tfinal``, which can be after the last
+    release time.
+    """
+    time = np.ascontiguousarray(time, dtype='f8')
+    nstream = np.ascontiguousarray(nstream, dtype='i4')
+    stream_t1 = np.asarray(stream_t1, dtype='f8')
+    if stream_t1.shape != time.shape or not np.allclose(stream_t1, time):
+        raise ValueError(
+            "Stream particles can only be released at the times of the "
+            "progenitor orbit, i.e. stream_t1 must equal time"
+        )
+
+    if (tfinal - time[-1]) * (time[-1] - time[0]) < 0:
+        raise ValueError("tfinal must not be before the last release time")
+
+    # integrate from the last release time to the final time without
+    #   releasing any more particles. The orbits of the bodies are stored (and
+    #   interpolated) at about the spacing of the release times
+    if tfinal != time[-1]:
+        n_extra = 1
+        if len(time) > 1:
+            dt = np.median(np.diff(time))
+            n_extra = max(int(np.ceil((tfinal - time[-1]) / dt)), 1)
+        extra = np.linspace(time[-1], tfinal, n_extra + 1)[1:]
+        time = np.concatenate((time, extra))
+        nstream = np.concatenate((nstream, np.zeros(n_extra, dtype='i4')))
+
+    return mockstream_dop853_single_pass(nbody, time, stream_w0, nstream,
+                                         atol=atol, rtol=rtol, nmax=nmax,
+                                         progress=progress)
+
+
+cdef int mockstream_integrate_particle(Dop853State *state,
+                                      CPotential *cp, CFrameType *cf,
+                                      double *w, double *t, int i1, int ntimes,
+                                      BodyField *field, int n_sub,
+                                      double *cs, double *ds, double dt0,
+                                      double atol, double rtol,
+                                      int nmax) noexcept nogil:
+    """
+    Integrate one stream particle ``w``, released at time ``t[i1]``, to the
+    final time ``t[ntimes-1]`` in the external potential plus the field of
+    the massive bodies. With ``n_sub = 0``, the particle is integrated with
+    DOP853 and its own adaptive step size, and the return value of
+    ``dop853_solve()`` is returned. Otherwise, it is advanced through the
+    times ``t`` with the composition scheme ``cs``, ``ds``, and 1 is
+    returned.
+    """
+    cdef:
+        int j
+        double x[3]
+        double grad[3]
+        StreamGradient args
+
+    # particles released at the final time don't move
+    if t[i1] == t[ntimes-1]:
+        return 1
+
+    if n_sub == 0:
+        return dop853_step_state(state, cp, cf,
+                                 <FcnEqDiff> Fwrapper_body_field,
+                                 w, t[i1], t[ntimes-1], dt0, 6, 1, 0, field,
+                                 atol, rtol, nmax)
+
+    args.p = cp
+    args.field = field
+    for j in range(i1, ntimes-1):
+        c_composition_step(mockstream_gradient, &args, 1, 3,
+                           t[j], t[j+1] - t[j], n_sub, cs, ds, w,
+                           &x[0], &grad[0])
+    return 1
+
+
+cdef _check_symplectic(list nbodies, double[::1] cs, double[::1] ds):
+    for nbody in nbodies:
+        if not isinstance(nbody.H.frame, StaticFrame):
+            raise TypeError(
+                "Symplectic mock stream integration is currently only supported "
+                f"for StaticFrame, not {nbody.H.frame.__class__.__name__}"
+            )
+
+    if (cs is None or ds is None or cs.shape[0] == 0 or
+            cs.shape[0] != ds.shape[0]):
+        raise ValueError(
+            "The drift and kick coefficients must have the same, non-zero length"
+        )
+
+
+cdef _mockstream_single_pass(list nbodies, double[::1] t,
+                             double[:, ::1] stream_w0, int[:, ::1] nstream,
+                             double[::1] cs, double[::1] ds,
+                             double atol, double rtol, int nmax, double dt0,
+                             int progress, int n_threads):
+    """
+    The engine of ``mockstream_dop853_single_pass()`` (if ``cs`` and ``ds``
+    are ``None``), ``mockstream_symplectic()`` and ``mockstream_ensemble()``.
+    Each of the ``nbodies`` is a stream, with its own external potential and
+    massive bodies, and ``nstream[s]`` are the numbers of particles of stream
+    ``s`` released at each time. The particles of all streams are stacked,
+    stream by stream, in ``stream_w0``.
     """
 
+    if n_threads < 1:
+        raise ValueError(f"n_threads must be a positive integer, got {n_threads}")
+
     cdef:
-        int i, j, k, n  # indexing
+        int i, j, s, tid  # indexing
         unsigned ndim = 6  # TODO: hard-coded, but really must be 6D
 
         # For N-body support:
         void *args
         CPotential *c_particle_potentials[MAX_NBODY]
+        BodyField *fields = NULL
 
         # Time-stepping parameters:
-        int ntimes = time.shape[0]
-        double dt0 = 1.
+        int ntimes = t.shape[0]
+        int n_sub = 0 if cs is None else cs.shape[0]
+        double *cs_ptr = NULL if cs is None else &cs[0]
+        double *ds_ptr = NULL if ds is None else &ds[0]
+
+        # the external potential and frame of each stream
+        int n_streams = len(nbodies)
+        CPotential **cps = NULL
+        CFrameType **cfs = NULL
 
+        int nb  # number of massive bodies of a stream, includes the progenitor
+        double[:, ::1] nbody_w0
+        double[:, :, ::1] nbody_w
+        list all_nbody_w = []
+
+        int total_nstream = np.sum(nstream)
+        double[:, ::1] stream_w = np.array(stream_w0[:total_nstream])
+        int[::1] stream_i1  # release time index of each particle
+        int[::1] stream_s  # stream index of each particle
+        int[::1] status = np.ones(total_nstream, dtype=np.intc)
+
+        Dop853State **states = NULL
+
+        int prog_out = max(total_nstream // 100, 1)
+
+    if nstream.shape[0] != n_streams or nstream.shape[1] != ntimes:
+        raise ValueError(
+            "nstream must have shape (nstreams, ntimes) = "
+            f"({n_streams}, {ntimes}), got "
+            f"({nstream.shape[0]}, {nstream.shape[1]})"
+        )
+
+    stream_i1 = np.tile(np.arange(ntimes, dtype=np.intc),
+                        n_streams).repeat(np.asarray(nstream).ravel())
+    stream_s = np.repeat(np.arange(n_streams, dtype=np.intc),
+                         np.sum(nstream, axis=1))
+
+    # Integrate the orbits of the massive bodies of each stream once, and
+    # store them at all times as the field that the stream particles move in
+    for s in range(n_streams):
+        nbody = nbodies[s]
+        nb = nbody._c_w0.shape[0]
+        nbody_w0 = nbody._c_w0
+
+        # set the potential objects of the progenitor (index 0) and any other
+        # massive bodies included in the stream generation
+        for i in range(nb):
+            c_particle_potentials[i] = &(<CPotentialWrapper>(nbody.particle_potentials[i].c_instance)).cpotential
+        args = <void *>(&c_particle_potentials[0])
+
+        nbody_w = dop853_helper_save_all(
+            &(<CPotentialWrapper>(nbody.H.potential.c_instance)).cpotential,
+            &(<CFrameWrapper>(nbody.H.frame.c_instance)).cframe,
+            <FcnEqDiff> Fwrapper_direct_nbody,
+            nbody_w0, t,
+            ndim, nb, nb, args, ntimes,
+            atol, rtol, nmax, 0)
+        all_nbody_w.append(np.asarray(nbody_w))
+
+    # each thread has its own workspace and view of the body field of each
+    # stream, at index tid * n_streams + s
+    cps = <CPotential **>malloc(n_streams * sizeof(CPotential *))
+    cfs = <CFrameType **>malloc(n_streams * sizeof(CFrameType *))
+    fields = <BodyField *>malloc(n_threads * n_streams * sizeof(BodyField))
+    states = <Dop853State **>malloc(n_threads * sizeof(Dop853State *))
+    if cps == NULL or cfs == NULL or fields == NULL or states == NULL:
+        free(cps)
+        free(cfs)
+        free(fields)
+        free(states)
+        raise MemoryError("Failed to allocate the mock stream workspaces.")
+
+    for i in range(n_threads * n_streams):
+        fields[i].q = NULL
+        fields[i].pots = NULL
+    for tid in range(n_threads):
+        states[tid] = NULL
+
+    try:
         # whoa, so many dots
-        CPotential cp = (<CPotentialWrapper>(nbody.H.potential.c_instance)).cpotential
-        CFrameType cf = (<CFrameWrapper>(nbody.H.frame.c_instance)).cframe
+        for s in range(n_streams):
+            cps[s] = &(<CPotentialWrapper>(nbodies[s].H.potential.c_instance)).cpotential
+            cfs[s] = &(<CFrameWrapper>(nbodies[s].H.frame.c_instance)).cframe
+
+        for tid in range(n_threads):
+            for s in range(n_streams):
+                body_field_init(&fields[tid * n_streams + s],
+                                nbodies[s].particle_potentials, t,
+                                all_nbody_w[s])
+            if n_sub == 0:
+                states[tid] = dop853_alloc_state(ndim, 0)
+
+        if n_threads == 1:
+            for j in range(total_nstream):
+                s = stream_s[j]
+                status[j] = mockstream_integrate_particle(
+                    states[0], cps[s], cfs[s], &stream_w[j, 0], &t[0],
+                    stream_i1[j], ntimes, &fields[s], n_sub, cs_ptr, ds_ptr,
+                    dt0, atol, rtol, nmax)
+                dop853_check_result(status[j])
+
+                PyErr_CheckSignals()
+
+                if progress == 1 and j % prog_out == 0:
+                    sys.stdout.write('\r')
+                    sys.stdout.write(
+                        f"Integrating orbits: {100 * j / total_nstream: 3.0f}%")
+                    sys.stdout.flush()
+
+        else:
+            # the particles released first take the longest, so they are
+            #   handed out first
+            with nogil:
+                for j in prange(total_nstream, schedule='dynamic',
+                                num_threads=n_threads):
+                    status[j] = mockstream_integrate_particle(
+                        states[threadid()], cps[stream_s[j]], cfs[stream_s[j]],
+                        &stream_w[j, 0], &t[0], stream_i1[j], ntimes,
+                        &fields[threadid() * n_streams + stream_s[j]], n_sub,
+                        cs_ptr, ds_ptr, dt0, atol, rtol, nmax)
+
+            for j in range(total_nstream):
+                dop853_check_result(status[j])
+
+    finally:
+        for tid in range(n_threads):
+            dop853_free(states[tid])
+        for i in range(n_threads * n_streams):
+            body_field_free(&fields[i])
+        free(states)
+        free(fields)
+        free(cps)
+        free(cfs)
 
-        # for the test particles
-        CPotentialWrapper null_wrapper = NullWrapper(1., [],
-                                                     np.zeros(3), np.eye(3))
-        CPotential null_p = null_wrapper.cpotential
+    if progress == 1:
+        sys.stdout.write('\r')
+        sys.stdout.write(f"Integrating orbits: {100: 3.0f}%")
+        sys.stdout.flush()
 
-        int nbodies = nbody._c_w0.shape[0]  # includes the progenitor
-        double [:, ::1] nbody_w0 = nbody._c_w0
+    return [w[ntimes-1].copy() for w in all_nbody_w], np.asarray(stream_w)
 
-        int max_nstream = np.max(nstream)
-        int total_nstream = np.sum(nstream)
-        double[:, ::1] w_tmp = np.empty((nbodies + max_nstream, ndim))
-        double[:, ::1] w_final = np.empty((nbodies + total_nstream, ndim))
-        double[:, :, ::1] nbody_w = np.empty((ntimes, nbodies, ndim))
 
-        int prog_out = max(len(time) // 100, 1)
+cpdef mockstream_dop853_single_pass(nbody, double[::1] t,
+                                    double[:, ::1] stream_w0, int[::1] nstream,
+                                    double atol=1E-10, double rtol=1E-10,
+                                    int nmax=0, int progress=0, double dt0=1.,
+                                    int n_threads=1):
+    """
+    Parameters
+    ----------
+    nbody : `~gala.dynamics.nbody.DirectNBody`
+    t : numpy.ndarray (ntimes, )
+    stream_w0 : numpy.ndarray (nstreamparticles, 6)
+    nstream : numpy.ndarray (ntimes, )
+        The number of stream particles released at each timestep. Zero
+        values are allowed.
+    atol, rtol : float (optional)
+        The absolute and relative error tolerances of DOP853.
+    nmax : int (optional)
+        The maximum number of steps for each particle (0 for the default).
+    dt0 : float (optional)
+        The initial step size of each particle.
+    n_threads : int (optional)
+        The number of threads to distribute the stream particles over.
+
+    Notes
+    -----
+    The massive bodies are integrated only once, through all times ``t``,
+    and their stored orbits are then used as the external field of the
+    stream particles: the positions of the bodies at any time are
+    interpolated from the stored positions and velocities. Each stream
+    particle is then integrated on its own, from its release time to the
+    final time, with its own adaptive step size. The cost therefore grows
+    linearly with the number of release times, rather than quadratically as
+    when the bodies are re-integrated from every release time.
+
+    The stored orbits are shared read-only by all threads, and each thread
+    has its own workspace, so the results do not depend on ``n_threads``.
 
-    # set the potential objects of the progenitor (index 0) and any other
-    # massive bodies included in the stream generation
-    for i in range(nbodies):
-        c_particle_potentials[i] = &(<CPotentialWrapper>(nbody.particle_potentials[i].c_instance)).cpotential
+    """
+    nbody_ws, stream_w = _mockstream_single_pass(
+        [nbody], t, stream_w0, np.asarray(nstream)[None], None, None,
+        atol, rtol, nmax, dt0, progress, n_threads)
+    return nbody_ws[0], stream_w
 
-    # set null potentials for all of the stream particles
-    for i in range(nbodies, nbodies + max_nstream):
-        c_particle_potentials[i] = &null_p
-    args = <void *>(&c_particle_potentials[0])
 
-    # First have to integrate the nbody orbits so we have their positions at
-    # each timestep
-    nbody_w = dop853_helper_save_all(&cp, &cf,
-                                     <FcnEqDiff> Fwrapper_direct_nbody,
-                                     nbody_w0, time,
-                                     ndim, nbodies, nbodies, args, ntimes,
-                                     atol, rtol, nmax, 0)
-
-    n = 0
-    for i in range(ntimes):
-        # set initial conditions for progenitor and N-bodies
-        for j in range(nbodies):
-            for k in range(ndim):
-                w_tmp[j, k] = nbody_w[i, j, k]
-
-        for j in range(nstream[i]):
-            for k in range(ndim):
-                w_tmp[nbodies+j, k] = stream_w0[n+j, k]
-
-        dop853_step(&cp, &cf, <FcnEqDiff> Fwrapper_direct_nbody,
-                    &w_tmp[0, 0], stream_t1[i], tfinal, dt0,
-                    ndim, nbodies+nstream[i], nbodies, args,
-                    atol, rtol, nmax)
-
-        for j in range(nstream[i]):
-            for k in range(ndim):
-                w_final[nbodies+n+j, k] = w_tmp[nbodies+j, k]
-
-        PyErr_CheckSignals()
-
-        n += nstream[i]
-
-        if progress == 1:
-            if i % prog_out == 0:
-                sys.stdout.write('\r')
-                sys.stdout.write(
-                    f"Integrating orbits: {100 * i / ntimes: 3.0f}%")
-                sys.stdout.flush()
+cpdef mockstream_symplectic(nbody, double[::1] t,
+                            double[:, ::1] stream_w0, int[::1] nstream,
+                            double[::1] cs, double[::1] ds,
+                            int progress=0, int n_threads=1):
+    """
+    Parameters
+    ----------
+    nbody : `~gala.dynamics.nbody.DirectNBody`
+    t : numpy.ndarray (ntimes, )
+    stream_w0 : numpy.ndarray (nstreamparticles, 6)
+    nstream : numpy.ndarray (ntimes, )
+        The number of stream particles released at each timestep. Zero
+        values are allowed.
+    cs, ds : numpy.ndarray (nsubsteps, )
+        The drift and kick coefficients of the symplectic integrator, in the
+        convention of `~gala.integrate.Ruth4Integrator`.
+    n_threads : int (optional)
+        The number of threads to distribute the stream particles over.
 
-    if progress == 1:
-        sys.stdout.write('\r')
-        sys.stdout.write(f"Integrating orbits: {100: 3.0f}%")
-        sys.stdout.flush()
+    Notes
+    -----
+    The same as ``mockstream_dop853_single_pass()``, but the stream
+    particles are advanced with a fixed-step symplectic integrator, with the
+    time steps ``t`` of the progenitor orbit. The massive bodies are still
+    integrated with DOP853.
 
+    """
 
-    for j in range(nbodies):
-        for k in range(ndim):
-            w_final[j, k] = w_tmp[j, k]
+    _check_symplectic([nbody], cs, ds)
 
-    return_nbody_w = np.array(w_final)[:nbodies]
-    return_stream_w = np.array(w_final)[nbodies:]
+    nbody_ws, stream_w = _mockstream_single_pass(
+        [nbody], t, stream_w0, np.asarray(nstream)[None], cs, ds,
+        1E-10, 1E-10, 0, 1., progress, n_threads)
+    return nbody_ws[0], stream_w
 
-    return return_nbody_w, return_stream_w
+
+cpdef mockstream_ensemble(list nbodies, double[::1] t,
+                          double[:, ::1] stream_w0, int[:, ::1] nstream,
+                          double[::1] cs=None, double[::1] ds=None,
+                          double atol=1E-10, double rtol=1E-10, int nmax=0,
+                          int progress=0, double dt0=1., int n_threads=1):
+    """
+    Parameters
+    ----------
+    nbodies : list of `~gala.dynamics.nbody.DirectNBody`
+        The progenitor (and any other massive bodies) of each stream, in the
+        external potential and frame of that stream.
+    t : numpy.ndarray (ntimes, )
+        The times, shared by all streams.
+    stream_w0 : numpy.ndarray (nstreamparticles, 6)
+        The initial conditions of the particles of all streams, stacked
+        stream by stream.
+    nstream : numpy.ndarray (nstreams, ntimes)
+        The number of particles of each stream released at each timestep.
+        Zero values are allowed.
+    cs, ds : numpy.ndarray (nsubsteps, ) (optional)
+        The drift and kick coefficients of a symplectic integrator, in the
+        convention of `~gala.integrate.Ruth4Integrator`. By default, the
+        stream particles are integrated with DOP853.
+    atol, rtol : float (optional)
+        The absolute and relative error tolerances of DOP853.
+    nmax : int (optional)
+        The maximum number of steps for each particle (0 for the default).
+    dt0 : float (optional)
+        The initial step size of each particle.
+    n_threads : int (optional)
+        The number of threads to distribute the stream particles over.
+
+    Returns
+    -------
+    nbody_w : list of numpy.ndarray
+        The final phase-space positions of the massive bodies of each stream.
+    stream_w : numpy.ndarray (nstreamparticles, 6)
+        The final phase-space positions of the stream particles.
+
+    Notes
+    -----
+    Generates many streams, e.g. with different progenitors or external
+    potentials, with ``mockstream_dop853_single_pass()`` (or
+    ``mockstream_symplectic()`` with ``cs`` and ``ds``) in one call. The
+    particles of all streams are distributed over the threads together, so
+    the threads are kept busy even when each stream only has a few
+    particles. Each stream is the same as if it were generated on its own.
+
+    """
+    if cs is not None or ds is not None:
+        _check_symplectic(nbodies, cs, ds)
+
+    return _mockstream_single_pass(nbodies, t, stream_w0, nstream, cs, ds,
+                                   atol, rtol, nmax, dt0, progress, n_threads)
 
 
 cpdef mockstream_dop853_animate(nbody, double[::1] t,
@@ -192,6 +662,13 @@ cpdef mockstream_dop853_animate(nbody, double[::1] t,
     nstream : numpy.ndarray (ntimes, )
         The number of stream particles to be integrated from this timestep.
         There should be no zero values.
+    atol, rtol : float (optional)
+        The absolute and relative error tolerances of DOP853.
+    nmax : int (optional)
+        The maximum number of DOP853 steps within each timestep of ``t`` (0
+        for the default).
+    dt0 : float (optional)
+        The initial DOP853 step size within each timestep of ``t``.
 
     Notes
     -----
@@ -200,10 +677,6 @@ cpdef mockstream_dop853_animate(nbody, double[::1] t,
     ``nstream`` is the array containing the number of stream particles released
     at each timestep.
 
-    TODO
-    ----
-    - `dt0` should be customizable in the Python interface.
-
     """
 
     cdef:
@@ -233,6 +706,8 @@ cpdef mockstream_dop853_animate(nbody, double[::1] t,
 
         int prog_out = max(len(t) // 100, 1)
 
+        Dop853State *state
+
     if (ntimes-1) % output_every != 0:
         noutput_times += 1 # +1 for final conditions
 
@@ -302,34 +777,41 @@ cpdef mockstream_dop853_animate(nbody, double[::1] t,
     nbody_g['vel'][:, 0, :n] = np.array(w[:nbodies, :]).T[3:]
     output_times[0] = t[0]
 
+    # the workspace is sized for all particles, and reused as the number of
+    #   released particles grows
+    state = dop853_alloc_state(ndim * (nbodies + total_nstream), 0)
+
     j = 1 # output time index
-    for i in range(1, ntimes):
-        # print(i, j, n,
-        #       len(t), len(nstream), len(output_times))
-
-        dop853_step(&cp, &cf, <FcnEqDiff> Fwrapper_direct_nbody,
-                    &w[0, 0], t[i-1], t[i], dt0,
-                    ndim, nbodies+n, nbodies, args,
-                    atol, rtol, nmax)
-
-        PyErr_CheckSignals()
-
-        n += nstream[i]
-
-        if (i % output_every) == 0 or i == ntimes-1:
-            output_times[j] = t[i]
-            stream_g['pos'][:, j, :n] = np.array(w[nbodies:nbodies+n, :]).T[:3]
-            stream_g['vel'][:, j, :n] = np.array(w[nbodies:nbodies+n, :]).T[3:]
-            nbody_g['pos'][:, j, :n] = np.array(w[:nbodies, :]).T[:3]
-            nbody_g['vel'][:, j, :n] = np.array(w[:nbodies, :]).T[3:]
-            j += 1
-
-        if progress == 1:
-            if i % prog_out == 0:
-                sys.stdout.write('\r')
-                sys.stdout.write(
-                    f"Integrating orbits: {100 * i / ntimes: 3.0f}%")
-                sys.stdout.flush()
+    try:
+        for i in range(1, ntimes):
+            dop853_check_result(
+                dop853_step_state(state, &cp, &cf,
+                                  <FcnEqDiff> Fwrapper_direct_nbody,
+                                  &w[0, 0], t[i-1], t[i], dt0,
+                                  ndim, nbodies+n, nbodies, args,
+                                  atol, rtol, nmax))
+
+            PyErr_CheckSignals()
+
+            n += nstream[i]
+
+            if (i % output_every) == 0 or i == ntimes-1:
+                output_times[j] = t[i]
+                stream_g['pos'][:, j, :n] = np.array(w[nbodies:nbodies+n, :]).T[:3]
+                stream_g['vel'][:, j, :n] = np.array(w[nbodies:nbodies+n, :]).T[3:]
+                nbody_g['pos'][:, j, :n] = np.array(w[:nbodies, :]).T[:3]
+                nbody_g['vel'][:, j, :n] = np.array(w[:nbodies, :]).T[3:]
+                j += 1
+
+            if progress == 1:
+                if i % prog_out == 0:
+                    sys.stdout.write('\r')
+                    sys.stdout.write(
+                        f"Integrating orbits: {100 * i / ntimes: 3.0f}%")
+                    sys.stdout.flush()
+
+    finally:
+        dop853_free(state)
 
     if progress == 1:
         sys.stdout.write('\r')
@@ -1,4 +1,5 @@
 # Third-party
+import astropy.units as u
 import numpy as np
 
 # This package
@@ -6,7 +7,12 @@ from .. import combine, PhaseSpacePosition
 from ..nbody import DirectNBody
 from ...potential import Hamiltonian, PotentialBase
 from ...integrate.timespec import parse_time_specification
-from ._mockstream import mockstream_dop853, mockstream_dop853_animate
+from ._mockstream import (
+    mockstream_dop853_single_pass,
+    mockstream_symplectic,
+    mockstream_ensemble,
+    mockstream_dop853_animate,
+)
 from .core import MockStream
 
 __all__ = ["MockStreamGenerator"]
@@ -71,11 +77,14 @@ class MockStreamGenerator:
 
         self.progenitor_potential = progenitor_potential
 
-    def _get_nbody(self, prog_w0, nbody):
+    def _get_nbody(self, prog_w0, nbody, hamiltonian=None):
         """
         Internal function that adds the progenitor to the list of nbody objects to
-        integrate along with the test particles in the stream.
+        integrate along with the test particles in the stream. By default, the
+        bodies move in the hamiltonian of the generator.
         """
+        if hamiltonian is None:
+            hamiltonian = self.hamiltonian
 
         kwargs = dict()
         if nbody is not None:
@@ -105,12 +114,108 @@ class MockStreamGenerator:
         else:
             kwargs["w0"] = prog_w0
             kwargs["particle_potentials"] = [self.progenitor_potential]
-            kwargs["external_potential"] = self.hamiltonian.potential
-            kwargs["frame"] = self.hamiltonian.frame
-            kwargs["units"] = self.hamiltonian.units
+            kwargs["external_potential"] = hamiltonian.potential
+            kwargs["frame"] = hamiltonian.frame
+            kwargs["units"] = hamiltonian.units
 
         return DirectNBody(**kwargs)
 
+    def _symplectic_coeffs(self, Integrator):
+        """
+        Internal function that validates the integrator class for the stream
+        particles. Returns the drift and kick coefficients of the symplectic
+        integrators, or ``None`` for the `~gala.integrate.DOPRI853Integrator`.
+        """
+        from gala.integrate import (
+            DOPRI853Integrator,
+            LeapfrogIntegrator,
+            Ruth4Integrator,
+            Yoshida6Integrator,
+            Yoshida8Integrator,
+        )
+        from gala.integrate.pyintegrators.yoshida import _yoshida_coefficients
+
+        if Integrator is None or Integrator == DOPRI853Integrator:
+            return None
+
+        # The drift and kick coefficients of the symplectic integrators; the
+        # leapfrog is used in drift-kick-drift form, with one force evaluation
+        # per step
+        symplectic_coeffs = {
+            LeapfrogIntegrator: ([0.5, 0.5], [0.0, 1.0]),
+            Ruth4Integrator: (Ruth4Integrator._cs, Ruth4Integrator._ds),
+            Yoshida6Integrator: _yoshida_coefficients(6),
+            Yoshida8Integrator: _yoshida_coefficients(8),
+        }
+        if Integrator not in symplectic_coeffs:
+            raise NotImplementedError(
+                "Mock stream generation is currently not supported with the "
+                f"{Integrator} integrator class"
+            )
+
+        cs, ds = symplectic_coeffs[Integrator]
+        return np.array(cs, dtype="f8"), np.array(ds, dtype="f8")
+
+    def _sample_stream(
+        self, prog_nbody, prog_mass, hamiltonian, release_every, n_particles, t
+    ):
+        """
+        Internal function that integrates the orbits of the progenitor and any
+        other massive bodies, and samples the stream particles from the df.
+        Returns the bodies at the first time, the times of the progenitor
+        orbit, the stream particle initial conditions (also as a C-contiguous
+        array), and the number of stream particles released at each time.
+        """
+        units = hamiltonian.units
+        nbody_orbits = prog_nbody.integrate_orbit(t=t)
+
+        # If the time stepping passed in is negative, assume this means that all
+        # of the initial conditions are at *end time*, and we first need to
+        # integrate them backwards before treating them as initial conditions
+        if t[1] < t[0]:
+            nbody_orbits = nbody_orbits[::-1]
+
+            # TODO: this could be cleaned up...
+            nbody0 = DirectNBody(
+                nbody_orbits[0],
+                prog_nbody.particle_potentials,
+                external_potential=hamiltonian.potential,
+                frame=hamiltonian.frame,
+                units=units,
+            )
+
+        else:
+            nbody0 = prog_nbody
+
+        prog_orbit = nbody_orbits[:, 0]  # Note: Progenitor must be idx 0!
+        orbit_t = prog_orbit.t.decompose(units).value
+
+        # Generate initial conditions from the DF
+        stream_w0 = self.df.sample(
+            prog_orbit,
+            prog_mass,
+            hamiltonian=hamiltonian,
+            release_every=release_every,
+            n_particles=n_particles,
+        )
+        w0 = np.vstack(
+            (
+                stream_w0.xyz.decompose(units).value,
+                stream_w0.v_xyz.decompose(units).value,
+            )
+        ).T
+        w0 = np.ascontiguousarray(w0)
+
+        unq_t1s, nstream = np.unique(
+            stream_w0.release_time.decompose(units).value, return_counts=True
+        )
+
+        all_nstream = np.zeros(prog_orbit.ntimes, dtype="i4")
+        for t1, n in zip(unq_t1s, nstream):
+            all_nstream[np.isclose(orbit_t, t1)] = n
+
+        return nbody0, orbit_t, stream_w0, w0, all_nstream
+
     def run(
         self,
         prog_w0,
@@ -123,6 +228,9 @@ class MockStreamGenerator:
         check_filesize=True,
         overwrite=False,
         progress=False,
+        n_threads=1,
+        Integrator=None,
+        Integrator_kwargs=dict(),
         **time_spec
     ):
         """
@@ -178,6 +286,29 @@ class MockStreamGenerator:
             Overwrite the output file if it exists.
         progress : bool (optional)
             Print a very basic progress bar while computing the stream.
+        n_threads : int (optional)
+            The number of threads to distribute the stream particles over. The
+            massive bodies are integrated once, and their orbits are shared by
+            all threads, so the stream does not depend on the number of threads.
+            Not supported when storing snapshots with ``output_every``.
+        Integrator : `~gala.integrate.Integrator` (optional)
+            The integrator class used to integrate the stream particles. The
+            default, `~gala.integrate.DOPRI853Integrator`, integrates each
+            particle with its own adaptive step size. The fixed-step symplectic
+            integrators (`~gala.integrate.LeapfrogIntegrator`,
+            `~gala.integrate.Ruth4Integrator`,
+            `~gala.integrate.Yoshida6Integrator`, and
+            `~gala.integrate.Yoshida8Integrator`) instead step the particles
+            with the time steps of the progenitor orbit, which is much faster
+            in smooth, static potentials. They only support static reference
+            frames and can't be used when storing snapshots with
+            ``output_every``. The massive bodies are always integrated with
+            DOP853.
+        Integrator_kwargs : dict (optional)
+            Any extra keyword arguments to pass to the DOP853 integration of the
+            stream particles: the tolerances ``atol`` and ``rtol`` (default
+            ``1E-10``), the initial step size ``dt0``, and the maximum number of
+            steps ``nmax``. The symplectic integrators take no extra arguments.
         **time_spec
             Specification of how long to integrate. Most commonly, this is a timestep
             ``dt`` and number of steps ``n_steps``, or a timestep ``dt``, initial time
@@ -191,67 +322,52 @@ class MockStreamGenerator:
         nbody_w : `~gala.dynamics.PhaseSpacePosition`
 
         """
-        units = self.hamiltonian.units
-        t = parse_time_specification(units, **time_spec)
-
-        prog_nbody = self._get_nbody(prog_w0, nbody)
-        nbody_orbits = prog_nbody.integrate_orbit(t=t)
-
-        # If the time stepping passed in is negative, assume this means that all
-        # of the initial conditions are at *end time*, and we first need to
-        # integrate them backwards before treating them as initial conditions
-        if t[1] < t[0]:
-            nbody_orbits = nbody_orbits[::-1]
-
-            # TODO: this could be cleaned up...
-            nbody0 = DirectNBody(
-                nbody_orbits[0],
-                prog_nbody.particle_potentials,
-                external_potential=self.hamiltonian.potential,
-                frame=self.hamiltonian.frame,
-                units=units,
+        if output_every is not None and n_threads != 1:
+            raise ValueError(
+                "Multi-threaded stream generation is not supported when storing "
+                "snapshots with output_every"
             )
 
-        else:
-            nbody0 = prog_nbody
-
-        prog_orbit = nbody_orbits[:, 0]  # Note: Progenitor must be idx 0!
-        orbit_t = prog_orbit.t.decompose(units).value
+        coeffs = self._symplectic_coeffs(Integrator)
 
-        # Generate initial conditions from the DF
-        stream_w0 = self.df.sample(
-            prog_orbit,
-            prog_mass,
-            hamiltonian=self.hamiltonian,
-            release_every=release_every,
-            n_particles=n_particles,
-        )
-        w0 = np.vstack(
-            (
-                stream_w0.xyz.decompose(units).value,
-                stream_w0.v_xyz.decompose(units).value,
+        if output_every is not None and coeffs is not None:
+            raise ValueError(
+                "Storing snapshots with output_every is only supported with the "
+                "DOPRI853Integrator"
             )
-        ).T
-        w0 = np.ascontiguousarray(w0)
 
-        unq_t1s, nstream = np.unique(
-            stream_w0.release_time.decompose(units).value, return_counts=True
-        )
+        units = self.hamiltonian.units
+        t = parse_time_specification(units, **time_spec)
 
-        all_nstream = np.zeros(prog_orbit.ntimes, dtype=int)
-        for t1, n in zip(unq_t1s, nstream):
-            all_nstream[np.isclose(orbit_t, t1)] = n
+        prog_nbody = self._get_nbody(prog_w0, nbody)
+        nbody0, orbit_t, stream_w0, w0, all_nstream = self._sample_stream(
+            prog_nbody, prog_mass, self.hamiltonian, release_every, n_particles, t
+        )
 
         if output_every is None:
-            raw_nbody, raw_stream = mockstream_dop853(
-                nbody0,
-                orbit_t[all_nstream != 0],
-                w0,
-                unq_t1s,
-                orbit_t[-1],
-                all_nstream[all_nstream != 0].astype("i4"),
-                progress=int(progress),
-            )
+            if coeffs is None:
+                raw_nbody, raw_stream = mockstream_dop853_single_pass(
+                    nbody0,
+                    orbit_t,
+                    w0,
+                    all_nstream,
+                    progress=int(progress),
+                    n_threads=n_threads,
+                    **Integrator_kwargs,
+                )
+            else:
+                cs, ds = coeffs
+                raw_nbody, raw_stream = mockstream_symplectic(
+                    nbody0,
+                    orbit_t,
+                    w0,
+                    all_nstream,
+                    cs,
+                    ds,
+                    progress=int(progress),
+                    n_threads=n_threads,
+                    **Integrator_kwargs,
+                )
         else:  # store snapshots
             if output_filename is None:
                 raise ValueError(
@@ -263,12 +379,13 @@ class MockStreamGenerator:
                 nbody0,
                 orbit_t,
                 w0,
-                all_nstream.astype("i4"),
+                all_nstream,
                 output_every=output_every,
                 output_filename=output_filename,
                 check_filesize=check_filesize,
                 overwrite=overwrite,
                 progress=int(progress),
+                **Integrator_kwargs,
             )
 
         x_unit = units["length"]
@@ -287,3 +404,163 @@ class MockStreamGenerator:
         )
 
         return stream_w, nbody_w
+
+    def run_ensemble(
+        self,
+        prog_w0,
+        prog_mass,
+        potential_params=None,
+        release_every=1,
+        n_particles=1,
+        progress=False,
+        n_threads=1,
+        Integrator=None,
+        Integrator_kwargs=dict(),
+        **time_spec
+    ):
+        """
+        Generate an ensemble of mock streams, for different progenitor initial
+        conditions, masses, and parameters of the external potential.
+
+        Each stream is the same as the stream generated by `run` with the
+        corresponding progenitor properties and potential, but the particles of
+        all streams are integrated together in a single call, and distributed
+        over ``n_threads`` threads. This is much faster than calling `run` for
+        each stream when generating many small streams, e.g. when fitting
+        stream models. All streams share the time-stepping specification
+        ``**time_spec``, the stream distribution function, and the progenitor
+        potential (if any).
+
+        Parameters
+        ----------
+        prog_w0 : `~gala.dynamics.PhaseSpacePosition`
+            The initial or final phase-space positions of the progenitors of the
+            ``nstreams`` streams, with shape ``(nstreams,)`` (see `run`).
+        prog_mass : `~astropy.units.Quantity` [mass]
+            The mass of the progenitor systems, passed in to the stream
+            distribution function (df) ``.sample()`` method. This is either a
+            scalar, used for all streams, or has ``nstreams`` as its first axis.
+        potential_params : iterable of dict (optional)
+            The parameters of the external potential of each stream. Each item
+            is passed as keyword arguments to the ``replicate()`` method of the
+            potential of the ``hamiltonian``, so it only needs to contain the
+            parameters that differ from that potential. By default, all streams
+            are generated in the potential of the ``hamiltonian``.
+        release_every : int (optional)
+            Controls how often to release stream particles from each tail.
+            Default: 1, meaning release particles at each timestep.
+        n_particles : int, array_like (optional)
+            The number of particles to release in each tail at each release
+            timestep, shared by all streams (see `run`).
+        progress : bool (optional)
+            Print a very basic progress bar while computing the streams.
+        n_threads : int (optional)
+            The number of threads to distribute the stream particles over. The
+            streams do not depend on the number of threads.
+        Integrator : `~gala.integrate.Integrator` (optional)
+            The integrator class used to integrate the stream particles (see
+            `run`).
+        Integrator_kwargs : dict (optional)
+            Any extra keyword arguments to pass to the DOP853 integration of the
+            stream particles (see `run`).
+        **time_spec
+            Specification of how long to integrate (see `run`).
+
+        Returns
+        -------
+        stream_w : `~gala.dynamics.mockstream.MockStream`
+            The particles of all streams, stacked stream by stream.
+        nbody_w : `~gala.dynamics.PhaseSpacePosition`
+            The final phase-space positions of the progenitors, with shape
+            ``(nstreams,)``.
+        stream_idx : `numpy.ndarray`
+            The index of the stream of each particle in ``stream_w``.
+
+        """
+        if len(prog_w0.shape) != 1:
+            raise ValueError(
+                "prog_w0 must contain one progenitor per stream, with shape "
+                f"(nstreams,), not {prog_w0.shape}"
+            )
+        n_streams = prog_w0.shape[0]
+
+        prog_mass = u.Quantity(prog_mass)
+        if prog_mass.ndim == 0:
+            prog_mass = np.repeat(prog_mass[None], n_streams)
+        elif prog_mass.shape[0] != n_streams:
+            raise ValueError(
+                f"prog_mass must be a scalar or have length {n_streams}, the "
+                f"number of streams, not {prog_mass.shape[0]}"
+            )
+
+        if potential_params is None:
+            hamiltonians = [self.hamiltonian] * n_streams
+        else:
+            hamiltonians = [
+                Hamiltonian(
+                    self.hamiltonian.potential.replicate(**params),
+                    frame=self.hamiltonian.frame,
+                )
+                for params in potential_params
+            ]
+            if len(hamiltonians) != n_streams:
+                raise ValueError(
+                    f"potential_params must have length {n_streams}, the number of "
+                    f"streams, not {len(hamiltonians)}"
+                )
+
+        coeffs = self._symplectic_coeffs(Integrator)
+        cs, ds = (None, None) if coeffs is None else coeffs
+
+        units = self.hamiltonian.units
+        t = parse_time_specification(units, **time_spec)
+
+        nbody0s = []
+        stream_w0s = []
+        w0s = []
+        all_nstreams = []
+        for i in range(n_streams):
+            prog_nbody = self._get_nbody(prog_w0[i], None, hamiltonians[i])
+            nbody0, orbit_t, stream_w0, w0, all_nstream = self._sample_stream(
+                prog_nbody, prog_mass[i], hamiltonians[i], release_every,
+                n_particles, t
+            )
+            nbody0s.append(nbody0)
+            stream_w0s.append(stream_w0)
+            w0s.append(w0)
+            all_nstreams.append(all_nstream)
+
+        raw_nbody, raw_stream = mockstream_ensemble(
+            nbody0s,
+            orbit_t,
+            np.concatenate(w0s),
+            np.array(all_nstreams, dtype="i4"),
+            cs,
+            ds,
+            progress=int(progress),
+            n_threads=n_threads,
+            **Integrator_kwargs,
+        )
+        raw_nbody = np.array([w[0] for w in raw_nbody])  # the progenitors
+
+        stream_idx = np.repeat(np.arange(n_streams), [len(w0) for w0 in w0s])
+
+        x_unit = units["length"]
+        v_unit = units["length"] / units["time"]
+        stream_w = MockStream(
+            pos=raw_stream[:, :3].T * x_unit,
+            vel=raw_stream[:, 3:].T * v_unit,
+            release_time=np.concatenate(
+                [w0.release_time.to_value(units["time"]) for w0 in stream_w0s]
+            )
+            * units["time"],
+            lead_trail=np.concatenate([w0.lead_trail for w0 in stream_w0s]),
+            frame=self.hamiltonian.frame,
+        )
+        nbody_w = PhaseSpacePosition(
+            pos=raw_nbody[:, :3].T * x_unit,
+            vel=raw_nbody[:, 3:].T * v_unit,
+            frame=self.hamiltonian.frame,
+        )
+
+        return stream_w, nbody_w, stream_idx
@@ -50,6 +50,96 @@ def test_init_sample(DF, DF_kwargs, pot):
     assert len(o1.x) == 2 * n_times
 
 
+@pytest.mark.parametrize('DF, DF_kwargs, n_per_particle',
+                         list(zip(_DF_CLASSES, _DF_KWARGS, [0, 4, 3])))
+@pytest.mark.parametrize('make_random_state',
+                         [np.random.RandomState, np.random.default_rng])
+def test_sample_random_state(DF, DF_kwargs, n_per_particle,
+                             make_random_state):
+    H = Hamiltonian(_TEST_POTENTIALS[0])
+    orbit = H.integrate_orbit([10., 0, 0, 0, 0.2, 0], dt=1., n_steps=100)
+    prog_mass = np.full(orbit.ntimes, 1e4) * u.Msun
+    prog_mass[10:20] = 0 * u.Msun
+    n_particles = np.random.RandomState(1).randint(0, 4, size=orbit.ntimes)
+
+    random_state = make_random_state(42)
+    df = DF(random_state=random_state, **DF_kwargs)
+    o1 = df.sample(orbit, prog_mass, n_particles=n_particles)
+    o2 = DF(random_state=make_random_state(42), **DF_kwargs).sample(
+        orbit, prog_mass, n_particles=n_particles)
+    assert np.all(o1.xyz == o2.xyz)
+    assert np.all(o1.v_xyz == o2.v_xyz)
+
+    # The random variates are drawn in one call: particles are only drawn
+    # where the progenitor mass is non-zero
+    n_draws = 2 * n_particles[prog_mass != 0].sum() * n_per_particle
+    expected_state = make_random_state(42)
+    expected_state.standard_normal(size=n_draws)
+    assert random_state.standard_normal() == expected_state.standard_normal()
+
+
+@pytest.mark.parametrize('DF, DF_kwargs', list(zip(_DF_CLASSES[1:],
+                                                   _DF_KWARGS[1:])))
+@pytest.mark.parametrize('make_random_state',
+                         [np.random.RandomState, np.random.default_rng])
+def test_sample_per_particle_draws(DF, DF_kwargs, make_random_state):
+    # The particles are the same as when the random variates were drawn with
+    # one normal() call per particle and coordinate, as the samplers used to
+    H = Hamiltonian(_TEST_POTENTIALS[1])
+    orbit = H.integrate_orbit([10., 0, 0, 0, 0.2, 0], dt=1., n_steps=50)
+    prog_mass = np.full(orbit.ntimes, 1e4) * u.Msun
+    prog_mass[10:20] = 0 * u.Msun
+    n_particles = np.random.RandomState(1).randint(0, 4, size=orbit.ntimes)
+
+    df_random_state = make_random_state(42)
+    o = DF(random_state=df_random_state, **DF_kwargs).sample(
+        orbit, prog_mass, n_particles=n_particles)
+
+    # the Jacobi radius and velocity, and the satellite coordinates, of each
+    # release from the streakline model
+    released = prog_mass != 0
+    streak = StreaklineStreamDF(lead=False).sample(
+        orbit, prog_mass, n_particles=released.astype(int))
+    prog_x = orbit.xyz.decompose(galactic).value.T[released]
+    prog_v = orbit.v_xyz.decompose(galactic).value.T[released]
+    dx = streak.xyz.decompose(galactic).value.T[:released.sum()] - prog_x
+    dv = streak.v_xyz.decompose(galactic).value.T[:released.sum()] - prog_v
+
+    random_state = make_random_state(42)
+    x = []
+    v = []
+    for i in range(released.sum()):
+        rj = np.linalg.norm(dx[i])
+        vj = np.linalg.norm(dv[i])
+        R = np.stack([dx[i] / rj, dv[i] / vj,
+                      np.cross(dx[i] / rj, dv[i] / vj)])
+
+        n = n_particles[released][i]
+        for sign in [1., -1.]:  # trailing, then leading tail
+            for k in range(n):
+                if DF is FardalStreamDF:
+                    kx = random_state.normal(2., 0.5)
+                    sat_x = [kx * sign * rj, 0.,
+                             random_state.normal(0., 0.5) * sign * rj]
+                    sat_v = [0., kx * random_state.normal(0.3, 0.5) * sign * vj,
+                             random_state.normal(0., 0.5) * sign * vj]
+                else:
+                    v_disp = DF_kwargs['v_disp'].decompose(galactic).value
+                    sat_x = [sign * rj, 0., 0.]
+                    sat_v = [random_state.normal(0., v_disp) for _ in range(3)]
+                x.append(R.T @ sat_x + prog_x[i])
+                v.append(R.T @ sat_v + prog_v[i])
+
+    x = np.array(x)
+    v = np.array(v)
+    assert np.allclose(o.xyz.decompose(galactic).value.T[:len(x)], x,
+                       rtol=1e-12, atol=0)
+    assert np.allclose(o.v_xyz.decompose(galactic).value.T[:len(v)], v,
+                       rtol=1e-12, atol=0)
+    # the same number of variates were drawn
+    assert df_random_state.standard_normal() == random_state.standard_normal()
+
+
 @pytest.mark.parametrize('DF, DF_kwargs', zip(_DF_CLASSES, _DF_KWARGS))
 def test_expected_failure(DF, DF_kwargs):
 
@@ -9,12 +9,17 @@ import pytest
 # Custom
 from ....potential import (Hamiltonian, NFWPotential, HernquistPotential,
                            ConstantRotatingFrame)
-from ....dynamics import PhaseSpacePosition, Orbit
+from ....dynamics import PhaseSpacePosition, Orbit, combine
 from ....units import galactic
+from ....integrate import (DOPRI853Integrator, LeapfrogIntegrator,
+                           RK5Integrator, Ruth4Integrator, Yoshida6Integrator,
+                           Yoshida8Integrator)
 from ...nbody import DirectNBody
 from ..mockstream_generator import MockStreamGenerator
 from ..df import FardalStreamDF
+from .._mockstream import mockstream_dop853, mockstream_dop853_single_pass
 from gala.tests.optional_deps import HAS_H5PY
+from gala.util import GalaDeprecationWarning
 
 
 def test_init():
@@ -94,6 +99,241 @@ def test_run():
     # TODO: add nbody test
 
 
+@pytest.fixture
+def nfw_potential():
+    return NFWPotential.from_circular_velocity(v_c=0.2, r_s=20.,
+                                               units=galactic)
+
+
+@pytest.fixture
+def prog_w0():
+    # the progenitor orbit in nfw_potential
+    return PhaseSpacePosition(pos=[15., 0., 0]*u.kpc,
+                              vel=[0, 0, 0.13]*u.kpc/u.Myr)
+
+
+def test_single_pass(nfw_potential, prog_w0):
+    # The single-pass engine integrates the massive bodies once: it should
+    # agree with integrating the stream particles together with the bodies
+    # from their release time
+    potential = nfw_potential
+    H = Hamiltonian(potential)
+    mass = 2.5e4 * u.Msun
+    w0 = combine((
+        prog_w0,
+        PhaseSpacePosition(pos=[14., 1., 0]*u.kpc,
+                           vel=[0, 0, 0.12]*u.kpc/u.Myr)))
+    body_potentials = [HernquistPotential(mass, 4*u.pc, units=galactic),
+                       HernquistPotential(1e8*u.Msun, 0.5*u.kpc,
+                                          units=galactic)]
+    nbody = DirectNBody(w0, body_potentials, external_potential=potential)
+
+    t = np.linspace(0, 200., 201)
+    orbits = nbody.integrate_orbit(t=t)
+
+    df = FardalStreamDF(random_state=np.random.RandomState(42))
+    stream_w0 = df.sample(orbits[:, 0], mass, hamiltonian=H)
+    stream_w0 = np.ascontiguousarray(np.vstack(
+        (stream_w0.xyz.decompose(galactic).value,
+         stream_w0.v_xyz.decompose(galactic).value)).T)
+    nstream = np.full(len(t), 2, dtype='i4')
+
+    nbody1, stream1 = mockstream_dop853_single_pass(nbody, t, stream_w0,
+                                                    nstream)
+    assert np.allclose(nbody1, orbits[-1].w(galactic).T)
+
+    for i in [0, 60, 150]:
+        ref_w0 = np.vstack((orbits[i].w(galactic).T, stream_w0[2*i:2*i+2]))
+        ref_w0 = PhaseSpacePosition(pos=ref_w0[:, :3].T*u.kpc,
+                                    vel=ref_w0[:, 3:].T*u.kpc/u.Myr)
+        ref = DirectNBody(ref_w0, body_potentials + [None, None],
+                          external_potential=potential)
+        ref_orbits = ref.integrate_orbit(t=t[i:])
+        assert np.allclose(ref_orbits[-1, 2:].w(galactic).T,
+                           stream1[2*i:2*i+2], rtol=0, atol=1e-6)
+
+    # Particles are only integrated from their release time:
+    nstream[1::2] = 0
+    released = np.repeat(nstream, 2) > 0
+    nbody2, stream2 = mockstream_dop853_single_pass(
+        nbody, t, np.ascontiguousarray(stream_w0[released]), nstream)
+    assert np.allclose(nbody1, nbody2)
+    assert np.allclose(stream2, stream1[released], rtol=0, atol=1e-6)
+
+    # The old engine is a deprecated wrapper of the single-pass engine
+    with pytest.warns(GalaDeprecationWarning):
+        nbody3, stream3 = mockstream_dop853(
+            nbody, t, np.ascontiguousarray(stream_w0[released]), t, t[-1],
+            nstream)
+    assert np.all(nbody3 == nbody2)
+    assert np.all(stream3 == stream2)
+
+    # As called before the single-pass engine, with particles released at
+    # only some times of the orbit, and integrated to a later final time
+    nstream[-20:] = 0
+    released = np.repeat(nstream, 2) > 0
+    nbody4, stream4 = mockstream_dop853_single_pass(
+        nbody, t, np.ascontiguousarray(stream_w0[released]), nstream)
+    release = nstream != 0
+    with pytest.warns(GalaDeprecationWarning):
+        nbody5, stream5 = mockstream_dop853(
+            nbody, t[release], np.ascontiguousarray(stream_w0[released]),
+            t[release], t[-1], nstream[release])
+    assert np.allclose(nbody5, nbody4)
+    assert np.allclose(stream5, stream4, rtol=0, atol=1e-6)
+
+    with pytest.warns(GalaDeprecationWarning), pytest.raises(ValueError):
+        mockstream_dop853(nbody, t, stream_w0, t, t[-2], nstream)
+
+    with pytest.warns(GalaDeprecationWarning), pytest.raises(ValueError):
+        mockstream_dop853(nbody, t, stream_w0, t + 0.5, t[-1], nstream)
+
+
+def test_run_threads(nfw_potential, prog_w0):
+    potential = nfw_potential
+    H = Hamiltonian(potential)
+    w0 = prog_w0
+    mass = 2.5e4 * u.Msun
+    prog_pot = HernquistPotential(mass, 4*u.pc, units=galactic)
+    nbody = DirectNBody(
+        PhaseSpacePosition(pos=[14., 1., 0]*u.kpc,
+                           vel=[0, 0, 0.12]*u.kpc/u.Myr),
+        [HernquistPotential(1e8*u.Msun, 0.5*u.kpc, units=galactic)],
+        external_potential=potential)
+
+    streams = []
+    for n_threads in [1, 2, 3]:
+        df = FardalStreamDF(random_state=np.random.RandomState(42))
+        gen = MockStreamGenerator(df=df, hamiltonian=H,
+                                  progenitor_potential=prog_pot)
+        stream, _ = gen.run(w0, mass, nbody=nbody, dt=-1., n_steps=100,
+                            n_threads=n_threads)
+        streams.append(stream)
+
+    # The results don't depend on the number of threads:
+    for stream in streams[1:]:
+        assert np.all(stream.xyz == streams[0].xyz)
+        assert np.all(stream.v_xyz == streams[0].v_xyz)
+
+    with pytest.raises(ValueError):
+        gen.run(w0, mass, dt=-1., n_steps=100, n_threads=0)
+
+    with pytest.raises(ValueError):
+        gen.run(w0, mass, dt=-1., n_steps=100, n_threads=2,
+                output_every=1, output_filename='test.hdf5')
+
+
+@pytest.mark.parametrize('Integrator, atol', [
+    (LeapfrogIntegrator, 1e-2),
+    (Ruth4Integrator, 1e-4),
+    (Yoshida6Integrator, 1e-6),
+    (Yoshida8Integrator, 1e-6),
+])
+def test_run_integrators(Integrator, atol, nfw_potential, prog_w0):
+    potential = nfw_potential
+    H = Hamiltonian(potential)
+    w0 = prog_w0
+    mass = 2.5e4 * u.Msun
+
+    streams = []
+    for Integrator_ in [DOPRI853Integrator, Integrator]:
+        df = FardalStreamDF(random_state=np.random.RandomState(42))
+        gen = MockStreamGenerator(df=df, hamiltonian=H)
+        stream, _ = gen.run(w0, mass, dt=-1., n_steps=200,
+                            Integrator=Integrator_)
+        streams.append(stream)
+
+    assert u.allclose(streams[0].xyz, streams[1].xyz, rtol=0, atol=atol*u.kpc)
+
+    # Multi-threaded symplectic integration gives the same result:
+    df = FardalStreamDF(random_state=np.random.RandomState(42))
+    gen = MockStreamGenerator(df=df, hamiltonian=H)
+    stream, _ = gen.run(w0, mass, dt=-1., n_steps=200,
+                        Integrator=Integrator, n_threads=2)
+    assert np.all(stream.xyz == streams[1].xyz)
+
+
+def test_run_integrator_kwargs(nfw_potential, prog_w0):
+    potential = nfw_potential
+    H = Hamiltonian(potential)
+    w0 = prog_w0
+    mass = 2.5e4 * u.Msun
+
+    streams = []
+    for tol in [1e-10, 1e-6]:
+        df = FardalStreamDF(random_state=np.random.RandomState(42))
+        gen = MockStreamGenerator(df=df, hamiltonian=H)
+        stream, _ = gen.run(w0, mass, dt=-1., n_steps=200,
+                            Integrator_kwargs=dict(atol=tol, rtol=tol,
+                                                   dt0=0.5))
+        streams.append(stream)
+    assert not np.all(streams[0].xyz == streams[1].xyz)
+    assert u.allclose(streams[0].xyz, streams[1].xyz, rtol=0,
+                      atol=1e-3*u.kpc)
+
+    with pytest.raises(NotImplementedError):
+        gen.run(w0, mass, dt=-1., n_steps=200, Integrator=RK5Integrator)
+
+    with pytest.raises(TypeError):
+        gen.run(w0, mass, dt=-1., n_steps=200, Integrator=LeapfrogIntegrator,
+                Integrator_kwargs=dict(atol=1e-8))
+
+    with pytest.raises(ValueError):
+        gen.run(w0, mass, dt=-1., n_steps=200, Integrator=LeapfrogIntegrator,
+                output_every=1, output_filename='test.hdf5')
+
+    frame = ConstantRotatingFrame([0, 0, 25.]*u.km/u.s/u.kpc, units=galactic)
+    gen = MockStreamGenerator(df=df, hamiltonian=Hamiltonian(potential, frame))
+    with pytest.raises(TypeError):
+        gen.run(w0, mass, dt=-1., n_steps=200, Integrator=LeapfrogIntegrator)
+
+
+@pytest.mark.parametrize('Integrator', [DOPRI853Integrator, LeapfrogIntegrator])
+def test_run_ensemble(Integrator, nfw_potential):
+    potential = nfw_potential
+    H = Hamiltonian(potential)
+    w0 = PhaseSpacePosition(pos=[[15., 12., 18.], [0, 0, 0], [0, 1., 0]]*u.kpc,
+                            vel=[[0, 0, 0], [0, 0.01, 0],
+                                 [0.13, 0.14, 0.12]]*u.kpc/u.Myr)
+    mass = [2.5e4, 1e4, 5e4] * u.Msun
+    m = potential.parameters['m']
+    params = [dict(m=m), dict(m=0.9*m), dict(m=1.1*m)]
+    prog_pot = HernquistPotential(m=1e4, c=0.1, units=galactic)
+
+    df = FardalStreamDF(random_state=np.random.RandomState(42))
+    gen = MockStreamGenerator(df=df, hamiltonian=H,
+                              progenitor_potential=prog_pot)
+    stream, prog, idx = gen.run_ensemble(w0, mass, potential_params=params,
+                                         dt=-1., n_steps=100, n_threads=2,
+                                         Integrator=Integrator)
+    assert prog.shape == (3,)
+    assert np.all(np.diff(idx) >= 0)
+
+    # each stream is the same as if it was generated on its own
+    df = FardalStreamDF(random_state=np.random.RandomState(42))
+    for i in range(3):
+        H_i = Hamiltonian(potential.replicate(**params[i]))
+        gen = MockStreamGenerator(df=df, hamiltonian=H_i,
+                                  progenitor_potential=prog_pot)
+        stream_i, prog_i = gen.run(w0[i], mass[i], dt=-1., n_steps=100,
+                                   Integrator=Integrator)
+        assert np.all(stream.xyz[:, idx == i] == stream_i.xyz)
+        assert np.all(stream.v_xyz[:, idx == i] == stream_i.v_xyz)
+        assert np.all(stream.release_time[idx == i] == stream_i.release_time)
+        assert np.all(stream.lead_trail[idx == i] == stream_i.lead_trail)
+        assert np.all(prog.xyz[:, i] == prog_i.xyz[:, 0])
+
+    with pytest.raises(ValueError):
+        gen.run_ensemble(w0, mass[:2], dt=-1., n_steps=100)
+
+    with pytest.raises(ValueError):
+        gen.run_ensemble(w0, mass, potential_params=params[:2], dt=-1.,
+                         n_steps=100)
+
+    with pytest.raises(ValueError):
+        gen.run_ensemble(w0[0], mass[0], dt=-1., n_steps=100)
+
+
 @pytest.mark.parametrize(
     'dt, nsteps, output_every, release_every, n_particles, trail',
     list(itertools.product([1, -1], [16, 17],
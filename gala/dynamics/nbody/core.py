@@ -10,7 +10,8 @@ import numpy as np
 
 from ...integrate.cyintegrators.leapfrog import leapfrog_integrate_nbody
 from ...integrate.cyintegrators.ruth4 import ruth4_integrate_nbody
-from ...integrate.timespec import parse_time_specification
+from ...integrate.cyintegrators.yoshida import yoshida_integrate_nbody
+from ...integrate.timespec import _save_every_indices, parse_time_specification
 from ...potential import Hamiltonian, NullPotential, StaticFrame
 from ...units import UnitSystem
 from ...util import atleast_2d
@@ -174,7 +175,9 @@ class DirectNBody:
         ext_acc = self.external_potential.acceleration(self.w0, t=t)
         return nbody_acc + ext_acc
 
-    def integrate_orbit(self, Integrator=None, Integrator_kwargs=dict(), **time_spec):
+    def integrate_orbit(
+        self, Integrator=None, Integrator_kwargs=dict(), save_every=1, **time_spec
+    ):
         """
         Integrate the initial conditions in the combined external potential
         plus N-body forces.
@@ -183,6 +186,12 @@ class DirectNBody:
 
         Parameters
         ----------
+        save_every : int (optional)
+            If ``save_all`` is set, only store the orbits at every
+            ``save_every``-th timestep (and at the final timestep). For the
+            fixed-step symplectic integrators, the output is decimated as the
+            integration proceeds; for DOP853, the output times are decimated
+            before the integration. Default is 1.
         **time_spec
             Specification of how long to integrate. See documentation
             for `~gala.integrate.parse_time_specification`.
@@ -197,6 +206,8 @@ class DirectNBody:
             DOPRI853Integrator,
             LeapfrogIntegrator,
             Ruth4Integrator,
+            Yoshida6Integrator,
+            Yoshida8Integrator,
         )
 
         if Integrator is None:
@@ -204,6 +215,7 @@ class DirectNBody:
 
         # Prepare the time-stepping array
         t = parse_time_specification(self.units, **time_spec)
+        save_idx = _save_every_indices(len(t), save_every)
 
         # Reorganize orbits so that massive bodies are first:
         front_idx = []
@@ -223,14 +235,23 @@ class DirectNBody:
         reorg_w0 = np.ascontiguousarray(self._c_w0[idx])
 
         if Integrator == LeapfrogIntegrator:
-            _, ws = leapfrog_integrate_nbody(
-                self.H, reorg_w0, t, pps, store_all=int(self.save_all)
+            t, ws = leapfrog_integrate_nbody(
+                self.H, reorg_w0, t, pps, store_all=int(self.save_all),
+                save_every=save_every
             )
         elif Integrator == Ruth4Integrator:
-            _, ws = ruth4_integrate_nbody(
-                self.H, reorg_w0, t, pps, store_all=int(self.save_all)
+            t, ws = ruth4_integrate_nbody(
+                self.H, reorg_w0, t, pps, store_all=int(self.save_all),
+                save_every=save_every
+            )
+        elif Integrator in (Yoshida6Integrator, Yoshida8Integrator):
+            t, ws = yoshida_integrate_nbody(
+                self.H, reorg_w0, t, pps,
+                order=6 if Integrator == Yoshida6Integrator else 8,
+                store_all=int(self.save_all), save_every=save_every
             )
         elif Integrator == DOPRI853Integrator:
+            t = np.ascontiguousarray(t[save_idx])
             ws = direct_nbody_dop853(reorg_w0, t, self.H, pps, save_all=self.save_all)
         else:
             raise NotImplementedError(
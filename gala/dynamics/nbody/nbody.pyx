@@ -22,7 +22,7 @@ from cpython.exc cimport PyErr_CheckSignals
 
 from ...potential import Hamiltonian, NullPotential
 from ...potential.potential.cpotential cimport (CPotentialWrapper,
-                                                MAX_N_COMPONENTS, CPotential)
+                                                CPotential)
 from ...potential.frame.cframe cimport CFrameWrapper
 from ...integrate.cyintegrators.dop853 cimport (dop853_helper,
                                                 dop853_helper_save_all)
@@ -17,6 +17,8 @@ from gala.integrate import (
     DOPRI853Integrator,
     LeapfrogIntegrator,
     Ruth4Integrator,
+    Yoshida6Integrator,
+    Yoshida8Integrator,
 )
 
 # Project
@@ -86,7 +88,14 @@ class TestDirectNBody:
             DirectNBody(self.w0, particle_potentials=[None, None])
 
     @pytest.mark.parametrize(
-        "Integrator", [DOPRI853Integrator, Ruth4Integrator, LeapfrogIntegrator]
+        "Integrator",
+        [
+            DOPRI853Integrator,
+            Ruth4Integrator,
+            LeapfrogIntegrator,
+            Yoshida6Integrator,
+            Yoshida8Integrator,
+        ],
     )
     def test_directnbody_integrate(self, Integrator):
         # TODO: this is really a unit test, but we should have some functional tests
@@ -159,8 +168,35 @@ class TestDirectNBody:
         acc = nbody.acceleration()
         assert u.allclose(acc, exp_acc)
 
+    @pytest.mark.parametrize("Integrator", [DOPRI853Integrator, LeapfrogIntegrator])
+    def test_directnbody_particle_potentials_unchanged(self, Integrator):
+        # the body potentials are shifted to the body positions only for the
+        # duration of each force evaluation
+        pot1 = HernquistPotential(m=1e6 * u.Msun, c=0.1 * u.pc, units=self.usys)
+        pot2 = HernquistPotential(m=1.6e6 * u.Msun, c=0.33 * u.pc, units=self.usys)
+        nbody = DirectNBody(self.w0, particle_potentials=[pot1, pot2])
+
+        xyz = [1.0, 0.5, -0.2] * u.pc
+        E0 = [pp.energy(xyz) for pp in nbody.particle_potentials]
+
+        nbody.acceleration()
+        nbody.integrate_orbit(
+            dt=1 * self.usys["time"], t1=0, t2=0.1 * u.Myr, Integrator=Integrator
+        )
+
+        for pp, E in zip(nbody.particle_potentials, E0):
+            assert np.all(pp.c_instance._transform_flags() == 0)
+            assert u.allclose(pp.energy(xyz), E)
+
     @pytest.mark.parametrize(
-        "Integrator", [DOPRI853Integrator, Ruth4Integrator, LeapfrogIntegrator]
+        "Integrator",
+        [
+            DOPRI853Integrator,
+            Ruth4Integrator,
+            LeapfrogIntegrator,
+            Yoshida6Integrator,
+            Yoshida8Integrator,
+        ],
     )
     def test_directnbody_integrate_dontsaveall(self, Integrator):
         # If we set save_all = False, only return the final positions:
@@ -189,6 +225,43 @@ class TestDirectNBody:
         assert u.allclose(w1.xyz, w2.xyz)
         assert u.allclose(w1.v_xyz, w2.v_xyz)
 
+    @pytest.mark.parametrize(
+        "Integrator",
+        [
+            DOPRI853Integrator,
+            Ruth4Integrator,
+            LeapfrogIntegrator,
+            Yoshida6Integrator,
+            Yoshida8Integrator,
+        ],
+    )
+    def test_directnbody_integrate_save_every(self, Integrator):
+        nbody = DirectNBody(
+            self.w0,
+            particle_potentials=self.particle_potentials,
+            units=self.usys,
+            external_potential=self.ext_pot,
+        )
+
+        orbits = nbody.integrate_orbit(
+            dt=1 * self.usys["time"], t1=0, t2=1 * u.Myr, Integrator=Integrator
+        )
+        orbits2 = nbody.integrate_orbit(
+            dt=1 * self.usys["time"],
+            t1=0,
+            t2=1 * u.Myr,
+            Integrator=Integrator,
+            save_every=7,
+        )
+
+        idx = np.append(np.arange(0, orbits.ntimes, 7), orbits.ntimes - 1)
+        assert u.allclose(orbits2.t, orbits.t[idx])
+        if Integrator == DOPRI853Integrator:
+            assert u.allclose(orbits2.xyz, orbits.xyz[:, idx], rtol=1e-6)
+        else:
+            assert u.allclose(orbits2.xyz, orbits.xyz[:, idx], rtol=0)
+            assert u.allclose(orbits2.v_xyz, orbits.v_xyz[:, idx], rtol=0)
+
     @pytest.mark.parametrize("Integrator", [DOPRI853Integrator])
     def test_directnbody_integrate_rotframe(self, Integrator):
         # Now compare with/without mass with external potential:
@@ -1,6 +1,8 @@
 from distutils.core import Extension
 from collections import defaultdict
 
+from extension_helpers import add_openmp_flags_if_available
+
 
 def get_extensions():
     import numpy as np
@@ -50,7 +52,9 @@ def get_extensions():
     cfg['sources'].append('gala/dynamics/mockstream/mockstream.pyx')
     cfg['sources'].append('gala/integrate/cyintegrators/dopri/dop853.c')
     cfg['extra_compile_args'].append('--std=gnu99')
-    exts.append(Extension('gala.dynamics.mockstream._mockstream', **cfg))
+    ext = Extension('gala.dynamics.mockstream._mockstream', **cfg)
+    add_openmp_flags_if_available(ext)
+    exts.append(ext)
 
     cfg = defaultdict(list)
     cfg['include_dirs'].append(np.get_include())
@@ -93,6 +93,17 @@ def test_from_w():
     assert o.v_x.unit == u.kpc/u.Myr
     assert o.shape == (10,)
 
+    # by default, the input array is copied
+    assert not np.shares_memory(o.xyz.value, w)
+    assert not np.shares_memory(o.v_xyz.value, w)
+
+    for ndim in [2, 3]:
+        w = np.random.random(size=(2*ndim, 10))
+        o = PhaseSpacePosition.from_w(w, galactic, copy=False)
+        for rep in [o.pos, o.vel]:
+            assert np.shares_memory(getattr(rep, rep.components[0]).value, w)
+        assert np.all(o.w(galactic) == w)
+
 
 def test_slice():
 
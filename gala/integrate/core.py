@@ -1,6 +1,7 @@
 """ Base class for integrators. """
 
 # Third-party
+import astropy.units as u
 import numpy as np
 
 # This project
@@ -9,6 +10,25 @@ from gala.units import UnitSystem, DimensionlessUnitSystem
 __all__ = ["Integrator"]
 
 
+def _validate_mmap(mmap, return_shape):
+    """
+    Check that a user-provided output array (e.g., a memory-mapped array) has
+    the shape of the return array and can be written to.
+    """
+    if mmap.shape != return_shape:
+        raise ValueError(
+            "Shape of memory-mapped array doesn't match expected shape of "
+            f"return array ({mmap.shape} vs {return_shape})"
+        )
+
+    flags = getattr(mmap, "flags", None)
+    if flags is not None and not flags.writeable:
+        raise TypeError(
+            "Memory-mapped array must be a writable mode, not "
+            f"'{getattr(mmap, 'mode', 'r')}'"
+        )
+
+
 class Integrator(object):
     def __init__(
         self,
@@ -78,17 +98,7 @@ class Integrator(object):
             ws = np.zeros(return_shape, dtype=float)
 
         else:
-            if mmap.shape != return_shape:
-                raise ValueError(
-                    "Shape of memory-mapped array doesn't match expected shape of "
-                    f"return array ({mmap.shape} vs {return_shape})"
-                )
-
-            if not mmap.flags.writeable:
-                raise TypeError(
-                    f"Memory-mapped array must be a writable mode, not '{mmap.mode}'"
-                )
-
+            _validate_mmap(mmap, return_shape)
             ws = mmap
 
         return w0, arr_w0, ws
@@ -104,10 +114,13 @@ class Integrator(object):
 
         from ..dynamics import Orbit
 
+        # the orbit is created without copying the (possibly memory-mapped)
+        #   output array
         orbit = Orbit(
-            pos=w[:self.ndim] * pos_unit,
-            vel=w[self.ndim:] * vel_unit,
+            pos=u.Quantity(w[:self.ndim], pos_unit, copy=False),
+            vel=u.Quantity(w[self.ndim:], vel_unit, copy=False),
             t=t * t_unit,
+            copy=False,
         )
         return orbit
 
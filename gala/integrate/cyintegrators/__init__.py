@@ -1,3 +1,4 @@
 from .dop853 import dop853_integrate_hamiltonian
 from .leapfrog import leapfrog_integrate_hamiltonian
 from .ruth4 import ruth4_integrate_hamiltonian
+from .yoshida import yoshida_integrate_hamiltonian
@@ -1,5 +1,7 @@
 # cython: language_level=3
 
+from .reductions cimport OrbitReducer
+
 cdef extern from "frame/src/cframe.h":
     ctypedef struct CFrameType:
         pass
@@ -13,6 +15,25 @@ cdef extern from "dopri/dop853.h":
                               CPotential *p, CFrameType *fr, unsigned norbits,
                               unsigned nbody, void *args) nogil
 
+    ctypedef struct Dop853State:
+        long nfcn, nstep, naccpt, nrejct
+        double hout, xold, xout
+        void *data
+
+    Dop853State *dop853_alloc(unsigned n, unsigned nrdens) nogil
+    void dop853_free(Dop853State *state) nogil
+    double contd8(Dop853State *state, unsigned ii, double x) nogil
+
+cdef Dop853State *dop853_alloc_state(unsigned n, unsigned nrdens) except NULL
+
+cdef int dop853_check_result(int res) except -1
+
+cdef int dop853_step_state(Dop853State *state,
+                           CPotential *cp, CFrameType *cf, FcnEqDiff F,
+                           double *w, double t1, double t2, double dt0,
+                           int ndim, int norbits, int nbody, void *args,
+                           double atol, double rtol, int nmax) nogil
+
 cdef void dop853_step(CPotential *cp, CFrameType *cf, FcnEqDiff F,
                       double *w, double t1, double t2, double dt0,
                       int ndim, int norbits, int nbody, void *args,
@@ -21,13 +42,14 @@ cdef void dop853_step(CPotential *cp, CFrameType *cf, FcnEqDiff F,
 cdef dop853_helper(CPotential *cp, CFrameType *cf, FcnEqDiff F,
                    double[:,::1] w0, double[::1] t,
                    int ndim, int norbits, int nbody, void *args, int ntimes,
-                   double atol, double rtol, int nmax, int progress)
+                   double atol, double rtol, int nmax, int progress,
+                   OrbitReducer *reducer=*)
 
 cdef dop853_helper_save_all(CPotential *cp, CFrameType *cf, FcnEqDiff F,
                             double[:,::1] w0, double[::1] t,
                             int ndim, int norbits, int nbody, void *args,
                             int ntimes, double atol, double rtol, int nmax,
-                            int progress)
+                            int progress, OrbitReducer *reducer=*)
 
 # cpdef dop853_integrate_hamiltonian(hamiltonian, double[:,::1] w0, double[::1] t,
 #                                    double atol=?, double rtol=?, int nmax=?)
@@ -16,10 +16,15 @@ from libc.string cimport strcpy
 import numpy as np
 cimport numpy as np
 np.import_array()
+from cython.parallel cimport prange, threadid
 
 from cpython.exc cimport PyErr_CheckSignals
 from ...potential.potential.cpotential cimport CPotentialWrapper
 from ...potential.frame.cframe cimport CFrameWrapper
+from .events cimport (EventRecorder, events_init, events_check,
+                      event_recorder_init)
+from .reductions cimport (OrbitReducer, reductions_init, reductions_update,
+                          orbit_reducer_init)
 
 cdef extern from "frame/src/cframe.h":
     ctypedef struct CFrameType:
@@ -32,11 +37,8 @@ cdef extern from "potential/src/cpotential.h":
     void c_gradient(CPotential *p, double t, double *q, double *grad) nogil
 
 cdef extern from "dopri/dop853.h":
-    ctypedef void (*FcnEqDiff)(unsigned n, double x, double *y, double *f,
-                              CPotential *p, CFrameType *fr, unsigned norbits,
-                              unsigned nbody, void *args) nogil
     ctypedef void (*SolTrait)(long nr, double xold, double x, double* y,
-                              unsigned n, int* irtrn)
+                              unsigned n, int* irtrn, Dop853State *state) nogil
 
     # See dop853.h for full description of all input parameters
     int dop853 (unsigned n, FcnEqDiff fn,
@@ -48,6 +50,16 @@ cdef extern from "dopri/dop853.h":
                 double fac2, double beta, double hmax, double h, long nmax, int meth,
                 long nstiff, unsigned nrdens, unsigned* icont, unsigned licont)
 
+    int dop853_solve (Dop853State *state, unsigned n, FcnEqDiff fn,
+                      CPotential *p, CFrameType *fr, unsigned n_orbits,
+                      unsigned nbody, void *args,
+                      double x, double* y, double xend,
+                      double* rtoler, double* atoler, int itoler, SolTrait solout,
+                      int iout, FILE* fileout, double uround, double safe,
+                      double fac1, double fac2, double beta, double hmax, double h,
+                      long nmax, int meth, long nstiff, unsigned nrdens,
+                      unsigned* icont, unsigned licont) nogil
+
     void Fwrapper (unsigned ndim, double t, double *w, double *f,
                    CPotential *p, CFrameType *fr, unsigned norbits)
 
@@ -55,11 +67,247 @@ cdef extern from "stdio.h":
     ctypedef struct FILE
     FILE *stdout
 
+# Output times and storage for dop853_dense_solout(), passed via state.data
+ctypedef struct DenseOutput:
+    double *t
+    int ntimes
+    int j  # index of the next output time
+    double *out
+    int stride  # number of elements between output times in out
+    EventRecorder *events  # event detection, if not NULL
+    OrbitReducer *reducer  # running statistics, if not NULL
+    double *work  # solution at an output time, if out is NULL
+    int orbit0  # index of the first orbit of the system in the buffers
+    int norbits
+    int ndim
+
+# Interpolant data for locating events with the dense output
+ctypedef struct DenseEventData:
+    Dop853State *state
+    int offset  # index of the first component of the orbit in the system
+    int ndim
+
+
+cdef Dop853State *dop853_alloc_state(unsigned n, unsigned nrdens) except NULL:
+    """
+    Allocate the workspace for integrating a system of up to ``n`` equations,
+    with dense output for up to ``nrdens`` components. Free it with
+    ``dop853_free()``.
+    """
+    cdef Dop853State *state = dop853_alloc(n, nrdens)
+    if state == NULL:
+        raise MemoryError("Failed to allocate the DOP853 workspace.")
+    return state
+
+cdef int dop853_check_result(int res) except -1:
+    """
+    Raise an error if the return value of ``dop853_solve()`` is an error code.
+    """
+    if res == -1:
+        raise RuntimeError("Input is not consistent.")
+    elif res == -2:
+        raise RuntimeError("Larger nmax is needed.")
+    elif res == -3:
+        raise RuntimeError("Step size becomes too small.")
+    elif res == -4:
+        raise RuntimeError("The problem is probably stiff (interrupted).")
+    return 0
+
+cdef int dop853_step_state(Dop853State *state,
+                           CPotential *cp, CFrameType *cf, FcnEqDiff F,
+                           double *w, double t1, double t2, double dt0,
+                           int ndim, int norbits, int nbody, void *args,
+                           double atol, double rtol, int nmax) nogil:
+    """
+    Same as ``dop853_step()``, but using the pre-allocated workspace
+    ``state``, and returning the return value of ``dop853_solve()`` instead
+    of raising an error. This does not need the GIL, so integrations with
+    separate workspaces can run in parallel.
+    """
+    return dop853_solve(state, ndim*norbits, F,
+                        cp, cf, norbits, nbody, args, t1, w, t2,
+                        &rtol, &atol, 0, NULL, 0,
+                        NULL, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, dt0, nmax, 0, 1, 0,
+                        NULL, 0)
+
+cdef void dop853_event_interpolant(double t, double *w,
+                                   void *data) noexcept nogil:
+    cdef:
+        DenseEventData *d = <DenseEventData *>data
+        int k
+
+    for k in range(d.ndim):
+        w[k] = contd8(d.state, d.offset + k, t)
+
+cdef void dop853_dense_solout(long nr, double xold, double x, double *y,
+                              unsigned n, int *irtrn,
+                              Dop853State *state) noexcept nogil:
+    """
+    Called by DOP853 after every accepted step: stores the solution at all
+    output times in the interval ``(xold, x]`` using the dense output
+    polynomial of the step, updates the running statistics of the orbits at
+    these times, and locates any events of the orbits within the step.
+    """
+    cdef:
+        DenseOutput *d = <DenseOutput *>state.data
+        DenseEventData ed
+        double sgn = 1. if d.t[d.ntimes-1] >= d.t[0] else -1.
+        double *out
+        unsigned k
+        int i
+
+    if d.out != NULL or d.reducer != NULL:
+        while d.j < d.ntimes and (d.t[d.j] - x) * sgn <= 0:
+            out = &d.out[d.j*d.stride] if d.out != NULL else d.work
+            if d.t[d.j] == x:
+                for k in range(n):
+                    out[k] = y[k]
+            else:
+                for k in range(n):
+                    out[k] = contd8(state, k, d.t[d.j])
+
+            if d.reducer != NULL:
+                for i in range(d.norbits):
+                    reductions_update(d.reducer, d.orbit0 + i, d.t[d.j],
+                                      &out[i*d.ndim])
+            d.j += 1
+
+    if d.events != NULL:
+        # the first call is for the initial conditions
+        if nr == 1:
+            for i in range(d.norbits):
+                events_init(d.events, d.orbit0 + i, &y[i*d.ndim])
+        else:
+            ed.state = state
+            ed.ndim = d.ndim
+            for i in range(d.norbits):
+                ed.offset = i * d.ndim
+                events_check(d.events, d.orbit0 + i, xold, x, &y[i*d.ndim],
+                             dop853_event_interpolant, &ed)
+
+cdef int dop853_solve_continuous(Dop853State *state,
+                                 CPotential *cp, CFrameType *cf, FcnEqDiff F,
+                                 double *w, double *t, int ntimes,
+                                 int ndim, int norbits, int nbody, void *args,
+                                 double atol, double rtol, long nmax,
+                                 double *all_w, int stride,
+                                 EventRecorder *events, int orbit0,
+                                 OrbitReducer *reducer, double *work) nogil:
+    """
+    Integrate ``w`` from ``t[0]`` to ``t[ntimes-1]`` in a single call to
+    DOP853, so that the adaptive step size is kept across output times. If
+    ``all_w`` is not NULL, the solution at all times ``t`` is interpolated
+    from the dense output and stored in ``all_w``, with ``stride`` elements
+    between output times. If ``events`` is not NULL, the events of the
+    orbits, which are stored from index ``orbit0`` in the event buffers, are
+    located using the dense output. Similarly, if ``reducer`` is not NULL, the
+    running statistics of the orbits are updated at all times ``t``, where
+    ``work`` must have space for ``ndim * norbits`` elements if ``all_w`` is
+    NULL. ``state`` must have been allocated with dense output for all
+    components in any of these cases. Returns the return value of
+    ``dop853_solve()``.
+    """
+    cdef:
+        DenseOutput d
+        unsigned n = ndim * norbits
+        int res, i, j, k
+
+    if all_w == NULL and events == NULL and reducer == NULL:
+        return dop853_solve(state, n, F, cp, cf, norbits, nbody, args,
+                            t[0], w, t[ntimes-1], &rtol, &atol, 0, NULL, 0,
+                            NULL, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, nmax,
+                            0, 1, 0, NULL, 0)
+
+    d.t = t
+    d.ntimes = ntimes
+    d.j = 0
+    d.out = all_w
+    d.stride = stride
+    d.events = events
+    d.reducer = reducer
+    d.work = work
+    d.orbit0 = orbit0
+    d.norbits = norbits
+    d.ndim = ndim
+
+    state.data = &d
+    res = dop853_solve(state, n, F, cp, cf, norbits, nbody, args,
+                       t[0], w, t[ntimes-1], &rtol, &atol, 0,
+                       dop853_dense_solout, 2,
+                       NULL, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, nmax,
+                       0, 1, n, NULL, 0)
+    state.data = NULL
+
+    if res < 0 or (all_w == NULL and reducer == NULL):
+        return res
+
+    # the last step can end just short of the final time because of
+    #   round-off, so make sure the final output times are filled
+    for j in range(d.j, ntimes):
+        if all_w != NULL:
+            for k in range(n):
+                all_w[j*stride + k] = w[k]
+
+        if reducer != NULL:
+            for i in range(norbits):
+                reductions_update(reducer, orbit0 + i, t[j], &w[i*ndim])
+
+    return res
+
+cdef dop853_helper_continuous(CPotential *cp, CFrameType *cf, FcnEqDiff F,
+                              double[:, ::1] w0, double[::1] t,
+                              int ndim, int norbits, int nbody, void *args,
+                              int ntimes, double atol, double rtol, long nmax,
+                              int store_all, EventRecorder *events,
+                              OrbitReducer *reducer):
+    """
+    Integrate all orbits together in a single call to DOP853 across the full
+    time range, and interpolate the solution at the output times from the
+    dense output.
+    """
+    cdef:
+        double[:, ::1] w = w0.copy()
+        double[:, :, ::1] all_w
+        double[::1] work = np.empty(ndim*norbits)
+        double *all_w_ptr = NULL
+        Dop853State *state
+        int i, res
+
+    if store_all:
+        all_w = np.empty((ntimes, norbits, ndim))
+        all_w_ptr = &all_w[0, 0, 0]
+
+    if reducer != NULL:
+        for i in range(norbits):
+            reductions_init(reducer, i, t[0], &w[i, 0])
+
+    state = dop853_alloc_state(
+        ndim*norbits,
+        ndim*norbits if (store_all or events != NULL or reducer != NULL) else 0)
+    try:
+        with nogil:
+            res = dop853_solve_continuous(
+                state, cp, cf, F, &w[0, 0], &t[0], ntimes, ndim, norbits,
+                nbody, args, atol, rtol, nmax, all_w_ptr, ndim*norbits,
+                events, 0, reducer, &work[0])
+        dop853_check_result(res)
+
+    finally:
+        dop853_free(state)
+
+    if store_all:
+        return np.asarray(all_w)
+    else:
+        return np.asarray(w)
 
 cdef void dop853_step(CPotential *cp, CFrameType *cf, FcnEqDiff F,
                       double *w, double t1, double t2, double dt0,
                       int ndim, int norbits, int nbody, void *args,
                       double atol, double rtol, int nmax) except *:
+    """
+    Integrate all ``norbits`` orbits together, as one system of
+    ``ndim * norbits`` equations, from ``t1`` to ``t2``.
+    """
 
     cdef:
         int res
@@ -70,19 +318,26 @@ cdef void dop853_step(CPotential *cp, CFrameType *cf, FcnEqDiff F,
                  &rtol, &atol, 0, solout, 0,
                  NULL, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, dt0, nmax, 0, 1, 0, NULL, 0);
 
-    if res == -1:
-        raise RuntimeError("Input is not consistent.")
-    elif res == -2:
-        raise RuntimeError("Larger nmax is needed.")
-    elif res == -3:
-        raise RuntimeError("Step size becomes too small.")
-    elif res == -4:
-        raise RuntimeError("The problem is probably stiff (interrupted).")
+    dop853_check_result(res)
+
+cdef int _dop853_progress(int j, int ntimes, int progress) except -1:
+    """
+    Check for interrupts, and print the progress if ``progress`` is 1.
+    """
+    PyErr_CheckSignals()
+
+    if progress == 1:
+        sys.stdout.write('\r')
+        sys.stdout.write(f"Integrating orbits: {100 * j / ntimes: 3.0f}%")
+        sys.stdout.flush()
+
+    return 0
 
 cdef dop853_helper(CPotential *cp, CFrameType *cf, FcnEqDiff F,
                    double[:, ::1] w0, double[::1] t,
                    int ndim, int norbits, int nbody, void *args, int ntimes,
-                   double atol, double rtol, int nmax, int progress):
+                   double atol, double rtol, int nmax, int progress,
+                   OrbitReducer *reducer=NULL):
 
     cdef:
         int i, j
@@ -91,43 +346,52 @@ cdef dop853_helper(CPotential *cp, CFrameType *cf, FcnEqDiff F,
         # store initial conditions
         double[:, ::1] w = w0.copy()
 
-        int prog_out = ntimes // 100
+        int res = 1
+        int prog_out = max(ntimes // 100, 1)
 
-    if progress == 1:
-        for j in range(1, ntimes, 1):
-            dop853_step(cp, cf, F,
-                        &w[0, 0], t[j-1], t[j], dt0,
-                        ndim, norbits, nbody, args,
-                        atol, rtol, nmax)
+        Dop853State *state = dop853_alloc_state(ndim*norbits, 0)
+
+    if reducer != NULL:
+        for i in range(norbits):
+            reductions_init(reducer, i, t[0], &w[i, 0])
+            reductions_update(reducer, i, t[0], &w[i, 0])
+
+    try:
+        with nogil:
+            for j in range(1, ntimes, 1):
+                res = dop853_step_state(state, cp, cf, F,
+                                        &w[0, 0], t[j-1], t[j], dt0,
+                                        ndim, norbits, nbody, args,
+                                        atol, rtol, nmax)
+                if res < 0:
+                    break
+
+                if reducer != NULL:
+                    for i in range(norbits):
+                        reductions_update(reducer, i, t[j], &w[i, 0])
 
-            PyErr_CheckSignals()
+                # only take the GIL back every 1% of the output times
+                if j % prog_out == 0:
+                    with gil:
+                        _dop853_progress(j, ntimes, progress)
 
-            if j % prog_out == 0:
-                sys.stdout.write('\r')
-                sys.stdout.write(
-                    f"Integrating orbits: {100 * j / ntimes: 3.0f}%")
-                sys.stdout.flush()
+        dop853_check_result(res)
 
+    finally:
+        dop853_free(state)
+
+    if progress == 1:
         sys.stdout.write('\r')
         sys.stdout.write(f"Integrating orbits: {100: 3.0f}%")
         sys.stdout.flush()
 
-    else:
-        for j in range(1, ntimes, 1):
-            dop853_step(cp, cf, F,
-                        &w[0, 0], t[j-1], t[j], dt0,
-                        ndim, norbits, nbody, args,
-                        atol, rtol, nmax)
-
-            PyErr_CheckSignals()
-
     return np.asarray(w)
 
 cdef dop853_helper_save_all(CPotential *cp, CFrameType *cf, FcnEqDiff F,
                             double[:, ::1] w0, double[::1] t,
                             int ndim, int norbits, int nbody, void *args,
                             int ntimes, double atol, double rtol, int nmax,
-                            int progress):
+                            int progress, OrbitReducer *reducer=NULL):
 
     cdef:
         int i, j, k
@@ -136,7 +400,10 @@ cdef dop853_helper_save_all(CPotential *cp, CFrameType *cf, FcnEqDiff F,
         double[::1] w = np.empty(ndim*norbits)
         double[:, :, ::1] all_w = np.empty((ntimes, norbits, ndim))
 
-        int prog_out = ntimes // 100
+        int res = 1
+        int prog_out = max(ntimes // 100, 1)
+
+        Dop853State *state
 
     # store initial conditions
     for i in range(norbits):
@@ -144,48 +411,231 @@ cdef dop853_helper_save_all(CPotential *cp, CFrameType *cf, FcnEqDiff F,
             w[i*ndim + k] = w0[i, k]
             all_w[0, i, k] = w0[i, k]
 
-    if progress == 1:
-        for j in range(1, ntimes, 1):
-            dop853_step(cp, cf, F,
-                        &w[0], t[j-1], t[j], dt0, ndim, norbits, nbody, args,
-                        atol, rtol, nmax)
+    if reducer != NULL:
+        for i in range(norbits):
+            reductions_init(reducer, i, t[0], &w[i*ndim])
+            reductions_update(reducer, i, t[0], &w[i*ndim])
 
-            for k in range(ndim):
-                for i in range(norbits):
-                    all_w[j, i, k] = w[i*ndim + k]
+    state = dop853_alloc_state(ndim*norbits, 0)
+    try:
+        with nogil:
+            for j in range(1, ntimes, 1):
+                res = dop853_step_state(state, cp, cf, F,
+                                        &w[0], t[j-1], t[j], dt0,
+                                        ndim, norbits, nbody, args,
+                                        atol, rtol, nmax)
+                if res < 0:
+                    break
+
+                for k in range(ndim):
+                    for i in range(norbits):
+                        all_w[j, i, k] = w[i*ndim + k]
+
+                if reducer != NULL:
+                    for i in range(norbits):
+                        reductions_update(reducer, i, t[j], &w[i*ndim])
+
+                # only take the GIL back every 1% of the output times
+                if j % prog_out == 0:
+                    with gil:
+                        _dop853_progress(j, ntimes, progress)
 
-            PyErr_CheckSignals()
+        dop853_check_result(res)
 
-            if j % prog_out == 0:
-                sys.stdout.write('\r')
-                sys.stdout.write(
-                    f"Integrating orbits: {100 * j / ntimes: 3.0f}%")
-                sys.stdout.flush()
+    finally:
+        dop853_free(state)
 
+    if progress == 1:
         sys.stdout.write('\r')
         sys.stdout.write(f"Integrating orbits: {100: 3.0f}%")
         sys.stdout.flush()
 
-    else:
-        for j in range(1, ntimes, 1):
-            dop853_step(cp, cf, F,
-                        &w[0], t[j-1], t[j], dt0, ndim, norbits, nbody, args,
-                        atol, rtol, nmax)
+    return np.asarray(all_w)
+
+cdef int dop853_integrate_orbit(Dop853State *state,
+                                CPotential *cp, CFrameType *cf, FcnEqDiff F,
+                                double *w, double *t, int ntimes, int ndim,
+                                int nbody, void *args,
+                                double atol, double rtol, long nmax,
+                                double *all_w, int all_w_stride,
+                                long *n_steps, int continuous,
+                                EventRecorder *events, int orbit,
+                                OrbitReducer *reducer, double *work) nogil:
+    """
+    Integrate a single orbit ``w`` through all times ``t``, storing the
+    phase-space position at each time in ``all_w`` (with ``all_w_stride``
+    elements between times) if it is not NULL. The number of steps taken is
+    stored in ``n_steps``. With ``continuous``, the orbit is integrated in a
+    single call across the full time range (see
+    ``dop853_solve_continuous()``), and its events are detected if
+    ``events`` is not NULL. If ``reducer`` is not NULL, the running statistics
+    of the orbit are updated at all times ``t`` (``work`` must then have space
+    for ``ndim`` elements). Returns the first error code of
+    ``dop853_solve()``, or 1 on success.
+    """
+    cdef:
+        int j, k, res
+        double dt0 = t[1] - t[0]
 
+    if reducer != NULL:
+        reductions_init(reducer, orbit, t[0], w)
+
+    if continuous:
+        res = dop853_solve_continuous(state, cp, cf, F, w, t, ntimes, ndim, 1,
+                                      nbody, args, atol, rtol, nmax,
+                                      all_w, all_w_stride, events, orbit,
+                                      reducer, work)
+        n_steps[0] = state.nstep
+        return res
+
+    if reducer != NULL:
+        reductions_update(reducer, orbit, t[0], w)
+
+    n_steps[0] = 0
+    for j in range(1, ntimes, 1):
+        res = dop853_step_state(state, cp, cf, F,
+                                w, t[j-1], t[j], dt0, ndim, 1, nbody, args,
+                                atol, rtol, nmax)
+        n_steps[0] += state.nstep
+        if res < 0:
+            return res
+
+        if all_w != NULL:
             for k in range(ndim):
-                for i in range(norbits):
-                    all_w[j, i, k] = w[i*ndim + k]
+                all_w[j*all_w_stride + k] = w[k]
 
-            PyErr_CheckSignals()
+        if reducer != NULL:
+            reductions_update(reducer, orbit, t[j], w)
 
-    return np.asarray(all_w)
+    return 1
+
+cdef dop853_helper_independent(CPotential *cp, CFrameType *cf, FcnEqDiff F,
+                                double[:, ::1] w0, double[::1] t,
+                                int ndim, int norbits, int nbody, void *args,
+                                int ntimes, double atol, double rtol, long nmax,
+                                int progress, int store_all,
+                                long[::1] n_steps, int n_threads=1,
+                                int continuous=0, EventRecorder *events=NULL,
+                                OrbitReducer *reducer=NULL):
+    """
+    Integrate each orbit separately, with its own error control and step
+    size, instead of as one big system of equations. The number of steps
+    taken for each orbit is stored in ``n_steps``. With ``n_threads > 1``,
+    the orbits are distributed over threads, each with its own workspace.
+    """
+
+    cdef:
+        int i, tid
+        int stride = norbits * ndim
+        double *all_w_ptr = NULL
+
+        double[:, ::1] w = w0.copy()
+        double[:, :, ::1] all_w
+        int[::1] status = np.ones(norbits, dtype=np.intc)
+        double[:, ::1] work = np.empty((n_threads, ndim))
+
+        int prog_out = max(norbits // 100, 1)
+
+        Dop853State **states = NULL
+
+    if store_all:
+        all_w = np.empty((ntimes, norbits, ndim))
+        all_w[0] = w0
+        all_w_ptr = &all_w[0, 0, 0]
+
+    states = <Dop853State **>malloc(n_threads * sizeof(Dop853State *))
+    if states == NULL:
+        raise MemoryError("Failed to allocate the DOP853 workspaces.")
+    for tid in range(n_threads):
+        states[tid] = NULL
+
+    try:
+        for tid in range(n_threads):
+            states[tid] = dop853_alloc_state(
+                ndim,
+                ndim if (continuous and (store_all or events != NULL or
+                                         reducer != NULL)) else 0)
+
+        if n_threads == 1:
+            for i in range(norbits):
+                status[i] = dop853_integrate_orbit(
+                    states[0], cp, cf, F, &w[i, 0], &t[0], ntimes, ndim,
+                    nbody, args, atol, rtol, nmax,
+                    &all_w_ptr[i*ndim] if store_all else NULL, stride,
+                    &n_steps[i], continuous, events, i, reducer, &work[0, 0])
+                dop853_check_result(status[i])
+
+                PyErr_CheckSignals()
+
+                if progress == 1 and i % prog_out == 0:
+                    sys.stdout.write('\r')
+                    sys.stdout.write(
+                        f"Integrating orbits: {100 * i / norbits: 3.0f}%")
+                    sys.stdout.flush()
+
+        else:
+            with nogil:
+                for i in prange(norbits, schedule='dynamic',
+                                num_threads=n_threads):
+                    status[i] = dop853_integrate_orbit(
+                        states[threadid()], cp, cf, F, &w[i, 0], &t[0],
+                        ntimes, ndim, nbody, args, atol, rtol, nmax,
+                        &all_w_ptr[i*ndim] if store_all else NULL, stride,
+                        &n_steps[i], continuous, events, i, reducer,
+                        &work[threadid(), 0])
+
+            for i in range(norbits):
+                dop853_check_result(status[i])
+
+    finally:
+        for tid in range(n_threads):
+            dop853_free(states[tid])
+        free(states)
+
+    if progress == 1:
+        sys.stdout.write('\r')
+        sys.stdout.write(f"Integrating orbits: {100: 3.0f}%")
+        sys.stdout.flush()
+
+    if store_all:
+        return np.asarray(all_w)
+    else:
+        return np.asarray(w)
 
 cpdef dop853_integrate_hamiltonian(hamiltonian, double[:, ::1] w0, double[::1] t,
-                                   double atol=1E-10, double rtol=1E-10, int nmax=0, progress=False, int store_all=1):
+                                   double atol=1E-10, double rtol=1E-10, int nmax=0, progress=False, int store_all=1,
+                                   int independent=0, n_steps=None, int n_threads=1,
+                                   int continuous=0, events=None, reductions=None):
     """
     CAUTION: Interpretation of axes is different here! We need the
     arrays to be C ordered and easy to iterate over, so here the
-    axes are (norbits, ndim).
+    axes of the initial conditions are (norbits, ndim). The orbits are
+    stored with axes (ntimes, norbits, ndim), as for the N-body and mock
+    stream integrations, and are returned as a view with gala's usual axis
+    order, (ndim, ntimes, norbits), or (ndim, norbits) without ``store_all``.
+
+    By default, all orbits are integrated together as one system of
+    equations, so every orbit is advanced with the step size required by the
+    hardest orbit. With ``independent=1``, each orbit is instead integrated
+    separately with its own adaptive step size, and the orbits can be
+    distributed over ``n_threads`` threads. If an integer array of shape
+    ``(norbits,)`` is passed in as ``n_steps``, it is filled with the number
+    of steps (accepted and rejected) taken for each orbit.
+
+    By default, the integrator is restarted at each output time. With
+    ``continuous=1``, the orbits are instead integrated in one pass across
+    the full time range, keeping the adaptive step size, and the phase-space
+    positions at the output times are interpolated with the dense output of
+    DOP853. In this mode, ``nmax`` limits the number of steps of the whole
+    integration (by default, 100000 per output time step).
+
+    If an instance of ``gala.integrate.events.EventBuffers`` is passed in as
+    ``events``, the times and phase-space positions of the events are
+    located with the dense output and stored in its buffers. This implies
+    ``continuous=1``. Similarly, running statistics of the orbits at the
+    output times are accumulated if an instance of
+    ``gala.integrate.reductions.ReductionBuffers`` is passed in as
+    ``reductions``.
     """
 
     if not hamiltonian.c_enabled:
@@ -204,20 +654,87 @@ cpdef dop853_integrate_hamiltonian(hamiltonian, double[:, ::1] w0, double[::1] t
         CPotential cp = (<CPotentialWrapper>(hamiltonian.potential.c_instance)).cpotential
         CFrameType cf = (<CFrameWrapper>(hamiltonian.frame.c_instance)).cframe
 
+        long[::1] orbit_n_steps
+        long total_nmax
+
+        EventRecorder rec
+        EventRecorder *rec_ptr = NULL
+
+        OrbitReducer red
+        OrbitReducer *red_ptr = NULL
+
+    if n_steps is not None and not independent:
+        raise ValueError("Per-orbit step counts (n_steps) require independent=1")
+
+    if n_steps is not None and len(n_steps) != norbits:
+        raise ValueError(
+            f"n_steps must have one element per orbit ({norbits}), "
+            f"got {len(n_steps)}"
+        )
+
+    if n_threads < 1:
+        raise ValueError(f"n_threads must be a positive integer, got {n_threads}")
+
+    if n_threads > 1 and not independent:
+        raise ValueError("Multi-threaded DOP853 integration requires independent=1")
+
+    if events is not None:
+        event_recorder_init(&rec, events)
+        rec_ptr = &rec
+        continuous = 1
+
+    if reductions is not None:
+        orbit_reducer_init(&red, reductions, &cp, &cf)
+        red_ptr = &red
+
+    if continuous and nmax == 0:
+        total_nmax = 100000 * (ntimes - 1)
+    else:
+        total_nmax = nmax
+
     # 0 below is for nbody - we ignore that in this test particle integration
-    if store_all:
+    if independent:
+        orbit_n_steps = np.zeros(norbits, dtype=np.int_)
+        w = dop853_helper_independent(
+            &cp, &cf, <FcnEqDiff> Fwrapper,
+            w0, t,
+            ndim, norbits, 0, args, ntimes,
+            atol, rtol, total_nmax, int(progress), store_all, orbit_n_steps,
+            n_threads, continuous, rec_ptr, red_ptr)
+
+        if n_steps is not None:
+            n_steps[:] = orbit_n_steps
+
+        if store_all:
+            return np.asarray(t), np.moveaxis(w, -1, 0)
+        else:
+            return np.asarray(t[-1:]), np.transpose(w)
+
+    elif continuous:
+        w = dop853_helper_continuous(
+            &cp, &cf, <FcnEqDiff> Fwrapper,
+            w0, t,
+            ndim, norbits, 0, args, ntimes,
+            atol, rtol, total_nmax, store_all, rec_ptr, red_ptr)
+
+        if store_all:
+            return np.asarray(t), np.moveaxis(w, -1, 0)
+        else:
+            return np.asarray(t[-1:]), np.transpose(w)
+
+    elif store_all:
         all_w = dop853_helper_save_all(&cp, &cf, <FcnEqDiff> Fwrapper,
                                     w0, t,
                                     ndim, norbits, 0, args, ntimes,
-                                    atol, rtol, nmax, int(progress))
+                                    atol, rtol, nmax, int(progress), red_ptr)
 
-        return np.asarray(t), np.asarray(all_w)
+        return np.asarray(t), np.moveaxis(all_w, -1, 0)
 
     else:
         w = dop853_helper(
             &cp, &cf, <FcnEqDiff> Fwrapper,
             w0, t,
             ndim, norbits, 0, args, ntimes,
-            atol, rtol, nmax, int(progress))
+            atol, rtol, nmax, int(progress), red_ptr)
 
-        return np.asarray(t[-1:]), np.asarray(w)
+        return np.asarray(t[-1:]), np.transpose(w)
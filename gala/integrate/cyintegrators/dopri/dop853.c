@@ -7,54 +7,79 @@
 #include "dop853.h"
 
 
-static long      nfcn, nstep, naccpt, nrejct;
-static double    hout, xold, xout;
-static unsigned  nrds, *indir;
-static double    *yy1, *k1, *k2, *k3, *k4, *k5, *k6, *k7, *k8, *k9, *k10;
-static double    *rcont1, *rcont2, *rcont3, *rcont4;
-static double    *rcont5, *rcont6, *rcont7, *rcont8;
-
-
-long nfcnRead (void)
-{
-  return nfcn;
-
-} /* nfcnRead */
-
-
-long nstepRead (void)
-{
-  return nstep;
-
-} /* stepRead */
-
-
-long naccptRead (void)
-{
-  return naccpt;
-
-} /* naccptRead */
-
-
-long nrejctRead (void)
+/* workspace */
+Dop853State *dop853_alloc (unsigned n, unsigned nrdens)
 {
-  return nrejct;
-
-} /* nrejct */
-
+  /*
+    Allocates the solver state for systems of up to n equations, with dense
+    output for up to nrdens components. All arrays share one block of memory.
+    Returns NULL if the allocation fails.
+  */
+  Dop853State *s;
+  double *work;
+
+  s = (Dop853State*) malloc (sizeof(Dop853State));
+  if (!s)
+    return NULL;
+
+  work = (double*) malloc ((11*(size_t)n + 8*(size_t)nrdens) * sizeof(double));
+  s->indir = NULL;
+  if (nrdens && (nrdens < n))
+    s->indir = (unsigned*) malloc (n*sizeof(unsigned));
+
+  if (!work || (!s->indir && nrdens && (nrdens < n)))
+  {
+    free (work);
+    free (s->indir);
+    free (s);
+    return NULL;
+  }
 
-double hRead (void)
+  s->n = n;
+  s->nrdens = nrdens;
+  s->nrds = 0;
+  s->dense_indir = 0;
+  s->nfcn = s->nstep = s->naccpt = s->nrejct = 0;
+  s->hout = s->xold = s->xout = 0.0;
+  s->data = NULL;
+
+  s->yy1 = work;
+  s->k1 = work + n;
+  s->k2 = work + 2*n;
+  s->k3 = work + 3*n;
+  s->k4 = work + 4*n;
+  s->k5 = work + 5*n;
+  s->k6 = work + 6*n;
+  s->k7 = work + 7*n;
+  s->k8 = work + 8*n;
+  s->k9 = work + 9*n;
+  s->k10 = work + 10*n;
+
+  work = work + 11*n;
+  s->rcont1 = work;
+  s->rcont2 = work + nrdens;
+  s->rcont3 = work + 2*nrdens;
+  s->rcont4 = work + 3*nrdens;
+  s->rcont5 = work + 4*nrdens;
+  s->rcont6 = work + 5*nrdens;
+  s->rcont7 = work + 6*nrdens;
+  s->rcont8 = work + 7*nrdens;
+
+  return s;
+
+} /* dop853_alloc */
+
+
+void dop853_free (Dop853State *s)
 {
-  return hout;
-
-} /* hRead */
-
+  if (!s)
+    return;
 
-double xRead (void)
-{
-  return xout;
+  free (s->yy1);
+  free (s->indir);
+  free (s);
 
-} /* xRead */
+} /* dop853_free */
 
 
 static double sign (double a, double b)
@@ -155,7 +180,7 @@ static double hinit (unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, u
 
 
 /* core integrator */
-static int dopcor (unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, unsigned norbits, unsigned nbody, void *args,
+static int dopcor (Dop853State *s, unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, unsigned norbits, unsigned nbody, void *args,
        double x, double* y, double xend,
 		   double hmax, double h, double* rtoler, double* atoler,
 		   int itoler, FILE* fileout, SolTrait solout, int iout,
@@ -182,6 +207,13 @@ static int dopcor (unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, uns
   double   d51, d56, d57, d58, d59, d510, d511, d512, d513, d514, d515, d516;
   double   d61, d66, d67, d68, d69, d610, d611, d612, d613, d614, d615, d616;
   double   d71, d76, d77, d78, d79, d710, d711, d712, d713, d714, d715, d716;
+  unsigned nrds = s->nrds;
+  double   *yy1 = s->yy1, *k1 = s->k1, *k2 = s->k2, *k3 = s->k3, *k4 = s->k4;
+  double   *k5 = s->k5, *k6 = s->k6, *k7 = s->k7, *k8 = s->k8, *k9 = s->k9;
+  double   *k10 = s->k10;
+  double   *rcont1 = s->rcont1, *rcont2 = s->rcont2, *rcont3 = s->rcont3;
+  double   *rcont4 = s->rcont4, *rcont5 = s->rcont5, *rcont6 = s->rcont6;
+  double   *rcont7 = s->rcont7, *rcont8 = s->rcont8;
 
   /* initialisations */
   switch (meth)
@@ -375,16 +407,16 @@ static int dopcor (unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, uns
   iord = 8;
   if (h == 0.0)
     h = hinit (n, fcn, p, fr, norbits, nbody, args, x, y, posneg, k1, k2, k3, iord, hmax, atoler, rtoler, itoler);
-  nfcn += 2;
+  s->nfcn += 2;
   reject = 0;
-  xold = x;
+  s->xold = x;
 
   if (iout)
   {
     irtrn = 1;
-    hout = 1.0;
-    xout = x;
-    solout (naccpt+1, xold, x, y, n, &irtrn);
+    s->hout = 1.0;
+    s->xout = x;
+    solout (s->naccpt+1, s->xold, x, y, n, &irtrn, s);
     if (irtrn < 0)
     {
       if (fileout)
@@ -396,12 +428,12 @@ static int dopcor (unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, uns
   /* basic integration step */
   while (1)
   {
-    if (nstep > nmax)
+    if (s->nstep > nmax)
     {
       if (fileout)
 	fprintf (fileout, "Exit of dop853 at x = %.16e, more than nmax = %li are needed\r\n", x, nmax);
-      xout = x;
-      hout = h;
+      s->xout = x;
+      s->hout = h;
       return -2;
     }
 
@@ -409,8 +441,8 @@ static int dopcor (unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, uns
     {
       if (fileout)
 	fprintf (fileout, "Exit of dop853 at x = %.16e, step size too small h = %.16e\r\n", x, h);
-      xout = x;
-      hout = h;
+      s->xout = x;
+      s->hout = h;
       return -3;
     }
 
@@ -420,7 +452,7 @@ static int dopcor (unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, uns
       last = 1;
     }
 
-    nstep++;
+    s->nstep++;
 
     /* the twelve stages */
     for (i = 0; i < n; i++)
@@ -463,7 +495,7 @@ static int dopcor (unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, uns
 			  a127*k7[i] + a128*k8[i] + a129*k9[i] +
 			  a1210*k10[i] + a1211*k2[i]);
     fcn (n, xph, yy1, k3, p, fr, norbits, nbody, args);
-    nfcn += 11;
+    s->nfcn += 11;
     for (i = 0; i < n; i++)
     {
       k4[i] = b1*k1[i] + b6*k6[i] + b7*k7[i] + b8*k8[i] + b9*k9[i] +
@@ -516,12 +548,12 @@ static int dopcor (unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, uns
       /* step accepted */
 
       facold = max_d (err, 1.0E-4);
-      naccpt++;
+      s->naccpt++;
       fcn (n, xph, k5, k4, p, fr, norbits, nbody, args);
-      nfcn++;
+      s->nfcn++;
 
       /* stiffness detection */
-      if (!(naccpt % nstiff) || (iasti > 0))
+      if (!(s->naccpt % nstiff) || (iasti > 0))
       {
 	stnum = 0.0;
 	stden = 0.0;
@@ -543,8 +575,8 @@ static int dopcor (unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, uns
 	      fprintf (fileout, "The problem seems to become stiff at x = %.16e\r\n", x);
 	    else
 	    {
-	      xout = x;
-	      hout = h;
+	      s->xout = x;
+	      s->hout = h;
 	      return -4;
 	    }
 	}
@@ -614,7 +646,7 @@ static int dopcor (unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, uns
 			      a169*k9[i] + a1613*k4[i] + a1614*k10[i] +
 			      a1615*k2[i]);
 	fcn (n, x+c16*h, yy1, k3, p, fr, norbits, nbody, args);
-	nfcn += 3;
+	s->nfcn += 3;
 
 	/* final preparation */
 	if (nrds == n)
@@ -646,14 +678,14 @@ static int dopcor (unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, uns
 
       memcpy (k1, k4, n * sizeof(double));
       memcpy (y, k5, n * sizeof(double));
-      xold = x;
+      s->xold = x;
       x = xph;
 
       if (iout)
       {
-	hout = h;
-	xout = x;
-	solout (naccpt+1, xold, x, y, n, &irtrn);
+	s->hout = h;
+	s->xout = x;
+	solout (s->naccpt+1, s->xold, x, y, n, &irtrn, s);
 	if (irtrn < 0)
 	{
 	  if (fileout)
@@ -665,8 +697,8 @@ static int dopcor (unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, uns
       /* normal exit */
       if (last)
       {
-	hout=hnew;
-	xout = x;
+	s->hout=hnew;
+	s->xout = x;
 	return 1;
       }
 
@@ -682,8 +714,8 @@ static int dopcor (unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, uns
       /* step rejected */
       hnew = h / min_d (facc1, fac11/safe);
       reject = 1;
-      if (naccpt >= 1)
-	nrejct=nrejct + 1;
+      if (s->naccpt >= 1)
+	s->nrejct=s->nrejct + 1;
       last = 0;
     }
 
@@ -693,21 +725,30 @@ static int dopcor (unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, uns
 } /* dopcor */
 
 
-/* front-end */
-int dop853
- (unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, unsigned norbits, unsigned nbody, void *args,
+/* re-entrant front-end: uses the workspace in s, see dop853_alloc() */
+int dop853_solve
+ (Dop853State *s, unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, unsigned norbits, unsigned nbody, void *args,
   double x, double* y, double xend, double* rtoler,
   double* atoler, int itoler, SolTrait solout, int iout, FILE* fileout, double uround,
   double safe, double fac1, double fac2, double beta, double hmax, double h,
   long nmax, int meth, long nstiff, unsigned nrdens, unsigned* icont, unsigned licont)
 {
-  int       arret, idid;
+  int       arret;
   unsigned  i;
 
   /* initialisations */
-  nfcn = nstep = naccpt = nrejct = arret = 0;
-  rcont1 = rcont2 = rcont3 = rcont4 = rcont5 = rcont6 = rcont7 = rcont8 = NULL;
-  indir = NULL;
+  s->nfcn = s->nstep = s->naccpt = s->nrejct = arret = 0;
+  s->nrds = 0;
+  s->dense_indir = 0;
+
+  /* the workspace must be large enough for the system */
+  if ((n > s->n) || (nrdens > s->nrdens) ||
+      (nrdens && (nrdens < n) && !s->indir))
+  {
+    if (fileout)
+      fprintf (fileout, "Workspace too small for n = %u, nrdens = %u\r\n", n, nrdens);
+    arret = 1;
+  }
 
   /* n, the dimension of the system */
   if (n == UINT_MAX)
@@ -760,32 +801,12 @@ int dop853
   }
   else if (nrdens)
   {
-    /* is there enough memory to allocate rcont12345678&indir ? */
-    rcont1 = (double*) malloc (nrdens*sizeof(double));
-    rcont2 = (double*) malloc (nrdens*sizeof(double));
-    rcont3 = (double*) malloc (nrdens*sizeof(double));
-    rcont4 = (double*) malloc (nrdens*sizeof(double));
-    rcont5 = (double*) malloc (nrdens*sizeof(double));
-    rcont6 = (double*) malloc (nrdens*sizeof(double));
-    rcont7 = (double*) malloc (nrdens*sizeof(double));
-    rcont8 = (double*) malloc (nrdens*sizeof(double));
-    if (nrdens < n)
-      indir = (unsigned*) malloc (n*sizeof(unsigned));
-
-    if (!rcont1 || !rcont2 || !rcont3 || !rcont4 || !rcont5 ||
-	!rcont6 || !rcont7 || !rcont8 || (!indir && (nrdens < n)))
-    {
-      if (fileout)
-	fprintf (fileout, "Not enough free memory for rcont12345678&indir\r\n");
-      arret = 1;
-    }
-
     /* control of length of icont */
     if (nrdens == n)
     {
       if (icont && fileout)
 	fprintf (fileout, "Warning : when nrdens = n there is no need allocating memory for icont\r\n");
-      nrds = n;
+      s->nrds = n;
     }
     else if (licont < nrdens)
     {
@@ -797,11 +818,12 @@ int dop853
     {
       if ((iout < 2) && fileout)
 	fprintf (fileout, "Warning : put iout = 2 for dense output\r\n");
-      nrds = nrdens;
+      s->nrds = nrdens;
+      s->dense_indir = 1;
       for (i = 0; i < n; i++)
-	indir[i] = UINT_MAX;
+	s->indir[i] = UINT_MAX;
       for (i = 0; i < nrdens; i++)
-	indir[icont[i]] = i;
+	s->indir[icont[i]] = i;
     }
   }
 
@@ -847,119 +869,58 @@ int dop853
   if (hmax == 0.0)
     hmax = xend - x;
 
-  /* is there enough free memory for the method ? */
-  yy1 = (double*) malloc (n*sizeof(double));
-  k1 = (double*) malloc (n*sizeof(double));
-  k2 = (double*) malloc (n*sizeof(double));
-  k3 = (double*) malloc (n*sizeof(double));
-  k4 = (double*) malloc (n*sizeof(double));
-  k5 = (double*) malloc (n*sizeof(double));
-  k6 = (double*) malloc (n*sizeof(double));
-  k7 = (double*) malloc (n*sizeof(double));
-  k8 = (double*) malloc (n*sizeof(double));
-  k9 = (double*) malloc (n*sizeof(double));
-  k10 = (double*) malloc (n*sizeof(double));
-
-  if (!yy1 || !k1 || !k2 || !k3 || !k4 || !k5 || !k6 || !k7 || !k8 || !k9 || !k10)
-  {
-    if (fileout)
-      fprintf (fileout, "Not enough free memory for the method\r\n");
-    arret = 1;
-  }
-
   /* when a failure has occured, we return -1 */
   if (arret)
-  {
-    if (k10)
-      free (k10);
-    if (k9)
-      free (k9);
-    if (k8)
-      free (k8);
-    if (k7)
-      free (k7);
-    if (k6)
-      free (k6);
-    if (k5)
-      free (k5);
-    if (k4)
-      free (k4);
-    if (k3)
-      free (k3);
-    if (k2)
-      free (k2);
-    if (k1)
-      free (k1);
-    if (yy1)
-      free (yy1);
-    if (indir)
-      free (indir);
-    if (rcont8)
-      free (rcont8);
-    if (rcont7)
-      free (rcont7);
-    if (rcont6)
-      free (rcont6);
-    if (rcont5)
-      free (rcont5);
-    if (rcont4)
-      free (rcont4);
-    if (rcont3)
-      free (rcont3);
-    if (rcont2)
-      free (rcont2);
-    if (rcont1)
-      free (rcont1);
+    return -1;
+
+  return dopcor (s, n, fcn, p, fr, norbits, nbody, args, x, y, xend, hmax, h, rtoler, atoler, itoler, fileout,
+		 solout, iout, nmax, uround, meth, nstiff, safe, beta, fac1, fac2, icont);
+
+} /* dop853_solve */
+
 
+/* front-end: allocates a workspace for a single integration */
+int dop853
+ (unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr, unsigned norbits, unsigned nbody, void *args,
+  double x, double* y, double xend, double* rtoler,
+  double* atoler, int itoler, SolTrait solout, int iout, FILE* fileout, double uround,
+  double safe, double fac1, double fac2, double beta, double hmax, double h,
+  long nmax, int meth, long nstiff, unsigned nrdens, unsigned* icont, unsigned licont)
+{
+  Dop853State *s;
+  int idid;
+
+  s = dop853_alloc (n, nrdens);
+  if (!s)
+  {
+    if (fileout)
+      fprintf (fileout, "Not enough free memory for the method\r\n");
     return -1;
   }
-  else
-  {
-    idid = dopcor (n, fcn, p, fr, norbits, nbody, args, x, y, xend, hmax, h, rtoler, atoler, itoler, fileout,
-		   solout, iout, nmax, uround, meth, nstiff, safe, beta, fac1, fac2, icont);
-    free (k10);
-    free (k9);
-    free (k8);
-    free (k7);
-    free (k6);
-    free (k5);    /* reverse order freeing too increase chances */
-    free (k4);    /* of efficient dynamic memory managing       */
-    free (k3);
-    free (k2);
-    free (k1);
-    free (yy1);
-    if (indir)
-      free (indir);
-    if (rcont8)
-    {
-      free (rcont8);
-      free (rcont7);
-      free (rcont6);
-      free (rcont5);
-      free (rcont4);
-      free (rcont3);
-      free (rcont2);
-      free (rcont1);
-    }
 
-    return idid;
-  }
+  idid = dop853_solve (s, n, fcn, p, fr, norbits, nbody, args, x, y, xend,
+		       rtoler, atoler, itoler, solout, iout, fileout, uround,
+		       safe, fac1, fac2, beta, hmax, h, nmax, meth, nstiff,
+		       nrdens, icont, licont);
+  dop853_free (s);
+
+  return idid;
 
 } /* dop853 */
 
 
 /* dense output function */
-double contd8 (unsigned ii, double x)
+double contd8 (Dop853State *st, unsigned ii, double x)
 {
-  unsigned i, j;
+  unsigned i;
   double   s, s1;
 
   i = UINT_MAX;
 
-  if (!indir)
+  if (!st->dense_indir)
     i = ii;
   else
-    i = indir[ii];
+    i = st->indir[ii];
 
   if (i == UINT_MAX)
   {
@@ -967,11 +928,11 @@ double contd8 (unsigned ii, double x)
     return 0.0;
   }
 
-  s = (x - xold) / hout;
+  s = (x - st->xold) / st->hout;
   s1 = 1.0 - s;
 
-  return rcont1[i]+s*(rcont2[i]+s1*(rcont3[i]+s*(rcont4[i]+s1*(rcont5[i]+
-	 s*(rcont6[i]+s1*(rcont7[i]+s*rcont8[i]))))));
+  return st->rcont1[i]+s*(st->rcont2[i]+s1*(st->rcont3[i]+s*(st->rcont4[i]+s1*(st->rcont5[i]+
+	 s*(st->rcont6[i]+s1*(st->rcont7[i]+s*st->rcont8[i]))))));
 
 } /* contd8 */
 
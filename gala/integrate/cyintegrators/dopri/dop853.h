@@ -72,16 +72,18 @@ solout   A pointer to the output function called during integration.
 	 pass a pointer equal to NULL. solout must must have the following
 	 prototype
 
-	   solout (long nr, double xold, double x, double* y, unsigned n, int* irtrn)
+	   solout (long nr, double xold, double x, double* y, unsigned n, int* irtrn,
+		   Dop853State *state)
 
 	 where y is the solution the at nr-th grid point x, xold is the
 	 previous grid point and irtrn serves to interrupt the integration
-	 (if set to a negative value).
+	 (if set to a negative value). state is the solver state of the
+	 integration, and state->data can be used to pass extra data to solout.
 
 	 Continuous output : during the calls to solout, a continuous solution
 	 for the interval (xold,x) is available through the function
 
-	   contd8(i,s)
+	   contd8(state,i,s)
 
 	 which provides an approximation to the i-th component of the solution
 	 at the point s (s must lie in the interval (xold,x)).
@@ -144,15 +146,22 @@ nrdens   Number of components for which dense outpout is required, default 0.
 Memory requirements
 -------------------
 
-	 The function dop853 allocates dynamically 11*n doubles for the method
-	 stages, 8*nrdens doubles for the interpolation if dense output is
-	 performed and n unsigned if 0 < nrdens < n.
+	 The solver state needs 11*n doubles for the method stages, 8*nrdens
+	 doubles for the interpolation if dense output is performed and n
+	 unsigned if 0 < nrdens < n. The function dop853 allocates and frees
+	 this state on every call. To reuse it across many integrations, e.g.,
+	 when integrating over many output intervals, allocate it once with
+	 dop853_alloc(n, nrdens), pass it to dop853_solve (which takes the same
+	 arguments as dop853 after the state), and release it with
+	 dop853_free. The state holds all of the workspace and statistics of an
+	 integration, so integrations with separate states can run concurrently
+	 in different threads.
 
 
 OUTPUT PARAMETERS
 -----------------
 
-y       numerical solution at x=xRead() (see below).
+y       numerical solution at x=state->xout (see below).
 
 dopri5 returns the following values
 
@@ -164,18 +173,18 @@ dopri5 returns the following values
 	-4 : the problem is probably stff (interrupted).
 
 
-Several functions provide access to different values :
+The solver state (Dop853State) provides access to different values :
 
-xRead   x value for which the solution has been computed (x=xend after
+xout    x value for which the solution has been computed (x=xend after
 	successful return).
 
-hRead   Predicted step size of the last accepted step (useful for a subsequent
-	call to dop853).
+hout    Predicted step size of the last accepted step (useful for a subsequent
+	call to dop853_solve).
 
-nstepRead   Number of used steps.
-naccptRead  Number of accepted steps.
-nrejctRead  Number of rejected steps.
-nfcnRead    Number of function calls.
+nstep   Number of used steps.
+naccpt  Number of accepted steps.
+nrejct  Number of rejected steps.
+nfcn    Number of function calls.
 
 
 */
@@ -191,7 +200,35 @@ typedef void (*FcnEqDiff)(unsigned n, double x, double *y, double *f,
                           CPotential *p, CFrameType *fr, unsigned norbits,
                           unsigned nbody, void *args);
 
-typedef void (*SolTrait)(long nr, double xold, double x, double* y, unsigned n, int* irtrn);
+/* Solver state: holds what the original C version kept in static variables */
+typedef struct {
+  unsigned n;        /* maximum dimension of the system */
+  unsigned nrdens;   /* maximum number of dense output components */
+  unsigned nrds;     /* number of dense output components of this integration */
+  int      dense_indir; /* whether dense output components are given by icont */
+  long     nfcn, nstep, naccpt, nrejct;
+  double   hout, xold, xout;
+  unsigned *indir;
+  double   *yy1, *k1, *k2, *k3, *k4, *k5, *k6, *k7, *k8, *k9, *k10;
+  double   *rcont1, *rcont2, *rcont3, *rcont4;
+  double   *rcont5, *rcont6, *rcont7, *rcont8;
+  void     *data;    /* extra data for solout */
+} Dop853State;
+
+typedef void (*SolTrait)(long nr, double xold, double x, double* y, unsigned n, int* irtrn,
+                         Dop853State *state);
+
+extern Dop853State *dop853_alloc (unsigned n, unsigned nrdens);
+extern void dop853_free (Dop853State *state);
+
+extern int dop853_solve
+ (Dop853State *state, /* workspace, see dop853_alloc */
+  unsigned n, FcnEqDiff fcn, CPotential *p, CFrameType *fr,
+  unsigned n_orbits, unsigned n_body, void *args,
+  double x, double* y, double xend, double* rtoler, double* atoler, int itoler,
+  SolTrait solout, int iout, FILE* fileout, double uround, double safe,
+  double fac1, double fac2, double beta, double hmax, double h, long nmax,
+  int meth, long nstiff, unsigned nrdens, unsigned* icont, unsigned licont);
 
 extern int dop853
  (unsigned n,      /* dimension of the system <= UINT_MAX-1*/
@@ -226,17 +263,11 @@ extern int dop853
  );
 
 extern double contd8
- (unsigned ii,     /* index of desired component */
+ (Dop853State *state, /* solver state of the integration */
+  unsigned ii,     /* index of desired component */
   double x         /* approximation at x */
  );
 
-extern long nfcnRead (void);   /* encapsulation of statistical data */
-extern long nstepRead (void);
-extern long naccptRead (void);
-extern long nrejctRead (void);
-extern double hRead (void);
-extern double xRead (void);
-
 /* ADDED BY APW */
 extern void Fwrapper (unsigned ndim, double t, double *w, double *f,
                       CPotential *p, CFrameType *fr,
@@ -0,0 +1,60 @@
+# cython: language_level=3
+
+cdef extern from "src/events.h":
+    ctypedef void (*EventInterpolant)(double t, double *w, void *data) noexcept nogil
+
+    ctypedef struct EventRecorder:
+        int n_events
+        int ndim
+        int max_events
+        int *kind
+        double *coeff
+        double *offset
+        int *direction
+        double *g_prev
+        long *count
+        double *t_out
+        double *w_out
+
+    ctypedef struct HermiteData:
+        double t0, t1
+        double *w0
+        double *w1
+        double *grad0
+        double *grad1
+        int half_ndim
+
+    void events_init(EventRecorder *rec, int orbit, double *w) nogil
+    void events_check(EventRecorder *rec, int orbit, double t0, double t1,
+                      double *w1, EventInterpolant interp, void *data) nogil
+    void hermite_interpolant(double t, double *w, void *data) noexcept nogil
+
+
+cdef inline int event_recorder_init(EventRecorder *rec, events) except -1:
+    """
+    Point the event recorder ``rec`` at the buffers of ``events``, an
+    instance of ``gala.integrate.events.EventBuffers``, which must be kept
+    alive while ``rec`` is in use.
+    """
+    cdef:
+        int[::1] kind = events.kind
+        double[:, ::1] coeff = events.coeff
+        double[::1] offset = events.offset
+        int[::1] direction = events.direction
+        double[:, ::1] g_prev = events.g_prev
+        long[:, ::1] count = events.count
+        double[:, :, ::1] t_out = events.t_out
+        double[:, :, :, ::1] w_out = events.w_out
+
+    rec.n_events = kind.shape[0]
+    rec.ndim = coeff.shape[1]
+    rec.max_events = t_out.shape[2]
+    rec.kind = &kind[0]
+    rec.coeff = &coeff[0, 0]
+    rec.offset = &offset[0]
+    rec.direction = &direction[0]
+    rec.g_prev = &g_prev[0, 0]
+    rec.count = &count[0, 0]
+    rec.t_out = &t_out[0, 0, 0]
+    rec.w_out = &w_out[0, 0, 0, 0]
+    return 0
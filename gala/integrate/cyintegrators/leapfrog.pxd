@@ -12,3 +12,11 @@ cdef void c_init_velocity(CPotential *p, int ndim, double t, double dt,
 
 cdef void c_leapfrog_step(CPotential *p, int ndim, double t, double dt,
                           double *x_jm1, double *v_jm1, double *v_jm1_2, double *grad) nogil
+
+cdef void c_init_velocity_batch(CPotential *p, int n, int half_ndim,
+                                double t, double dt, double *w, double *x,
+                                double *v_jm1_2, double *grad) nogil
+
+cdef void c_leapfrog_step_batch(CPotential *p, int n, int half_ndim,
+                                double t, double dt, double *w, double *x,
+                                double *v_jm1_2, double *grad) nogil
@@ -11,11 +11,19 @@
 import numpy as np
 cimport numpy as np
 np.import_array()
+from cython.parallel cimport prange
 
 # Project
 from ...potential.potential.cpotential cimport CPotentialWrapper
+from ...potential.frame.cframe cimport CFrameWrapper
 from ...potential.frame import StaticFrame
 from ...potential import NullPotential
+from ..core import _validate_mmap
+from ..timespec import _save_every_indices
+from .events cimport (EventRecorder, HermiteData, events_init, events_check,
+                      hermite_interpolant, event_recorder_init)
+from .reductions cimport (OrbitReducer, reductions_init, reductions_update,
+                          orbit_reducer_init)
 
 cdef extern from "frame/src/cframe.h":
     ctypedef struct CFrameType:
@@ -27,6 +35,7 @@ cdef extern from "potential/src/cpotential.h":
 
 cdef extern from "potential/src/cpotential.h":
     void c_gradient(CPotential *p, double t, double *q, double *grad) nogil
+    void c_gradient_batch(CPotential *p, double t, double *q, int N, double *grad) nogil
     void c_nbody_gradient_symplectic(
         CPotential **pots, double t, double *q,
         double *nbody_q, int nbody, int nbody_i,
@@ -59,12 +68,139 @@ cdef void c_leapfrog_step(CPotential *p, int half_ndim, double t, double dt,
         v_jm1[k] = v_jm1_2[k] - grad[k] * dt/2.
         v_jm1_2[k] = v_jm1_2[k] - grad[k] * dt
 
+cdef void c_init_velocity_batch(CPotential *p, int n, int half_ndim,
+                                double t, double dt, double *w, double *x,
+                                double *v_jm1_2, double *grad) nogil:
+    """
+    Same as ``c_init_velocity()``, but for all ``n`` orbits at once so that the
+    gradient can be computed with a single batch evaluation. ``w`` has shape
+    ``(n, 2*half_ndim)``; ``x`` and ``grad`` are ``(n, half_ndim)`` buffers.
+    """
+    cdef int i, k
+
+    for i in range(n):
+        for k in range(half_ndim):
+            x[i*half_ndim + k] = w[i*2*half_ndim + k]
+
+    c_gradient_batch(p, t, x, n, grad)
+
+    for i in range(n):
+        for k in range(half_ndim):
+            v_jm1_2[i*half_ndim + k] = (w[i*2*half_ndim + half_ndim + k] -
+                                        grad[i*half_ndim + k] * dt/2.)
+
+cdef void c_leapfrog_step_batch(CPotential *p, int n, int half_ndim,
+                                double t, double dt, double *w, double *x,
+                                double *v_jm1_2, double *grad) nogil:
+    """
+    Same as ``c_leapfrog_step()``, but for all ``n`` orbits at once. See
+    ``c_init_velocity_batch()`` for the array layouts.
+    """
+    cdef int i, k
+
+    # full step the positions
+    for i in range(n):
+        for k in range(half_ndim):
+            w[i*2*half_ndim + k] = (w[i*2*half_ndim + k] +
+                                    v_jm1_2[i*half_ndim + k] * dt)
+            x[i*half_ndim + k] = w[i*2*half_ndim + k]
+
+    c_gradient_batch(p, t, x, n, grad)  # compute gradient at new positions
+
+    # step velocity forward by half step, aligned w/ position, then
+    #   finish the full step to leapfrog over position
+    for i in range(n):
+        for k in range(half_ndim):
+            w[i*2*half_ndim + half_ndim + k] = (v_jm1_2[i*half_ndim + k] -
+                                                grad[i*half_ndim + k] * dt/2.)
+            v_jm1_2[i*half_ndim + k] = (v_jm1_2[i*half_ndim + k] -
+                                        grad[i*half_ndim + k] * dt)
+
+cdef void c_leapfrog_events_init(EventRecorder *rec, int i0, int n, int ndim,
+                                 double *w, double *grad,
+                                 double *prev_w, double *prev_grad) nogil:
+    """
+    Initialize event detection for orbits ``i0`` to ``i0 + n``, and keep
+    copies of their phase-space positions ``w`` and gradients ``grad`` for
+    interpolating within the next step.
+    """
+    cdef int i, k, half_ndim = ndim // 2
+
+    for i in range(n):
+        events_init(rec, i0 + i, &w[i*ndim])
+        for k in range(ndim):
+            prev_w[i*ndim + k] = w[i*ndim + k]
+        for k in range(half_ndim):
+            prev_grad[i*half_ndim + k] = grad[i*half_ndim + k]
+
+cdef void c_leapfrog_events_check(EventRecorder *rec, int i0, int n, int ndim,
+                                  double t0, double t1,
+                                  double *w, double *grad,
+                                  double *prev_w, double *prev_grad) nogil:
+    """
+    Check for events of orbits ``i0`` to ``i0 + n`` in the step from ``t0``
+    to ``t1``, where the orbits are interpolated with cubic Hermite
+    polynomials using the positions, velocities, and accelerations at both
+    ends of the step.
+    """
+    cdef:
+        int i, k, half_ndim = ndim // 2
+        HermiteData data
+
+    data.t0 = t0
+    data.t1 = t1
+    data.half_ndim = half_ndim
+    for i in range(n):
+        data.w0 = &prev_w[i*ndim]
+        data.w1 = &w[i*ndim]
+        data.grad0 = &prev_grad[i*half_ndim]
+        data.grad1 = &grad[i*half_ndim]
+        events_check(rec, i0 + i, t0, t1, &w[i*ndim], hermite_interpolant, &data)
+
+        for k in range(ndim):
+            prev_w[i*ndim + k] = w[i*ndim + k]
+        for k in range(half_ndim):
+            prev_grad[i*half_ndim + k] = grad[i*half_ndim + k]
+
+# The maximum number of orbits integrated together: each block of orbits is
+#   advanced through all time steps before moving on to the next, so that its
+#   state stays in cache, and blocks are distributed over threads
+cdef int ORBIT_BLOCK_SIZE = 32
+
+# The default size of the buffer that orbits are integrated into before being
+#   copied to a user-provided output array, in number of doubles
+cdef long OUTPUT_CHUNK_SIZE = 2**23
+
 cpdef leapfrog_integrate_hamiltonian(hamiltonian, double [:, ::1] w0, double[::1] t,
-                                     int store_all=1):
+                                     int store_all=1, int n_threads=1,
+                                     events=None, reductions=None,
+                                     int save_every=1, mmap=None,
+                                     int chunk_size=0):
     """
     CAUTION: Interpretation of axes is different here! We need the
     arrays to be C ordered and easy to iterate over, so here the
-    axes are (norbits, ndim).
+    axes of the initial conditions are (norbits, ndim). The orbits are
+    written directly in gala's usual axis order, so the returned array has
+    axes (ndim, ntimes, norbits), or (ndim, norbits) without ``store_all``.
+
+    With ``save_every > 1`` and ``store_all``, only every ``save_every``-th
+    time step (and the final one) is stored.
+
+    If an instance of ``gala.integrate.events.EventBuffers`` is passed in as
+    ``events``, the times and phase-space positions of the events are
+    located within each step and stored in its buffers. Similarly, running
+    statistics of the orbits are accumulated at every step if an instance of
+    ``gala.integrate.reductions.ReductionBuffers`` is passed in as
+    ``reductions``.
+
+    With ``store_all``, the orbits can be written to a user-provided array,
+    ``mmap``, instead of to a new array in memory. It must have the shape of
+    the return array, ``(ndim, ntimes, norbits)``, and can be any writable
+    array that supports slice assignment, e.g. a
+    memory-mapped array or an HDF5 dataset. The orbits are integrated into a
+    buffer of ``chunk_size`` stored time steps (by default, a buffer of about
+    64 MB), which is copied to ``mmap`` when full, so that the full orbits
+    never have to fit in memory.
     """
 
     if not hamiltonian.c_enabled:
@@ -76,9 +212,13 @@ cpdef leapfrog_integrate_hamiltonian(hamiltonian, double [:, ::1] w0, double[::1
             f"not {hamiltonian.frame.__class__.__name__}"
         )
 
+    if n_threads < 1:
+        raise ValueError(f"n_threads must be a positive integer, got {n_threads}")
+
     cdef:
         # temporary scalars
-        int i, j, k
+        int i, j, k, b, i0, m
+        int s0, s1, j_first, j_last, nsave, chunk
         int n = w0.shape[0]
         int ndim = w0.shape[1]
         int half_ndim = ndim // 2
@@ -86,8 +226,18 @@ cpdef leapfrog_integrate_hamiltonian(hamiltonian, double [:, ::1] w0, double[::1
         int ntimes = len(t)
         double dt = t[1]-t[0]
 
-        # temporary array containers
-        double[::1] grad = np.zeros(half_ndim)
+        # make sure there are enough blocks to keep all threads busy
+        int block = max(1, min(ORBIT_BLOCK_SIZE,
+                               (n + n_threads - 1) // n_threads))
+        int n_blocks = (n + block - 1) // block
+
+        # temporary array containers: positions are gathered into a
+        #   contiguous (n, half_ndim) array so that the gradient of a block of
+        #   orbits can be computed with one batch evaluation per step. Each
+        #   block only touches its own rows, so these are also the per-thread
+        #   scratch space
+        double[:, ::1] x = np.zeros((n, half_ndim))
+        double[:, ::1] grad = np.zeros((n, half_ndim))
         double[:, ::1] v_jm1_2 = np.zeros((n, half_ndim))
 
         # return arrays
@@ -96,41 +246,110 @@ cpdef leapfrog_integrate_hamiltonian(hamiltonian, double [:, ::1] w0, double[::1
 
         # whoa, so many dots
         CPotential cp = (<CPotentialWrapper>(hamiltonian.potential.c_instance)).cpotential
+        CFrameType cf = (<CFrameWrapper>(hamiltonian.frame.c_instance)).cframe
+
+        OrbitReducer red
+        int has_reductions = reductions is not None
+
+        # event detection: the phase-space positions and gradients at the
+        #   start of each step
+        EventRecorder rec
+        int has_events = events is not None
+        double[:, ::1] prev_w
+        double[:, ::1] prev_grad
+
+    save_idx = _save_every_indices(ntimes, save_every)
+    nsave = len(save_idx)
+
+    # the orbits are stored in chunks of output times, which are copied to
+    #   mmap if it is specified
+    if mmap is not None:
+        if not store_all:
+            raise ValueError("An output array (mmap) requires store_all=1")
+        _validate_mmap(mmap, (ndim, nsave, n))
+
+        if chunk_size <= 0:
+            chunk_size = max(1, OUTPUT_CHUNK_SIZE // (n * ndim))
+        chunk = min(chunk_size, nsave)
+    else:
+        chunk = nsave
 
     if store_all:
-        all_w = np.zeros((ntimes, n, ndim))
+        all_w = np.zeros((ndim, chunk, n))
 
-        # save initial conditions
-        all_w[0, :, :] = w0.copy()
+    if has_events:
+        event_recorder_init(&rec, events)
+        prev_w = np.zeros((n, ndim))
+        prev_grad = np.zeros((n, half_ndim))
 
-    tmp_w = w0.copy()
+    if has_reductions:
+        orbit_reducer_init(&red, reductions, &cp, &cf)
 
-    with nogil:
-        # first initialize the velocities so they are evolved by a
-        #   half step relative to the positions
-        for i in range(n):
-            c_init_velocity(&cp, half_ndim, t[0], dt,
-                            &tmp_w[i, 0], &tmp_w[i, half_ndim],
-                            &v_jm1_2[i, 0], &grad[0])
-
-        for j in range(1, ntimes, 1):
-            for i in range(n):
-                for k in range(half_ndim):
-                    grad[k] = 0.
-
-                c_leapfrog_step(&cp, half_ndim, t[j], dt,
-                                &tmp_w[i, 0], &tmp_w[i, half_ndim],
-                                &v_jm1_2[i, 0],
-                                &grad[0])
-
-                if store_all:
-                    for k in range(ndim):
-                        all_w[j, i, k] = tmp_w[i, k]
+    tmp_w = w0.copy()
 
-    if store_all:
-        return np.asarray(t), np.asarray(all_w)
+    s0 = 0
+    while s0 < nsave:
+        # integrate through the time steps of the stored times s0 to s1
+        s1 = min(s0 + chunk, nsave)
+        j_first = save_idx[s0 - 1] + 1 if s0 > 0 else 1
+        j_last = save_idx[s1 - 1]
+
+        if store_all and s0 == 0:
+            # save initial conditions
+            np.asarray(all_w)[:, 0, :] = np.transpose(w0)
+
+        with nogil:
+            for b in prange(n_blocks, schedule='dynamic', num_threads=n_threads):
+                i0 = b * block
+                m = min(block, n - i0)
+
+                if s0 == 0:
+                    # first initialize the velocities so they are evolved by a
+                    #   half step relative to the positions
+                    c_init_velocity_batch(&cp, m, half_ndim, t[0], dt,
+                                          &tmp_w[i0, 0], &x[i0, 0],
+                                          &v_jm1_2[i0, 0], &grad[i0, 0])
+
+                    if has_events:
+                        c_leapfrog_events_init(&rec, i0, m, ndim,
+                                               &tmp_w[i0, 0], &grad[i0, 0],
+                                               &prev_w[i0, 0], &prev_grad[i0, 0])
+
+                    if has_reductions:
+                        for i in range(i0, i0 + m):
+                            reductions_init(&red, i, t[0], &tmp_w[i, 0])
+                            reductions_update(&red, i, t[0], &tmp_w[i, 0])
+
+                for j in range(j_first, j_last + 1):
+                    c_leapfrog_step_batch(&cp, m, half_ndim, t[j], dt,
+                                          &tmp_w[i0, 0], &x[i0, 0],
+                                          &v_jm1_2[i0, 0], &grad[i0, 0])
+
+                    if has_events:
+                        c_leapfrog_events_check(&rec, i0, m, ndim, t[j-1], t[j],
+                                                &tmp_w[i0, 0], &grad[i0, 0],
+                                                &prev_w[i0, 0], &prev_grad[i0, 0])
+
+                    if has_reductions:
+                        for i in range(i0, i0 + m):
+                            reductions_update(&red, i, t[j], &tmp_w[i, 0])
+
+                    if store_all and (j % save_every == 0 or j == ntimes - 1):
+                        for k in range(ndim):
+                            for i in range(i0, i0 + m):
+                                all_w[k, (j + save_every - 1) // save_every - s0, i] = tmp_w[i, k]
+
+        if mmap is not None:
+            mmap[:, s0:s1, :] = np.asarray(all_w)[:, :s1 - s0]
+
+        s0 = s1
+
+    if mmap is not None:
+        return np.asarray(t)[save_idx], mmap
+    elif store_all:
+        return np.asarray(t)[save_idx], np.asarray(all_w)
     else:
-        return np.asarray(t[-1:]), np.asarray(tmp_w)
+        return np.asarray(t[-1:]), np.asarray(tmp_w).T
 
 # -------------------------------------------------------------------------------------
 # N-body stuff - TODO: to be moved, because this is a HACK!
@@ -171,11 +390,15 @@ cdef void c_leapfrog_step_nbody(
 
 
 cpdef leapfrog_integrate_nbody(hamiltonian, double [:, ::1] w0, double[::1] t,
-                               list particle_potentials, int store_all=1):
+                               list particle_potentials, int store_all=1,
+                               int save_every=1):
     """
     CAUTION: Interpretation of axes is different here! We need the
     arrays to be C ordered and easy to iterate over, so here the
     axes are (norbits, ndim).
+
+    With ``save_every > 1`` and ``store_all``, only every ``save_every``-th
+    time step (and the final one) is stored.
     """
 
     if not hamiltonian.c_enabled:
@@ -210,8 +433,10 @@ cpdef leapfrog_integrate_nbody(hamiltonian, double [:, ::1] w0, double[::1] t,
         CPotential *c_particle_potentials[MAX_NBODY]
         unsigned nbody = 0
 
+    save_idx = _save_every_indices(ntimes, save_every)
+
     if store_all:
-        all_w = np.zeros((ntimes, n, ndim))
+        all_w = np.zeros((len(save_idx), n, ndim))
 
         # save initial conditions
         all_w[0, :, :] = w0.copy()
@@ -246,11 +471,11 @@ cpdef leapfrog_integrate_nbody(hamiltonian, double [:, ::1] w0, double[::1] t,
                                       &v_jm1_2[i, 0],
                                       &grad[0])
 
-                if store_all:
+                if store_all and (j % save_every == 0 or j == ntimes - 1):
                     for k in range(ndim):
-                        all_w[j, i, k] = tmp_w[i, k]
+                        all_w[(j + save_every - 1) // save_every, i, k] = tmp_w[i, k]
 
     if store_all:
-        return np.asarray(t), np.asarray(all_w)
+        return np.asarray(t)[save_idx], np.asarray(all_w)
     else:
         return np.asarray(t[-1:]), np.asarray(tmp_w)
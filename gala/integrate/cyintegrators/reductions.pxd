@@ -0,0 +1,44 @@
+# cython: language_level=3
+
+cdef extern from "frame/src/cframe.h":
+    ctypedef struct CFrameType:
+        pass
+
+cdef extern from "potential/src/cpotential.h":
+    ctypedef struct CPotential:
+        pass
+
+cdef extern from "src/reductions.h":
+    ctypedef struct OrbitReducer:
+        int n_stats
+        int ndim
+        int *kind
+        CPotential *p
+        CFrameType *fr
+        double *E0
+        double *out
+
+    void reductions_init(OrbitReducer *red, int orbit, double t, double *w) nogil
+    void reductions_update(OrbitReducer *red, int orbit, double t, double *w) nogil
+
+
+cdef inline int orbit_reducer_init(OrbitReducer *red, reductions,
+                                   CPotential *p, CFrameType *fr) except -1:
+    """
+    Point the orbit reducer ``red`` at the buffers of ``reductions``, an
+    instance of ``gala.integrate.reductions.ReductionBuffers``, which must be
+    kept alive while ``red`` is in use.
+    """
+    cdef:
+        int[::1] kind = reductions.kind
+        double[::1] E0 = reductions.E0
+        double[:, ::1] out = reductions.out
+
+    red.n_stats = kind.shape[0]
+    red.ndim = reductions.ndim
+    red.kind = &kind[0]
+    red.p = p
+    red.fr = fr
+    red.E0 = &E0[0]
+    red.out = &out[0, 0]
+    return 0
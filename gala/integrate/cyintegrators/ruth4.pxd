@@ -7,6 +7,26 @@ cdef extern from "potential/src/cpotential.h":
 cdef extern from "nbody_helper.h":
     const int MAX_NBODY
 
-cdef void c_ruth4_step(CPotential *p, int ndim, double t, double dt,
-                       double *cs, double *ds,
-                       double *w, double *grad) nogil
+ctypedef void (*CompositionGradient)(void *args, double t, double *q, int n,
+                                     double *grad) noexcept nogil
+
+cdef void c_composition_step(CompositionGradient gradient, void *args,
+                             int n, int half_ndim, double t, double dt,
+                             int n_sub, double *cs, double *ds, double *w,
+                             double *x, double *grad) noexcept nogil
+
+cdef void c_potential_gradient(void *args, double t, double *q, int n,
+                               double *grad) noexcept nogil
+
+cdef composition_integrate_hamiltonian(hamiltonian,
+                                       double[:, ::1] w0,
+                                       double[::1] t,
+                                       list py_cs, list py_ds,
+                                       int store_all, reductions,
+                                       int save_every, mmap,
+                                       int chunk_size)
+
+cdef composition_integrate_nbody(hamiltonian, double [:, ::1] w0,
+                                 double[::1] t, list particle_potentials,
+                                 list py_cs, list py_ds,
+                                 int store_all, int save_every)
@@ -5,7 +5,7 @@
 # cython: profile=False
 # cython: language_level=3
 
-""" Leapfrog integration in Cython. """
+""" Ruth4 and other symplectic composition integration in Cython. """
 
 # Third-party
 import numpy as np
@@ -14,8 +14,14 @@ np.import_array()
 
 # Project
 from ...potential.potential.cpotential cimport CPotentialWrapper
+from ...potential.frame.cframe cimport CFrameWrapper
+from .reductions cimport (OrbitReducer, reductions_init, reductions_update,
+                          orbit_reducer_init)
 from ...potential.frame import StaticFrame
 from ...potential import NullPotential
+from ..core import _validate_mmap
+from ..pyintegrators.ruth4 import Ruth4Integrator
+from ..timespec import _save_every_indices
 
 cdef extern from "frame/src/cframe.h":
     ctypedef struct CFrameType:
@@ -27,6 +33,7 @@ cdef extern from "potential/src/cpotential.h":
 
 cdef extern from "potential/src/cpotential.h":
     void c_gradient(CPotential *p, double t, double *q, double *grad) nogil
+    void c_gradient_batch(CPotential *p, double t, double *q, int N, double *grad) nogil
     void c_nbody_gradient_symplectic(
         CPotential **pots, double t, double *q,
         double *nbody_q, int nbody, int nbody_i,
@@ -34,28 +41,82 @@ cdef extern from "potential/src/cpotential.h":
     ) nogil
 
 
-cdef void c_ruth4_step(CPotential *p, int half_ndim, double t, double dt,
-                       double *cs, double *ds,
-                       double *w, double *grad) nogil:
+cdef void c_composition_step(CompositionGradient gradient, void *args,
+                             int n, int half_ndim, double t, double dt,
+                             int n_sub, double *cs, double *ds, double *w,
+                             double *x, double *grad) noexcept nogil:
+    """
+    Advance all ``n`` orbits from time ``t`` by one step of a symplectic
+    composition scheme with ``n_sub`` substeps, each a kick by
+    ``ds[s] * dt`` followed by a drift by ``cs[s] * dt`` (see
+    ``gala.integrate.Ruth4Integrator``). Kicks with a zero coefficient are
+    skipped, so they do not cost a force evaluation. The positions are
+    gathered into ``x`` and ``gradient(args, t, x, n, grad)`` must store the
+    gradient at them in ``grad``, so that it can be computed for all orbits
+    at once. ``w`` has shape ``(n, 2*half_ndim)``; ``x`` and ``grad`` are
+    ``(n, half_ndim)`` buffers.
+    """
     cdef:
-        int j, k
+        int i, s, k
+        int ndim = 2 * half_ndim
+
+    for s in range(n_sub):
+        if ds[s] != 0.:
+            for i in range(n):
+                for k in range(half_ndim):
+                    x[i*half_ndim + k] = w[i*ndim + k]
+
+            gradient(args, t, x, n, grad)
+
+            for i in range(n):
+                for k in range(half_ndim):
+                    w[i*ndim + half_ndim + k] = (w[i*ndim + half_ndim + k] -
+                                                 ds[s] * grad[i*half_ndim + k] * dt)
+
+        for i in range(n):
+            for k in range(half_ndim):
+                w[i*ndim + k] = (w[i*ndim + k] +
+                                 cs[s] * w[i*ndim + half_ndim + k] * dt)
+
+        t = t + cs[s] * dt
+
+cdef void c_potential_gradient(void *args, double t, double *q, int n,
+                               double *grad) noexcept nogil:
+    """
+    The gradient for ``c_composition_step()`` in a potential, which is passed
+    in as ``args``, with one batch evaluation.
+    """
+    c_gradient_batch(<CPotential *>args, t, q, n, grad)
 
-    for j in range(4):
-        for k in range(half_ndim):
-             grad[k] = 0.
-        c_gradient(p, t, w, grad)
-        for k in range(half_ndim):
-            w[half_ndim + k] = w[half_ndim + k] - ds[j] * grad[k] * dt
-            w[k] = w[k] + cs[j] * w[half_ndim + k] * dt
+# The default size of the buffer that orbits are integrated into before being
+#   copied to a user-provided output array, in number of doubles
+cdef long OUTPUT_CHUNK_SIZE = 2**23
 
 cpdef ruth4_integrate_hamiltonian(hamiltonian,
                                   double[:, ::1] w0,
                                   double[::1] t,
-                                  int store_all=1):
+                                  int store_all=1, reductions=None,
+                                  int save_every=1, mmap=None,
+                                  int chunk_size=0):
     """
     CAUTION: Interpretation of axes is different here! We need the
     arrays to be C ordered and easy to iterate over, so here the
-    axes are (norbits, ndim).
+    axes of the initial conditions are (norbits, ndim). As for
+    ``leapfrog_integrate_hamiltonian()``, the returned array has gala's usual
+    axis order, (ndim, ntimes, norbits), or (ndim, norbits) without
+    ``store_all``.
+
+    With ``save_every > 1`` and ``store_all``, only every ``save_every``-th
+    time step (and the final one) is stored.
+
+    If an instance of ``gala.integrate.reductions.ReductionBuffers`` is
+    passed in as ``reductions``, running statistics of the orbits are
+    accumulated at every step and stored in its buffers.
+
+    With ``store_all``, the orbits can be written to a user-provided array,
+    ``mmap`` with the shape of the return array, in chunks of
+    ``chunk_size`` stored time steps. See
+    ``leapfrog_integrate_hamiltonian()``.
     """
 
     if not hamiltonian.c_enabled:
@@ -66,9 +127,28 @@ cpdef ruth4_integrate_hamiltonian(hamiltonian,
                         "for StaticFrame, not {}."
                         .format(hamiltonian.frame.__class__.__name__))
 
+    return composition_integrate_hamiltonian(
+        hamiltonian, w0, t, Ruth4Integrator._cs, Ruth4Integrator._ds,
+        store_all, reductions, save_every, mmap, chunk_size)
+
+cdef composition_integrate_hamiltonian(hamiltonian,
+                                       double[:, ::1] w0,
+                                       double[::1] t,
+                                       list py_cs, list py_ds,
+                                       int store_all, reductions,
+                                       int save_every, mmap,
+                                       int chunk_size):
+    """
+    Integrate the orbits with the composition scheme with drift and kick
+    coefficients ``py_cs`` and ``py_ds``. The other arguments are the same as
+    for ``ruth4_integrate_hamiltonian()``, which (like the Yoshida
+    integrators) checks that the Hamiltonian is supported.
+    """
+
     cdef:
         # temporary scalars
         int i, j, k
+        int s0, s1, j_first, j_last, nsave, chunk
         int n = w0.shape[0]
         int ndim = w0.shape[1]
         int half_ndim = ndim // 2
@@ -77,23 +157,15 @@ cpdef ruth4_integrate_hamiltonian(hamiltonian,
         double dt = t[1] - t[0]
 
         # Integrator coefficients
-        double two_13 = 2 ** (1./3.)
-        double[::1] cs = np.array([
-            1. / (2. * (2. - two_13)),
-            (1. - two_13) / (2.*(2. - two_13)),
-            (1. - two_13) / (2.*(2. - two_13)),
-            1. / (2.*(2. - two_13))
-        ], dtype='f8')
-
-        double[::1] ds = np.array([
-            0.,
-            1. / (2. - two_13),
-            -two_13 / (2. - two_13),
-            1. / (2. - two_13)
-        ], dtype='f8')
+        int n_sub = len(py_cs)
+        double[::1] cs = np.array(py_cs, dtype='f8')
+        double[::1] ds = np.array(py_ds, dtype='f8')
 
-        # temporary array containers
-        double[::1] grad = np.zeros(half_ndim)
+        # temporary array containers: positions are gathered into a
+        #   contiguous (n, half_ndim) block so that the gradient of all orbits
+        #   can be computed with one batch evaluation per substep
+        double[:, ::1] x = np.zeros((n, half_ndim))
+        double[:, ::1] grad = np.zeros((n, half_ndim))
 
         # return arrays
         double[:, :, ::1] all_w
@@ -101,62 +173,111 @@ cpdef ruth4_integrate_hamiltonian(hamiltonian,
 
         # whoa, so many dots
         CPotential cp = (<CPotentialWrapper>(hamiltonian.potential.c_instance)).cpotential
+        CFrameType cf = (<CFrameWrapper>(hamiltonian.frame.c_instance)).cframe
 
-    if store_all:
-        all_w = np.zeros((ntimes, n, ndim))
+        OrbitReducer red
+        int has_reductions = reductions is not None
 
-        # save initial conditions
-        all_w[0, :, :] = w0.copy()
+    save_idx = _save_every_indices(ntimes, save_every)
+    nsave = len(save_idx)
+
+    # the orbits are stored in chunks of output times, which are copied to
+    #   mmap if it is specified
+    if mmap is not None:
+        if not store_all:
+            raise ValueError("An output array (mmap) requires store_all=1")
+        _validate_mmap(mmap, (ndim, nsave, n))
+
+        if chunk_size <= 0:
+            chunk_size = max(1, OUTPUT_CHUNK_SIZE // (n * ndim))
+        chunk = min(chunk_size, nsave)
+    else:
+        chunk = nsave
+
+    if store_all:
+        all_w = np.zeros((ndim, chunk, n))
 
     tmp_w = w0.copy()
 
-    with nogil:
+    if has_reductions:
+        orbit_reducer_init(&red, reductions, &cp, &cf)
 
-        for j in range(1, ntimes, 1):
+        with nogil:
             for i in range(n):
-                c_ruth4_step(&cp, half_ndim, t[j], dt,
-                             &cs[0], &ds[0],
-                             &tmp_w[i, 0], &grad[0])
-
-                if store_all:
+                reductions_init(&red, i, t[0], &tmp_w[i, 0])
+                reductions_update(&red, i, t[0], &tmp_w[i, 0])
+
+    s0 = 0
+    while s0 < nsave:
+        # integrate through the time steps of the stored times s0 to s1
+        s1 = min(s0 + chunk, nsave)
+        j_first = save_idx[s0 - 1] + 1 if s0 > 0 else 1
+        j_last = save_idx[s1 - 1]
+
+        if store_all and s0 == 0:
+            # save initial conditions
+            np.asarray(all_w)[:, 0, :] = np.transpose(w0)
+
+        with nogil:
+            for j in range(j_first, j_last + 1):
+                c_composition_step(c_potential_gradient, &cp,
+                                   n, half_ndim, t[j-1], dt, n_sub,
+                                   &cs[0], &ds[0], &tmp_w[0, 0],
+                                   &x[0, 0], &grad[0, 0])
+
+                if has_reductions:
+                    for i in range(n):
+                        reductions_update(&red, i, t[j], &tmp_w[i, 0])
+
+                if store_all and (j % save_every == 0 or j == ntimes - 1):
                     for k in range(ndim):
-                        all_w[j, i, k] = tmp_w[i, k]
+                        for i in range(n):
+                            all_w[k, (j + save_every - 1) // save_every - s0, i] = tmp_w[i, k]
 
-    if store_all:
-        return np.asarray(t), np.asarray(all_w)
+        if mmap is not None:
+            mmap[:, s0:s1, :] = np.asarray(all_w)[:, :s1 - s0]
+
+        s0 = s1
+
+    if mmap is not None:
+        return np.asarray(t)[save_idx], mmap
+    elif store_all:
+        return np.asarray(t)[save_idx], np.asarray(all_w)
     else:
-        return np.asarray(t[-1:]), np.asarray(tmp_w)
+        return np.asarray(t[-1:]), np.asarray(tmp_w).T
 
 
 # -------------------------------------------------------------------------------------
 # N-body stuff - TODO: to be moved, because this is a HACK!
 
-cdef void c_ruth4_step_nbody(
-    CPotential *p, int half_ndim, double t, double dt,
-    CPotential **pots, double *w_nbody, int nbody, int nbody_i,
-    double *cs, double *ds,
-    double *w, double *grad
-) nogil:
-    cdef:
-        int j, k
-
-    for j in range(4):
-        for k in range(half_ndim):
-             grad[k] = 0.
+# The gradient for c_composition_step() of a particle in the external
+#   potential plus the potentials of the other particles
+ctypedef struct NBodyGradient:
+    CPotential *p
+    CPotential **pots
+    double *w_nbody
+    int nbody
+    int nbody_i
+    int half_ndim
 
-        c_gradient(p, t, w, grad)
-        c_nbody_gradient_symplectic(pots, t, w, w_nbody, nbody, nbody_i, half_ndim, grad)
+cdef void c_nbody_gradient(void *args, double t, double *q, int n,
+                           double *grad) noexcept nogil:
+    cdef NBodyGradient *a = <NBodyGradient *>args
 
-        for k in range(half_ndim):
-            w[half_ndim + k] = w[half_ndim + k] - ds[j] * grad[k] * dt
-            w[k] = w[k] + cs[j] * w[half_ndim + k] * dt
+    c_gradient(a.p, t, q, grad)
+    c_nbody_gradient_symplectic(a.pots, t, q, a.w_nbody, a.nbody, a.nbody_i,
+                                a.half_ndim, grad)
 
 cpdef ruth4_integrate_nbody(hamiltonian, double [:, ::1] w0, double[::1] t,
-                            list particle_potentials, int store_all=1):
+                            list particle_potentials, int store_all=1,
+                            int save_every=1):
     """
     CAUTION: Interpretation of axes is different here! We need the
     arrays to be C ordered and easy to iterate over, so here the
     axes are (norbits, ndim).
+
+    With ``save_every > 1`` and ``store_all``, only every ``save_every``-th
+    time step (and the final one) is stored.
     """
 
     if not hamiltonian.c_enabled:
@@ -168,6 +289,20 @@ cpdef ruth4_integrate_nbody(hamiltonian, double [:, ::1] w0, double[::1] t,
             f"not {hamiltonian.frame.__class__.__name__}"
         )
 
+    return composition_integrate_nbody(
+        hamiltonian, w0, t, particle_potentials,
+        Ruth4Integrator._cs, Ruth4Integrator._ds, store_all, save_every)
+
+cdef composition_integrate_nbody(hamiltonian, double [:, ::1] w0,
+                                 double[::1] t, list particle_potentials,
+                                 list py_cs, list py_ds,
+                                 int store_all, int save_every):
+    """
+    Integrate the bodies with the composition scheme with drift and kick
+    coefficients ``py_cs`` and ``py_ds``. The other arguments are the same as
+    for ``ruth4_integrate_nbody()``.
+    """
+
     cdef:
         # temporary scalars
         int i, j, k
@@ -178,25 +313,14 @@ cpdef ruth4_integrate_nbody(hamiltonian, double [:, ::1] w0, double[::1] t,
         int ntimes = len(t)
         double dt = t[1]-t[0]
 
-         # Integrator coefficients
-        double two_13 = 2 ** (1./3.)
-        double[::1] cs = np.array([
-            1. / (2. * (2. - two_13)),
-            (1. - two_13) / (2.*(2. - two_13)),
-            (1. - two_13) / (2.*(2. - two_13)),
-            1. / (2.*(2. - two_13))
-        ], dtype='f8')
-
-        double[::1] ds = np.array([
-            0.,
-            1. / (2. - two_13),
-            -two_13 / (2. - two_13),
-            1. / (2. - two_13)
-        ], dtype='f8')
+        # Integrator coefficients
+        int n_sub = len(py_cs)
+        double[::1] cs = np.array(py_cs, dtype='f8')
+        double[::1] ds = np.array(py_ds, dtype='f8')
 
         # temporary array containers
+        double[::1] x = np.zeros(half_ndim)
         double[::1] grad = np.zeros(half_ndim)
-        double[:, ::1] v_jm1_2 = np.zeros((n, half_ndim))
 
         # return arrays
         double[:, :, ::1] all_w
@@ -206,9 +330,12 @@ cpdef ruth4_integrate_nbody(hamiltonian, double [:, ::1] w0, double[::1] t,
         CPotential cp = (<CPotentialWrapper>(hamiltonian.potential.c_instance)).cpotential
         CPotential *c_particle_potentials[MAX_NBODY]
         unsigned nbody = 0
+        NBodyGradient args
+
+    save_idx = _save_every_indices(ntimes, save_every)
 
     if store_all:
-        all_w = np.zeros((ntimes, n, ndim))
+        all_w = np.zeros((len(save_idx), n, ndim))
 
         # save initial conditions
         all_w[0, :, :] = w0.copy()
@@ -223,22 +350,27 @@ cpdef ruth4_integrate_nbody(hamiltonian, double [:, ::1] w0, double[::1] t,
 
     tmp_w = w0.copy()
 
+    args.p = &cp
+    args.pots = &c_particle_potentials[0]
+    args.w_nbody = &tmp_w[0, 0]
+    args.nbody = nbody
+    args.half_ndim = half_ndim
+
     with nogil:
 
         for j in range(1, ntimes, 1):
             for i in range(n):
-                c_ruth4_step_nbody(
-                    &cp, half_ndim, t[j], dt,
-                    &c_particle_potentials[0], &tmp_w[0, 0], nbody, i,
-                    &cs[0], &ds[0],
-                    &tmp_w[i, 0], &grad[0]
-                )
-
-                if store_all:
+                args.nbody_i = i
+                c_composition_step(c_nbody_gradient, &args,
+                                   1, half_ndim, t[j-1], dt, n_sub,
+                                   &cs[0], &ds[0], &tmp_w[i, 0],
+                                   &x[0], &grad[0])
+
+                if store_all and (j % save_every == 0 or j == ntimes - 1):
                     for k in range(ndim):
-                        all_w[j, i, k] = tmp_w[i, k]
+                        all_w[(j + save_every - 1) // save_every, i, k] = tmp_w[i, k]
 
     if store_all:
-        return np.asarray(t), np.asarray(all_w)
+        return np.asarray(t)[save_idx], np.asarray(all_w)
     else:
         return np.asarray(t[-1:]), np.asarray(tmp_w)
@@ -0,0 +1,151 @@
+#include <math.h>
+#include "events.h"
+
+#define EVENT_MAX_ITER 100
+
+static double event_function(EventRecorder *rec, int e, double *w) {
+    int k;
+    int ndim = rec->ndim;
+    int half_ndim = ndim / 2;
+    double g = 0.;
+
+    switch (rec->kind[e]) {
+        case EVENT_RADIAL:
+            for (k=0; k < half_ndim; k++)
+                g = g + w[k] * w[half_ndim + k];
+            break;
+
+        case EVENT_ZMAX:
+            g = w[2] * w[half_ndim + 2];
+            break;
+
+        default:
+            g = rec->offset[e];
+            for (k=0; k < ndim; k++)
+                g = g + rec->coeff[e*ndim + k] * w[k];
+            break;
+    }
+
+    return g;
+}
+
+static int event_crossed(int direction, double g0, double g1) {
+    if (direction >= 0 && g0 < 0 && g1 >= 0)
+        return 1;
+    if (direction <= 0 && g0 > 0 && g1 <= 0)
+        return 1;
+    return 0;
+}
+
+static double event_locate(EventRecorder *rec, int e, double ta, double ga,
+                           double tb, double gb, double *w,
+                           EventInterpolant interp, void *data) {
+    /*
+        Finds the time of the root of event function e in [ta, tb], where it
+        changes sign, with the Illinois variant of regula falsi. The
+        interpolated phase-space position at the root is stored in w.
+    */
+    int i, side = 0;
+    double t = tb, g;
+    double tol = 1e-14 * (fabs(ta) + fabs(tb)) + 1e-15 * fabs(tb - ta);
+
+    for (i=0; i < EVENT_MAX_ITER; i++) {
+        t = (ta*gb - tb*ga) / (gb - ga);
+        interp(t, w, data);
+        g = event_function(rec, e, w);
+
+        if ((g == 0.) || (fabs(tb - ta) <= tol))
+            return t;
+
+        if ((g > 0) == (gb > 0)) {
+            tb = t;
+            gb = g;
+            if (side == -1)
+                ga = ga / 2.;
+            side = -1;
+        } else {
+            ta = t;
+            ga = g;
+            if (side == 1)
+                gb = gb / 2.;
+            side = 1;
+        }
+    }
+
+    return t;
+}
+
+void events_init(EventRecorder *rec, int orbit, double *w) {
+    /*
+        Evaluates the event functions at the initial conditions of an orbit.
+    */
+    int e;
+    for (e=0; e < rec->n_events; e++)
+        rec->g_prev[orbit*rec->n_events + e] = event_function(rec, e, w);
+}
+
+void events_check(EventRecorder *rec, int orbit, double t0, double t1,
+                  double *w1, EventInterpolant interp, void *data) {
+    /*
+        Checks for events of an orbit in a step from t0 to t1, where w1 is the
+        phase-space position at t1, and stores the times and positions of any
+        events found.
+    */
+    int e, k;
+    int ndim = rec->ndim;
+    int n_events = rec->n_events;
+    long ix, c;
+    double g0, g1, t;
+    double w[ndim];
+
+    for (e=0; e < n_events; e++) {
+        ix = orbit*n_events + e;
+        g0 = rec->g_prev[ix];
+        g1 = event_function(rec, e, w1);
+        rec->g_prev[ix] = g1;
+
+        if (!event_crossed(rec->direction[e], g0, g1))
+            continue;
+
+        c = rec->count[ix];
+        rec->count[ix] = c + 1;
+        if (c >= rec->max_events)
+            continue;
+
+        if (g1 == 0.) {
+            t = t1;
+            for (k=0; k < ndim; k++)
+                w[k] = w1[k];
+        } else {
+            t = event_locate(rec, e, t0, g0, t1, g1, &w[0], interp, data);
+        }
+
+        rec->t_out[ix*rec->max_events + c] = t;
+        for (k=0; k < ndim; k++)
+            rec->w_out[(ix*rec->max_events + c)*ndim + k] = w[k];
+    }
+}
+
+void hermite_interpolant(double t, double *w, void *data) {
+    /*
+        Cubic Hermite interpolation of the positions (from the positions and
+        velocities) and of the velocities (from the velocities and
+        accelerations) at the ends of a step.
+    */
+    HermiteData *d = (HermiteData *)data;
+    int k;
+    int n = d->half_ndim;
+    double h = d->t1 - d->t0;
+    double s = (t - d->t0) / h;
+    double h00 = (1 + 2*s) * (1 - s) * (1 - s);
+    double h10 = s * (1 - s) * (1 - s);
+    double h01 = s * s * (3 - 2*s);
+    double h11 = s * s * (s - 1);
+
+    for (k=0; k < n; k++) {
+        w[k] = (h00 * d->w0[k] + h10 * h * d->w0[n + k] +
+                h01 * d->w1[k] + h11 * h * d->w1[n + k]);
+        w[n + k] = (h00 * d->w0[n + k] - h10 * h * d->grad0[k] +
+                    h01 * d->w1[n + k] - h11 * h * d->grad1[k]);
+    }
+}
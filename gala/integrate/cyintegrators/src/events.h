@@ -0,0 +1,46 @@
+/*
+    Event detection during orbit integration. An event occurs when an event
+    function g(w) of the phase-space position of an orbit crosses zero in the
+    requested direction. After each integration step, the event functions are
+    evaluated at the new position and compared to their values at the
+    previous one; the times of any sign changes are then located by root
+    finding on an interpolant of the orbit within the step.
+*/
+
+/* event functions */
+#define EVENT_RADIAL 0  /* g = x . v, i.e. r dr/dt */
+#define EVENT_ZMAX 1    /* g = z vz, i.e. |z| d|z|/dt */
+#define EVENT_LINEAR 2  /* g = coeff . w + offset */
+
+/* Interpolates the phase-space position of an orbit at time t into w */
+typedef void (*EventInterpolant)(double t, double *w, void *data);
+
+typedef struct {
+    int n_events;     /* number of events */
+    int ndim;         /* phase-space dimensionality of an orbit */
+    int max_events;   /* maximum number of stored occurrences of each event */
+
+    int *kind;        /* (n_events,) event function, see above */
+    double *coeff;    /* (n_events, ndim) coefficients for EVENT_LINEAR */
+    double *offset;   /* (n_events,) offsets for EVENT_LINEAR */
+    int *direction;   /* (n_events,) 1: increasing, -1: decreasing, 0: both */
+
+    double *g_prev;   /* (norbits, n_events) event functions at the last step */
+    long *count;      /* (norbits, n_events) number of occurrences */
+    double *t_out;    /* (norbits, n_events, max_events) event times */
+    double *w_out;    /* (norbits, n_events, max_events, ndim) positions */
+} EventRecorder;
+
+/* Interpolant data for integrators that only provide the positions,
+   velocities, and accelerations at the ends of a step, e.g. leapfrog */
+typedef struct {
+    double t0, t1;
+    double *w0, *w1;         /* (ndim,) phase-space positions */
+    double *grad0, *grad1;   /* (ndim/2,) potential gradients */
+    int half_ndim;
+} HermiteData;
+
+extern void events_init(EventRecorder *rec, int orbit, double *w);
+extern void events_check(EventRecorder *rec, int orbit, double t0, double t1,
+                         double *w1, EventInterpolant interp, void *data);
+extern void hermite_interpolant(double t, double *w, void *data);
@@ -0,0 +1,90 @@
+#include <math.h>
+#include "reductions.h"
+
+static double reductions_energy(OrbitReducer *red, double t, double *w) {
+    return ((red->fr->energy)(t, red->fr->parameters, w, red->ndim / 2) +
+            c_potential(red->p, t, w));
+}
+
+void reductions_init(OrbitReducer *red, int orbit, double t, double *w) {
+    /*
+        Resets the statistics of an orbit, and stores its initial energy. The
+        initial conditions are not included in the statistics, so this should
+        be followed by a call to reductions_update().
+    */
+    int s;
+    double *out = &red->out[orbit * red->n_stats];
+
+    for (s=0; s < red->n_stats; s++) {
+        switch (red->kind[s]) {
+            case REDUCE_R_MIN:
+                out[s] = INFINITY;
+                break;
+
+            case REDUCE_R_MAX:
+            case REDUCE_Z_MAX:
+                out[s] = -INFINITY;
+                break;
+
+            case REDUCE_DE_SUM:
+            case REDUCE_DE_SQ_SUM:
+                red->E0[orbit] = reductions_energy(red, t, w);
+                out[s] = 0.;
+                break;
+
+            default:
+                out[s] = 0.;
+                break;
+        }
+    }
+}
+
+void reductions_update(OrbitReducer *red, int orbit, double t, double *w) {
+    /*
+        Updates the statistics of an orbit with its phase-space position w at
+        time t.
+    */
+    int s, k;
+    int half_ndim = red->ndim / 2;
+    double r, dE;
+    double *out = &red->out[orbit * red->n_stats];
+
+    for (s=0; s < red->n_stats; s++) {
+        switch (red->kind[s]) {
+            case REDUCE_R_MIN:
+            case REDUCE_R_MAX:
+                r = 0.;
+                for (k=0; k < half_ndim; k++)
+                    r = r + w[k] * w[k];
+                r = sqrt(r);
+
+                if (red->kind[s] == REDUCE_R_MIN)
+                    out[s] = fmin(out[s], r);
+                else
+                    out[s] = fmax(out[s], r);
+                break;
+
+            case REDUCE_Z_MAX:
+                out[s] = fmax(out[s], fabs(w[2]));
+                break;
+
+            case REDUCE_DE_SUM:
+            case REDUCE_DE_SQ_SUM:
+                dE = reductions_energy(red, t, w) - red->E0[orbit];
+                if (red->kind[s] == REDUCE_DE_SUM)
+                    out[s] = out[s] + dE;
+                else
+                    out[s] = out[s] + dE * dE;
+                break;
+
+            case REDUCE_LZ_SUM:
+                out[s] = out[s] + (w[0] * w[half_ndim + 1] -
+                                   w[1] * w[half_ndim]);
+                break;
+
+            case REDUCE_DENSITY_SUM:
+                out[s] = out[s] + c_density(red->p, t, w);
+                break;
+        }
+    }
+}
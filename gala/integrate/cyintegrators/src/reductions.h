@@ -0,0 +1,34 @@
+/*
+    Running statistics of orbits, accumulated during the integration so that
+    the orbits do not have to be stored. The statistics are updated with the
+    phase-space position of each orbit at every output time. Sums are
+    accumulated for the time averages, which are normalized by the number of
+    output times afterwards.
+*/
+
+#include "potential/src/cpotential.h"
+#include "frame/src/cframe.h"
+
+/* statistics */
+#define REDUCE_R_MIN 0         /* minimum spherical radius */
+#define REDUCE_R_MAX 1         /* maximum spherical radius */
+#define REDUCE_Z_MAX 2         /* maximum |z| */
+#define REDUCE_DE_SUM 3        /* sum of E - E0 */
+#define REDUCE_DE_SQ_SUM 4     /* sum of (E - E0)^2 */
+#define REDUCE_LZ_SUM 5        /* sum of Lz = x vy - y vx */
+#define REDUCE_DENSITY_SUM 6   /* sum of the density */
+
+typedef struct {
+    int n_stats;     /* number of statistics */
+    int ndim;        /* phase-space dimensionality of an orbit */
+    int *kind;       /* (n_stats,) statistic, see above */
+
+    CPotential *p;
+    CFrameType *fr;  /* used for the energy, together with p */
+
+    double *E0;      /* (norbits,) initial energies */
+    double *out;     /* (norbits, n_stats) statistics */
+} OrbitReducer;
+
+extern void reductions_init(OrbitReducer *red, int orbit, double t, double *w);
+extern void reductions_update(OrbitReducer *red, int orbit, double t, double *w);
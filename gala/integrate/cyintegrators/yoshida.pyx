@@ -0,0 +1,79 @@
+# cython: boundscheck=False
+# cython: nonecheck=False
+# cython: cdivision=True
+# cython: wraparound=False
+# cython: profile=False
+# cython: language_level=3
+
+""" Yoshida (6th and 8th order symplectic) integration in Cython. """
+
+# Project
+from .ruth4 cimport (composition_integrate_hamiltonian,
+                     composition_integrate_nbody)
+from ...potential.frame import StaticFrame
+from ..pyintegrators.yoshida import _yoshida_coefficients
+
+
+cpdef yoshida_integrate_hamiltonian(hamiltonian,
+                                    double[:, ::1] w0,
+                                    double[::1] t,
+                                    int order=6,
+                                    int store_all=1, reductions=None,
+                                    int save_every=1, mmap=None,
+                                    int chunk_size=0):
+    """
+    CAUTION: Interpretation of axes is different here! We need the
+    arrays to be C ordered and easy to iterate over, so here the
+    axes of the initial conditions are (norbits, ndim). As for
+    ``leapfrog_integrate_hamiltonian()``, the returned array has gala's usual
+    axis order, (ndim, ntimes, norbits), or (ndim, norbits) without
+    ``store_all``.
+
+    ``order`` is the order of the Yoshida integrator, 6 or 8. The other
+    arguments are the same as for ``ruth4_integrate_hamiltonian()``.
+    """
+
+    if not hamiltonian.c_enabled:
+        raise TypeError("Input Hamiltonian object does not support C-level access.")
+
+    if not isinstance(hamiltonian.frame, StaticFrame):
+        raise TypeError(
+            "Yoshida integration is currently only supported for StaticFrame, "
+            f"not {hamiltonian.frame.__class__.__name__}"
+        )
+
+    cs, ds = _yoshida_coefficients(order)
+    return composition_integrate_hamiltonian(
+        hamiltonian, w0, t, cs, ds, store_all, reductions, save_every, mmap,
+        chunk_size)
+
+
+# -------------------------------------------------------------------------------------
+# N-body stuff - TODO: to be moved, because this is a HACK!
+
+cpdef yoshida_integrate_nbody(hamiltonian, double [:, ::1] w0, double[::1] t,
+                              list particle_potentials, int order=6,
+                              int store_all=1, int save_every=1):
+    """
+    CAUTION: Interpretation of axes is different here! We need the
+    arrays to be C ordered and easy to iterate over, so here the
+    axes are (norbits, ndim).
+
+    ``order`` is the order of the Yoshida integrator, 6 or 8. With
+    ``save_every > 1`` and ``store_all``, only every ``save_every``-th time
+    step (and the final one) is stored.
+    """
+
+    if not hamiltonian.c_enabled:
+        raise TypeError("Input Hamiltonian object does not support C-level access.")
+
+    if not isinstance(hamiltonian.frame, StaticFrame):
+        raise TypeError(
+            "Yoshida integration is currently only supported for StaticFrame, "
+            f"not {hamiltonian.frame.__class__.__name__}"
+        )
+
+    cs, ds = _yoshida_coefficients(order)
+    return composition_integrate_nbody(
+        hamiltonian, w0, t, particle_potentials, cs, ds, store_all,
+        save_every)
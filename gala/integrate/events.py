@@ -0,0 +1,192 @@
+""" Events that can be detected during orbit integration with the Cython
+    integrators.
+"""
+
+# Third-party
+import astropy.units as u
+import numpy as np
+
+__all__ = ["LinearEvent", "EventBuffers"]
+
+# Event function types, see cyintegrators/src/events.h
+_EVENT_RADIAL = 0
+_EVENT_ZMAX = 1
+_EVENT_LINEAR = 2
+
+# name: (event function, direction)
+_builtin_events = {
+    "pericenter": (_EVENT_RADIAL, 1),
+    "apocenter": (_EVENT_RADIAL, -1),
+    "zmax": (_EVENT_ZMAX, -1),
+}
+
+
+class LinearEvent:
+    """
+    An event that occurs when a linear combination of the phase-space
+    coordinates of an orbit crosses a given value, i.e. when
+    ``coeff . w = value``.
+
+    Parameters
+    ----------
+    coeff : array_like
+        The coefficients of the phase-space coordinates (positions followed by
+        velocities) in the unit system of the Hamiltonian.
+    value : numeric (optional)
+        The value that the linear combination crosses. Default is 0.
+    direction : int (optional)
+        Only detect crossings where the linear combination is increasing (1),
+        decreasing (-1), or both (0). Default is 0.
+    name : str (optional)
+        The key of the event in the returned event dictionary. Default is
+        ``"linear"``.
+    """
+
+    def __init__(self, coeff, value=0.0, direction=0, name=None):
+        self.coeff = np.array(coeff, dtype=np.float64)
+        if self.coeff.ndim != 1:
+            raise ValueError("coeff must be a one-dimensional array.")
+
+        self.value = float(value)
+
+        if direction not in (-1, 0, 1):
+            raise ValueError(f"direction must be -1, 0, or 1, got {direction}")
+        self.direction = int(direction)
+
+        if name is None:
+            name = "linear"
+        self.name = str(name)
+
+
+def _z_crossing(ndim):
+    coeff = np.zeros(2 * ndim)
+    coeff[2] = 1.0
+    return LinearEvent(coeff, name="z_crossing")
+
+
+class EventBuffers:
+    """
+    The event specifications and output buffers for detecting events during
+    the integration of ``norbits`` orbits, in the layout expected by the
+    Cython integrators.
+
+    Parameters
+    ----------
+    events : str, `~gala.integrate.events.LinearEvent`, iterable
+        The events to detect. Built-in events are ``"pericenter"`` and
+        ``"apocenter"`` (radial turning points), ``"zmax"`` (turning points
+        of ``|z|``), and ``"z_crossing"`` (crossings of the ``z=0`` plane).
+    norbits : int
+        The number of orbits.
+    ndim : int
+        The phase-space dimensionality.
+    max_events : int (optional)
+        The maximum number of occurrences of each event to store per orbit.
+    """
+
+    def __init__(self, events, norbits, ndim, max_events=100):
+        if isinstance(events, (str, LinearEvent)):
+            events = [events]
+
+        max_events = int(max_events)
+        if max_events < 1:
+            raise ValueError(
+                f"max_events must be a positive integer, got {max_events}"
+            )
+
+        half_ndim = ndim // 2
+        n_events = len(events)
+        if n_events == 0:
+            raise ValueError("At least one event must be specified.")
+
+        self.names = []
+        self.kind = np.zeros(n_events, dtype=np.intc)
+        self.direction = np.zeros(n_events, dtype=np.intc)
+        self.coeff = np.zeros((n_events, ndim))
+        self.offset = np.zeros(n_events)
+
+        for i, event in enumerate(events):
+            if isinstance(event, str):
+                if event not in _builtin_events and event != "z_crossing":
+                    raise ValueError(
+                        f"Unknown event '{event}'. Built-in events are: "
+                        + ", ".join(list(_builtin_events) + ["z_crossing"])
+                    )
+
+                if event in ("zmax", "z_crossing") and half_ndim < 3:
+                    raise ValueError(f"The '{event}' event requires 3D orbits.")
+
+                if event == "z_crossing":
+                    event = _z_crossing(half_ndim)
+
+                else:
+                    self.kind[i], self.direction[i] = _builtin_events[event]
+                    self.names.append(event)
+                    continue
+
+            if not isinstance(event, LinearEvent):
+                raise TypeError(
+                    "Events must be specified as the name of a built-in event "
+                    f"or as LinearEvent instances, not {type(event)}"
+                )
+
+            if len(event.coeff) != ndim:
+                raise ValueError(
+                    f"The coefficients of event '{event.name}' must have length "
+                    f"{ndim}, got {len(event.coeff)}"
+                )
+
+            self.kind[i] = _EVENT_LINEAR
+            self.direction[i] = event.direction
+            self.coeff[i] = event.coeff
+            self.offset[i] = -event.value
+            self.names.append(event.name)
+
+        if len(set(self.names)) != len(self.names):
+            raise ValueError(f"Event names must be unique, got {self.names}")
+
+        self.g_prev = np.zeros((norbits, n_events))
+        self.count = np.zeros((norbits, n_events), dtype=np.int_)
+        self.t_out = np.full((norbits, n_events, max_events), np.nan)
+        self.w_out = np.full((norbits, n_events, max_events, ndim), np.nan)
+
+    def results(self, units, shape=None):
+        """
+        Package the detected events into a dictionary with one item per
+        event, each containing the times ``t``, phase-space positions ``w``,
+        and numbers of occurrences ``n`` of the event for each orbit. Unused
+        slots (beyond the number of occurrences) are filled with NaN, and
+        only the first ``max_events`` occurrences are stored.
+
+        Parameters
+        ----------
+        units : `~gala.units.UnitSystem`
+            The unit system of the integration.
+        shape : tuple (optional)
+            The shape of the orbit axes of the output arrays. By default,
+            ``(norbits,)``.
+        """
+        from gala.dynamics import PhaseSpacePosition
+
+        norbits, n_events, max_events, ndim = self.w_out.shape
+        if shape is None:
+            shape = (norbits,)
+        shape = tuple(shape)
+
+        try:
+            tunit = units["time"]
+        except (TypeError, AttributeError):
+            tunit = u.dimensionless_unscaled
+
+        results = {}
+        for i, name in enumerate(self.names):
+            t = self.t_out[:, i].reshape(shape + (max_events,))
+            w = np.moveaxis(self.w_out[:, i], -1, 0)
+            w = w.reshape((ndim,) + shape + (max_events,))
+            results[name] = dict(
+                t=t * tunit,
+                w=PhaseSpacePosition.from_w(w, units=units),
+                n=self.count[:, i].reshape(shape),
+            )
+
+        return results
@@ -2,3 +2,4 @@ from .dopri853 import DOPRI853Integrator
 from .rk5 import RK5Integrator
 from .leapfrog import LeapfrogIntegrator
 from .ruth4 import Ruth4Integrator
+from .yoshida import Yoshida6Integrator, Yoshida8Integrator
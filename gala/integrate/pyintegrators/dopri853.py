@@ -1,7 +1,8 @@
 """ Wrapper around SciPy DOPRI853 integrator. """
 
 # Third-party
-from scipy.integrate import ode
+import numpy as np
+from scipy.integrate import ode, solve_ivp
 
 # Project
 from ..core import Integrator
@@ -33,6 +34,28 @@ class DOPRI853Integrator(Integrator):
         integrand function.
     progress : bool (optional)
         Display a progress bar during integration.
+    independent : bool (optional)
+        By default, all orbits are integrated together as one system of
+        equations, so they share the step size required by the hardest orbit.
+        If True, each orbit is instead integrated separately with its own
+        adaptive step size. In the Cython implementation, the orbits can then
+        also be distributed over ``n_threads`` threads.
+    continuous : bool (optional)
+        By default, the integrator is restarted at each output time. If True,
+        the orbits are instead integrated in one pass across the full time
+        range, keeping the adaptive step size, and the output is interpolated
+        with the dense output of the integrator. In the Python implementation,
+        this uses `scipy.integrate.solve_ivp`, which only supports the
+        ``atol``, ``rtol``, ``first_step``, and ``max_step`` keyword
+        arguments.
+    n_threads : int (optional)
+        The number of threads to integrate independent orbits with. This is
+        only used by the Cython implementation, i.e. when integrating orbits
+        in a C potential with
+        `~gala.potential.hamiltonian.Hamiltonian.integrate_orbit`.
+    **kwargs
+        Any other keyword arguments are passed to the SciPy ``dop853``
+        integrator, e.g., ``atol``, ``rtol``, or ``nsteps``.
 
     """
 
@@ -43,11 +66,29 @@ class DOPRI853Integrator(Integrator):
         func_units=None,
         progress=False,
         store_all=True,
+        independent=False,
+        continuous=False,
+        n_threads=None,
         **kwargs
     ):
         super(DOPRI853Integrator, self).__init__(
             func, func_args, func_units, progress=progress, store_all=store_all
         )
+        self.independent = bool(independent)
+        self.continuous = bool(continuous)
+        self.n_threads = n_threads
+
+        if self.continuous:
+            unsupported = set(kwargs) - {"atol", "rtol", "first_step", "max_step"}
+            if unsupported:
+                raise ValueError(
+                    "Unsupported keyword arguments for continuous integration: "
+                    f"{', '.join(sorted(unsupported))}"
+                )
+
+            # use the same default tolerances as the SciPy dop853 integrator
+            kwargs.setdefault("atol", 1e-12)
+            kwargs.setdefault("rtol", 1e-6)
         self._ode_kwargs = kwargs
 
     def run(self, w0, mmap=None, **time_spec):
@@ -57,42 +98,78 @@ class DOPRI853Integrator(Integrator):
         n_steps = len(times) - 1
 
         w0, arr_w0, ws = self._prepare_ws(w0, mmap, n_steps)
-        _size_1d = 2 * self.ndim * self.norbits
+
+        # create the return arrays
+        if self.store_all:
+            ws[:, 0] = arr_w0
+        else:
+            ws = np.zeros((2 * self.ndim, 1, self.norbits))
+
+        if self.independent:
+            # show progress over orbits rather than over time steps
+            range_ = self._get_range_func()
+            for i in range_(self.norbits):
+                self._run_group(arr_w0, ws, times, slice(i, i + 1),
+                                progress=False)
+        else:
+            self._run_group(arr_w0, ws, times, slice(None))
+
+        if not self.store_all:
+            times = times[-1:]
+
+        return self._handle_output(w0, times, ws)
+
+    def _run_group(self, arr_w0, ws, times, group, progress=True):
+        """
+        Integrate the orbits selected by ``group`` (a slice along the orbit
+        axis) together as one system of equations, and store the output in
+        ``ws``.
+        """
+        n_steps = len(times) - 1
+        w0 = arr_w0[:, group]
+        norbits = w0.shape[1]
+        _size_1d = 2 * self.ndim * norbits
 
         # need this to do resizing, and to handle func_args because there is some
         #   issue with the args stuff in scipy...
         def func_wrapper(t, x):
-            _x = x.reshape((2 * self.ndim, self.norbits))
+            _x = x.reshape((2 * self.ndim, norbits))
             val = self.F(t, _x, *self._func_args)
             return val.reshape((_size_1d,))
 
+        if self.continuous:
+            sol = solve_ivp(
+                func_wrapper,
+                (times[0], times[-1]),
+                w0.reshape((_size_1d,)),
+                method="DOP853",
+                t_eval=times if self.store_all else times[-1:],
+                **self._ode_kwargs
+            )
+            if not sol.success:
+                raise RuntimeError(f"ODE integration failed: {sol.message}")
+
+            outy = sol.y.T.reshape(-1, 2 * self.ndim, norbits)
+            ws[:, :, group] = np.moveaxis(outy, 0, 1)
+            return
+
         self._ode = ode(func_wrapper, jac=None)
         self._ode = self._ode.set_integrator("dop853", **self._ode_kwargs)
 
-        # create the return arrays
-        if self.store_all:
-            ws[:, 0] = arr_w0
-
-        # make 1D
-        arr_w0 = arr_w0.reshape((_size_1d,))
-
         # set the initial conditions
-        self._ode.set_initial_value(arr_w0, times[0])
+        self._ode.set_initial_value(w0.reshape((_size_1d,)), times[0])
 
         # Integrate the ODE(s) across each delta_t timestep
-        range_ = self._get_range_func()
+        range_ = self._get_range_func() if progress else range
         for k in range_(1, n_steps + 1):
             self._ode.integrate(times[k])
             outy = self._ode.y
 
             if self.store_all:
-                ws[:, k] = outy.reshape(2 * self.ndim, self.norbits)
+                ws[:, k, group] = outy.reshape(2 * self.ndim, norbits)
 
             if not self._ode.successful():
                 raise RuntimeError("ODE integration failed!")
 
         if not self.store_all:
-            ws = outy.reshape(2 * self.ndim, 1, self.norbits)
-            times = times[-1:]
-
-        return self._handle_output(w0, times, ws)
+            ws[:, 0, group] = outy.reshape(2 * self.ndim, norbits)
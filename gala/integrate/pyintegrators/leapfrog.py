@@ -89,9 +89,25 @@ class LeapfrogIntegrator(Integrator):
     func_units : `~gala.units.UnitSystem` (optional)
         If using units, this is the unit system assumed by the
         integrand function.
+    progress : bool (optional)
+        Display a progress bar during integration.
+    store_all : bool (optional)
+        Controls whether to store the phase-space position at all intermediate
+        timesteps. Default is True.
+    n_threads : int (optional)
+        The number of threads to integrate orbits with. This is only used by
+        the Cython implementation, i.e. when integrating orbits in a C
+        potential with `~gala.potential.hamiltonian.Hamiltonian.integrate_orbit`
+        and passing ``n_threads`` in ``Integrator_kwargs``.
 
     """
 
+    def __init__(self, func, func_args=(), func_units=None, progress=False,
+                 store_all=True, n_threads=None):
+        super().__init__(func, func_args=func_args, func_units=func_units,
+                         progress=progress, store_all=store_all)
+        self.n_threads = n_threads
+
     def step(self, t, x_im1, v_im1_2, dt):
         """
         Step forward the positions and velocities by the given timestep.
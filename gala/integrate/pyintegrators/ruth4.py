@@ -112,13 +112,19 @@ class Ruth4Integrator(Integrator):
             The timestep to move forward.
         """
 
+        # each substep is a kick by dj * dt followed by a drift by cj * dt,
+        # starting from the beginning of the step; kicks with a zero
+        # coefficient don't need a force evaluation
         w_i = w.copy()
+        t_i = t - dt
         for cj, dj in zip(self._cs, self._ds):
-            F_i = self.F(t, w_i, *self._func_args)
-            a_i = F_i[self.ndim:]
+            if dj != 0:
+                F_i = self.F(t_i, w_i, *self._func_args)
+                a_i = F_i[self.ndim:]
+                w_i[self.ndim:] += dj * a_i * dt
 
-            w_i[self.ndim:] += dj * a_i * dt
             w_i[: self.ndim] += cj * w_i[self.ndim:] * dt
+            t_i = t_i + cj * dt
 
         return w_i
 
@@ -0,0 +1,117 @@
+""" Higher-order symplectic integration by composition of leapfrog steps. """
+
+# Project
+from .ruth4 import Ruth4Integrator
+
+__all__ = ["Yoshida6Integrator", "Yoshida8Integrator"]
+
+# The weights of the leapfrog steps in the symmetric compositions of Yoshida
+# (1990), Physics Letters A, 150, 262: solution A for 6th order and solution D
+# for 8th order. Only the first half of each (symmetric) composition is given
+# here, starting from the outermost step; the weight of the central step makes
+# the weights sum to 1.
+_yoshida_half_weights = {
+    6: [0.784513610477560, 0.235573213359357, -1.17767998417887],
+    8: [
+        0.914844246229740,
+        0.253693336566229,
+        -0.144485223686048e1,
+        -0.158240635368243,
+        0.193813913762276e1,
+        -0.196061023297549e1,
+        0.102799849391985,
+    ],
+}
+
+
+def _yoshida_coefficients(order):
+    """
+    Return the drift (``cs``) and kick (``ds``) coefficients of the Yoshida
+    integrator of the given order, in the convention of
+    `~gala.integrate.Ruth4Integrator`: each substep is a kick by ``ds[i] * dt``
+    followed by a drift by ``cs[i] * dt``. The first kick coefficient is
+    always 0, so a step with ``m`` leapfrog stages needs ``m`` force
+    evaluations.
+    """
+    if order not in _yoshida_half_weights:
+        raise ValueError(
+            "Yoshida integrators are implemented for orders "
+            f"{sorted(_yoshida_half_weights)}, not {order}"
+        )
+
+    half = _yoshida_half_weights[order]
+    weights = half + [1 - 2 * sum(half)] + half[::-1]
+
+    # adjacent half drifts of the drift-kick-drift leapfrog stages merge
+    cs = [weights[0] / 2]
+    cs += [(w1 + w2) / 2 for w1, w2 in zip(weights[:-1], weights[1:])]
+    cs += [weights[-1] / 2]
+    ds = [0.0] + weights
+    return cs, ds
+
+
+class Yoshida6Integrator(Ruth4Integrator):
+    r"""
+    A 6th order symplectic integrator.
+
+    Each step is a symmetric composition of 7 leapfrog steps with the weights
+    of Yoshida (1990, solution A), so it needs 7 force evaluations. For a
+    given accuracy, this allows much larger timesteps than
+    `~gala.integrate.LeapfrogIntegrator` or
+    `~gala.integrate.Ruth4Integrator`, which is useful for long integrations
+    where the energy error matters.
+
+    .. seealso::
+
+        - Yoshida (1990), Physics Letters A, 150, 262
+        - https://en.wikipedia.org/wiki/Symplectic_integrator
+
+    The integrator is used in the same way as
+    `~gala.integrate.Ruth4Integrator`::
+
+        integrator = Yoshida6Integrator(acceleration)
+        orbit = integrator.run(w0=[1., 0.], dt=0.1, n_steps=1000)
+
+    Parameters
+    ----------
+    func : func
+        A callable object that computes the phase-space time derivatives
+        at a time and point in phase space.
+    func_args : tuple (optional)
+        Any extra arguments for the derivative function.
+    func_units : `~gala.units.UnitSystem` (optional)
+        If using units, this is the unit system assumed by the
+        integrand function.
+
+    """
+
+    _cs, _ds = _yoshida_coefficients(6)
+
+
+class Yoshida8Integrator(Ruth4Integrator):
+    r"""
+    An 8th order symplectic integrator.
+
+    Each step is a symmetric composition of 15 leapfrog steps with the
+    weights of Yoshida (1990, solution D), so it needs 15 force evaluations.
+    See `~gala.integrate.Yoshida6Integrator`.
+
+    .. seealso::
+
+        - Yoshida (1990), Physics Letters A, 150, 262
+        - https://en.wikipedia.org/wiki/Symplectic_integrator
+
+    Parameters
+    ----------
+    func : func
+        A callable object that computes the phase-space time derivatives
+        at a time and point in phase space.
+    func_args : tuple (optional)
+        Any extra arguments for the derivative function.
+    func_units : `~gala.units.UnitSystem` (optional)
+        If using units, this is the unit system assumed by the
+        integrand function.
+
+    """
+
+    _cs, _ds = _yoshida_coefficients(8)
@@ -0,0 +1,128 @@
+""" Running statistics of orbits that can be accumulated during orbit
+    integration with the Cython integrators.
+"""
+
+# Third-party
+import numpy as np
+
+__all__ = ["ReductionBuffers"]
+
+# Statistics, see cyintegrators/src/reductions.h
+_REDUCE_R_MIN = 0
+_REDUCE_R_MAX = 1
+_REDUCE_Z_MAX = 2
+_REDUCE_DE_SUM = 3
+_REDUCE_DE_SQ_SUM = 4
+_REDUCE_LZ_SUM = 5
+_REDUCE_DENSITY_SUM = 6
+
+# name: (statistic, minimum number of spatial dimensions)
+_builtin_reductions = {
+    "r_min": (_REDUCE_R_MIN, 1),
+    "r_max": (_REDUCE_R_MAX, 1),
+    "z_max": (_REDUCE_Z_MAX, 3),
+    "energy_error_mean": (_REDUCE_DE_SUM, 1),
+    "energy_error_rms": (_REDUCE_DE_SQ_SUM, 1),
+    "Lz_mean": (_REDUCE_LZ_SUM, 2),
+    "density_mean": (_REDUCE_DENSITY_SUM, 1),
+}
+
+
+class ReductionBuffers:
+    """
+    The statistics and output buffers for accumulating running statistics
+    during the integration of ``norbits`` orbits, in the layout expected by
+    the Cython integrators.
+
+    The statistics are computed from the phase-space positions of the orbits
+    at all output times (i.e. at every step for the fixed-step integrators),
+    including the initial conditions. The available statistics are:
+
+    - ``"r_min"``, ``"r_max"``: the minimum and maximum spherical radius
+    - ``"z_max"``: the maximum ``|z|``
+    - ``"energy_error_mean"``, ``"energy_error_rms"``: the mean and root mean
+      square of the change in energy relative to the initial energy
+    - ``"Lz_mean"``: the mean ``z`` component of the angular momentum
+    - ``"density_mean"``: the mean density of the potential along the orbit
+
+    Parameters
+    ----------
+    reductions : str, iterable
+        The names of the statistics to accumulate.
+    norbits : int
+        The number of orbits.
+    ndim : int
+        The phase-space dimensionality.
+    """
+
+    def __init__(self, reductions, norbits, ndim):
+        if isinstance(reductions, str):
+            reductions = [reductions]
+
+        self.names = list(reductions)
+        if len(self.names) == 0:
+            raise ValueError("At least one statistic must be specified.")
+
+        if len(set(self.names)) != len(self.names):
+            raise ValueError(f"Statistics must be unique, got {self.names}")
+
+        self.kind = np.zeros(len(self.names), dtype=np.intc)
+        for i, name in enumerate(self.names):
+            if name not in _builtin_reductions:
+                raise ValueError(
+                    f"Unknown statistic '{name}'. Available statistics are: "
+                    + ", ".join(_builtin_reductions)
+                )
+
+            self.kind[i], min_ndim = _builtin_reductions[name]
+            if ndim // 2 < min_ndim:
+                raise ValueError(
+                    f"The '{name}' statistic requires orbits with at least "
+                    f"{min_ndim} spatial dimensions."
+                )
+
+        self.ndim = int(ndim)
+        self.E0 = np.zeros(norbits)
+        self.out = np.zeros((norbits, len(self.names)))
+
+    def results(self, units, n_samples, shape=None):
+        """
+        Package the accumulated statistics into a dictionary of
+        `~astropy.units.Quantity` arrays, one per statistic.
+
+        Parameters
+        ----------
+        units : `~gala.units.UnitSystem`
+            The unit system of the integration.
+        n_samples : int
+            The number of phase-space positions per orbit that the statistics
+            were accumulated over, used to normalize the time averages.
+        shape : tuple (optional)
+            The shape of the output arrays. By default, ``(norbits,)``.
+        """
+        if shape is None:
+            shape = (self.out.shape[0],)
+
+        length = units["length"]
+        speed = length / units["time"]
+        result_units = {
+            _REDUCE_R_MIN: length,
+            _REDUCE_R_MAX: length,
+            _REDUCE_Z_MAX: length,
+            _REDUCE_DE_SUM: speed**2,
+            _REDUCE_DE_SQ_SUM: speed**2,
+            _REDUCE_LZ_SUM: length * speed,
+            _REDUCE_DENSITY_SUM: units["mass"] / length**3,
+        }
+
+        results = {}
+        for i, (name, kind) in enumerate(zip(self.names, self.kind)):
+            val = self.out[:, i]
+            if kind == _REDUCE_DE_SQ_SUM:
+                val = np.sqrt(val / n_samples)
+            elif kind in (_REDUCE_DE_SUM, _REDUCE_LZ_SUM, _REDUCE_DENSITY_SUM):
+                val = val / n_samples
+
+            results[name] = val.reshape(shape) * result_units[kind]
+
+        return results
@@ -1,6 +1,8 @@
 from collections import defaultdict
 from distutils.core import Extension
 
+from extension_helpers import add_openmp_flags_if_available
+
 
 def get_extensions():
     import numpy as np
@@ -17,8 +19,12 @@ def get_extensions():
     cfg["include_dirs"].append("gala/dynamics/nbody")
     cfg["extra_compile_args"].append("--std=gnu99")
     cfg["sources"].append("gala/integrate/cyintegrators/leapfrog.pyx")
+    cfg["sources"].append("gala/integrate/cyintegrators/src/events.c")
+    cfg["sources"].append("gala/integrate/cyintegrators/src/reductions.c")
     cfg["sources"].append("gala/potential/potential/src/cpotential.c")
-    exts.append(Extension("gala.integrate.cyintegrators.leapfrog", **cfg))
+    ext = Extension("gala.integrate.cyintegrators.leapfrog", **cfg)
+    add_openmp_flags_if_available(ext)
+    exts.append(ext)
 
     cfg = defaultdict(list)
     cfg["include_dirs"].append(np.get_include())
@@ -29,7 +35,11 @@ def get_extensions():
     cfg["sources"].append("gala/potential/potential/src/cpotential.c")
     cfg["sources"].append("gala/integrate/cyintegrators/dop853.pyx")
     cfg["sources"].append("gala/integrate/cyintegrators/dopri/dop853.c")
-    exts.append(Extension("gala.integrate.cyintegrators.dop853", **cfg))
+    cfg["sources"].append("gala/integrate/cyintegrators/src/events.c")
+    cfg["sources"].append("gala/integrate/cyintegrators/src/reductions.c")
+    ext = Extension("gala.integrate.cyintegrators.dop853", **cfg)
+    add_openmp_flags_if_available(ext)
+    exts.append(ext)
 
     cfg = defaultdict(list)
     cfg["include_dirs"].append(np.get_include())
@@ -38,7 +48,17 @@ def get_extensions():
     cfg["include_dirs"].append("gala/dynamics/nbody")
     cfg["extra_compile_args"].append("--std=gnu99")
     cfg["sources"].append("gala/integrate/cyintegrators/ruth4.pyx")
+    cfg["sources"].append("gala/integrate/cyintegrators/src/reductions.c")
     cfg["sources"].append("gala/potential/potential/src/cpotential.c")
     exts.append(Extension("gala.integrate.cyintegrators.ruth4", **cfg))
 
+    cfg = defaultdict(list)
+    cfg["include_dirs"].append(np.get_include())
+    cfg["include_dirs"].append(mac_incl_path)
+    cfg["include_dirs"].append("gala/potential")
+    cfg["include_dirs"].append("gala/dynamics/nbody")
+    cfg["extra_compile_args"].append("--std=gnu99")
+    cfg["sources"].append("gala/integrate/cyintegrators/yoshida.pyx")
+    exts.append(Extension("gala.integrate.cyintegrators.yoshida", **cfg))
+
     return exts
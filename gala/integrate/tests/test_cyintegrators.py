@@ -3,6 +3,7 @@
 """
 
 # Standard library
+from functools import partial
 from itertools import product
 import time
 
@@ -17,14 +18,19 @@ from ..pyintegrators.dopri853 import DOPRI853Integrator
 from ..cyintegrators.dop853 import dop853_integrate_hamiltonian
 from ..pyintegrators.ruth4 import Ruth4Integrator
 from ..cyintegrators.ruth4 import ruth4_integrate_hamiltonian
+from ..pyintegrators.yoshida import Yoshida6Integrator, Yoshida8Integrator
+from ..cyintegrators.yoshida import yoshida_integrate_hamiltonian
 from ...potential import Hamiltonian, HernquistPotential
 from ...units import galactic
 
-integrator_list = [LeapfrogIntegrator, DOPRI853Integrator, Ruth4Integrator]
+integrator_list = [LeapfrogIntegrator, DOPRI853Integrator, Ruth4Integrator,
+                   Yoshida6Integrator, Yoshida8Integrator]
 func_list = [
     leapfrog_integrate_hamiltonian,
     dop853_integrate_hamiltonian,
     ruth4_integrate_hamiltonian,
+    partial(yoshida_integrate_hamiltonian, order=6),
+    partial(yoshida_integrate_hamiltonian, order=8),
 ]
 
 _list = []
@@ -57,7 +63,6 @@ def test_compare_to_py(Integrator, integrate_func, dt):
     t = np.linspace(0, dt * n_steps, n_steps + 1)
 
     cy_t, cy_w = integrate_func(H, cy_w0, t)
-    cy_w = np.rollaxis(cy_w, -1)
 
     integrator = Integrator(F)
     orbit = integrator.run(py_w0, dt=dt, n_steps=n_steps)
@@ -93,7 +98,168 @@ def test_store_all(integrate_func, dt):
     t_f, w_f = integrate_func(H, w0, t, store_all=False)
 
     assert t_all[-1] == t_f[0]
-    assert np.allclose(w_all[-1], w_f)
+    assert np.allclose(w_all[:, -1], w_f)
+
+
+@pytest.mark.parametrize("n_threads", [2, 4])
+def test_leapfrog_n_threads(n_threads):
+    p = HernquistPotential(m=1e11, c=0.5, units=galactic)
+    H = Hamiltonian(potential=p)
+
+    rnd = np.random.default_rng(42)
+    w0 = np.hstack((rnd.normal(0, 10.0, size=(100, 3)),
+                    rnd.normal(0, 0.2, size=(100, 3))))
+    t = np.linspace(0, 256.0, 256 + 1)
+
+    t1, w1 = leapfrog_integrate_hamiltonian(H, w0, t)
+    tn, wn = leapfrog_integrate_hamiltonian(H, w0, t, n_threads=n_threads)
+
+    # orbits are independent, so the result must not depend on the threading
+    assert np.all(t1 == tn)
+    assert np.all(w1 == wn)
+
+    _, w_f = leapfrog_integrate_hamiltonian(H, w0, t, store_all=False,
+                                            n_threads=n_threads)
+    assert np.all(w1[:, -1] == w_f)
+
+    with pytest.raises(ValueError):
+        leapfrog_integrate_hamiltonian(H, w0, t, n_threads=0)
+
+
+@pytest.mark.parametrize(
+    ["integrate_func", "save_every", "chunk_size"],
+    list(product([leapfrog_integrate_hamiltonian, ruth4_integrate_hamiltonian,
+                  yoshida_integrate_hamiltonian],
+                 [1, 3], [0, 1, 7]))
+)
+def test_mmap(tmpdir, integrate_func, save_every, chunk_size):
+    p = HernquistPotential(m=1e11, c=0.5, units=galactic)
+    H = Hamiltonian(potential=p)
+
+    rnd = np.random.default_rng(42)
+    w0 = np.hstack((rnd.normal(0, 10.0, size=(5, 3)),
+                    rnd.normal(0, 0.2, size=(5, 3))))
+    t = np.linspace(0, 100.0, 100 + 1)
+
+    t1, w1 = integrate_func(H, w0, t, save_every=save_every)
+
+    mmap = np.memmap(str(tmpdir / "orbits.dat"), mode="w+", dtype=float,
+                     shape=(6, len(t1), len(w0)))
+    t2, w2 = integrate_func(H, w0, t, save_every=save_every, mmap=mmap,
+                            chunk_size=chunk_size)
+
+    assert w2 is mmap
+    assert np.all(t1 == t2)
+    assert np.all(w1 == mmap)
+
+    with pytest.raises(ValueError):
+        integrate_func(H, w0, t, mmap=np.zeros((6, 10, len(w0))))
+
+    with pytest.raises(ValueError):
+        integrate_func(H, w0, t, store_all=False,
+                       mmap=np.zeros((6, len(t), len(w0))))
+
+
+def test_dop853_independent():
+    p = HernquistPotential(m=1e11, c=0.5, units=galactic)
+    H = Hamiltonian(potential=p)
+
+    # a tightly bound orbit, which needs small steps, and a loosely bound one
+    w0 = np.array(
+        [
+            [0.5, 0.0, 0.0, 0.0, 0.3, 0.05],
+            [30.0, 0.0, 0.0, 0.0, 0.1, 0.0],
+        ]
+    )
+    t = np.linspace(0, 1024.0, 128 + 1)
+
+    _, w_shared = dop853_integrate_hamiltonian(H, w0, t)
+
+    n_steps = np.zeros(len(w0), dtype=int)
+    _, w = dop853_integrate_hamiltonian(H, w0, t, independent=1,
+                                        n_steps=n_steps)
+    assert w.shape == w_shared.shape
+    assert np.allclose(w, w_shared, atol=1e-4)
+    assert n_steps[1] < n_steps[0]
+
+    # a single orbit is integrated exactly as in the default mode
+    for i in range(len(w0)):
+        _, w_i = dop853_integrate_hamiltonian(H, w0[i:i+1], t)
+        assert np.all(w_i[..., 0] == w[..., i])
+
+    _, w_f = dop853_integrate_hamiltonian(H, w0, t, independent=1,
+                                          store_all=0)
+    assert np.all(w_f == w[:, -1])
+
+    # each thread has its own workspace, so threading doesn't change anything
+    n_steps_threads = np.zeros(len(w0), dtype=int)
+    _, w_threads = dop853_integrate_hamiltonian(H, w0, t, independent=1,
+                                                n_steps=n_steps_threads,
+                                                n_threads=2)
+    assert np.all(w_threads == w)
+    assert np.all(n_steps_threads == n_steps)
+
+    # compare to the Python implementation
+    def F(t, w):
+        w_T = np.ascontiguousarray(w.T)
+        return H._gradient(w_T, np.array([0.0])).T
+
+    integrator = DOPRI853Integrator(F, independent=True, atol=1e-10,
+                                    rtol=1e-10)
+    orbit = integrator.run(np.ascontiguousarray(w0.T), t=t)
+    assert np.allclose(orbit.w()[:, -1], w[:, -1], atol=1e-4)
+
+    with pytest.raises(ValueError):
+        dop853_integrate_hamiltonian(H, w0, t, n_steps=n_steps)
+
+    with pytest.raises(ValueError):
+        dop853_integrate_hamiltonian(H, w0, t, n_threads=2)
+
+    with pytest.raises(RuntimeError):
+        dop853_integrate_hamiltonian(H, w0, t, nmax=4, independent=1,
+                                     n_threads=2)
+
+
+@pytest.mark.parametrize("independent", [0, 1])
+@pytest.mark.parametrize("dt", [-2.0, 2.0])
+def test_dop853_continuous(independent, dt):
+    p = HernquistPotential(m=1e11, c=0.5, units=galactic)
+    H = Hamiltonian(potential=p)
+
+    w0 = np.array(
+        [
+            [0.0, 10.0, 0.0, 0.2, 0.0, 0.0],
+            [10.0, 0.0, 0.0, 0.0, 0.2, 0.0],
+            [0.0, 10.0, 0.0, 0.0, 0.0, 0.2],
+        ]
+    )
+    t = np.linspace(0, dt * 1024, 1024 + 1)
+
+    _, w = dop853_integrate_hamiltonian(H, w0, t, independent=independent)
+    t_c, w_c = dop853_integrate_hamiltonian(H, w0, t, independent=independent,
+                                            continuous=1)
+    assert np.all(t_c == t)
+    assert np.all(w_c[:, 0] == w0.T)
+    assert np.allclose(w_c, w, atol=1e-6)
+
+    t_f, w_f = dop853_integrate_hamiltonian(H, w0, t, independent=independent,
+                                            continuous=1, store_all=0)
+    assert t_f[0] == t[-1]
+    assert np.all(w_f == w_c[:, -1])
+
+    # compare to the Python implementation
+    def F(t, w):
+        w_T = np.ascontiguousarray(w.T)
+        return H._gradient(w_T, np.array([0.0])).T
+
+    integrator = DOPRI853Integrator(F, continuous=True,
+                                    independent=bool(independent),
+                                    atol=1e-10, rtol=1e-10)
+    orbit = integrator.run(np.ascontiguousarray(w0.T), t=t)
+    assert np.allclose(orbit.w(), w_c, atol=1e-6)
+
+    with pytest.raises(ValueError):
+        DOPRI853Integrator(F, continuous=True, nsteps=100)
 
 
 # TODO: move this to only run if a flag like --remote-data is passed, like
@@ -13,6 +13,8 @@ from .. import (
     RK5Integrator,
     DOPRI853Integrator,
     Ruth4Integrator,
+    Yoshida6Integrator,
+    Yoshida8Integrator,
 )
 from gala.tests.optional_deps import HAS_TQDM
 
@@ -22,6 +24,8 @@ integrator_list = [
     DOPRI853Integrator,
     LeapfrogIntegrator,
     Ruth4Integrator,
+    Yoshida6Integrator,
+    Yoshida8Integrator,
 ]
 
 # Gradient functions:
@@ -149,3 +153,19 @@ def test_py_store_all(Integrator):
     out_final = integrator_final.run([0.0, 1.0], dt=dt, n_steps=n_steps)
 
     assert np.allclose(out_all.w()[:, -1], out_final.w()[:, 0])
+
+
+@pytest.mark.parametrize(
+    ["Integrator", "order"],
+    [(Ruth4Integrator, 4), (Yoshida6Integrator, 6), (Yoshida8Integrator, 8)],
+)
+def test_symplectic_order(Integrator, order):
+    # the error after one period of a harmonic oscillator should decrease by
+    # a factor 2^order when the timestep is halved
+    errs = []
+    for n_steps in [32, 64]:
+        integrator = Integrator(sho_F, func_args=(1.0,))
+        orbit = integrator.run([0.0, 1.0], t1=0.0, t2=1.0, n_steps=n_steps)
+        errs.append(np.abs(orbit.w()[:, -1] - [0.0, 1.0]).max())
+
+    assert abs(np.log2(errs[0] / errs[1]) - order) < 0.5
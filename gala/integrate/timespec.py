@@ -108,3 +108,18 @@ def parse_time_specification(units, dt=None, n_steps=None, t1=None, t2=None, t=N
             raise ValueError("Invalid options. See docstring.")
 
         return times.astype(np.float64)
+
+
+def _save_every_indices(ntimes, save_every):
+    """
+    Return the indices of the times to store when only every ``save_every``-th
+    time step is stored. The last time is always included.
+    """
+    save_every = int(save_every)
+    if save_every < 1:
+        raise ValueError(f"save_every must be a positive integer, got {save_every}")
+
+    idx = np.arange(0, ntimes, save_every)
+    if idx[-1] != ntimes - 1:
+        idx = np.append(idx, ntimes - 1)
+    return idx
@@ -23,7 +23,15 @@ void static_frame_gradient(double t, double *pars, double *qp, int n_dim, double
 }
 
 void static_frame_hessian(double t, double *pars, double *qp, int n_dim, double *d2H) {
-    /* TODO: this is just potential Hessian and identity matrix for d2H/dp2*/
+    /*
+        d2H is the (2*n_dim, 2*n_dim) Hessian with respect to (q, p): the
+        kinetic term only contributes the identity matrix for d2H/dp2
+    */
+    int i;
+
+    for (i=0; i < n_dim; i++) {
+        d2H[(n_dim+i)*2*n_dim + n_dim+i] = d2H[(n_dim+i)*2*n_dim + n_dim+i] + 1.;
+    }
 }
 
 /*
@@ -66,7 +74,17 @@ void constant_rotating_frame_gradient_2d(double t, double *pars, double *qp, int
 }
 
 void constant_rotating_frame_hessian_2d(double t, double *pars, double *qp, int n_dim, double *d2H) {
-    /* TODO: */
+    /*
+        TODO: this is klugy, n_dim has to equal 2!
+    */
+    // kinetic term
+    static_frame_hessian(t, pars, qp, n_dim, d2H);
+
+    // - Omega (x py - y px) mixes position and momentum
+    d2H[0*4 + 3] = d2H[0*4 + 3] - pars[0];
+    d2H[3*4 + 0] = d2H[3*4 + 0] - pars[0];
+    d2H[1*4 + 2] = d2H[1*4 + 2] + pars[0];
+    d2H[2*4 + 1] = d2H[2*4 + 1] + pars[0];
 }
 
 double constant_rotating_frame_hamiltonian_3d(double t, double *pars, double *qp, int n_dim) {
@@ -111,5 +129,29 @@ void constant_rotating_frame_gradient_3d(double t, double *pars, double *qp, int
 }
 
 void constant_rotating_frame_hessian_3d(double t, double *pars, double *qp, int n_dim, double *d2H) {
-    /* TODO: */
+    /*
+        Omega = pars
+    */
+    int i, j;
+    double C[3][3]; // d2/dq_i dp_j of - Omega dot (q x p)
+
+    // kinetic term
+    static_frame_hessian(t, pars, qp, n_dim, d2H);
+
+    C[0][0] = 0.;
+    C[0][1] = -pars[2];
+    C[0][2] = pars[1];
+    C[1][0] = pars[2];
+    C[1][1] = 0.;
+    C[1][2] = -pars[0];
+    C[2][0] = -pars[1];
+    C[2][1] = pars[0];
+    C[2][2] = 0.;
+
+    for (i=0; i < 3; i++) {
+        for (j=0; j < 3; j++) {
+            d2H[i*6 + 3+j] = d2H[i*6 + 3+j] + C[i][j];
+            d2H[(3+j)*6 + i] = d2H[(3+j)*6 + i] + C[i][j];
+        }
+    }
 }
@@ -10,7 +10,5 @@ void frame_gradient(CFrameType *fr, double t, double *qp, int n_dim, double *dH)
 }
 
 void frame_hessian(CFrameType *fr, double t, double *qp, int n_dim, double *d2H) {
-    // TODO: not implemented!!
-    // TODO: can I just add in the terms from the frame here?
-    // (fr->hessian)(t, (fr->parameters), qp, n_dim, d2H);
+    (fr->hessian)(t, (fr->parameters), qp, n_dim, d2H);
 }
@@ -11,7 +11,8 @@ import astropy.units as u
 from ..common import CommonBase
 from ..potential import PotentialBase, CPotentialBase
 from ..frame import FrameBase, CFrameBase, StaticFrame
-from ...integrate import LeapfrogIntegrator, DOPRI853Integrator, Ruth4Integrator
+from ...integrate import (LeapfrogIntegrator, DOPRI853Integrator, Ruth4Integrator,
+                          Yoshida6Integrator, Yoshida8Integrator)
 
 __all__ = ["Hamiltonian"]
 
@@ -97,7 +98,15 @@ class Hamiltonian(CommonBase):
         return dH
 
     def _hessian(self, w, t):
-        raise NotImplementedError()
+        q = np.ascontiguousarray(w[:, :self._pot_ndim])
+
+        # kinetic term and extra terms from the frame
+        d2H = self.frame._hessian(w, t=t)
+
+        # the potential only contributes to the position-position block
+        d2H[:, :self._pot_ndim, :self._pot_ndim] += self.potential._hessian(q, t=t)
+
+        return d2H
 
     # ========================================================================
     # Core methods that use the above implemented functions
@@ -164,15 +173,22 @@ class Hamiltonian(CommonBase):
 
         Returns
         -------
-        # TODO: see TODO about units about
-        hess : `~astropy.units.Quantity`
-            The Hessian matrix of second derivatives of the potential. If the input
-            position has shape ``w.shape``, the output energy will have shape
+        TODO: this can't return a quantity, because units are different for the
+        position and momentum blocks
+        hess : `~numpy.ndarray`
+            The Hessian matrix of second derivatives of the Hamiltonian with
+            respect to the phase-space coordinates. If the input position has
+            shape ``w.shape``, the output will have shape
             ``(w.shape[0],w.shape[0]) + w.shape[1:]``. That is, an ``n_dim`` by
             ``n_dim`` array (matrix) for each position, where the dimensionality of
             phase-space is ``n_dim``.
         """
-        raise NotImplementedError()
+        w = self._remove_units_prepare_shape(w)
+        orig_shape, w = self._get_c_valid_arr(w)
+        t = self._validate_prepare_time(t, w)
+
+        hess = np.moveaxis(self._hessian(w, t=t), 0, -1)
+        return hess.reshape((orig_shape[0], orig_shape[0]) + orig_shape[1:])
 
     # def jacobi_energy(self, w, t=0.):
     #     """
@@ -247,6 +263,12 @@ class Hamiltonian(CommonBase):
         Integrator_kwargs=dict(),
         cython_if_possible=True,
         store_all=True,
+        n_threads=None,
+        events=None,
+        max_events=100,
+        reductions=None,
+        save_every=1,
+        mmap=None,
         **time_spec
     ):
         """
@@ -261,10 +283,16 @@ class Hamiltonian(CommonBase):
         Integrator : `~gala.integrate.Integrator` (optional)
             Integrator class to use. By default, uses
             `~gala.integrate.LeapfrogIntegrator` if the frame is static and
-            `~gala.integrate.DOPRI853Integrator` else.
+            `~gala.integrate.DOPRI853Integrator` else. The higher-order
+            symplectic integrators `~gala.integrate.Yoshida6Integrator` and
+            `~gala.integrate.Yoshida8Integrator` allow larger timesteps for a
+            given accuracy in static frames.
         Integrator_kwargs : dict (optional)
             Any extra keyword argumets to pass to the integrator class
-            when initializing. Only works in non-Cython mode.
+            when initializing. In Cython mode, only the ``atol``, ``rtol``,
+            ``nmax``, ``progress``, ``independent``, and ``continuous``
+            arguments of `~gala.integrate.DOPRI853Integrator` and
+            ``n_threads`` are supported.
         cython_if_possible : bool (optional)
             If there is a Cython version of the integrator implemented,
             and the potential object has a C instance, using Cython
@@ -273,6 +301,60 @@ class Hamiltonian(CommonBase):
             Controls whether to store the phase-space position at all intermediate
             timesteps. Set to False to store only the final values (i.e. the
             phase-space position(s) at the final timestep). Default is True.
+        save_every : int (optional)
+            With ``store_all=True``, only store the phase-space position at every
+            ``save_every``-th timestep (and at the final timestep). For the
+            fixed-step integrators, the orbits are still integrated with the
+            full time resolution, and the output is decimated as the integration
+            proceeds. For `~gala.integrate.DOPRI853Integrator`, the output times
+            are decimated before the integration, since the internal steps are
+            adaptive anyway. This is currently only supported by the Cython
+            implementations of these integrators. Default is 1.
+        mmap : `numpy.memmap` (optional)
+            With ``store_all=True``, a writable array to write the orbits to as
+            the integration proceeds, with shape ``(2*ndim, ntimes, norbits)``
+            (as for `~gala.integrate.Integrator.run()`) and values in the unit
+            system of the Hamiltonian. The returned orbit is a view of this
+            array, so it must be an array that supports NumPy views, such as a
+            `numpy.memmap`; e.g. an HDF5 dataset would be read back into memory.
+            The Cython implementations of the fixed-step symplectic integrators
+            only keep a fixed-size chunk of output times in memory while
+            integrating, so the orbits can be larger than memory. This is not
+            supported by the Cython implementation of
+            `~gala.integrate.DOPRI853Integrator`.
+        n_threads : int (optional)
+            The number of threads to integrate the orbits with, if there are
+            many orbits. This is currently only supported by the Cython
+            implementations of `~gala.integrate.LeapfrogIntegrator` and of
+            `~gala.integrate.DOPRI853Integrator` with ``independent=True``, and
+            can also be set with ``Integrator_kwargs``. Multi-threading requires
+            that gala was compiled with OpenMP support. Default is 1.
+        events : str, `~gala.integrate.events.LinearEvent`, iterable (optional)
+            Events to detect during the integration, located by root finding
+            within the integration steps (on the dense output for
+            `~gala.integrate.DOPRI853Integrator`, which then integrates in
+            ``continuous`` mode, and on a cubic interpolation of each step for
+            `~gala.integrate.LeapfrogIntegrator`). Built-in events are
+            ``"pericenter"``, ``"apocenter"``, ``"zmax"``, and
+            ``"z_crossing"``; crossings of a general linear combination of the
+            phase-space coordinates can be specified with
+            `~gala.integrate.events.LinearEvent`. Combine with
+            ``store_all=False`` to avoid storing the orbits. This is currently
+            only supported by the Cython implementations of these integrators.
+        max_events : int (optional)
+            The maximum number of occurrences of each event to store for each
+            orbit. Default is 100.
+        reductions : str, iterable (optional)
+            Running statistics of the orbits to accumulate during the
+            integration, from the phase-space positions at all output times:
+            ``"r_min"``, ``"r_max"``, ``"z_max"`` (maximum ``|z|``),
+            ``"energy_error_mean"``, ``"energy_error_rms"`` (mean and root mean
+            square of the energy change from the initial energy), ``"Lz_mean"``,
+            and ``"density_mean"``. See
+            `~gala.integrate.reductions.ReductionBuffers`. Combine with
+            ``store_all=False`` to avoid storing the orbits. This is currently
+            only supported by the Cython implementations of the fixed-step
+            symplectic integrators and `~gala.integrate.DOPRI853Integrator`.
         **time_spec
             Specification of how long to integrate. Most commonly, this is a
             timestep ``dt`` and number of steps ``n_steps``, or a timestep
@@ -283,6 +365,16 @@ class Hamiltonian(CommonBase):
         Returns
         -------
         orbit : `~gala.dynamics.Orbit`
+        events : dict
+            Only returned if ``events`` is specified. For each event, a
+            dictionary with the times ``t``, phase-space positions ``w`` (a
+            `~gala.dynamics.PhaseSpacePosition`), and total numbers of
+            occurrences ``n`` of the event for each orbit. The last axis of
+            ``t`` and ``w`` has length ``max_events``, and unused slots are
+            filled with NaN.
+        reductions : dict
+            Only returned if ``reductions`` is specified. The value of each
+            statistic for each orbit.
 
         """
         from gala.dynamics import PhaseSpacePosition, Orbit
@@ -295,7 +387,9 @@ class Hamiltonian(CommonBase):
             # use the Integrator provided
             pass
 
-        symplectic_integrators = [LeapfrogIntegrator, Ruth4Integrator]
+        symplectic_integrators = [LeapfrogIntegrator, Ruth4Integrator,
+                                  Yoshida6Integrator, Yoshida8Integrator]
+        yoshida_integrators = {Yoshida6Integrator: 6, Yoshida8Integrator: 8}
         if (Integrator in symplectic_integrators and
                 not isinstance(self.frame, StaticFrame)):
             warnings.warn(
@@ -313,19 +407,106 @@ class Hamiltonian(CommonBase):
         arr_w0 = self._remove_units_prepare_shape(arr_w0)
         orig_shape, arr_w0 = self._get_c_valid_arr(arr_w0)
 
+        if n_threads is None:
+            n_threads = Integrator_kwargs.get('n_threads', None)
+
+        if n_threads is not None and n_threads != 1 and not (
+                self.c_enabled and cython_if_possible and (
+                    Integrator == LeapfrogIntegrator or
+                    (Integrator == DOPRI853Integrator and
+                     Integrator_kwargs.get('independent', False)))):
+            raise ValueError(
+                "Multi-threaded orbit integration (n_threads) is currently only "
+                "supported by the Cython implementations of LeapfrogIntegrator "
+                "and of DOPRI853Integrator with independent=True"
+            )
+
+        if events is not None:
+            if not (self.c_enabled and cython_if_possible and
+                    Integrator in [LeapfrogIntegrator, DOPRI853Integrator]):
+                raise ValueError(
+                    "Event detection is currently only supported by the Cython "
+                    "implementations of LeapfrogIntegrator and DOPRI853Integrator"
+                )
+
+            from ...integrate.events import EventBuffers
+            event_buffers = EventBuffers(
+                events, arr_w0.shape[0], arr_w0.shape[1], max_events
+            )
+        else:
+            event_buffers = None
+
+        if reductions is not None:
+            if not (self.c_enabled and cython_if_possible and
+                    Integrator in symplectic_integrators + [DOPRI853Integrator]):
+                raise ValueError(
+                    "Orbit reductions are currently only supported by the Cython "
+                    "implementations of LeapfrogIntegrator, Ruth4Integrator, the "
+                    "Yoshida integrators, and DOPRI853Integrator"
+                )
+
+            from ...integrate.reductions import ReductionBuffers
+            reduction_buffers = ReductionBuffers(
+                reductions, arr_w0.shape[0], arr_w0.shape[1]
+            )
+        else:
+            reduction_buffers = None
+
+        if save_every != 1 and not (
+                self.c_enabled and cython_if_possible and
+                Integrator in symplectic_integrators + [DOPRI853Integrator]):
+            raise ValueError(
+                "Output decimation (save_every) is currently only supported by the "
+                "Cython implementations of LeapfrogIntegrator, Ruth4Integrator, "
+                "the Yoshida integrators, and DOPRI853Integrator"
+            )
+
+        if mmap is not None:
+            if not store_all:
+                raise ValueError("An output array (mmap) requires store_all=True")
+
+            if (self.c_enabled and cython_if_possible and
+                    Integrator == DOPRI853Integrator):
+                raise ValueError(
+                    "Writing the orbits to an output array (mmap) is not supported "
+                    "by the Cython implementation of DOPRI853Integrator. Use "
+                    "cython_if_possible=False instead."
+                )
+
         if self.c_enabled and cython_if_possible:
             # array of times
-            from ...integrate.timespec import parse_time_specification
+            from ...integrate.timespec import (parse_time_specification,
+                                               _save_every_indices)
             t = np.ascontiguousarray(parse_time_specification(self.units, **time_spec))
+            if Integrator == DOPRI853Integrator and save_every != 1:
+                t = np.ascontiguousarray(t[_save_every_indices(len(t), save_every)])
+            ntimes = len(t)
 
             # TODO: these replacements should be defined in gala.integrate...
             if Integrator == LeapfrogIntegrator:
                 from ...integrate.cyintegrators import leapfrog_integrate_hamiltonian
-                t, w = leapfrog_integrate_hamiltonian(self, arr_w0, t, store_all=store_all)
+                t, w = leapfrog_integrate_hamiltonian(
+                    self, arr_w0, t, store_all=store_all,
+                    n_threads=1 if n_threads is None else n_threads,
+                    events=event_buffers, reductions=reduction_buffers,
+                    save_every=save_every, mmap=mmap
+                )
 
             elif Integrator == Ruth4Integrator:
                 from ...integrate.cyintegrators import ruth4_integrate_hamiltonian
-                t, w = ruth4_integrate_hamiltonian(self, arr_w0, t, store_all=store_all)
+                t, w = ruth4_integrate_hamiltonian(
+                    self, arr_w0, t, store_all=store_all,
+                    reductions=reduction_buffers, save_every=save_every,
+                    mmap=mmap
+                )
+
+            elif Integrator in yoshida_integrators:
+                from ...integrate.cyintegrators import yoshida_integrate_hamiltonian
+                t, w = yoshida_integrate_hamiltonian(
+                    self, arr_w0, t, order=yoshida_integrators[Integrator],
+                    store_all=store_all, reductions=reduction_buffers,
+                    save_every=save_every, mmap=mmap
+                )
 
             elif Integrator == DOPRI853Integrator:
                 from ...integrate.cyintegrators import dop853_integrate_hamiltonian
@@ -335,13 +516,17 @@ class Hamiltonian(CommonBase):
                     Integrator_kwargs.get('rtol', 1E-10),
                     Integrator_kwargs.get('nmax', 0),
                     Integrator_kwargs.get('progress', False),
-                    store_all=store_all
+                    store_all=store_all,
+                    independent=Integrator_kwargs.get('independent', False),
+                    n_threads=1 if n_threads is None else n_threads,
+                    continuous=Integrator_kwargs.get('continuous', False),
+                    events=event_buffers, reductions=reduction_buffers
                 )
             else:
                 raise ValueError(f"Cython integration not supported for '{Integrator!r}'")
 
-            # because shape is different from normal integrator return
-            w = np.rollaxis(w, -1)
+            # the orbits are returned in the usual axis order, (ndim, ntimes,
+            #   norbits), so the orbit can be created without copying them
             if w.shape[-1] == 1:
                 w = w[..., 0]
 
@@ -351,7 +536,7 @@ class Hamiltonian(CommonBase):
                 w_T = np.ascontiguousarray(w.T)
                 return self._gradient(w_T, t=np.array([t])).T
             integrator = Integrator(F, func_units=self.units, **Integrator_kwargs)
-            orbit = integrator.run(arr_w0.T, **time_spec)
+            orbit = integrator.run(arr_w0.T, mmap=mmap, **time_spec)
             orbit.potential = self.potential
             orbit.frame = self.frame
             return orbit
@@ -364,8 +549,19 @@ class Hamiltonian(CommonBase):
         except (TypeError, AttributeError):
             tunit = u.dimensionless_unscaled
 
-        return Orbit.from_w(w=w, units=self.units, t=t*tunit,
-                            hamiltonian=self)
+        orbit = Orbit.from_w(w=w, units=self.units, t=t*tunit,
+                             hamiltonian=self, copy=False)
+
+        if event_buffers is None and reduction_buffers is None:
+            return orbit
+
+        results = [orbit]
+        if event_buffers is not None:
+            results.append(event_buffers.results(self.units, shape=w0.shape))
+        if reduction_buffers is not None:
+            results.append(reduction_buffers.results(self.units, ntimes,
+                                                     shape=w0.shape))
+        return tuple(results)
 
     # def save(self, f):
     #     """
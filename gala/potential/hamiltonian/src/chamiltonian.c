@@ -34,13 +34,26 @@ void hamiltonian_gradient(CPotential *p, CFrameType *fr, double t, double *qp, d
 }
 
 void hamiltonian_hessian(CPotential *p, CFrameType *fr, double t, double *qp, double *d2H) {
-    int i;
+    /*
+        d2H is the (2*n_dim, 2*n_dim) Hessian of the Hamiltonian with respect
+        to the phase-space coordinates (q, p)
+    */
+    int i, j;
+    int n_dim = p->n_dim;
+    double hess[n_dim*n_dim];
+
+    for (i=0; i < 4*n_dim*n_dim; i++) {
+        d2H[i] = 0.;
+    }
 
-    for (i=0; i < p->n_components; i++) {
-        (p->hessian)[i](t, (p->parameters)[i], qp, p->n_dim, d2H);
+    // the potential only contributes to the position-position block
+    c_hessian(p, t, qp, &hess[0]);
+    for (i=0; i < n_dim; i++) {
+        for (j=0; j < n_dim; j++) {
+            d2H[i*2*n_dim + j] = hess[i*n_dim + j];
+        }
     }
 
-    // TODO: not implemented!!
-    // TODO: can I just add in the terms from the frame here?
-    // (fr->hessian)(t, (fr->parameters), qp, p->n_dim, d2H);
+    // kinetic term and, for rotating frames, the position-momentum terms
+    (fr->hessian)(t, (fr->parameters), qp, n_dim, d2H);
 }
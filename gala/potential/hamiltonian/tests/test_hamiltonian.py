@@ -2,11 +2,18 @@ import pickle
 
 # Third-party
 import astropy.units as u
+import numpy as np
 import pytest
 
 # Project
 from .. import Hamiltonian
-from ...potential.builtin import KeplerPotential
+from ....dynamics import PhaseSpacePosition
+from ....integrate import (DOPRI853Integrator, LeapfrogIntegrator,
+                           Ruth4Integrator, Yoshida6Integrator,
+                           Yoshida8Integrator)
+from ....integrate.events import LinearEvent
+from ...potential.builtin import (KeplerPotential, LongMuraliBarPotential,
+                                  MilkyWayPotential)
 from ...frame.builtin import StaticFrame, ConstantRotatingFrame
 from ....units import solarsystem, galactic
 
@@ -53,3 +60,303 @@ def test_pickle(tmpdir):
 
         with open(filename, 'rb') as f:
             H2 = pickle.load(f)
+
+
+@pytest.mark.parametrize("frame", [
+    StaticFrame(units=galactic),
+    ConstantRotatingFrame(Omega=[0.01, -0.02, 0.04]/u.Myr, units=galactic),
+])
+def test_hessian(frame):
+    R = np.array([[0.63302222, 0.75440651, 0.17364818],
+                  [-0.76604444, 0.64278761, 0.],
+                  [-0.1116189, -0.13302222, 0.98480775]])
+    p = LongMuraliBarPotential(m=1E11, a=4., b=1., c=1., R=R, units=galactic)
+    H = Hamiltonian(potential=p, frame=frame)
+
+    w = np.array([[1., 2., 3., 0.1, -0.2, 0.15],
+                  [-4., 0.5, 1., 0.2, 0.1, -0.05]]).T
+    hess = H.hessian(w)
+    assert hess.shape == (6, 6, 2)
+
+    # compare to finite-difference second derivatives of the energy
+    h = 1e-4
+    dw = h * np.eye(6)
+    hess_num = np.zeros_like(hess)
+    for i in range(6):
+        for j in range(6):
+            hess_num[i, j] = (
+                H.energy(w + (dw[i] + dw[j])[:, None]).value
+                - H.energy(w + (dw[i] - dw[j])[:, None]).value
+                - H.energy(w - (dw[i] - dw[j])[:, None]).value
+                + H.energy(w - (dw[i] + dw[j])[:, None]).value
+            ) / (4 * h**2)
+
+    assert np.allclose(hess, hess_num, rtol=1e-5, atol=1e-7)
+
+
+@pytest.fixture
+def kepler_H():
+    return Hamiltonian(KeplerPotential(m=1., units=solarsystem))
+
+
+@pytest.fixture
+def kepler_w0():
+    # two orbits in the Kepler potential
+    return PhaseSpacePosition(pos=[[1., 0], [0, 1.5], [0, 0]] * u.au,
+                              vel=[[0, -5.], [6.28, 0], [0, 0.5]] * u.au/u.yr)
+
+
+@pytest.fixture
+def mw_w0():
+    # two orbits in the Milky Way potential
+    return PhaseSpacePosition(pos=[[10., 8.], [0, 0], [1., -0.5]] * u.kpc,
+                              vel=[[0, 50.], [170., 230], [40., 20.]] * u.km/u.s)
+
+
+def test_integrate_orbit_n_threads(kepler_H, kepler_w0):
+    H = kepler_H
+    w0 = kepler_w0
+
+    orbit1 = H.integrate_orbit(w0, dt=1e-3, n_steps=1000)
+    orbit2 = H.integrate_orbit(w0, dt=1e-3, n_steps=1000, n_threads=2)
+    orbit3 = H.integrate_orbit(w0, dt=1e-3, n_steps=1000,
+                               Integrator=LeapfrogIntegrator,
+                               Integrator_kwargs=dict(n_threads=2))
+    assert np.all(orbit1.xyz == orbit2.xyz)
+    assert np.all(orbit1.xyz == orbit3.xyz)
+
+    orbit1 = H.integrate_orbit(w0, dt=1e-3, n_steps=100,
+                               Integrator=DOPRI853Integrator,
+                               Integrator_kwargs=dict(independent=True))
+    orbit2 = H.integrate_orbit(w0, dt=1e-3, n_steps=100, n_threads=2,
+                               Integrator=DOPRI853Integrator,
+                               Integrator_kwargs=dict(independent=True))
+    assert np.all(orbit1.xyz == orbit2.xyz)
+
+    with pytest.raises(ValueError):
+        H.integrate_orbit(w0, dt=1e-3, n_steps=10, n_threads=2,
+                          Integrator=DOPRI853Integrator)
+
+    with pytest.raises(ValueError):
+        H.integrate_orbit(w0, dt=1e-3, n_steps=10, n_threads=2,
+                          cython_if_possible=False)
+
+
+def test_integrate_orbit_yoshida(kepler_H, kepler_w0):
+    H = kepler_H
+    w0 = kepler_w0
+
+    for Integrator in [Yoshida6Integrator, Yoshida8Integrator]:
+        orbit = H.integrate_orbit(w0, dt=1e-2, n_steps=1000,
+                                  Integrator=Integrator)
+        orbit_py = H.integrate_orbit(w0, dt=1e-2, n_steps=1000,
+                                     Integrator=Integrator,
+                                     cython_if_possible=False)
+        assert u.allclose(orbit.xyz, orbit_py.xyz, rtol=1e-10)
+
+        E = orbit.energy()
+        assert np.all(np.abs((E - E[0]) / E[0]) < 1e-8)
+
+        _, stats = H.integrate_orbit(w0, dt=1e-2, n_steps=1000,
+                                     Integrator=Integrator, store_all=False,
+                                     reductions="r_max")
+        r = np.sqrt(np.sum(orbit.xyz**2, axis=0))
+        assert u.allclose(stats["r_max"], r.max(axis=0))
+
+
+@pytest.mark.parametrize(
+    "Integrator_name", ["leapfrog", "dop853", "dop853-independent"]
+)
+def test_integrate_orbit_events(Integrator_name, mw_w0):
+    if Integrator_name == "leapfrog":
+        kw = dict(Integrator=LeapfrogIntegrator)
+    else:
+        kw = dict(Integrator=DOPRI853Integrator,
+                  Integrator_kwargs=dict(
+                      independent=Integrator_name.endswith("independent")))
+
+    H = Hamiltonian(MilkyWayPotential())
+    w0 = mw_w0
+    x_event = LinearEvent([1., 0, 0, 0, 0, 0], value=2., name="x=2")
+
+    events = ["pericenter", "apocenter", "zmax", "z_crossing", x_event]
+    orbits, evt = H.integrate_orbit(w0, dt=0.5, n_steps=4000, events=events,
+                                    **kw)
+    final, evt2 = H.integrate_orbit(w0, dt=0.5, n_steps=4000, events=events,
+                                    store_all=False, **kw)
+    assert np.allclose(final.xyz[:, 0], orbits.xyz[:, -1])
+    for name in evt:
+        assert np.all(evt[name]['n'] == evt2[name]['n'])
+        assert u.allclose(evt[name]['t'], evt2[name]['t'], equal_nan=True)
+
+    for i in range(w0.shape[0]):
+        orbit = orbits[:, i]
+        for name, func in [("pericenter", orbit.pericenter),
+                           ("apocenter", orbit.apocenter),
+                           ("zmax", orbit.zmax)]:
+            val, t = func(func=None, return_times=True)
+            n = evt[name]['n'][i]
+            assert n > 5
+            assert np.all(np.isfinite(evt[name]['t'][i, :n]))
+            assert np.all(np.isnan(evt[name]['t'][i, n:]))
+
+            # the extrema found from the orbit can include the end points
+            t_evt = evt[name]['t'][i, :n]
+            w_evt = evt[name]['w'][i, :n]
+            if name == "zmax":
+                val_evt = np.abs(w_evt.z)
+            else:
+                val_evt = np.sqrt(np.sum(w_evt.xyz**2, axis=0))
+            for tt, vv in zip(t[1:-1], val[1:-1]):
+                j = np.argmin(np.abs(t_evt - tt))
+                assert abs(t_evt[j] - tt) < 0.5 * u.Myr
+                assert u.allclose(val_evt[j], vv, rtol=1e-4)
+
+        z = orbit.z
+        n = evt['z_crossing']['n'][i]
+        assert n == np.sum(np.sign(z[1:]) != np.sign(z[:-1]))
+        assert u.allclose(evt['z_crossing']['w'][i, :n].z, 0 * u.kpc,
+                          atol=1e-8 * u.kpc)
+        assert u.allclose(evt['x=2']['w'][i, :evt['x=2']['n'][i]].x,
+                          2 * u.kpc)
+
+    # only the first max_events occurrences are stored
+    _, evt3 = H.integrate_orbit(w0, dt=0.5, n_steps=4000, events="pericenter",
+                                max_events=2, **kw)
+    assert evt3['pericenter']['t'].shape == (2, 2)
+    assert np.all(evt3['pericenter']['n'] == evt['pericenter']['n'])
+    assert u.allclose(evt3['pericenter']['t'], evt['pericenter']['t'][:, :2])
+
+    with pytest.raises(ValueError):
+        H.integrate_orbit(w0, dt=0.5, n_steps=10, events="perihelion", **kw)
+
+    with pytest.raises(ValueError):
+        H.integrate_orbit(w0, dt=0.5, n_steps=10, events="pericenter",
+                          Integrator=Ruth4Integrator)
+
+    with pytest.raises(ValueError):
+        H.integrate_orbit(w0, dt=0.5, n_steps=10, events="pericenter",
+                          cython_if_possible=False, **kw)
+
+
+@pytest.mark.parametrize("Integrator_name", [
+    "leapfrog", "ruth4", "dop853", "dop853-independent", "dop853-continuous"
+])
+def test_integrate_orbit_reductions(Integrator_name, mw_w0):
+    if Integrator_name == "leapfrog":
+        kw = dict(Integrator=LeapfrogIntegrator)
+    elif Integrator_name == "ruth4":
+        kw = dict(Integrator=Ruth4Integrator)
+    else:
+        kw = dict(Integrator=DOPRI853Integrator,
+                  Integrator_kwargs=dict(
+                      independent=Integrator_name.endswith("independent"),
+                      continuous=Integrator_name.endswith("continuous")))
+
+    H = Hamiltonian(MilkyWayPotential())
+    w0 = mw_w0
+    stats = ["r_min", "r_max", "z_max", "energy_error_mean",
+             "energy_error_rms", "Lz_mean", "density_mean"]
+
+    orbits, red = H.integrate_orbit(w0, dt=1., n_steps=1000,
+                                    reductions=stats, **kw)
+    final, red2 = H.integrate_orbit(w0, dt=1., n_steps=1000,
+                                    reductions=stats, store_all=False, **kw)
+    assert np.allclose(final.xyz[:, 0], orbits.xyz[:, -1])
+
+    r = np.sqrt(np.sum(orbits.xyz**2, axis=0))
+    dE = orbits.energy() - orbits.energy()[0]
+    expected = dict(
+        r_min=r.min(axis=0),
+        r_max=r.max(axis=0),
+        z_max=np.abs(orbits.z).max(axis=0),
+        energy_error_mean=dE.mean(axis=0),
+        energy_error_rms=np.sqrt((dE**2).mean(axis=0)),
+        Lz_mean=orbits.angular_momentum()[2].mean(axis=0),
+        density_mean=H.potential.density(
+            orbits.xyz).reshape(orbits.shape).mean(axis=0)
+    )
+    for name in stats:
+        assert red[name].shape == (2,)
+        assert u.allclose(red[name], expected[name], rtol=1e-8,
+                          atol=1e-14 * expected[name].unit)
+        assert np.all(red2[name] == red[name])
+
+    # events and reductions together
+    if Integrator_name != "ruth4":
+        _, evt, red3 = H.integrate_orbit(w0, dt=1., n_steps=1000,
+                                         events="pericenter",
+                                         reductions="r_min", **kw)
+        assert "pericenter" in evt
+        assert u.allclose(red3["r_min"], red["r_min"], rtol=1e-6)
+
+    with pytest.raises(ValueError):
+        H.integrate_orbit(w0, dt=1., n_steps=10, reductions="r_median", **kw)
+
+    with pytest.raises(ValueError):
+        H.integrate_orbit(w0, dt=1., n_steps=10, reductions="r_min",
+                          cython_if_possible=False, **kw)
+
+
+def test_integrate_orbit_save_every(kepler_H, kepler_w0):
+    H = kepler_H
+    w0 = kepler_w0
+
+    for Integrator in [LeapfrogIntegrator, Ruth4Integrator]:
+        for n_steps in [1000, 1001, 1003]:
+            orbit = H.integrate_orbit(w0, dt=1e-3, n_steps=n_steps,
+                                      Integrator=Integrator)
+            orbit2 = H.integrate_orbit(w0, dt=1e-3, n_steps=n_steps,
+                                       Integrator=Integrator, save_every=10)
+
+            idx = np.append(np.arange(0, n_steps + 1, 10), n_steps)
+            idx = np.unique(idx)
+            assert orbit2.ntimes == len(idx)
+            assert u.allclose(orbit2.t, orbit.t[idx])
+            assert np.all(orbit2.xyz == orbit.xyz[:, idx])
+            assert np.all(orbit2.v_xyz == orbit.v_xyz[:, idx])
+
+    orbit = H.integrate_orbit(w0, dt=1e-3, n_steps=100,
+                              Integrator=DOPRI853Integrator)
+    orbit2 = H.integrate_orbit(w0, dt=1e-3, n_steps=100,
+                               Integrator=DOPRI853Integrator, save_every=10)
+    assert u.allclose(orbit2.t, orbit.t[::10])
+    assert u.allclose(orbit2.xyz, orbit.xyz[:, ::10], rtol=1e-7)
+
+    with pytest.raises(ValueError):
+        H.integrate_orbit(w0, dt=1e-3, n_steps=10, save_every=0)
+
+    with pytest.raises(ValueError):
+        H.integrate_orbit(w0, dt=1e-3, n_steps=10, save_every=2,
+                          cython_if_possible=False)
+
+
+def test_integrate_orbit_mmap(tmpdir, kepler_H, kepler_w0):
+    H = kepler_H
+    w0 = kepler_w0
+
+    for Integrator in [LeapfrogIntegrator, Ruth4Integrator]:
+        for cython_if_possible in [True, False]:
+            orbit = H.integrate_orbit(w0, dt=1e-3, n_steps=100,
+                                      Integrator=Integrator,
+                                      cython_if_possible=cython_if_possible)
+
+            mmap = np.memmap(str(tmpdir / "orbits.dat"), mode="w+",
+                             dtype=float, shape=(6, 101, 2))
+            orbit2 = H.integrate_orbit(w0, dt=1e-3, n_steps=100,
+                                       Integrator=Integrator, mmap=mmap,
+                                       cython_if_possible=cython_if_possible)
+            assert np.all(orbit2.xyz == orbit.xyz)
+            assert np.all(orbit2.v_xyz == orbit.v_xyz)
+            assert np.all(mmap == orbit.w(H.units))
+
+            # the orbit is created over the output array without a copy
+            assert np.shares_memory(orbit2.xyz.value, mmap)
+
+    with pytest.raises(ValueError):
+        H.integrate_orbit(w0, dt=1e-3, n_steps=100, mmap=mmap,
+                          Integrator=DOPRI853Integrator)
+
+    with pytest.raises(ValueError):
+        H.integrate_orbit(w0, dt=1e-3, n_steps=100, mmap=mmap,
+                          store_all=False)
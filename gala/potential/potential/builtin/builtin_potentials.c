@@ -11,7 +11,11 @@
 double nan_density(double t, double *pars, double *q, int n_dim) { return NAN; }
 double nan_value(double t, double *pars, double *q, int n_dim) { return NAN; }
 void nan_gradient(double t, double *pars, double *q, int n_dim, double *grad) {}
-void nan_hessian(double t, double *pars, double *q, int n_dim, double *hess) {}
+void nan_hessian(double t, double *pars, double *q, int n_dim, double *hess) {
+    int i;
+    for (i=0; i < n_dim*n_dim; i++)
+        hess[i] = NAN;
+}
 
 double null_density(double t, double *pars, double *q, int n_dim) { return 0; }
 double null_value(double t, double *pars, double *q, int n_dim) { return 0; }
@@ -77,6 +81,60 @@ void kepler_gradient(double t, double *pars, double *q, int n_dim, double *grad)
     grad[2] = grad[2] + fac*q[2];
 }
 
+double kepler_value_gradient(double t, double *pars, double *q, int n_dim, double *grad) {
+    /*  pars:
+            - G (Gravitational constant)
+            - m (mass scale)
+    */
+    double R, GM_R, fac;
+    R = sqrt(q[0]*q[0] + q[1]*q[1] + q[2]*q[2]);
+    GM_R = pars[0] * pars[1] / R;
+    fac = GM_R / (R*R);
+
+    grad[0] = grad[0] + fac*q[0];
+    grad[1] = grad[1] + fac*q[1];
+    grad[2] = grad[2] + fac*q[2];
+
+    return -GM_R;
+}
+
+void kepler_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val) {
+    /*  pars:
+            - G (Gravitational constant)
+            - m (mass scale)
+    */
+    int n;
+    double R;
+    double *qn;
+
+    for (n=0; n < N; n++) {
+        qn = &q[n*n_dim];
+        R = sqrt(qn[0]*qn[0] + qn[1]*qn[1] + qn[2]*qn[2]);
+        val[n] = val[n] - pars[0] * pars[1] / R;
+    }
+}
+
+void kepler_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad) {
+    /*  pars:
+            - G (Gravitational constant)
+            - m (mass scale)
+    */
+    int n;
+    double R, fac;
+    double *qn, *gn;
+
+    for (n=0; n < N; n++) {
+        qn = &q[n*n_dim];
+        gn = &grad[n*n_dim];
+        R = sqrt(qn[0]*qn[0] + qn[1]*qn[1] + qn[2]*qn[2]);
+        fac = pars[0] * pars[1] / (R*R*R);
+
+        gn[0] = gn[0] + fac*qn[0];
+        gn[1] = gn[1] + fac*qn[1];
+        gn[2] = gn[2] + fac*qn[2];
+    }
+}
+
 double kepler_density(double t, double *pars, double *q, int n_dim) {
     /*  pars:
             - G (Gravitational constant)
@@ -242,6 +300,63 @@ void hernquist_gradient(double t, double *pars, double *q, int n_dim, double *gr
     grad[2] = grad[2] + fac*q[2];
 }
 
+double hernquist_value_gradient(double t, double *pars, double *q, int n_dim, double *grad) {
+    /*  pars:
+            - G (Gravitational constant)
+            - m (mass scale)
+            - c (length scale)
+    */
+    double R, GM_Rc, fac;
+    R = sqrt(q[0]*q[0] + q[1]*q[1] + q[2]*q[2]);
+    GM_Rc = pars[0] * pars[1] / (R + pars[2]);
+    fac = GM_Rc / ((R + pars[2]) * R);
+
+    grad[0] = grad[0] + fac*q[0];
+    grad[1] = grad[1] + fac*q[1];
+    grad[2] = grad[2] + fac*q[2];
+
+    return -GM_Rc;
+}
+
+void hernquist_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val) {
+    /*  pars:
+            - G (Gravitational constant)
+            - m (mass scale)
+            - c (length scale)
+    */
+    int n;
+    double R;
+    double *qn;
+
+    for (n=0; n < N; n++) {
+        qn = &q[n*n_dim];
+        R = sqrt(qn[0]*qn[0] + qn[1]*qn[1] + qn[2]*qn[2]);
+        val[n] = val[n] - pars[0] * pars[1] / (R + pars[2]);
+    }
+}
+
+void hernquist_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad) {
+    /*  pars:
+            - G (Gravitational constant)
+            - m (mass scale)
+            - c (length scale)
+    */
+    int n;
+    double R, fac;
+    double *qn, *gn;
+
+    for (n=0; n < N; n++) {
+        qn = &q[n*n_dim];
+        gn = &grad[n*n_dim];
+        R = sqrt(qn[0]*qn[0] + qn[1]*qn[1] + qn[2]*qn[2]);
+        fac = pars[0] * pars[1] / ((R + pars[2]) * (R + pars[2]) * R);
+
+        gn[0] = gn[0] + fac*qn[0];
+        gn[1] = gn[1] + fac*qn[1];
+        gn[2] = gn[2] + fac*qn[2];
+    }
+}
+
 double hernquist_density(double t, double *pars, double *q, int n_dim) {
     /*  pars:
             - G (Gravitational constant)
@@ -325,6 +440,63 @@ void plummer_gradient(double t, double *pars, double *q, int n_dim, double *grad
     grad[2] = grad[2] + fac*q[2];
 }
 
+double plummer_value_gradient(double t, double *pars, double *q, int n_dim, double *grad) {
+    /*  pars:
+            - G (Gravitational constant)
+            - m (mass scale)
+            - b (length scale)
+    */
+    double R2b, GM_sqrtR2b, fac;
+    R2b = q[0]*q[0] + q[1]*q[1] + q[2]*q[2] + pars[2]*pars[2];
+    GM_sqrtR2b = pars[0] * pars[1] / sqrt(R2b);
+    fac = GM_sqrtR2b / R2b;
+
+    grad[0] = grad[0] + fac*q[0];
+    grad[1] = grad[1] + fac*q[1];
+    grad[2] = grad[2] + fac*q[2];
+
+    return -GM_sqrtR2b;
+}
+
+void plummer_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val) {
+    /*  pars:
+            - G (Gravitational constant)
+            - m (mass scale)
+            - b (length scale)
+    */
+    int n;
+    double R2;
+    double *qn;
+
+    for (n=0; n < N; n++) {
+        qn = &q[n*n_dim];
+        R2 = qn[0]*qn[0] + qn[1]*qn[1] + qn[2]*qn[2];
+        val[n] = val[n] - pars[0]*pars[1] / sqrt(R2 + pars[2]*pars[2]);
+    }
+}
+
+void plummer_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad) {
+    /*  pars:
+            - G (Gravitational constant)
+            - m (mass scale)
+            - b (length scale)
+    */
+    int n;
+    double R2b, fac;
+    double *qn, *gn;
+
+    for (n=0; n < N; n++) {
+        qn = &q[n*n_dim];
+        gn = &grad[n*n_dim];
+        R2b = qn[0]*qn[0] + qn[1]*qn[1] + qn[2]*qn[2] + pars[2]*pars[2];
+        fac = pars[0] * pars[1] / sqrt(R2b) / R2b;
+
+        gn[0] = gn[0] + fac*qn[0];
+        gn[1] = gn[1] + fac*qn[1];
+        gn[2] = gn[2] + fac*qn[2];
+    }
+}
+
 double plummer_density(double t, double *pars, double *q, int n_dim) {
     /*  pars:
             - G (Gravitational constant)
@@ -866,6 +1038,75 @@ void sphericalnfw_gradient(double t, double *pars, double *q, int n_dim, double
     grad[2] = grad[2] + fac*q[2];
 }
 
+double sphericalnfw_value_gradient(double t, double *pars, double *q, int n_dim, double *grad) {
+    /*  pars:
+            - G (Gravitational constant)
+            - m (mass scale)
+            - r_s (scale radius)
+    */
+    double fac, u, v_h2, log1pu;
+    v_h2 = pars[0] * pars[1] / pars[2];
+
+    u = sqrt(q[0]*q[0] + q[1]*q[1] + q[2]*q[2]) / pars[2];
+    log1pu = log(1 + u);
+    fac = v_h2 / (u*u*u) / (pars[2]*pars[2]) * (log1pu - u/(1+u));
+
+    grad[0] = grad[0] + fac*q[0];
+    grad[1] = grad[1] + fac*q[1];
+    grad[2] = grad[2] + fac*q[2];
+
+    if (u == 0) {
+        return -v_h2;
+    } else {
+        return -v_h2 * log1pu / u;
+    }
+}
+
+void sphericalnfw_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val) {
+    /*  pars:
+            - G (Gravitational constant)
+            - m (mass scale)
+            - r_s (scale radius)
+    */
+    int n;
+    double u, v_h2;
+    double *qn;
+
+    v_h2 = -pars[0] * pars[1] / pars[2];
+    for (n=0; n < N; n++) {
+        qn = &q[n*n_dim];
+        u = sqrt(qn[0]*qn[0] + qn[1]*qn[1] + qn[2]*qn[2]) / pars[2];
+        if (u == 0) {
+            val[n] = val[n] + v_h2;
+        } else {
+            val[n] = val[n] + v_h2 * log(1 + u) / u;
+        }
+    }
+}
+
+void sphericalnfw_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad) {
+    /*  pars:
+            - G (Gravitational constant)
+            - m (mass scale)
+            - r_s (scale radius)
+    */
+    int n;
+    double fac, u, v_h2;
+    double *qn, *gn;
+
+    v_h2 = pars[0] * pars[1] / pars[2];
+    for (n=0; n < N; n++) {
+        qn = &q[n*n_dim];
+        gn = &grad[n*n_dim];
+        u = sqrt(qn[0]*qn[0] + qn[1]*qn[1] + qn[2]*qn[2]) / pars[2];
+        fac = v_h2 / (u*u*u) / (pars[2]*pars[2]) * (log(1+u) - u/(1+u));
+
+        gn[0] = gn[0] + fac*qn[0];
+        gn[1] = gn[1] + fac*qn[1];
+        gn[2] = gn[2] + fac*qn[2];
+    }
+}
+
 double sphericalnfw_density(double t, double *pars, double *q, int n_dim) {
     /*  pars:
             - G (Gravitational constant)
@@ -1303,6 +1544,37 @@ double kuzmin_density(double t, double *pars, double *q, int n_dim) {
 
 }
 
+void kuzmin_hessian(double t, double *pars, double *q, int n_dim,
+                    double *hess) {
+    /*  pars:
+            - G (Gravitational constant)
+            - m (mass scale)
+            - a (length scale 1) TODO
+    */
+    double S2 = q[0]*q[0] + q[1]*q[1] + pow(pars[2] + fabs(q[2]), 2);
+    double fac = pars[0] * pars[1] * pow(S2, -1.5);
+    double w[3];
+    int i, j;
+
+    // the gradient is fac * w, where w is q with z replaced by sign(z)(a + |z|)
+    w[0] = q[0];
+    w[1] = q[1];
+    if (q[2] > 0) {
+        w[2] = pars[2] + q[2];
+    } else if (q[2] < 0) {
+        w[2] = q[2] - pars[2];
+    } else {
+        w[2] = 0.;
+    }
+
+    for (i=0; i < 3; i++) {
+        for (j=0; j < 3; j++) {
+            hess[i*3 + j] = hess[i*3 + j] - 3 * fac * w[i] * w[j] / S2;
+        }
+        hess[i*3 + i] = hess[i*3 + i] + fac;
+    }
+}
+
 /* ---------------------------------------------------------------------------
     Miyamoto-Nagai flattened potential
 */
@@ -1336,6 +1608,70 @@ void miyamotonagai_gradient(double t, double *pars, double *q, int n_dim, double
     grad[2] = grad[2] + fac*q[2] * (1. + pars[2] / sqrtz);
 }
 
+double miyamotonagai_value_gradient(double t, double *pars, double *q, int n_dim, double *grad) {
+    /*  pars:
+            - G (Gravitational constant)
+            - m (mass scale)
+            - a (length scale 1) TODO
+            - b (length scale 2) TODO
+    */
+    double sqrtz, zd, R2, GM_sqrtR2, fac;
+
+    sqrtz = sqrt(q[2]*q[2] + pars[3]*pars[3]);
+    zd = pars[2] + sqrtz;
+    R2 = q[0]*q[0] + q[1]*q[1] + zd*zd;
+    GM_sqrtR2 = pars[0]*pars[1] / sqrt(R2);
+    fac = GM_sqrtR2 / R2;
+
+    grad[0] = grad[0] + fac*q[0];
+    grad[1] = grad[1] + fac*q[1];
+    grad[2] = grad[2] + fac*q[2] * (1. + pars[2] / sqrtz);
+
+    return -GM_sqrtR2;
+}
+
+void miyamotonagai_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val) {
+    /*  pars:
+            - G (Gravitational constant)
+            - m (mass scale)
+            - a (length scale 1) TODO
+            - b (length scale 2) TODO
+    */
+    int n;
+    double zd;
+    double *qn;
+
+    for (n=0; n < N; n++) {
+        qn = &q[n*n_dim];
+        zd = (pars[2] + sqrt(qn[2]*qn[2] + pars[3]*pars[3]));
+        val[n] = val[n] - pars[0] * pars[1] / sqrt(qn[0]*qn[0] + qn[1]*qn[1] + zd*zd);
+    }
+}
+
+void miyamotonagai_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad) {
+    /*  pars:
+            - G (Gravitational constant)
+            - m (mass scale)
+            - a (length scale 1) TODO
+            - b (length scale 2) TODO
+    */
+    int n;
+    double sqrtz, zd, fac;
+    double *qn, *gn;
+
+    for (n=0; n < N; n++) {
+        qn = &q[n*n_dim];
+        gn = &grad[n*n_dim];
+        sqrtz = sqrt(qn[2]*qn[2] + pars[3]*pars[3]);
+        zd = pars[2] + sqrtz;
+        fac = pars[0]*pars[1] * pow(qn[0]*qn[0] + qn[1]*qn[1] + zd*zd, -1.5);
+
+        gn[0] = gn[0] + fac*qn[0];
+        gn[1] = gn[1] + fac*qn[1];
+        gn[2] = gn[2] + fac*qn[2] * (1. + pars[2] / sqrtz);
+    }
+}
+
 double miyamotonagai_density(double t, double *pars, double *q, int n_dim) {
     /*  pars:
             - G (Gravitational constant)
@@ -1653,6 +1989,98 @@ void logarithmic_gradient(double t, double *pars, double *q, int n_dim, double *
     grad[2] = grad[2] + az;
 }
 
+double logarithmic_value_gradient(double t, double *pars, double *q, int n_dim, double *grad) {
+    /*  pars:
+            - G (Gravitational constant)
+            - v_c (velocity scale)
+            - r_h (length scale)
+            - q1
+            - q2
+            - q3
+    */
+    double x, y, z, ax, ay, az, denom, fac, cosphi, sinphi;
+
+    cosphi = cos(pars[6]);
+    sinphi = sin(pars[6]);
+    x = q[0]*cosphi + q[1]*sinphi;
+    y = -q[0]*sinphi + q[1]*cosphi;
+    z = q[2];
+
+    denom = (pars[2]*pars[2] + x*x/(pars[3]*pars[3]) + y*y/(pars[4]*pars[4]) +
+             z*z/(pars[5]*pars[5]));
+    fac = pars[1]*pars[1] / denom;
+    ax = fac*x/(pars[3]*pars[3]);
+    ay = fac*y/(pars[4]*pars[4]);
+    az = fac*z/(pars[5]*pars[5]);
+
+    grad[0] = grad[0] + (ax*cosphi - ay*sinphi);
+    grad[1] = grad[1] + (ax*sinphi + ay*cosphi);
+    grad[2] = grad[2] + az;
+
+    return 0.5*pars[1]*pars[1] * log(denom);
+}
+
+void logarithmic_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val) {
+    /*  pars:
+            - G (Gravitational constant)
+            - v_c (velocity scale)
+            - r_h (length scale)
+            - q1
+            - q2
+            - q3
+    */
+    int n;
+    double x, y, z;
+    double cosphi = cos(pars[6]);
+    double sinphi = sin(pars[6]);
+    double *qn;
+
+    for (n=0; n < N; n++) {
+        qn = &q[n*n_dim];
+        x = qn[0]*cosphi + qn[1]*sinphi;
+        y = -qn[0]*sinphi + qn[1]*cosphi;
+        z = qn[2];
+
+        val[n] = val[n] + 0.5*pars[1]*pars[1] * log(pars[2]*pars[2] + // scale radius
+                                                     x*x/(pars[3]*pars[3]) +
+                                                     y*y/(pars[4]*pars[4]) +
+                                                     z*z/(pars[5]*pars[5]));
+    }
+}
+
+void logarithmic_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad) {
+    /*  pars:
+            - G (Gravitational constant)
+            - v_c (velocity scale)
+            - r_h (length scale)
+            - q1
+            - q2
+            - q3
+    */
+    int n;
+    double x, y, z, ax, ay, az, fac;
+    double cosphi = cos(pars[6]);
+    double sinphi = sin(pars[6]);
+    double *qn, *gn;
+
+    for (n=0; n < N; n++) {
+        qn = &q[n*n_dim];
+        gn = &grad[n*n_dim];
+        x = qn[0]*cosphi + qn[1]*sinphi;
+        y = -qn[0]*sinphi + qn[1]*cosphi;
+        z = qn[2];
+
+        fac = pars[1]*pars[1] / (pars[2]*pars[2] + x*x/(pars[3]*pars[3]) + y*y/(pars[4]*pars[4]) + z*z/(pars[5]*pars[5]));
+        ax = fac*x/(pars[3]*pars[3]);
+        ay = fac*y/(pars[4]*pars[4]);
+        az = fac*z/(pars[5]*pars[5]);
+
+        gn[0] = gn[0] + (ax*cosphi - ay*sinphi);
+        gn[1] = gn[1] + (ax*sinphi + ay*cosphi);
+        gn[2] = gn[2] + az;
+    }
+}
+
 void logarithmic_hessian(double t, double *pars, double *q, int n_dim,
                          double *hess) {
     /*  pars:
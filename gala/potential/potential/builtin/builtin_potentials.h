@@ -15,6 +15,9 @@ extern void henon_heiles_hessian(double t, double *pars, double *q, int n_dim, d
 extern double kepler_value(double t, double *pars, double *q, int n_dim);
 extern double kepler_density(double t, double *pars, double *q, int n_dim);
 extern void kepler_gradient(double t, double *pars, double *q, int n_dim, double *grad);
+extern double kepler_value_gradient(double t, double *pars, double *q, int n_dim, double *grad);
+extern void kepler_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val);
+extern void kepler_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad);
 extern void kepler_hessian(double t, double *pars, double *q, int n_dim, double *hess);
 
 extern double isochrone_value(double t, double *pars, double *q, int n_dim);
@@ -24,11 +27,17 @@ extern void isochrone_hessian(double t, double *pars, double *q, int n_dim, doub
 
 extern double hernquist_value(double t, double *pars, double *q, int n_dim);
 extern void hernquist_gradient(double t, double *pars, double *q, int n_dim, double *grad);
+extern double hernquist_value_gradient(double t, double *pars, double *q, int n_dim, double *grad);
+extern void hernquist_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val);
+extern void hernquist_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad);
 extern double hernquist_density(double t, double *pars, double *q, int n_dim);
 extern void hernquist_hessian(double t, double *pars, double *q, int n_dim, double *hess);
 
 extern double plummer_value(double t, double *pars, double *q, int n_dim);
 extern void plummer_gradient(double t, double *pars, double *q, int n_dim, double *grad);
+extern double plummer_value_gradient(double t, double *pars, double *q, int n_dim, double *grad);
+extern void plummer_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val);
+extern void plummer_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad);
 extern double plummer_density(double t, double *pars, double *q, int n_dim);
 extern void plummer_hessian(double t, double *pars, double *q, int n_dim, double *hess);
 
@@ -49,6 +58,9 @@ extern void stone_hessian(double t, double *pars, double *q, int n_dim, double *
 
 extern double sphericalnfw_value(double t, double *pars, double *q, int n_dim);
 extern void sphericalnfw_gradient(double t, double *pars, double *q, int n_dim, double *grad);
+extern double sphericalnfw_value_gradient(double t, double *pars, double *q, int n_dim, double *grad);
+extern void sphericalnfw_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val);
+extern void sphericalnfw_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad);
 extern double sphericalnfw_density(double t, double *pars, double *q, int n_dim);
 extern void sphericalnfw_hessian(double t, double *pars, double *q, int n_dim, double *hess);
 
@@ -68,9 +80,13 @@ extern void satoh_hessian(double t, double *pars, double *q, int n_dim, double *
 extern double kuzmin_value(double t, double *pars, double *q, int n_dim);
 extern void kuzmin_gradient(double t, double *pars, double *q, int n_dim, double *grad);
 extern double kuzmin_density(double t, double *pars, double *q, int n_dim);
+extern void kuzmin_hessian(double t, double *pars, double *q, int n_dim, double *hess);
 
 extern double miyamotonagai_value(double t, double *pars, double *q, int n_dim);
 extern void miyamotonagai_gradient(double t, double *pars, double *q, int n_dim, double *grad);
+extern double miyamotonagai_value_gradient(double t, double *pars, double *q, int n_dim, double *grad);
+extern void miyamotonagai_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val);
+extern void miyamotonagai_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad);
 extern void miyamotonagai_hessian(double t, double *pars, double *q, int n_dim, double *hess);
 extern double miyamotonagai_density(double t, double *pars, double *q, int n_dim);
 
@@ -85,6 +101,9 @@ extern double leesuto_density(double t, double *pars, double *q, int n_dim);
 
 extern double logarithmic_value(double t, double *pars, double *q, int n_dim);
 extern void logarithmic_gradient(double t, double *pars, double *q, int n_dim, double *grad);
+extern double logarithmic_value_gradient(double t, double *pars, double *q, int n_dim, double *grad);
+extern void logarithmic_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val);
+extern void logarithmic_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad);
 extern void logarithmic_hessian(double t, double *pars, double *q, int n_dim, double *hess);
 extern double logarithmic_density(double t, double *pars, double *q, int n_dim);
 
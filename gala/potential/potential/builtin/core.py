@@ -7,6 +7,9 @@ try:
 except AttributeError:
     myclassmethod = __builtins__['classmethod']
 
+# Standard library
+import warnings
+
 # Third-party
 from astropy.constants import G
 import astropy.units as u
@@ -38,7 +41,8 @@ from gala.potential.potential.builtin.cybuiltin import (
     LongMuraliBarWrapper,
     NullWrapper,
     MultipoleWrapper,
-    CylSplineWrapper
+    CylSplineWrapper,
+    TabulatedWrapper
 )
 
 __all__ = [
@@ -60,7 +64,8 @@ __all__ = [
     "LogarithmicPotential",
     "LongMuraliBarPotential",
     "MultipolePotential",
-    "CylSplinePotential"
+    "CylSplinePotential",
+    "TabulatedPotential"
 ]
 
 
@@ -1348,3 +1353,269 @@ class CylSplinePotential(CPotentialBase):
             units=self.units,
             **pars
         )
+
+
+class TabulatedPotential(CPotentialBase):
+    r"""
+    A potential that interpolates the value and gradient of another C
+    potential, tabulated once on a regular grid.
+
+    This is useful for speeding up orbit integrations in potentials that are
+    expensive to evaluate (e.g., SCF or multipole expansions, or composite
+    potentials with many components), as long as the orbits stay within a
+    bounded region. Inside of the grid, the potential and each component of
+    its gradient are interpolated with tricubic (or, for axisymmetric grids,
+    bicubic) Lagrange interpolation. Outside of the grid, the input potential
+    is evaluated directly. The density and Hessian are never tabulated, and
+    are always computed from the input potential.
+
+    The interpolation error decreases with the fourth power of the grid
+    spacing: use :meth:`precision_report` (or the ``rtol`` argument) to check
+    the accuracy of a given grid against the input potential.
+
+    Parameters
+    ----------
+    potential : `~gala.potential.CPotentialBase`
+        The (3D, time-independent) potential to tabulate.
+    bounds : iterable
+        The minimum and maximum of the grid along each axis, as a sequence of
+        ``(min, max)`` pairs of lengths. The axes are ``x, y, z`` for
+        ``coordinates='cartesian'``, and ``R, z`` for
+        ``coordinates='cylindrical'`` (the grid always covers all azimuths).
+    shape : int, iterable
+        The number of grid nodes along each axis (at least 4). For
+        ``coordinates='cylindrical'``, the axes are ``R, z, phi``, or ``R, z``
+        if ``axisymmetric=True``. If an integer, the same number of nodes is
+        used along all axes.
+    coordinates : str (optional)
+        The coordinates of the grid, either ``'cartesian'`` (the default) or
+        ``'cylindrical'``.
+    axisymmetric : bool (optional)
+        For ``coordinates='cylindrical'``, only tabulate the potential in the
+        ``phi=0`` plane and assume that it is axisymmetric.
+    t : `~astropy.units.Quantity`, numeric (optional)
+        The time at which to tabulate the potential.
+    rtol : float (optional)
+        If specified, compute a :meth:`precision_report` after tabulating and
+        warn if the maximum relative error of the energy or gradient is larger
+        than this value.
+    """
+
+    _coordinate_modes = {
+        'cartesian': 0,
+        'cylindrical': 1,
+        'axisymmetric': 2
+    }
+
+    Wrapper = TabulatedWrapper
+
+    def __init__(self, potential, bounds, shape, coordinates='cartesian',
+                 axisymmetric=False, t=0., rtol=None):
+        if not isinstance(potential, CPotentialBase):
+            raise TypeError("TabulatedPotential requires a C potential "
+                            "(subclass of CPotentialBase) to tabulate.")
+
+        if potential.ndim != 3:
+            raise ValueError("TabulatedPotential only supports 3D potentials.")
+
+        if coordinates not in ['cartesian', 'cylindrical']:
+            raise ValueError(f"Invalid coordinates '{coordinates}': must be "
+                             "one of 'cartesian' or 'cylindrical'.")
+
+        if axisymmetric and coordinates != 'cylindrical':
+            raise ValueError("axisymmetric=True requires "
+                             "coordinates='cylindrical'.")
+
+        PotentialBase.__init__(self, units=potential.units)
+
+        self.potential = potential
+        self._t = t
+        self.coordinates = coordinates
+        self.axisymmetric = bool(axisymmetric)
+        if axisymmetric:
+            mode = 'axisymmetric'
+        else:
+            mode = coordinates
+
+        n_bounds = 3 if mode == 'cartesian' else 2
+        n_axes = 2 if mode == 'axisymmetric' else 3
+
+        bounds = [self._length_value(b) for b in bounds]
+        if len(bounds) != n_bounds:
+            raise ValueError(f"Expected {n_bounds} (min, max) pairs for the "
+                             f"grid bounds, got {len(bounds)}.")
+        for b in bounds:
+            if b.shape != (2,) or not b[1] > b[0]:
+                raise ValueError("Grid bounds must be (min, max) pairs with "
+                                 "max > min.")
+        if mode != 'cartesian' and bounds[0][0] < 0:
+            raise ValueError("The minimum cylindrical radius of the grid "
+                             "must be >= 0.")
+        self.bounds = bounds
+
+        shape = np.broadcast_to(np.array(shape, dtype=int), (n_axes, ))
+        if np.any(shape < 4):
+            raise ValueError("The grid must have at least 4 nodes along each "
+                             "axis.")
+        self.shape = tuple(int(n) for n in shape)
+
+        # the grid nodes along each axis:
+        axes = [np.linspace(b[0], b[1], n) for b, n in zip(bounds, shape)]
+        if mode == 'cylindrical':
+            n_phi = shape[2]
+            axes.append(2*np.pi * np.arange(n_phi) / n_phi)
+        self._grid_axes = axes
+
+        table = self._tabulate(mode, t)
+
+        grid_n = np.ones(3)
+        grid_min = np.zeros(3)
+        grid_step = np.ones(3)
+        for i, ax in enumerate(axes):
+            grid_n[i] = len(ax)
+            grid_min[i] = ax[0]
+            grid_step[i] = ax[1] - ax[0]
+
+        self._c_only = {
+            'mode': self._coordinate_modes[mode],
+            'grid_n': grid_n,
+            'grid_min': grid_min,
+            'grid_step': grid_step,
+            'table': table
+        }
+        self._setup_wrapper(self._c_only, fallback=potential.c_instance)
+
+        if rtol is not None:
+            report = self.precision_report()
+            max_err = max(report['energy_max_rel_err'],
+                          report['gradient_max_rel_err'])
+            if max_err > rtol:
+                warnings.warn(
+                    f"The maximum relative error of the tabulated potential "
+                    f"({max_err:.2e}) is larger than rtol={rtol:.2e}: use a "
+                    "finer grid (larger shape) or smaller bounds.",
+                    RuntimeWarning)
+
+    def replace_units(self, units):
+        """Change the unit system of this potential.
+
+        The input potential is converted to the new unit system and
+        tabulated again on the same grid.
+
+        Parameters
+        ----------
+        units : `~gala.units.UnitSystem`
+            Set of non-reducable units that specify (at minimum) the
+            length, mass, time, and angle units.
+        """
+        potential = self.potential.replace_units(units)
+
+        bounds = self.bounds
+        if self.units['length'] != u.one:
+            bounds = [b * self.units['length'] for b in bounds]
+
+        return self.__class__(potential, bounds=bounds, shape=self.shape,
+                              coordinates=self.coordinates,
+                              axisymmetric=self.axisymmetric, t=self._t)
+
+    def _length_value(self, x):
+        if hasattr(x, 'unit'):
+            x = x.decompose(self.units).value
+        return np.asarray(x, dtype=np.float64)
+
+    def _tabulate(self, mode, t):
+        """
+        Evaluate the input potential and its gradient on the grid, returning
+        the table in the layout expected by the C interpolation functions.
+        """
+        grids = np.meshgrid(*self._grid_axes, indexing='ij')
+
+        if mode == 'cartesian':
+            xyz = np.stack([g.ravel() for g in grids])
+        else:
+            R = grids[0].ravel()
+            z = grids[1].ravel()
+            if mode == 'cylindrical':
+                phi = grids[2].ravel()
+            else:
+                phi = np.zeros_like(R)
+            xyz = np.stack([R * np.cos(phi), R * np.sin(phi), z])
+
+        Phi, grad = self.potential.energy_and_gradient(xyz, t=t)
+        Phi = Phi.decompose(self.units).value
+        grad = grad.decompose(self.units).value
+
+        if mode == 'cartesian':
+            vals = [Phi, grad[0], grad[1], grad[2]]
+        else:
+            cos_phi = np.cos(phi)
+            sin_phi = np.sin(phi)
+            grad_R = grad[0] * cos_phi + grad[1] * sin_phi
+            vals = [Phi, grad_R, grad[2]]
+            if mode == 'cylindrical':
+                vals.append(-grad[0] * sin_phi + grad[1] * cos_phi)
+
+        # interleave the values at each node
+        return np.stack(vals, axis=-1).ravel()
+
+    def _sample_grid(self, n_samples, rng):
+        """
+        Generate positions uniformly distributed within the grid.
+        """
+        if self.coordinates == 'cartesian':
+            return np.stack([rng.uniform(b[0], b[1], size=n_samples)
+                             for b in self.bounds])
+
+        R = rng.uniform(self.bounds[0][0], self.bounds[0][1], size=n_samples)
+        z = rng.uniform(self.bounds[1][0], self.bounds[1][1], size=n_samples)
+        phi = rng.uniform(0, 2*np.pi, size=n_samples)
+        return np.stack([R * np.cos(phi), R * np.sin(phi), z])
+
+    def precision_report(self, n_samples=4096, t=None, seed=None):
+        """
+        Compare the tabulated potential to the input potential at random
+        positions within the grid.
+
+        Parameters
+        ----------
+        n_samples : int (optional)
+            The number of random positions to compare at.
+        t : `~astropy.units.Quantity`, numeric (optional)
+            The time at which to evaluate the input potential. Defaults to the
+            time at which the potential was tabulated.
+        seed : int, `numpy.random.Generator` (optional)
+            The seed (or random number generator) used to draw the positions.
+
+        Returns
+        -------
+        report : dict
+            The maximum and median relative errors of the energy
+            (``energy_max_rel_err``, ``energy_median_rel_err``) and of the
+            magnitude of the gradient difference relative to the magnitude of
+            the gradient (``gradient_max_rel_err``,
+            ``gradient_median_rel_err``).
+        """
+        if t is None:
+            t = self._t
+
+        rng = np.random.default_rng(seed)
+        xyz = self._sample_grid(int(n_samples), rng)
+
+        E, grad = self.energy_and_gradient(xyz, t=t)
+        E_exact, grad_exact = self.potential.energy_and_gradient(xyz, t=t)
+        E = E.decompose(self.units).value
+        grad = grad.decompose(self.units).value
+        E_exact = E_exact.decompose(self.units).value
+        grad_exact = grad_exact.decompose(self.units).value
+
+        tiny = np.finfo(np.float64).tiny
+        E_err = np.abs(E - E_exact) / np.maximum(np.abs(E_exact), tiny)
+        grad_err = (np.linalg.norm(grad - grad_exact, axis=0) /
+                    np.maximum(np.linalg.norm(grad_exact, axis=0), tiny))
+
+        return {
+            'energy_max_rel_err': np.max(E_err),
+            'energy_median_rel_err': np.median(E_err),
+            'gradient_max_rel_err': np.max(grad_err),
+            'gradient_median_rel_err': np.median(grad_err)
+        }
@@ -22,7 +22,8 @@ from ..core import CompositePotential, _potential_docstring, PotentialBase
 from ..util import format_doc, sympy_wrap
 from ..cpotential import CPotentialBase
 from ..cpotential cimport CPotential, CPotentialWrapper
-from ..cpotential cimport densityfunc, energyfunc, gradientfunc, hessianfunc
+from ..cpotential cimport densityfunc, energyfunc, gradientfunc, hessianfunc, valuegradientfunc
+from ..cpotential cimport energybatchfunc, gradientbatchfunc
 from ...common import PotentialParameter
 from ...frame.cframe cimport CFrameWrapper
 from ....units import dimensionless, DimensionlessUnitSystem
@@ -42,6 +43,9 @@ cdef extern from "potential/potential/builtin/builtin_potentials.h":
 
     double kepler_value(double t, double *pars, double *q, int n_dim) nogil
     void kepler_gradient(double t, double *pars, double *q, int n_dim, double *grad) nogil
+    double kepler_value_gradient(double t, double *pars, double *q, int n_dim, double *grad) nogil
+    void kepler_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val) nogil
+    void kepler_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad) nogil
     double kepler_density(double t, double *pars, double *q, int n_dim) nogil
     void kepler_hessian(double t, double *pars, double *q, int n_dim, double *hess) nogil
 
@@ -52,11 +56,17 @@ cdef extern from "potential/potential/builtin/builtin_potentials.h":
 
     double hernquist_value(double t, double *pars, double *q, int n_dim) nogil
     void hernquist_gradient(double t, double *pars, double *q, int n_dim, double *grad) nogil
+    double hernquist_value_gradient(double t, double *pars, double *q, int n_dim, double *grad) nogil
+    void hernquist_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val) nogil
+    void hernquist_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad) nogil
     double hernquist_density(double t, double *pars, double *q, int n_dim) nogil
     void hernquist_hessian(double t, double *pars, double *q, int n_dim, double *hess) nogil
 
     double plummer_value(double t, double *pars, double *q, int n_dim) nogil
     void plummer_gradient(double t, double *pars, double *q, int n_dim, double *grad) nogil
+    double plummer_value_gradient(double t, double *pars, double *q, int n_dim, double *grad) nogil
+    void plummer_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val) nogil
+    void plummer_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad) nogil
     double plummer_density(double t, double *pars, double *q, int n_dim) nogil
     void plummer_hessian(double t, double *pars, double *q, int n_dim, double *hess) nogil
 
@@ -77,6 +87,9 @@ cdef extern from "potential/potential/builtin/builtin_potentials.h":
 
     double sphericalnfw_value(double t, double *pars, double *q, int n_dim) nogil
     void sphericalnfw_gradient(double t, double *pars, double *q, int n_dim, double *grad) nogil
+    double sphericalnfw_value_gradient(double t, double *pars, double *q, int n_dim, double *grad) nogil
+    void sphericalnfw_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val) nogil
+    void sphericalnfw_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad) nogil
     double sphericalnfw_density(double t, double *pars, double *q, int n_dim) nogil
     void sphericalnfw_hessian(double t, double *pars, double *q, int n_dim, double *hess) nogil
 
@@ -96,9 +109,13 @@ cdef extern from "potential/potential/builtin/builtin_potentials.h":
     double kuzmin_value(double t, double *pars, double *q, int n_dim) nogil
     void kuzmin_gradient(double t, double *pars, double *q, int n_dim, double *grad) nogil
     double kuzmin_density(double t, double *pars, double *q, int n_dim) nogil
+    void kuzmin_hessian(double t, double *pars, double *q, int n_dim, double *hess) nogil
 
     double miyamotonagai_value(double t, double *pars, double *q, int n_dim) nogil
     void miyamotonagai_gradient(double t, double *pars, double *q, int n_dim, double *grad) nogil
+    double miyamotonagai_value_gradient(double t, double *pars, double *q, int n_dim, double *grad) nogil
+    void miyamotonagai_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val) nogil
+    void miyamotonagai_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad) nogil
     void miyamotonagai_hessian(double t, double *pars, double *q, int n_dim, double *hess) nogil
     double miyamotonagai_density(double t, double *pars, double *q, int n_dim) nogil
 
@@ -113,6 +130,9 @@ cdef extern from "potential/potential/builtin/builtin_potentials.h":
 
     double logarithmic_value(double t, double *pars, double *q, int n_dim) nogil
     void logarithmic_gradient(double t, double *pars, double *q, int n_dim, double *grad) nogil
+    double logarithmic_value_gradient(double t, double *pars, double *q, int n_dim, double *grad) nogil
+    void logarithmic_value_batch(double t, double *pars, double *q, int n_dim, int N, double *val) nogil
+    void logarithmic_gradient_batch(double t, double *pars, double *q, int n_dim, int N, double *grad) nogil
     void logarithmic_hessian(double t, double *pars, double *q, int n_dim, double *hess) nogil
     double logarithmic_density(double t, double *pars, double *q, int n_dim) nogil
 
@@ -130,6 +150,24 @@ cdef extern from "potential/potential/builtin/multipole.h":
     void axisym_cylspline_gradient(double t, double *pars, double *q, int n_dim, double *grad) nogil
     double axisym_cylspline_density(double t, double *pars, double *q, int n_dim) nogil
 
+cdef extern from "potential/potential/builtin/tabulated.h":
+    const int TABULATED_N_HEADER
+
+    ctypedef struct TabulatedGrid:
+        double G
+        CPotential *fallback
+        int mode
+        int n[3]
+        double min[3]
+        double step[3]
+        double *table
+
+    double tabulated_value(double t, double *pars, double *q, int n_dim) nogil
+    void tabulated_gradient(double t, double *pars, double *q, int n_dim, double *grad) nogil
+    double tabulated_value_gradient(double t, double *pars, double *q, int n_dim, double *grad) nogil
+    double tabulated_density(double t, double *pars, double *q, int n_dim) nogil
+    void tabulated_hessian(double t, double *pars, double *q, int n_dim, double *hess) nogil
+
 # cdef extern from "gsl/gsl_interp.h":
 #     ctypedef struct gsl_interp_accel:
 #         pass
@@ -174,7 +212,8 @@ __all__ = [
     'LongMuraliBarWrapper',
     'NullWrapper',
     'MultipoleWrapper',
-    'CylSplineWrapper'
+    'CylSplineWrapper',
+    'TabulatedWrapper'
 ]
 
 # ============================================================================
@@ -189,6 +228,7 @@ cdef class HenonHeilesWrapper(CPotentialWrapper):
         self.cpotential.value[0] = <energyfunc>(henon_heiles_value)
         self.cpotential.gradient[0] = <gradientfunc>(henon_heiles_gradient)
         self.cpotential.hessian[0] = <hessianfunc>(henon_heiles_hessian)
+        self.cpotential.has_hessian[0] = 1
 
 
 # ============================================================================
@@ -204,6 +244,10 @@ cdef class KeplerWrapper(CPotentialWrapper):
         self.cpotential.density[0] = <densityfunc>(kepler_density)
         self.cpotential.gradient[0] = <gradientfunc>(kepler_gradient)
         self.cpotential.hessian[0] = <hessianfunc>(kepler_hessian)
+        self.cpotential.has_hessian[0] = 1
+        self.cpotential.value_gradient[0] = <valuegradientfunc>(kepler_value_gradient)
+        self.cpotential.value_batch[0] = <energybatchfunc>(kepler_value_batch)
+        self.cpotential.gradient_batch[0] = <gradientbatchfunc>(kepler_gradient_batch)
 
 
 cdef class IsochroneWrapper(CPotentialWrapper):
@@ -216,6 +260,7 @@ cdef class IsochroneWrapper(CPotentialWrapper):
         self.cpotential.density[0] = <densityfunc>(isochrone_density)
         self.cpotential.gradient[0] = <gradientfunc>(isochrone_gradient)
         self.cpotential.hessian[0] = <hessianfunc>(isochrone_hessian)
+        self.cpotential.has_hessian[0] = 1
 
 
 cdef class HernquistWrapper(CPotentialWrapper):
@@ -228,6 +273,10 @@ cdef class HernquistWrapper(CPotentialWrapper):
         self.cpotential.density[0] = <densityfunc>(hernquist_density)
         self.cpotential.gradient[0] = <gradientfunc>(hernquist_gradient)
         self.cpotential.hessian[0] = <hessianfunc>(hernquist_hessian)
+        self.cpotential.has_hessian[0] = 1
+        self.cpotential.value_gradient[0] = <valuegradientfunc>(hernquist_value_gradient)
+        self.cpotential.value_batch[0] = <energybatchfunc>(hernquist_value_batch)
+        self.cpotential.gradient_batch[0] = <gradientbatchfunc>(hernquist_gradient_batch)
 
 
 cdef class PlummerWrapper(CPotentialWrapper):
@@ -240,6 +289,10 @@ cdef class PlummerWrapper(CPotentialWrapper):
         self.cpotential.density[0] = <densityfunc>(plummer_density)
         self.cpotential.gradient[0] = <gradientfunc>(plummer_gradient)
         self.cpotential.hessian[0] = <hessianfunc>(plummer_hessian)
+        self.cpotential.has_hessian[0] = 1
+        self.cpotential.value_gradient[0] = <valuegradientfunc>(plummer_value_gradient)
+        self.cpotential.value_batch[0] = <energybatchfunc>(plummer_value_batch)
+        self.cpotential.gradient_batch[0] = <gradientbatchfunc>(plummer_gradient_batch)
 
 
 cdef class JaffeWrapper(CPotentialWrapper):
@@ -252,6 +305,7 @@ cdef class JaffeWrapper(CPotentialWrapper):
         self.cpotential.density[0] = <densityfunc>(jaffe_density)
         self.cpotential.gradient[0] = <gradientfunc>(jaffe_gradient)
         self.cpotential.hessian[0] = <hessianfunc>(jaffe_hessian)
+        self.cpotential.has_hessian[0] = 1
 
 
 cdef class StoneWrapper(CPotentialWrapper):
@@ -264,6 +318,7 @@ cdef class StoneWrapper(CPotentialWrapper):
         self.cpotential.density[0] = <densityfunc>(stone_density)
         self.cpotential.gradient[0] = <gradientfunc>(stone_gradient)
         self.cpotential.hessian[0] = <hessianfunc>(stone_hessian)
+        self.cpotential.has_hessian[0] = 1
 
 
 cdef class PowerLawCutoffWrapper(CPotentialWrapper):
@@ -278,6 +333,7 @@ cdef class PowerLawCutoffWrapper(CPotentialWrapper):
             self.cpotential.density[0] = <densityfunc>(powerlawcutoff_density)
             self.cpotential.gradient[0] = <gradientfunc>(powerlawcutoff_gradient)
             self.cpotential.hessian[0] = <hessianfunc>(powerlawcutoff_hessian)
+            self.cpotential.has_hessian[0] = 1
 
 
 # ============================================================================
@@ -293,6 +349,7 @@ cdef class SatohWrapper(CPotentialWrapper):
         self.cpotential.density[0] = <densityfunc>(satoh_density)
         self.cpotential.gradient[0] = <gradientfunc>(satoh_gradient)
         self.cpotential.hessian[0] = <hessianfunc>(satoh_hessian)
+        self.cpotential.has_hessian[0] = 1
 
 
 cdef class KuzminWrapper(CPotentialWrapper):
@@ -304,7 +361,8 @@ cdef class KuzminWrapper(CPotentialWrapper):
         self.cpotential.value[0] = <energyfunc>(kuzmin_value)
         self.cpotential.density[0] = <densityfunc>(kuzmin_density)
         self.cpotential.gradient[0] = <gradientfunc>(kuzmin_gradient)
-        self.cpotential.hessian[0] = <hessianfunc>(null_hessian)
+        self.cpotential.hessian[0] = <hessianfunc>(kuzmin_hessian)
+        self.cpotential.has_hessian[0] = 1
 
 
 cdef class MiyamotoNagaiWrapper(CPotentialWrapper):
@@ -317,6 +375,10 @@ cdef class MiyamotoNagaiWrapper(CPotentialWrapper):
         self.cpotential.density[0] = <densityfunc>(miyamotonagai_density)
         self.cpotential.gradient[0] = <gradientfunc>(miyamotonagai_gradient)
         self.cpotential.hessian[0] = <hessianfunc>(miyamotonagai_hessian)
+        self.cpotential.has_hessian[0] = 1
+        self.cpotential.value_gradient[0] = <valuegradientfunc>(miyamotonagai_value_gradient)
+        self.cpotential.value_batch[0] = <energybatchfunc>(miyamotonagai_value_batch)
+        self.cpotential.gradient_batch[0] = <gradientbatchfunc>(miyamotonagai_gradient_batch)
 
 
 cdef class MN3ExponentialDiskWrapper(CPotentialWrapper):
@@ -329,6 +391,7 @@ cdef class MN3ExponentialDiskWrapper(CPotentialWrapper):
         self.cpotential.density[0] = <densityfunc>(mn3_density)
         self.cpotential.gradient[0] = <gradientfunc>(mn3_gradient)
         self.cpotential.hessian[0] = <hessianfunc>(mn3_hessian)
+        self.cpotential.has_hessian[0] = 1
 
 
 # ============================================================================
@@ -345,6 +408,10 @@ cdef class SphericalNFWWrapper(CPotentialWrapper):
         self.cpotential.density[0] = <densityfunc>(sphericalnfw_density)
         self.cpotential.gradient[0] = <gradientfunc>(sphericalnfw_gradient)
         self.cpotential.hessian[0] = <hessianfunc>(sphericalnfw_hessian)
+        self.cpotential.has_hessian[0] = 1
+        self.cpotential.value_gradient[0] = <valuegradientfunc>(sphericalnfw_value_gradient)
+        self.cpotential.value_batch[0] = <energybatchfunc>(sphericalnfw_value_batch)
+        self.cpotential.gradient_batch[0] = <gradientbatchfunc>(sphericalnfw_gradient_batch)
 
 cdef class FlattenedNFWWrapper(CPotentialWrapper):
 
@@ -355,6 +422,7 @@ cdef class FlattenedNFWWrapper(CPotentialWrapper):
         self.cpotential.value[0] = <energyfunc>(flattenednfw_value)
         self.cpotential.gradient[0] = <gradientfunc>(flattenednfw_gradient)
         self.cpotential.hessian[0] = <hessianfunc>(flattenednfw_hessian)
+        self.cpotential.has_hessian[0] = 1
 
 cdef class TriaxialNFWWrapper(CPotentialWrapper):
 
@@ -365,6 +433,7 @@ cdef class TriaxialNFWWrapper(CPotentialWrapper):
         self.cpotential.value[0] = <energyfunc>(triaxialnfw_value)
         self.cpotential.gradient[0] = <gradientfunc>(triaxialnfw_gradient)
         self.cpotential.hessian[0] = <hessianfunc>(triaxialnfw_hessian)
+        self.cpotential.has_hessian[0] = 1
 
 
 cdef class LogarithmicWrapper(CPotentialWrapper):
@@ -376,6 +445,10 @@ cdef class LogarithmicWrapper(CPotentialWrapper):
         self.cpotential.value[0] = <energyfunc>(logarithmic_value)
         self.cpotential.gradient[0] = <gradientfunc>(logarithmic_gradient)
         self.cpotential.hessian[0] = <hessianfunc>(logarithmic_hessian)
+        self.cpotential.has_hessian[0] = 1
+        self.cpotential.value_gradient[0] = <valuegradientfunc>(logarithmic_value_gradient)
+        self.cpotential.value_batch[0] = <energybatchfunc>(logarithmic_value_batch)
+        self.cpotential.gradient_batch[0] = <gradientbatchfunc>(logarithmic_gradient_batch)
         self.cpotential.density[0] = <energyfunc>(logarithmic_density)
 
 
@@ -400,6 +473,7 @@ cdef class LongMuraliBarWrapper(CPotentialWrapper):
         self.cpotential.gradient[0] = <gradientfunc>(longmuralibar_gradient)
         self.cpotential.density[0] = <densityfunc>(longmuralibar_density)
         self.cpotential.hessian[0] = <hessianfunc>(longmuralibar_hessian)
+        self.cpotential.has_hessian[0] = 1
 
 
 # ==============================================================================
@@ -415,6 +489,7 @@ cdef class NullWrapper(CPotentialWrapper):
         self.cpotential.density[0] = <densityfunc>(null_density)
         self.cpotential.gradient[0] = <gradientfunc>(null_gradient)
         self.cpotential.hessian[0] = <hessianfunc>(null_hessian)
+        self.cpotential.has_hessian[0] = 1
         self.cpotential.null = 1
 
 
@@ -446,3 +521,60 @@ cdef class CylSplineWrapper(CPotentialWrapper):
             self.cpotential.gradient[0] = <gradientfunc>(axisym_cylspline_gradient)
             self.cpotential.density[0] = <densityfunc>(axisym_cylspline_density)
             #self.cpotential.hessian[0] = <hessianfunc>(axisym_cylspline_hessian)
+
+
+cdef class TabulatedWrapper(CPotentialWrapper):
+    # the grid and table, passed to the C functions in place of the parameter
+    # array. The table points into self._params
+    cdef TabulatedGrid _grid
+
+    # the wrapper of the exact potential, which is evaluated outside of the
+    # grid. The grid struct points to its C potential, so we hold a reference
+    # to keep it alive
+    cdef CPotentialWrapper _fallback
+
+    def __init__(self, G, parameters, q0, R, fallback=None):
+        cdef int i
+
+        if fallback is None:
+            raise ValueError("TabulatedWrapper requires the C wrapper of the "
+                             "tabulated potential, to evaluate outside of "
+                             "the grid")
+
+        self.init([G] + list(parameters),
+                  np.ascontiguousarray(q0),
+                  np.ascontiguousarray(R))
+
+        self._fallback = fallback
+
+        # parameters: G, mode, and the number of nodes, minimum, and spacing
+        #   along each of the 3 axes, followed by the table
+        self._grid.G = self._params[0]
+        self._grid.fallback = &(self._fallback.cpotential)
+        self._grid.mode = <int>self._params[1]
+        for i in range(3):
+            self._grid.n[i] = <int>self._params[2 + i]
+            self._grid.min[i] = self._params[5 + i]
+            self._grid.step[i] = self._params[8 + i]
+        self._grid.table = &(self._params[TABULATED_N_HEADER])
+        self.cpotential.parameters[0] = <double *>&(self._grid)
+
+        self.cpotential.value[0] = <energyfunc>(tabulated_value)
+        self.cpotential.gradient[0] = <gradientfunc>(tabulated_gradient)
+        self.cpotential.value_gradient[0] = <valuegradientfunc>(tabulated_value_gradient)
+        self.cpotential.density[0] = <densityfunc>(tabulated_density)
+
+        # the Hessian comes from the exact potential, if it has one
+        self.cpotential.hessian[0] = <hessianfunc>(tabulated_hessian)
+        self.cpotential.has_hessian[0] = 1
+        for i in range(self._fallback.cpotential.n_components):
+            if not self._fallback.cpotential.has_hessian[i]:
+                self.cpotential.has_hessian[0] = 0
+
+    def __reduce__(self):
+        return (self.__class__,
+                (self._params[0], list(self._params[1:]),
+                 np.array(self._q0),
+                 np.array(self._R).reshape(self.cpotential.n_dim,
+                                           self.cpotential.n_dim),
+                 self._fallback))
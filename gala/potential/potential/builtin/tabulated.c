@@ -0,0 +1,217 @@
+#include <math.h>
+#include "potential/src/cpotential.h"
+#include "tabulated.h"
+
+/*
+    Interpolation of a potential (and its gradient) tabulated on a regular grid
+    in Cartesian (x, y, z), cylindrical (R, z, phi), or axisymmetric (R, z)
+    coordinates. Inside the grid, each tabulated quantity is interpolated with
+    tensor-product cubic Lagrange interpolation over the 4 nearest nodes along
+    each axis (tricubic in 3D, bicubic in 2D). Outside the grid, the exact
+    potential is evaluated instead.
+
+    The grid, table, and exact potential are passed to the functions below
+    through a TabulatedGrid struct (see tabulated.h) in place of the parameter
+    array.
+*/
+
+static int tabulated_stencil(double u, double u_min, double h, int n,
+                             int periodic, int *idx, double *w) {
+    /*
+        Computes the indices of the 4 nodes used to interpolate at u along one
+        axis and the corresponding Lagrange weights. Returns 0 if u is outside
+        of the grid along a non-periodic axis.
+    */
+    int i, k;
+    double s = (u - u_min) / h;
+    double x;
+
+    if (periodic) {
+        s = s - n * floor(s / n);
+        i = (int)floor(s) - 1;
+        x = s - i;
+        for (k=0; k < 4; k++)
+            idx[k] = ((i + k) % n + n) % n;
+    } else {
+        if ((s < 0) || (s > n - 1))
+            return 0;
+
+        // shift the stencil so that it stays inside the grid at the edges
+        i = (int)floor(s) - 1;
+        if (i < 0)
+            i = 0;
+        if (i > n - 4)
+            i = n - 4;
+        x = s - i;
+        for (k=0; k < 4; k++)
+            idx[k] = i + k;
+    }
+
+    w[0] = -(x - 1) * (x - 2) * (x - 3) / 6.;
+    w[1] = x * (x - 2) * (x - 3) / 2.;
+    w[2] = -x * (x - 1) * (x - 3) / 2.;
+    w[3] = x * (x - 1) * (x - 2) / 6.;
+
+    return 1;
+}
+
+static int tabulated_interp(TabulatedGrid *grid, double *q, int c0, int c1,
+                            double *out) {
+    /*
+        Interpolates the tabulated quantities c0 <= c < c1 at position q,
+        storing the results in out[c]. Returns 0 if q is outside of the grid.
+    */
+    int mode = grid->mode;
+    int n1 = grid->n[1], n2 = grid->n[2];
+    int n_vals = (mode == TABULATED_AXISYMMETRIC) ? 3 : 4;
+    int n_axes = (mode == TABULATED_AXISYMMETRIC) ? 2 : 3;
+    double *table = grid->table;
+    double u[3];
+    int idx[3][4];
+    double w[3][4];
+    double *node;
+    double w01, w012;
+    int a, b, k, c, d;
+
+    if (mode == TABULATED_CARTESIAN) {
+        u[0] = q[0];
+        u[1] = q[1];
+        u[2] = q[2];
+    } else {
+        u[0] = sqrt(q[0]*q[0] + q[1]*q[1]);
+        u[1] = q[2];
+        u[2] = atan2(q[1], q[0]);
+    }
+
+    for (d=0; d < n_axes; d++) {
+        if (!tabulated_stencil(u[d], grid->min[d], grid->step[d], grid->n[d],
+                               (mode == TABULATED_CYLINDRICAL) && (d == 2),
+                               idx[d], w[d]))
+            return 0;
+    }
+
+    for (c=c0; c < c1; c++)
+        out[c] = 0.;
+
+    if (n_axes == 2) {
+        for (a=0; a < 4; a++) {
+            for (b=0; b < 4; b++) {
+                w01 = w[0][a] * w[1][b];
+                node = &table[(idx[0][a]*n1 + idx[1][b]) * n_vals];
+                for (c=c0; c < c1; c++)
+                    out[c] = out[c] + w01 * node[c];
+            }
+        }
+    } else {
+        for (a=0; a < 4; a++) {
+            for (b=0; b < 4; b++) {
+                w01 = w[0][a] * w[1][b];
+                for (k=0; k < 4; k++) {
+                    w012 = w01 * w[2][k];
+                    node = &table[((idx[0][a]*n1 + idx[1][b])*n2 + idx[2][k]) * n_vals];
+                    for (c=c0; c < c1; c++)
+                        out[c] = out[c] + w012 * node[c];
+                }
+            }
+        }
+    }
+
+    return 1;
+}
+
+static void tabulated_add_gradient(TabulatedGrid *grid, double *q, double *vals,
+                                   double *grad) {
+    /*
+        Converts the interpolated gradient components along the grid axes
+        (vals[1:]) to Cartesian components and accumulates them into grad.
+    */
+    int mode = grid->mode;
+    double R, cos_phi = 1., sin_phi = 0.;
+
+    if (mode == TABULATED_CARTESIAN) {
+        grad[0] = grad[0] + vals[1];
+        grad[1] = grad[1] + vals[2];
+        grad[2] = grad[2] + vals[3];
+        return;
+    }
+
+    R = sqrt(q[0]*q[0] + q[1]*q[1]);
+    if (R > 0) {
+        cos_phi = q[0] / R;
+        sin_phi = q[1] / R;
+    }
+
+    if (mode == TABULATED_CYLINDRICAL) {
+        grad[0] = grad[0] + vals[1]*cos_phi - vals[3]*sin_phi;
+        grad[1] = grad[1] + vals[1]*sin_phi + vals[3]*cos_phi;
+    } else {
+        grad[0] = grad[0] + vals[1]*cos_phi;
+        grad[1] = grad[1] + vals[1]*sin_phi;
+    }
+    grad[2] = grad[2] + vals[2];
+}
+
+double tabulated_value(double t, double *pars, double *q, int n_dim) {
+    TabulatedGrid *grid = (TabulatedGrid *)pars;
+    double vals[4];
+
+    if (tabulated_interp(grid, q, 0, 1, vals))
+        return vals[0];
+
+    return c_potential(grid->fallback, t, q);
+}
+
+void tabulated_gradient(double t, double *pars, double *q, int n_dim,
+                        double *grad) {
+    TabulatedGrid *grid = (TabulatedGrid *)pars;
+    int n_vals = (grid->mode == TABULATED_AXISYMMETRIC) ? 3 : 4;
+    double vals[4];
+    double tmp_grad[3];
+
+    if (tabulated_interp(grid, q, 1, n_vals, vals)) {
+        tabulated_add_gradient(grid, q, vals, grad);
+    } else {
+        c_gradient(grid->fallback, t, q, &tmp_grad[0]);
+        grad[0] = grad[0] + tmp_grad[0];
+        grad[1] = grad[1] + tmp_grad[1];
+        grad[2] = grad[2] + tmp_grad[2];
+    }
+}
+
+double tabulated_value_gradient(double t, double *pars, double *q, int n_dim,
+                                double *grad) {
+    TabulatedGrid *grid = (TabulatedGrid *)pars;
+    int n_vals = (grid->mode == TABULATED_AXISYMMETRIC) ? 3 : 4;
+    double vals[4];
+    double tmp_grad[3];
+    double v;
+
+    if (tabulated_interp(grid, q, 0, n_vals, vals)) {
+        tabulated_add_gradient(grid, q, vals, grad);
+        return vals[0];
+    }
+
+    v = c_value_gradient(grid->fallback, t, q, &tmp_grad[0]);
+    grad[0] = grad[0] + tmp_grad[0];
+    grad[1] = grad[1] + tmp_grad[1];
+    grad[2] = grad[2] + tmp_grad[2];
+    return v;
+}
+
+double tabulated_density(double t, double *pars, double *q, int n_dim) {
+    // the density is not tabulated, so always use the exact potential
+    TabulatedGrid *grid = (TabulatedGrid *)pars;
+    return c_density(grid->fallback, t, q);
+}
+
+void tabulated_hessian(double t, double *pars, double *q, int n_dim,
+                       double *hess) {
+    // the Hessian is not tabulated, so always use the exact potential
+    TabulatedGrid *grid = (TabulatedGrid *)pars;
+    double tmp_hess[9];
+    int i;
+
+    c_hessian(grid->fallback, t, q, &tmp_hess[0]);
+    for (i=0; i < 9; i++)
+        hess[i] = hess[i] + tmp_hess[i];
+}
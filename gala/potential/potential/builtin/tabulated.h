@@ -0,0 +1,37 @@
+#include "potential/src/cpotential.h"
+
+#define TABULATED_CARTESIAN 0
+#define TABULATED_CYLINDRICAL 1
+#define TABULATED_AXISYMMETRIC 2
+
+#define TABULATED_N_HEADER 11
+
+#ifndef _TABULATED_H
+#define _TABULATED_H
+    /*
+        The grid and table of a tabulated potential. The wrapper passes a
+        pointer to this struct to the functions below in place of the usual
+        parameter array, so G must stay the first member.
+    */
+    typedef struct {
+        double G;
+
+        // the exact potential, evaluated outside of the grid
+        CPotential *fallback;
+
+        int mode;
+        int n[3]; // number of grid nodes along each axis (1 for unused axes)
+        double min[3]; // minimum value along each axis
+        double step[3]; // grid spacing along each axis
+
+        // for each node, in C order over the axes, the value of the potential
+        // followed by the gradient components along the grid axes
+        double *table;
+    } TabulatedGrid;
+#endif
+
+extern double tabulated_value(double t, double *pars, double *q, int n_dim);
+extern void tabulated_gradient(double t, double *pars, double *q, int n_dim, double *grad);
+extern double tabulated_value_gradient(double t, double *pars, double *q, int n_dim, double *grad);
+extern double tabulated_density(double t, double *pars, double *q, int n_dim);
+extern void tabulated_hessian(double t, double *pars, double *q, int n_dim, double *hess);
@@ -25,7 +25,6 @@ cdef class CCompositePotentialWrapper(CPotentialWrapper):
 
     def __init__(self, list potentials):
         cdef:
-            CPotential cp
             CPotential tmp_cp
             int i
             CPotentialWrapper[::1] _cpotential_arr
@@ -38,27 +37,31 @@ cdef class CCompositePotentialWrapper(CPotentialWrapper):
         for i in range(n_components):
             self._n_params[i] = _cpotential_arr[i]._n_params[0]
 
-        cp.n_components = n_components
-        cp.n_params = &(self._n_params[0])
-        cp.n_dim = 0
+        self._allocate_components(n_components)
+        self.cpotential.n_params = &(self._n_params[0])
+        self.cpotential.n_dim = 0
+        self.cpotential.null = 0
 
         for i in range(n_components):
             tmp_cp = _cpotential_arr[i].cpotential
-            cp.parameters[i] = &(_cpotential_arr[i]._params[0])
-            cp.q0[i] = &(_cpotential_arr[i]._q0[0])
-            cp.R[i] = &(_cpotential_arr[i]._R[0])
-            cp.value[i] = tmp_cp.value[0]
-            cp.density[i] = tmp_cp.density[0]
-            cp.gradient[i] = tmp_cp.gradient[0]
-            cp.hessian[i] = tmp_cp.hessian[0]
-
-            if cp.n_dim == 0:
-                cp.n_dim = tmp_cp.n_dim
-            elif cp.n_dim != tmp_cp.n_dim:
+            self.cpotential.parameters[i] = tmp_cp.parameters[0]
+            self.cpotential.q0[i] = &(_cpotential_arr[i]._q0[0])
+            self.cpotential.R[i] = &(_cpotential_arr[i]._R[0])
+            self.cpotential.transform[i] = tmp_cp.transform[0]
+            self.cpotential.value[i] = tmp_cp.value[0]
+            self.cpotential.density[i] = tmp_cp.density[0]
+            self.cpotential.gradient[i] = tmp_cp.gradient[0]
+            self.cpotential.hessian[i] = tmp_cp.hessian[0]
+            self.cpotential.has_hessian[i] = tmp_cp.has_hessian[0]
+            self.cpotential.value_gradient[i] = tmp_cp.value_gradient[0]
+            self.cpotential.value_batch[i] = tmp_cp.value_batch[0]
+            self.cpotential.gradient_batch[i] = tmp_cp.gradient_batch[0]
+
+            if self.cpotential.n_dim == 0:
+                self.cpotential.n_dim = tmp_cp.n_dim
+            elif self.cpotential.n_dim != tmp_cp.n_dim:
                 raise ValueError("Input potentials must have same number of coordinate dimensions")
 
-        self.cpotential = cp
-
     def __reduce__(self):
         return (self.__class__, (list(self._potentials),))
 
@@ -75,6 +78,14 @@ class CCompositePotential(CompositePotential, CPotentialBase):
         self.G = p.G
         self.c_instance = CCompositePotentialWrapper(self._potential_list)
 
+    # Evaluate all components in a single pass through the C composite
+    # instead of summing over the components in Python
+    _energy = CPotentialBase._energy
+    _gradient = CPotentialBase._gradient
+    _density = CPotentialBase._density
+    _hessian = CPotentialBase._hessian
+    _energy_and_gradient = CPotentialBase._energy_and_gradient
+
     def __setitem__(self, *args, **kwargs):
         CompositePotential.__setitem__(self, *args, **kwargs)
         self._reset_c_instance()
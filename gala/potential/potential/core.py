@@ -173,6 +173,9 @@ class PotentialBase(CommonBase, metaclass=abc.ABCMeta):
     def _hessian(self, q, t=0.0):
         raise NotImplementedError("This Potential has no implemented Hessian.")
 
+    def _energy_and_gradient(self, q, t=0.0, **kwargs):
+        return self._energy(q, t=t, **kwargs), self._gradient(q, t=t, **kwargs)
+
     ###########################################################################
     # Utility methods
     #
@@ -213,10 +216,23 @@ class PotentialBase(CommonBase, metaclass=abc.ABCMeta):
 
         return x
 
+    def _validate_n_threads(self, n_threads):
+        """
+        Returns any extra keyword arguments to pass through to the low-level
+        evaluation methods (e.g., ``_energy()``). Multi-threaded evaluation is
+        only supported by potentials implemented in C.
+        """
+        if n_threads is not None:
+            raise ValueError(
+                "Multi-threaded evaluation (n_threads) is only supported for "
+                f"potentials implemented in C, not {self.__class__.__name__}"
+            )
+        return dict()
+
     ###########################################################################
     # Core methods that use the above implemented functions
     #
-    def energy(self, q, t=0.0):
+    def energy(self, q, t=0.0, n_threads=None):
         """
         Compute the potential energy at the given position(s).
 
@@ -226,6 +242,11 @@ class PotentialBase(CommonBase, metaclass=abc.ABCMeta):
             The position to compute the value of the potential. If the
             input position object has no units (i.e. is an `~numpy.ndarray`),
             it is assumed to be in the same unit system as the potential.
+        n_threads : int (optional)
+            The number of threads to use when evaluating at many positions.
+            This is only supported for potentials implemented in C, and only
+            has an effect if gala was compiled with OpenMP support. By default,
+            positions are evaluated serially.
 
         Returns
         -------
@@ -235,11 +256,12 @@ class PotentialBase(CommonBase, metaclass=abc.ABCMeta):
         q = self._remove_units_prepare_shape(q)
         orig_shape, q = self._get_c_valid_arr(q)
         t = self._validate_prepare_time(t, q)
+        kw = self._validate_n_threads(n_threads)
         ret_unit = self.units["energy"] / self.units["mass"]
 
-        return self._energy(q, t=t).T.reshape(orig_shape[1:]) * ret_unit
+        return self._energy(q, t=t, **kw).T.reshape(orig_shape[1:]) * ret_unit
 
-    def gradient(self, q, t=0.0):
+    def gradient(self, q, t=0.0, n_threads=None):
         """
         Compute the gradient of the potential at the given position(s).
 
@@ -249,6 +271,11 @@ class PotentialBase(CommonBase, metaclass=abc.ABCMeta):
             The position to compute the value of the potential. If the
             input position object has no units (i.e. is an `~numpy.ndarray`),
             it is assumed to be in the same unit system as the potential.
+        n_threads : int (optional)
+            The number of threads to use when evaluating at many positions.
+            This is only supported for potentials implemented in C, and only
+            has an effect if gala was compiled with OpenMP support. By default,
+            positions are evaluated serially.
 
         Returns
         -------
@@ -259,11 +286,57 @@ class PotentialBase(CommonBase, metaclass=abc.ABCMeta):
         q = self._remove_units_prepare_shape(q)
         orig_shape, q = self._get_c_valid_arr(q)
         t = self._validate_prepare_time(t, q)
+        kw = self._validate_n_threads(n_threads)
         ret_unit = self.units["length"] / self.units["time"] ** 2
         uu = self.units["acceleration"]
-        return (self._gradient(q, t=t).T.reshape(orig_shape) * ret_unit).to(uu)
+        return (self._gradient(q, t=t, **kw).T.reshape(orig_shape) * ret_unit).to(uu)
 
-    def density(self, q, t=0.0):
+    def energy_and_gradient(self, q, t=0.0, n_threads=None):
+        """
+        Compute the potential energy and the gradient of the potential at the
+        given position(s) in a single evaluation.
+
+        For potentials implemented in C, this shares the coordinate
+        transformations (and, where implemented, intermediate quantities)
+        between the two calculations, so it is faster than calling
+        `~gala.potential.PotentialBase.energy` and
+        `~gala.potential.PotentialBase.gradient` separately.
+
+        Parameters
+        ----------
+        q : `~gala.dynamics.PhaseSpacePosition`, `~astropy.units.Quantity`, array_like
+            The position to compute the value of the potential. If the
+            input position object has no units (i.e. is an `~numpy.ndarray`),
+            it is assumed to be in the same unit system as the potential.
+        n_threads : int (optional)
+            The number of threads to use when evaluating at many positions.
+            This is only supported for potentials implemented in C, and only
+            has an effect if gala was compiled with OpenMP support. By default,
+            positions are evaluated serially.
+
+        Returns
+        -------
+        E : `~astropy.units.Quantity`
+            The potential energy per unit mass or value of the potential.
+        grad : `~astropy.units.Quantity`
+            The gradient of the potential. Will have the same shape as
+            the input position.
+        """
+        q = self._remove_units_prepare_shape(q)
+        orig_shape, q = self._get_c_valid_arr(q)
+        t = self._validate_prepare_time(t, q)
+        kw = self._validate_n_threads(n_threads)
+        E, grad = self._energy_and_gradient(q, t=t, **kw)
+
+        E_unit = self.units["energy"] / self.units["mass"]
+        grad_unit = self.units["length"] / self.units["time"] ** 2
+        uu = self.units["acceleration"]
+        return (
+            E.T.reshape(orig_shape[1:]) * E_unit,
+            (grad.T.reshape(orig_shape) * grad_unit).to(uu),
+        )
+
+    def density(self, q, t=0.0, n_threads=None):
         """
         Compute the density value at the given position(s).
 
@@ -273,6 +346,11 @@ class PotentialBase(CommonBase, metaclass=abc.ABCMeta):
             The position to compute the value of the potential. If the
             input position object has no units (i.e. is an `~numpy.ndarray`),
             it is assumed to be in the same unit system as the potential.
+        n_threads : int (optional)
+            The number of threads to use when evaluating at many positions.
+            This is only supported for potentials implemented in C, and only
+            has an effect if gala was compiled with OpenMP support. By default,
+            positions are evaluated serially.
 
         Returns
         -------
@@ -284,10 +362,11 @@ class PotentialBase(CommonBase, metaclass=abc.ABCMeta):
         q = self._remove_units_prepare_shape(q)
         orig_shape, q = self._get_c_valid_arr(q)
         t = self._validate_prepare_time(t, q)
+        kw = self._validate_n_threads(n_threads)
         ret_unit = self.units["mass"] / self.units["length"] ** 3
-        return (self._density(q, t=t).T * ret_unit).to(self.units["mass density"])
+        return (self._density(q, t=t, **kw).T * ret_unit).to(self.units["mass density"])
 
-    def hessian(self, q, t=0.0):
+    def hessian(self, q, t=0.0, n_threads=None):
         """
         Compute the Hessian of the potential at the given position(s).
 
@@ -297,6 +376,11 @@ class PotentialBase(CommonBase, metaclass=abc.ABCMeta):
             The position to compute the value of the potential. If the
             input position object has no units (i.e. is an `~numpy.ndarray`),
             it is assumed to be in the same unit system as the potential.
+        n_threads : int (optional)
+            The number of threads to use when evaluating at many positions.
+            This is only supported for potentials implemented in C, and only
+            has an effect if gala was compiled with OpenMP support. By default,
+            positions are evaluated serially.
 
         Returns
         -------
@@ -306,20 +390,121 @@ class PotentialBase(CommonBase, metaclass=abc.ABCMeta):
             shape ``(q.shape[0],q.shape[0]) + q.shape[1:]``. That is, an
             ``n_dim`` by ``n_dim`` array (matrix) for each position.
         """
-        if self.R is not None and not np.allclose(
-            np.diag(self.R), 1.0, atol=1e-15, rtol=0
-        ):
-            raise NotImplementedError(
-                "Computing Hessian matrices for rotated "
-                "potentials is currently not supported."
-            )
         q = self._remove_units_prepare_shape(q)
         orig_shape, q = self._get_c_valid_arr(q)
         t = self._validate_prepare_time(t, q)
+        kw = self._validate_n_threads(n_threads)
         ret_unit = 1 / self.units["time"] ** 2
-        hess = np.moveaxis(self._hessian(q, t=t), 0, -1)
+        hess = np.moveaxis(self._hessian(q, t=t, **kw), 0, -1)
         return hess.reshape((orig_shape[0], orig_shape[0]) + orig_shape[1:]) * ret_unit
 
+    ###########################################################################
+    # Low-level evaluation methods, without units
+    #
+    def energy_raw(self, q, t=0.0, out=None, n_threads=None):
+        """
+        Compute the potential energy at the given positions, with no unit
+        handling or input validation.
+
+        This is a fast path for code that evaluates the potential many times
+        on small batches of positions (e.g., samplers or optimizers), where
+        the overhead of `~gala.potential.PotentialBase.energy` dominates. The
+        positions must already be in the unit system of the potential, and
+        note that the axes are ``(n, ndim)``, i.e. transposed relative to the
+        other methods.
+
+        Parameters
+        ----------
+        q : `~numpy.ndarray`
+            A C-contiguous, float64 array of positions with shape
+            ``(n, ndim)``.
+        t : numeric (optional)
+            A single time, in the unit system of the potential.
+        out : `~numpy.ndarray` (optional)
+            A C-contiguous, float64 array with shape ``(n,)`` to store the
+            output in. If not specified, a new array is allocated.
+        n_threads : int (optional)
+            The number of threads to use. This is only supported for
+            potentials implemented in C.
+
+        Returns
+        -------
+        E : `~numpy.ndarray`
+            The potential energy per unit mass, with shape ``(n,)``. This is
+            ``out``, if specified.
+        """
+        kw = self._validate_n_threads(n_threads)
+        E = self._energy(q, t=np.array([t], dtype=np.float64), **kw)
+        return self._raw_output(E, out)
+
+    def gradient_raw(self, q, t=0.0, out=None, n_threads=None):
+        """
+        Compute the gradient of the potential at the given positions, with no
+        unit handling or input validation.
+
+        See `~gala.potential.PotentialBase.energy_raw` for more information.
+
+        Parameters
+        ----------
+        q : `~numpy.ndarray`
+            A C-contiguous, float64 array of positions with shape
+            ``(n, ndim)``.
+        t : numeric (optional)
+            A single time, in the unit system of the potential.
+        out : `~numpy.ndarray` (optional)
+            A C-contiguous, float64 array with shape ``(n, ndim)`` to store
+            the output in. If not specified, a new array is allocated.
+        n_threads : int (optional)
+            The number of threads to use. This is only supported for
+            potentials implemented in C.
+
+        Returns
+        -------
+        grad : `~numpy.ndarray`
+            The gradient, with shape ``(n, ndim)``. This is ``out``, if
+            specified.
+        """
+        kw = self._validate_n_threads(n_threads)
+        grad = self._gradient(q, t=np.array([t], dtype=np.float64), **kw)
+        return self._raw_output(grad, out)
+
+    def density_raw(self, q, t=0.0, out=None, n_threads=None):
+        """
+        Compute the density at the given positions, with no unit handling or
+        input validation.
+
+        See `~gala.potential.PotentialBase.energy_raw` for more information.
+
+        Parameters
+        ----------
+        q : `~numpy.ndarray`
+            A C-contiguous, float64 array of positions with shape
+            ``(n, ndim)``.
+        t : numeric (optional)
+            A single time, in the unit system of the potential.
+        out : `~numpy.ndarray` (optional)
+            A C-contiguous, float64 array with shape ``(n,)`` to store the
+            output in. If not specified, a new array is allocated.
+        n_threads : int (optional)
+            The number of threads to use. This is only supported for
+            potentials implemented in C.
+
+        Returns
+        -------
+        dens : `~numpy.ndarray`
+            The density, with shape ``(n,)``. This is ``out``, if specified.
+        """
+        kw = self._validate_n_threads(n_threads)
+        dens = self._density(q, t=np.array([t], dtype=np.float64), **kw)
+        return self._raw_output(dens, out)
+
+    @staticmethod
+    def _raw_output(val, out):
+        if out is None:
+            return val
+        out[...] = val
+        return out
+
     ###########################################################################
     # Convenience methods that make use the base methods
     #
@@ -794,6 +979,11 @@ class PotentialBase(CommonBase, metaclass=abc.ABCMeta):
             Controls whether to store the phase-space position at all intermediate
             timesteps. Set to False to store only the final values (i.e. the
             phase-space position(s) at the final timestep). Default is True.
+        n_threads : int (optional)
+            The number of threads to integrate the orbits with. This is
+            currently only supported by the Cython implementations of
+            `~gala.integrate.LeapfrogIntegrator` and of
+            `~gala.integrate.DOPRI853Integrator` with ``independent=True``.
         **time_spec
             Specification of how long to integrate. See documentation
             for `~gala.integrate.parse_time_specification`.
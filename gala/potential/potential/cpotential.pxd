@@ -9,31 +9,46 @@ cdef extern from "src/funcdefs.h":
     ctypedef double (*energyfunc)(double t, double *pars, double *q) nogil
     ctypedef void (*gradientfunc)(double t, double *pars, double *q, double *grad) nogil
     ctypedef void (*hessianfunc)(double t, double *pars, double *q, double *hess) nogil
+    ctypedef double (*valuegradientfunc)(double t, double *pars, double *q, int n_dim, double *grad) nogil
+    ctypedef void (*energybatchfunc)(double t, double *pars, double *q, int n_dim, int N, double *val) nogil
+    ctypedef void (*gradientbatchfunc)(double t, double *pars, double *q, int n_dim, int N, double *grad) nogil
 
 cdef extern from "potential/src/cpotential.h":
-    const int MAX_N_COMPONENTS
+    const int TRANSFORM_SHIFT
+    const int TRANSFORM_ROTATE
 
     ctypedef struct CPotential:
         int n_components
         int n_dim
         int null
-        densityfunc density[MAX_N_COMPONENTS]
-        energyfunc value[MAX_N_COMPONENTS]
-        gradientfunc gradient[MAX_N_COMPONENTS]
-        hessianfunc hessian[MAX_N_COMPONENTS]
-        int n_params[MAX_N_COMPONENTS]
-        double *parameters[MAX_N_COMPONENTS]
-        double *q0[MAX_N_COMPONENTS]
-        double *R[MAX_N_COMPONENTS]
+        densityfunc *density
+        energyfunc *value
+        gradientfunc *gradient
+        hessianfunc *hessian
+        valuegradientfunc *value_gradient
+        energybatchfunc *value_batch
+        gradientbatchfunc *gradient_batch
+        int *n_params
+        double **parameters
+        double **q0
+        double **R
+        int *transform
+        int *has_hessian
 
     double c_potential(CPotential *p, double t, double *q) nogil
     double c_density(CPotential *p, double t, double *q) nogil
     void c_gradient(CPotential *p, double t, double *q, double *grad) nogil
     void c_hessian(CPotential *p, double t, double *q, double *hess) nogil
+    double c_value_gradient(CPotential *p, double t, double *q, double *grad) nogil
+    void c_potential_batch(CPotential *p, double t, double *q, int N, double *pot) nogil
+    void c_gradient_batch(CPotential *p, double t, double *q, int N, double *grad) nogil
 
-    double c_d_dr(CPotential *p, double t, double *q, double *epsilon) nogil
-    double c_d2_dr2(CPotential *p, double t, double *q, double *epsilon) nogil
-    double c_mass_enclosed(CPotential *p, double t, double *q, double G, double *epsilon) nogil
+    const double D_DR_STEP
+    const double D2_DR2_STEP
+
+    double c_d_dr(CPotential *p, double t, double *q, double *epsilon, double h) nogil
+    double c_d2_dr2(CPotential *p, double t, double *q, double *epsilon, double h) nogil
+    double c_mass_enclosed(CPotential *p, double t, double *q, double G, double *epsilon, double h) nogil
 
 cpdef _validate_pos_arr(double[:,::1] arr)
 
@@ -45,14 +60,23 @@ cdef class CPotentialWrapper:
     cdef double[::1] _q0
     cdef double[::1] _R
 
+    cdef int _allocate_components(self, int n_components) except -1
+    cdef void _free_components(self)
+
     cpdef init(self, list parameters, double[::1] q0, double[:, ::1] R,
                int n_dim=?)
 
-    cpdef energy(self, double[:,::1] q, double[::1] t)
-    cpdef density(self, double[:,::1] q, double[::1] t)
-    cpdef gradient(self, double[:,::1] q, double[::1] t)
-    cpdef hessian(self, double[:,::1] q, double[::1] t)
+    cpdef energy(self, double[:,::1] q, double[::1] t, int n_threads=?)
+    cpdef density(self, double[:,::1] q, double[::1] t, int n_threads=?)
+    cpdef gradient(self, double[:,::1] q, double[::1] t, int n_threads=?)
+    cpdef hessian(self, double[:,::1] q, double[::1] t, int n_threads=?)
+    cpdef energy_gradient(self, double[:,::1] q, double[::1] t, int n_threads=?)
+
+    cpdef energy_raw(self, double[:,::1] q, double t, double[::1] out=?, int n_threads=?)
+    cpdef gradient_raw(self, double[:,::1] q, double t, double[:,::1] out=?, int n_threads=?)
+    cpdef density_raw(self, double[:,::1] q, double t, double[::1] out=?, int n_threads=?)
+    cdef int _validate_raw(self, int ndim, int n_threads) except -1
 
-    cpdef d_dr(self, double[:,::1] q, double G, double[::1] t)
-    cpdef d2_dr2(self, double[:,::1] q, double G, double[::1] t)
-    cpdef mass_enclosed(self, double[:,::1] q, double G, double[::1] t)
+    cpdef d_dr(self, double[:,::1] q, double G, double[::1] t, double h=?)
+    cpdef d2_dr2(self, double[:,::1] q, double G, double[::1] t, double h=?)
+    cpdef mass_enclosed(self, double[:,::1] q, double G, double[::1] t, double h=?)
@@ -17,8 +17,10 @@ cimport numpy as np
 np.import_array()
 import cython
 cimport cython
+from cython.parallel cimport prange
 
 from libc.stdio cimport printf
+from libc.stdlib cimport calloc, free
 
 # Project
 from .core import PotentialBase, CompositePotential
@@ -49,9 +51,86 @@ cdef class CPotentialWrapper:
     given potential. This provides a Cython wrapper around this C implementation.
     """
 
+    def __dealloc__(self):
+        self._free_components()
+
+    cdef int _allocate_components(self, int n_components) except -1:
+        """
+        Allocate the per-component arrays of the C struct for the given number
+        of components. All function pointers are initialized to NULL.
+        """
+        cdef int n = max(n_components, 1)
+        self._free_components()
+
+        self.cpotential.density = <densityfunc*>calloc(n, sizeof(densityfunc))
+        self.cpotential.value = <energyfunc*>calloc(n, sizeof(energyfunc))
+        self.cpotential.gradient = <gradientfunc*>calloc(n, sizeof(gradientfunc))
+        self.cpotential.hessian = <hessianfunc*>calloc(n, sizeof(hessianfunc))
+        self.cpotential.value_gradient = <valuegradientfunc*>calloc(
+            n, sizeof(valuegradientfunc))
+        self.cpotential.value_batch = <energybatchfunc*>calloc(
+            n, sizeof(energybatchfunc))
+        self.cpotential.gradient_batch = <gradientbatchfunc*>calloc(
+            n, sizeof(gradientbatchfunc))
+        self.cpotential.parameters = <double**>calloc(n, sizeof(double*))
+        self.cpotential.q0 = <double**>calloc(n, sizeof(double*))
+        self.cpotential.R = <double**>calloc(n, sizeof(double*))
+        self.cpotential.transform = <int*>calloc(n, sizeof(int))
+        self.cpotential.has_hessian = <int*>calloc(n, sizeof(int))
+
+        if (self.cpotential.density == NULL or
+                self.cpotential.value == NULL or
+                self.cpotential.gradient == NULL or
+                self.cpotential.hessian == NULL or
+                self.cpotential.value_gradient == NULL or
+                self.cpotential.value_batch == NULL or
+                self.cpotential.gradient_batch == NULL or
+                self.cpotential.parameters == NULL or
+                self.cpotential.q0 == NULL or
+                self.cpotential.R == NULL or
+                self.cpotential.transform == NULL or
+                self.cpotential.has_hessian == NULL):
+            self._free_components()
+            raise MemoryError("Failed to allocate potential components.")
+
+        self.cpotential.n_components = n_components
+        return 0
+
+    cdef void _free_components(self):
+        free(self.cpotential.density)
+        free(self.cpotential.value)
+        free(self.cpotential.gradient)
+        free(self.cpotential.hessian)
+        free(self.cpotential.value_gradient)
+        free(self.cpotential.value_batch)
+        free(self.cpotential.gradient_batch)
+        free(self.cpotential.parameters)
+        free(self.cpotential.q0)
+        free(self.cpotential.R)
+        free(self.cpotential.transform)
+        free(self.cpotential.has_hessian)
+
+        self.cpotential.density = NULL
+        self.cpotential.value = NULL
+        self.cpotential.gradient = NULL
+        self.cpotential.hessian = NULL
+        self.cpotential.value_gradient = NULL
+        self.cpotential.value_batch = NULL
+        self.cpotential.gradient_batch = NULL
+        self.cpotential.parameters = NULL
+        self.cpotential.q0 = NULL
+        self.cpotential.R = NULL
+        self.cpotential.transform = NULL
+        self.cpotential.has_hessian = NULL
+        self.cpotential.n_components = 0
+
     cpdef init(self, list parameters, double[::1] q0, double[:, ::1] R,
                int n_dim=3):
 
+        # number of components in the potential. for a simple potential, this is
+        #   always one - composite potentials allocate more.
+        self._allocate_components(1)
+
         # save the array of parameters so it doesn't get garbage-collected
         self._params = np.array(parameters, dtype=np.float64)
 
@@ -65,10 +144,6 @@ cdef class CPotentialWrapper:
         # phase-space half-dimensionality of the potential
         self.cpotential.n_dim = n_dim
 
-        # number of components in the potential. for a simple potential, this is
-        #   always one - composite potentials override this.
-        self.cpotential.n_components = 1
-
         # by default, don't skip this potential!
         self.cpotential.null = 0
 
@@ -77,6 +152,11 @@ cdef class CPotentialWrapper:
         self.cpotential.density[0] = <densityfunc>(nan_density)
         self.cpotential.gradient[0] = <gradientfunc>(nan_gradient)
         self.cpotential.hessian[0] = <hessianfunc>(nan_hessian)
+        # potentials that implement a Hessian set this flag, otherwise radial
+        #   second derivatives fall back to finite differences
+        self.cpotential.has_hessian[0] = 0
+        # the fused value + gradient and batch functions are optional and are
+        #   left NULL: these fall back to the functions above
 
         # set the origin of the potentials
         self._q0 = np.array(q0)
@@ -87,90 +167,239 @@ cdef class CPotentialWrapper:
         self._R = np.ascontiguousarray(np.array(R).ravel())
         self.cpotential.R[0] = &(self._R[0])
 
-    cpdef energy(self, double[:, ::1] q, double[::1] t):
+        # flag which coordinate transformations are needed, so they can be
+        #   skipped for the (common) case of no shift and no rotation
+        self.cpotential.transform[0] = 0
+        if np.any(np.asarray(self._q0) != 0):
+            self.cpotential.transform[0] |= TRANSFORM_SHIFT
+        if not np.array_equal(np.asarray(self._R), np.eye(n_dim).ravel()):
+            self.cpotential.transform[0] |= TRANSFORM_ROTATE
+
+    cpdef energy(self, double[:, ::1] q, double[::1] t, int n_threads=1):
         """
         CAUTION: Interpretation of axes is different here! We need the
         arrays to be C ordered and easy to iterate over, so here the
         axes are (norbits, ndim).
         """
-        cdef int n, ndim, i
+        cdef:
+            int n, ndim, i
+            int nt = t.shape[0]
+            CPotential *cp = &(self.cpotential)
         n, ndim = _validate_pos_arr(q)
 
-        cdef double [::1] pot = np.zeros(n)
+        cdef double [::1] pot = np.empty(n)
 
-        if len(t) == 1:
-            for i in range(n):
-                pot[i] = c_potential(&(self.cpotential), t[0], &q[i, 0])
+        if nt == 1:
+            self.energy_raw(q, t[0], pot, n_threads)
         else:
-            for i in range(n):
-                pot[i] = c_potential(&(self.cpotential), t[i], &q[i, 0])
+            for i in prange(n, nogil=True, schedule='static',
+                            num_threads=n_threads):
+                pot[i] = c_potential(cp, t[i], &q[i, 0])
 
         return np.array(pot)
 
-    cpdef density(self, double[:, ::1] q, double[::1] t):
+    cpdef density(self, double[:, ::1] q, double[::1] t, int n_threads=1):
         """
         CAUTION: Interpretation of axes is different here! We need the
         arrays to be C ordered and easy to iterate over, so here the
         axes are (norbits, ndim).
         """
-        cdef int n, ndim, i
+        cdef:
+            int n, ndim, i
+            int nt = t.shape[0]
+            CPotential *cp = &(self.cpotential)
         n, ndim = _validate_pos_arr(q)
 
         cdef double [::1] dens = np.zeros(n)
 
-        if len(t) == 1:
-            for i in range(n):
-                dens[i] = c_density(&(self.cpotential), t[0], &q[i, 0])
+        if nt == 1:
+            for i in prange(n, nogil=True, schedule='static',
+                            num_threads=n_threads):
+                dens[i] = c_density(cp, t[0], &q[i, 0])
         else:
-            for i in range(n):
-                dens[i] = c_density(&(self.cpotential), t[i], &q[i, 0])
+            for i in prange(n, nogil=True, schedule='static',
+                            num_threads=n_threads):
+                dens[i] = c_density(cp, t[i], &q[i, 0])
 
         return np.array(dens)
 
-    cpdef gradient(self, double[:, ::1] q, double[::1] t):
+    cpdef gradient(self, double[:, ::1] q, double[::1] t, int n_threads=1):
         """
         CAUTION: Interpretation of axes is different here! We need the
         arrays to be C ordered and easy to iterate over, so here the
         axes are (norbits, ndim).
         """
-        cdef int n, ndim, i
+        cdef:
+            int n, ndim, i
+            int nt = t.shape[0]
+            CPotential *cp = &(self.cpotential)
         n, ndim = _validate_pos_arr(q)
 
-        cdef double[:, ::1] grad = np.zeros((n, ndim))
+        cdef double[:, ::1] grad = np.empty((n, ndim))
 
-        if len(t) == 1:
-            for i in range(n):
-                c_gradient(&(self.cpotential), t[0], &q[i, 0], &grad[i, 0])
+        if nt == 1:
+            self.gradient_raw(q, t[0], grad, n_threads)
         else:
-            for i in range(n):
-                c_gradient(&(self.cpotential), t[i], &q[i, 0], &grad[i, 0])
+            for i in prange(n, nogil=True, schedule='static',
+                            num_threads=n_threads):
+                c_gradient(cp, t[i], &q[i, 0], &grad[i, 0])
 
         return np.array(grad)
 
-    cpdef hessian(self, double[:, ::1] q, double[::1] t):
+    cpdef energy_raw(self, double[:, ::1] q, double t, double[::1] out=None,
+                     int n_threads=1):
+        """
+        Low-level evaluation of the potential energy at a single time, with no
+        unit handling or shape conversion. The axes of ``q`` are
+        (norbits, ndim), and the result is written into ``out`` (allocated if
+        not specified), which is returned.
+        """
+        cdef:
+            int n, ndim, i, chunk, i0, m
+            CPotential *cp = &(self.cpotential)
+        n, ndim = _validate_pos_arr(q)
+        self._validate_raw(ndim, n_threads)
+
+        if out is None:
+            out = np.empty(n)
+        elif out.shape[0] != n:
+            raise ValueError(f"Output array must have shape ({n},), got "
+                             f"({out.shape[0]},)")
+
+        # evaluate in one contiguous block of positions per thread
+        chunk = (n + n_threads - 1) // n_threads
+        for i in prange(n_threads, nogil=True, schedule='static',
+                        num_threads=n_threads):
+            i0 = i * chunk
+            m = min(chunk, n - i0)
+            if m > 0:
+                c_potential_batch(cp, t, &q[i0, 0], m, &out[i0])
+
+        return out.base
+
+    cpdef gradient_raw(self, double[:, ::1] q, double t,
+                       double[:, ::1] out=None, int n_threads=1):
+        """
+        Low-level evaluation of the gradient at a single time, with no unit
+        handling or shape conversion. The axes of ``q`` and ``out`` are
+        (norbits, ndim). The result is written into ``out`` (allocated if not
+        specified), which is returned.
+        """
+        cdef:
+            int n, ndim, i, chunk, i0, m
+            CPotential *cp = &(self.cpotential)
+        n, ndim = _validate_pos_arr(q)
+        self._validate_raw(ndim, n_threads)
+
+        if out is None:
+            out = np.empty((n, ndim))
+        elif out.shape[0] != n or out.shape[1] != ndim:
+            raise ValueError(f"Output array must have shape ({n}, {ndim}), "
+                             f"got ({out.shape[0]}, {out.shape[1]})")
+
+        # evaluate in one contiguous block of positions per thread
+        chunk = (n + n_threads - 1) // n_threads
+        for i in prange(n_threads, nogil=True, schedule='static',
+                        num_threads=n_threads):
+            i0 = i * chunk
+            m = min(chunk, n - i0)
+            if m > 0:
+                c_gradient_batch(cp, t, &q[i0, 0], m, &out[i0, 0])
+
+        return out.base
+
+    cpdef density_raw(self, double[:, ::1] q, double t, double[::1] out=None,
+                      int n_threads=1):
+        """
+        Low-level evaluation of the density at a single time, with no unit
+        handling or shape conversion. The axes of ``q`` are (norbits, ndim),
+        and the result is written into ``out`` (allocated if not specified),
+        which is returned.
+        """
+        cdef:
+            int n, ndim, i
+            CPotential *cp = &(self.cpotential)
+        n, ndim = _validate_pos_arr(q)
+        self._validate_raw(ndim, n_threads)
+
+        if out is None:
+            out = np.empty(n)
+        elif out.shape[0] != n:
+            raise ValueError(f"Output array must have shape ({n},), got "
+                             f"({out.shape[0]},)")
+
+        for i in prange(n, nogil=True, schedule='static',
+                        num_threads=n_threads):
+            out[i] = c_density(cp, t, &q[i, 0])
+
+        return out.base
+
+    cdef int _validate_raw(self, int ndim, int n_threads) except -1:
+        if ndim != self.cpotential.n_dim:
+            raise ValueError(f"Position array must have shape (norbits, "
+                             f"{self.cpotential.n_dim}), got ndim={ndim}")
+        if n_threads < 1:
+            raise ValueError(
+                f"n_threads must be a positive integer, got {n_threads}")
+        return 0
+
+    cpdef hessian(self, double[:, ::1] q, double[::1] t, int n_threads=1):
         """
         CAUTION: Interpretation of axes is different here! We need the
         arrays to be C ordered and easy to iterate over, so here the
         axes are (norbits, ndim).
         """
-        cdef int n, ndim, i
+        cdef:
+            int n, ndim, i
+            int nt = t.shape[0]
+            CPotential *cp = &(self.cpotential)
         n, ndim = _validate_pos_arr(q)
 
         cdef double[:, :, ::1] hess = np.zeros((n, ndim, ndim))
 
-        if len(t) == 1:
-            for i in range(n):
-                c_hessian(&(self.cpotential), t[0], &q[i, 0], &hess[i, 0, 0])
+        if nt == 1:
+            for i in prange(n, nogil=True, schedule='static',
+                            num_threads=n_threads):
+                c_hessian(cp, t[0], &q[i, 0], &hess[i, 0, 0])
         else:
-            for i in range(n):
-                c_hessian(&(self.cpotential), t[i], &q[i, 0], &hess[i, 0, 0])
+            for i in prange(n, nogil=True, schedule='static',
+                            num_threads=n_threads):
+                c_hessian(cp, t[i], &q[i, 0], &hess[i, 0, 0])
 
         return np.array(hess)
 
+    cpdef energy_gradient(self, double[:, ::1] q, double[::1] t,
+                          int n_threads=1):
+        """
+        CAUTION: Interpretation of axes is different here! We need the
+        arrays to be C ordered and easy to iterate over, so here the
+        axes are (norbits, ndim).
+        """
+        cdef:
+            int n, ndim, i
+            int nt = t.shape[0]
+            CPotential *cp = &(self.cpotential)
+        n, ndim = _validate_pos_arr(q)
+
+        cdef double [::1] pot = np.zeros(n)
+        cdef double[:, ::1] grad = np.zeros((n, ndim))
+
+        if nt == 1:
+            for i in prange(n, nogil=True, schedule='static',
+                            num_threads=n_threads):
+                pot[i] = c_value_gradient(cp, t[0], &q[i, 0], &grad[i, 0])
+        else:
+            for i in prange(n, nogil=True, schedule='static',
+                            num_threads=n_threads):
+                pot[i] = c_value_gradient(cp, t[i], &q[i, 0], &grad[i, 0])
+
+        return np.array(pot), np.array(grad)
+
     # ------------------------------------------------------------------------
     # Other functionality
     #
-    cpdef d_dr(self, double[:, ::1] q, double G, double[::1] t):
+    cpdef d_dr(self, double[:, ::1] q, double G, double[::1] t,
+               double h=D_DR_STEP):
         """
         CAUTION: Interpretation of axes is different here! We need the
         arrays to be C ordered and easy to iterate over, so here the
@@ -184,14 +413,15 @@ cdef class CPotentialWrapper:
 
         if len(t) == 1:
             for i in range(n):
-                dr[i] = c_d_dr(&(self.cpotential), t[0], &q[i, 0], &epsilon[0])
+                dr[i] = c_d_dr(&(self.cpotential), t[0], &q[i, 0], &epsilon[0], h)
         else:
             for i in range(n):
-                dr[i] = c_d_dr(&(self.cpotential), t[i], &q[i, 0], &epsilon[0])
+                dr[i] = c_d_dr(&(self.cpotential), t[i], &q[i, 0], &epsilon[0], h)
 
         return np.array(dr)
 
-    cpdef d2_dr2(self, double[:, ::1] q, double G, double[::1] t):
+    cpdef d2_dr2(self, double[:, ::1] q, double G, double[::1] t,
+                 double h=D2_DR2_STEP):
         """
         CAUTION: Interpretation of axes is different here! We need the
         arrays to be C ordered and easy to iterate over, so here the
@@ -205,14 +435,15 @@ cdef class CPotentialWrapper:
 
         if len(t) == 1:
             for i in range(n):
-                dr2[i] = c_d2_dr2(&(self.cpotential), t[0], &q[i, 0], &epsilon[0])
+                dr2[i] = c_d2_dr2(&(self.cpotential), t[0], &q[i, 0], &epsilon[0], h)
         else:
             for i in range(n):
-                dr2[i] = c_d2_dr2(&(self.cpotential), t[i], &q[i, 0], &epsilon[0])
+                dr2[i] = c_d2_dr2(&(self.cpotential), t[i], &q[i, 0], &epsilon[0], h)
 
         return np.array(dr2)
 
-    cpdef mass_enclosed(self, double[:, ::1] q, double G, double[::1] t):
+    cpdef mass_enclosed(self, double[:, ::1] q, double G, double[::1] t,
+                        double h=D_DR_STEP):
         """
         CAUTION: Interpretation of axes is different here! We need the
         arrays to be C ordered and easy to iterate over, so here the
@@ -226,13 +457,24 @@ cdef class CPotentialWrapper:
 
         if len(t) == 1:
             for i in range(n):
-                mass[i] = c_mass_enclosed(&(self.cpotential), t[0], &q[i, 0], G, &epsilon[0])
+                mass[i] = c_mass_enclosed(&(self.cpotential), t[0], &q[i, 0], G,
+                                          &epsilon[0], h)
         else:
             for i in range(n):
-                mass[i] = c_mass_enclosed(&(self.cpotential), t[i], &q[i, 0], G, &epsilon[0])
+                mass[i] = c_mass_enclosed(&(self.cpotential), t[i], &q[i, 0], G,
+                                          &epsilon[0], h)
 
         return np.array(mass)
 
+    def _transform_flags(self):
+        """
+        The ``TRANSFORM_SHIFT`` and ``TRANSFORM_ROTATE`` flags of each
+        component, which say which coordinate transformations are applied.
+        """
+        return np.array([self.cpotential.transform[i]
+                         for i in range(self.cpotential.n_components)],
+                        dtype=np.intc)
+
     # For pickling in Python 2
     def __reduce__(self):
         return (self.__class__,
@@ -259,7 +501,7 @@ class CPotentialBase(PotentialBase):
                          **kwargs)
         self._setup_wrapper()
 
-    def _setup_wrapper(self, c_only_parameters=None):
+    def _setup_wrapper(self, c_only_parameters=None, **wrapper_kwargs):
         if self.Wrapper is None:
             raise ValueError("C potential wrapper class not defined for "
                              f"potential class {self.__class__}")
@@ -285,19 +527,52 @@ class CPotentialBase(PotentialBase):
         else:
             self._R = self.R
         self.c_instance = self.Wrapper(self.G, self.c_parameters,
-                                       q0=self.origin, R=self._R)
+                                       q0=self.origin, R=self._R,
+                                       **wrapper_kwargs)
+
+    def _energy(self, q, t, n_threads=1):
+        return self.c_instance.energy(q, t=t, n_threads=n_threads)
+
+    def _gradient(self, q, t, n_threads=1):
+        return self.c_instance.gradient(q, t=t, n_threads=n_threads)
+
+    def _density(self, q, t, n_threads=1):
+        return self.c_instance.density(q, t=t, n_threads=n_threads)
+
+    def _hessian(self, q, t, n_threads=1):
+        return self.c_instance.hessian(q, t=t, n_threads=n_threads)
+
+    def _energy_and_gradient(self, q, t, n_threads=1):
+        return self.c_instance.energy_gradient(q, t=t, n_threads=n_threads)
+
+    # The low-level methods call straight through to the C wrapper, which
+    # validates the array shapes itself
+    def energy_raw(self, q, t=0., out=None, n_threads=None):
+        if n_threads is None:
+            n_threads = 1
+        return self.c_instance.energy_raw(q, t, out, n_threads)
+
+    def gradient_raw(self, q, t=0., out=None, n_threads=None):
+        if n_threads is None:
+            n_threads = 1
+        return self.c_instance.gradient_raw(q, t, out, n_threads)
 
-    def _energy(self, q, t):
-        return self.c_instance.energy(q, t=t)
+    def density_raw(self, q, t=0., out=None, n_threads=None):
+        if n_threads is None:
+            n_threads = 1
+        return self.c_instance.density_raw(q, t, out, n_threads)
 
-    def _gradient(self, q, t):
-        return self.c_instance.gradient(q, t=t)
+    def _validate_n_threads(self, n_threads):
+        if n_threads is None:
+            return dict()
 
-    def _density(self, q, t):
-        return self.c_instance.density(q, t=t)
+        n_threads = int(n_threads)
+        if n_threads < 1:
+            raise ValueError(
+                f"n_threads must be a positive integer, got {n_threads}"
+            )
 
-    def _hessian(self, q, t):
-        return self.c_instance.hessian(q, t=t)
+        return {'n_threads': n_threads}
 
     # ----------------------------------------------------------
     # Overwrite the Python potential method to use Cython method
@@ -1,6 +1,8 @@
 from distutils.core import Extension
 from collections import defaultdict
 
+from extension_helpers import add_openmp_flags_if_available
+
 
 def get_extensions():
     import numpy as np
@@ -21,7 +23,9 @@ def get_extensions():
         "gala/potential/potential/builtin/builtin_potentials.c"
     )
     cfg["sources"].append("gala/potential/potential/src/cpotential.c")
-    exts.append(Extension("gala.potential.potential.cpotential", **cfg))
+    ext = Extension("gala.potential.potential.cpotential", **cfg)
+    add_openmp_flags_if_available(ext)
+    exts.append(ext)
 
     cfg = defaultdict(list)
     cfg["include_dirs"].append(np.get_include())
@@ -46,6 +50,7 @@ def get_extensions():
         "gala/potential/potential/builtin/builtin_potentials.c"
     )
     cfg["sources"].append("gala/potential/potential/builtin/multipole.c")
+    cfg["sources"].append("gala/potential/potential/builtin/tabulated.c")
     cfg["sources"].append("gala/potential/potential/src/cpotential.c")
     exts.append(Extension("gala.potential.potential.builtin.cybuiltin", **cfg))
 
@@ -63,6 +68,8 @@ def get_package_data():
             "*/*.pxd",
             "builtin/builtin_potentials.h",
             "builtin/builtin_potentials.c",
+            "builtin/tabulated.h",
+            "builtin/tabulated.c",
             "src/cpotential.h",
             "src/cpotential.c",
             "tests/*.yml",
@@ -1,4 +1,6 @@
 #include <math.h>
+#include <stddef.h>
+#include <stdlib.h>
 #include "cpotential.h"
 
 
@@ -46,17 +48,41 @@ void apply_shift_rotate(double *q_in, double *q0, double *R, int n_dim,
 }
 
 
+double *to_component_frame(CPotential *p, int i, double *qp,
+                           double *qp_trans) {
+    /*
+        Returns a pointer to the position qp in the frame of component i. If
+        the component is neither shifted nor rotated this is qp itself,
+        otherwise the transformed position is stored in qp_trans.
+    */
+    int j;
+    int transform = (p->transform)[i];
+
+    if (transform == 0)
+        return qp;
+
+    if (transform == TRANSFORM_SHIFT) {
+        for (j=0; j < p->n_dim; j++)
+            qp_trans[j] = qp[j] - (p->q0)[i][j];
+        return qp_trans;
+    }
+
+    for (j=0; j < p->n_dim; j++)
+        qp_trans[j] = 0.;
+    apply_shift_rotate(qp, (p->q0)[i], (p->R)[i], p->n_dim, 0, qp_trans);
+    return qp_trans;
+}
+
+
 double c_potential(CPotential *p, double t, double *qp) {
     double v = 0;
-    int i, j;
+    int i;
     double qp_trans[p->n_dim];
+    double *q;
 
     for (i=0; i < p->n_components; i++) {
-        for (j=0; j < p->n_dim; j++)
-            qp_trans[j] = 0.;
-        apply_shift_rotate(qp, (p->q0)[i], (p->R)[i], p->n_dim, 0,
-                           &qp_trans[0]);
-        v = v + (p->value)[i](t, (p->parameters)[i], &qp_trans[0], p->n_dim);
+        q = to_component_frame(p, i, qp, &qp_trans[0]);
+        v = v + (p->value)[i](t, (p->parameters)[i], q, p->n_dim);
     }
 
     return v;
@@ -65,15 +91,13 @@ double c_potential(CPotential *p, double t, double *qp) {
 
 double c_density(CPotential *p, double t, double *qp) {
     double v = 0;
-    int i, j;
+    int i;
     double qp_trans[p->n_dim];
+    double *q;
 
     for (i=0; i < p->n_components; i++) {
-        for (j=0; j < p->n_dim; j++)
-            qp_trans[j] = 0.;
-        apply_shift_rotate(qp, (p->q0)[i], (p->R)[i], p->n_dim, 0,
-                           &qp_trans[0]);
-        v = v + (p->density)[i](t, (p->parameters)[i], &qp_trans[0], p->n_dim);
+        q = to_component_frame(p, i, qp, &qp_trans[0]);
+        v = v + (p->density)[i](t, (p->parameters)[i], q, p->n_dim);
     }
 
     return v;
@@ -84,110 +108,352 @@ void c_gradient(CPotential *p, double t, double *qp, double *grad) {
     int i, j;
     double qp_trans[p->n_dim];
     double tmp_grad[p->n_dim];
+    double *q;
 
-    for (i=0; i < p->n_dim; i++) {
+    for (i=0; i < p->n_dim; i++)
         grad[i] = 0.;
-        tmp_grad[i] = 0.;
-        qp_trans[i] = 0.;
+
+    for (i=0; i < p->n_components; i++) {
+        q = to_component_frame(p, i, qp, &qp_trans[0]);
+
+        if ((p->transform)[i] & TRANSFORM_ROTATE) {
+            for (j=0; j < p->n_dim; j++)
+                tmp_grad[j] = 0.;
+            (p->gradient)[i](t, (p->parameters)[i], q, p->n_dim,
+                             &tmp_grad[0]);
+            apply_rotate(&tmp_grad[0], (p->R)[i], p->n_dim, 1, &grad[0]);
+        } else {
+            // gradient functions accumulate, so unrotated components can add
+            // directly into the output
+            (p->gradient)[i](t, (p->parameters)[i], q, p->n_dim, grad);
+        }
     }
+}
+
+
+double c_value_gradient(CPotential *p, double t, double *qp, double *grad) {
+    /*
+        Computes the value of the potential and accumulates the gradient in a
+        single pass over the components, so the coordinate transformation is
+        only applied once per component. Components that don't implement a
+        fused value_gradient function fall back to separate calls.
+    */
+    double v = 0;
+    int i, j;
+    double qp_trans[p->n_dim];
+    double tmp_grad[p->n_dim];
+    double *q, *g;
+
+    for (i=0; i < p->n_dim; i++)
+        grad[i] = 0.;
 
     for (i=0; i < p->n_components; i++) {
-        for (j=0; j < p->n_dim; j++) {
-            tmp_grad[j] = 0.;
-            qp_trans[j] = 0.;
+        q = to_component_frame(p, i, qp, &qp_trans[0]);
+
+        if ((p->transform)[i] & TRANSFORM_ROTATE) {
+            for (j=0; j < p->n_dim; j++)
+                tmp_grad[j] = 0.;
+            g = &tmp_grad[0];
+        } else {
+            g = grad;
         }
 
-        apply_shift_rotate(qp, (p->q0)[i], (p->R)[i], p->n_dim, 0,
-                           &qp_trans[0]);
-        (p->gradient)[i](t, (p->parameters)[i], &qp_trans[0], p->n_dim,
-                         &tmp_grad[0]);
-        apply_rotate(&tmp_grad[0], (p->R)[i], p->n_dim, 1, &grad[0]);
+        if ((p->value_gradient)[i] != NULL) {
+            v = v + (p->value_gradient)[i](t, (p->parameters)[i], q, p->n_dim,
+                                           g);
+        } else {
+            v = v + (p->value)[i](t, (p->parameters)[i], q, p->n_dim);
+            (p->gradient)[i](t, (p->parameters)[i], q, p->n_dim, g);
+        }
+
+        if ((p->transform)[i] & TRANSFORM_ROTATE)
+            apply_rotate(&tmp_grad[0], (p->R)[i], p->n_dim, 1, &grad[0]);
     }
+
+    return v;
 }
 
 
-void c_hessian(CPotential *p, double t, double *qp, double *hess) {
-    int i;
-    double qp_trans[p->n_dim];
+// The positions of shifted or rotated components are transformed in blocks of
+// this many points, into a buffer on the stack, so the batch functions don't
+// allocate memory
+#define BATCH_BLOCK 64
+
 
-    for (i=0; i < pow(p->n_dim,2); i++) {
-        hess[i] = 0.;
+void c_potential_batch(CPotential *p, double t, double *qp, int N,
+                       double *pot) {
+    /*
+        Computes the value of the potential at N positions, qp[N, n_dim].
+        Components that implement a batch kernel are evaluated over the whole
+        block in one call; the others are evaluated point by point.
+    */
+    int i, n, n0, nb;
+    int n_dim = p->n_dim;
+    double qp_trans[BATCH_BLOCK * n_dim];
+    double *q;
 
-        if (i < p->n_dim) {
-            qp_trans[i] = 0.;
+    for (n=0; n < N; n++)
+        pot[n] = 0.;
+
+    for (i=0; i < p->n_components; i++) {
+        for (n0=0; n0 < N; n0 += nb) {
+            if ((p->transform)[i] == 0) {
+                nb = N - n0;
+                q = &qp[n0*n_dim];
+            } else {
+                nb = (N - n0 < BATCH_BLOCK) ? N - n0 : BATCH_BLOCK;
+                for (n=0; n < nb; n++)
+                    to_component_frame(p, i, &qp[(n0+n)*n_dim],
+                                       &qp_trans[n*n_dim]);
+                q = &qp_trans[0];
+            }
+
+            if ((p->value_batch)[i] != NULL) {
+                (p->value_batch)[i](t, (p->parameters)[i], q, n_dim, nb,
+                                    &pot[n0]);
+            } else {
+                for (n=0; n < nb; n++)
+                    pot[n0+n] = pot[n0+n] + (p->value)[i](
+                        t, (p->parameters)[i], &q[n*n_dim], n_dim);
+            }
         }
     }
+}
+
+
+void c_gradient_batch(CPotential *p, double t, double *qp, int N,
+                      double *grad) {
+    /*
+        Computes the gradient of the potential at N positions, qp[N, n_dim],
+        and stores it in grad[N, n_dim]. Components that implement a batch
+        kernel are evaluated over the whole block in one call; the others are
+        evaluated point by point.
+    */
+    int i, j, n, n0, nb;
+    int n_dim = p->n_dim;
+    double qp_trans[BATCH_BLOCK * n_dim];
+    double tmp_grad[BATCH_BLOCK * n_dim];
+    double *q, *g;
+
+    for (j=0; j < N*n_dim; j++)
+        grad[j] = 0.;
 
     for (i=0; i < p->n_components; i++) {
-        apply_shift_rotate(qp, (p->q0)[i], (p->R)[i], p->n_dim, 0,
-                           &qp_trans[0]);
-        (p->hessian)[i](t, (p->parameters)[i], &qp_trans[0], p->n_dim, hess);
-        // TODO: here - need to apply inverse rotation to the Hessian!
-        // - Hessian calculation for potentials with rotations are disabled
+        for (n0=0; n0 < N; n0 += nb) {
+            if ((p->transform)[i] == 0) {
+                nb = N - n0;
+                q = &qp[n0*n_dim];
+            } else {
+                nb = (N - n0 < BATCH_BLOCK) ? N - n0 : BATCH_BLOCK;
+                for (n=0; n < nb; n++)
+                    to_component_frame(p, i, &qp[(n0+n)*n_dim],
+                                       &qp_trans[n*n_dim]);
+                q = &qp_trans[0];
+            }
+
+            if ((p->transform)[i] & TRANSFORM_ROTATE) {
+                for (j=0; j < nb*n_dim; j++)
+                    tmp_grad[j] = 0.;
+                g = &tmp_grad[0];
+            } else {
+                g = &grad[n0*n_dim];
+            }
+
+            if ((p->gradient_batch)[i] != NULL) {
+                (p->gradient_batch)[i](t, (p->parameters)[i], q, n_dim, nb, g);
+            } else {
+                for (n=0; n < nb; n++)
+                    (p->gradient)[i](t, (p->parameters)[i], &q[n*n_dim], n_dim,
+                                     &g[n*n_dim]);
+            }
+
+            if ((p->transform)[i] & TRANSFORM_ROTATE) {
+                for (n=0; n < nb; n++)
+                    apply_rotate(&tmp_grad[n*n_dim], (p->R)[i], n_dim, 1,
+                                 &grad[(n0+n)*n_dim]);
+            }
+        }
+    }
+}
+
+
+void apply_rotate_hessian(double *H_in, double *R, int n_dim, double *H_out) {
+    /*
+        Accumulates R^T H_in R into H_out, which transforms the Hessian of a
+        rotated component back to the input frame. All matrices are
+        row-major and of shape (n_dim, n_dim).
+    */
+    int j, k, l;
+    double tmp[n_dim*n_dim];
+
+    // tmp = H_in R
+    for (j=0; j < n_dim; j++) {
+        for (k=0; k < n_dim; k++) {
+            tmp[j*n_dim + k] = 0.;
+            for (l=0; l < n_dim; l++)
+                tmp[j*n_dim + k] = tmp[j*n_dim + k] + H_in[j*n_dim + l] * R[l*n_dim + k];
+        }
     }
 
+    // H_out += R^T tmp
+    for (j=0; j < n_dim; j++)
+        for (k=0; k < n_dim; k++)
+            for (l=0; l < n_dim; l++)
+                H_out[j*n_dim + k] = H_out[j*n_dim + k] + R[l*n_dim + j] * tmp[l*n_dim + k];
 }
 
 
-double c_d_dr(CPotential *p, double t, double *qp, double *epsilon) {
-    double h, r, dPhi_dr;
-    int j;
-    double r2 = 0;
+void c_hessian(CPotential *p, double t, double *qp, double *hess) {
+    int i, j;
+    int n_dim = p->n_dim;
+    double qp_trans[n_dim];
+    double tmp_hess[n_dim*n_dim];
+    double *q;
 
-    for (j=0; j<p->n_dim; j++) {
-        r2 = r2 + qp[j]*qp[j];
+    for (j=0; j < n_dim*n_dim; j++)
+        hess[j] = 0.;
+
+    for (i=0; i < p->n_components; i++) {
+        q = to_component_frame(p, i, qp, &qp_trans[0]);
+
+        if ((p->transform)[i] & TRANSFORM_ROTATE) {
+            // each component gets its own buffer, so the rotation is only
+            // applied to that component's contribution
+            for (j=0; j < n_dim*n_dim; j++)
+                tmp_hess[j] = 0.;
+            (p->hessian)[i](t, (p->parameters)[i], q, n_dim, &tmp_hess[0]);
+            apply_rotate_hessian(&tmp_hess[0], (p->R)[i], n_dim, hess);
+        } else {
+            // Hessian functions accumulate, so unrotated components can add
+            // directly into the output
+            (p->hessian)[i](t, (p->parameters)[i], q, n_dim, hess);
+        }
     }
+}
 
-    // TODO: allow user to specify fractional step-size
-    h = 1E-4;
 
-    // Step-size for estimating radial gradient of the potential
+double c_d_dr(CPotential *p, double t, double *qp, double *epsilon, double h) {
+    /*
+        Computes the radial derivative of the potential, dPhi/dr, as the
+        gradient projected onto the radial unit vector. Components that don't
+        implement a gradient fall back to a centered finite difference with
+        step size h.
+    */
+    double r, r2 = 0, v_plus, dPhi_dr = 0;
+    int i, j;
+    double r_hat[p->n_dim];
+    double qp_trans[p->n_dim];
+    double r_hat_trans[p->n_dim];
+    double grad[p->n_dim];
+    double *q, *u;
+
+    for (j=0; j<p->n_dim; j++) {
+        r2 = r2 + qp[j]*qp[j];
+    }
     r = sqrt(r2);
 
-    for (j=0; j < (p->n_dim); j++)
-        epsilon[j] = qp[j] + h * qp[j]/r;
+    for (j=0; j < p->n_dim; j++)
+        r_hat[j] = qp[j] / r;
 
-    dPhi_dr = c_potential(p, t, epsilon);
+    for (i=0; i < p->n_components; i++) {
+        q = to_component_frame(p, i, qp, &qp_trans[0]);
+
+        u = &r_hat[0];
+        if ((p->transform)[i] & TRANSFORM_ROTATE) {
+            for (j=0; j < p->n_dim; j++)
+                r_hat_trans[j] = 0.;
+            apply_rotate(&r_hat[0], (p->R)[i], p->n_dim, 0, &r_hat_trans[0]);
+            u = &r_hat_trans[0];
+        }
 
-    for (j=0; j < (p->n_dim); j++)
-        epsilon[j] = qp[j] - h * qp[j]/r;
+        if ((p->gradient)[i] != NULL) {
+            for (j=0; j < p->n_dim; j++)
+                grad[j] = 0.;
+            (p->gradient)[i](t, (p->parameters)[i], q, p->n_dim, &grad[0]);
+            for (j=0; j < p->n_dim; j++)
+                dPhi_dr = dPhi_dr + grad[j] * u[j];
 
-    dPhi_dr = dPhi_dr - c_potential(p, t, epsilon);
+        } else {
+            for (j=0; j < p->n_dim; j++)
+                epsilon[j] = q[j] + h * u[j];
+            v_plus = (p->value)[i](t, (p->parameters)[i], epsilon, p->n_dim);
+
+            for (j=0; j < p->n_dim; j++)
+                epsilon[j] = q[j] - h * u[j];
+            dPhi_dr = dPhi_dr + (v_plus - (p->value)[i](t, (p->parameters)[i],
+                                                         epsilon, p->n_dim)) / (2.*h);
+        }
+    }
 
-    return dPhi_dr / (2.*h);
+    return dPhi_dr;
 }
 
 
-double c_d2_dr2(CPotential *p, double t, double *qp, double *epsilon) {
-    double h, r, d2Phi_dr2;
-    int j;
-    double r2 = 0;
-    for (j=0; j<p->n_dim; j++) {
+double c_d2_dr2(CPotential *p, double t, double *qp, double *epsilon, double h) {
+    /*
+        Computes the second radial derivative of the potential, d2Phi/dr2, by
+        projecting the Hessian onto the radial unit vector. Components that
+        don't implement a Hessian fall back to a centered finite difference
+        with step size h.
+    */
+    double r, r2 = 0, d2Phi_dr2 = 0, tmp;
+    int i, j, k;
+    int n_dim = p->n_dim;
+    double r_hat[n_dim];
+    double qp_trans[n_dim];
+    double r_hat_trans[n_dim];
+    double hess[n_dim*n_dim];
+    double *q, *u;
+
+    for (j=0; j<n_dim; j++) {
         r2 = r2 + qp[j]*qp[j];
     }
+    r = sqrt(r2);
 
-    // TODO: allow user to specify fractional step-size
-    h = 1E-2;
+    for (j=0; j < n_dim; j++)
+        r_hat[j] = qp[j] / r;
 
-    // Step-size for estimating radial gradient of the potential
-    r = sqrt(r2);
+    for (i=0; i < p->n_components; i++) {
+        q = to_component_frame(p, i, qp, &qp_trans[0]);
+
+        u = &r_hat[0];
+        if ((p->transform)[i] & TRANSFORM_ROTATE) {
+            for (j=0; j < n_dim; j++)
+                r_hat_trans[j] = 0.;
+            apply_rotate(&r_hat[0], (p->R)[i], n_dim, 0, &r_hat_trans[0]);
+            u = &r_hat_trans[0];
+        }
+
+        if ((p->has_hessian)[i]) {
+            for (j=0; j < n_dim*n_dim; j++)
+                hess[j] = 0.;
+            (p->hessian)[i](t, (p->parameters)[i], q, n_dim, &hess[0]);
 
-    for (j=0; j < (p->n_dim); j++)
-        epsilon[j] = qp[j] + h * qp[j]/r;
-    d2Phi_dr2 = c_potential(p, t, epsilon);
+            for (j=0; j < n_dim; j++)
+                for (k=0; k < n_dim; k++)
+                    d2Phi_dr2 = d2Phi_dr2 + u[j] * hess[j*n_dim + k] * u[k];
+
+        } else {
+            for (j=0; j < n_dim; j++)
+                epsilon[j] = q[j] + h * u[j];
+            tmp = (p->value)[i](t, (p->parameters)[i], epsilon, n_dim);
 
-    d2Phi_dr2 = d2Phi_dr2 - 2.*c_potential(p, t, qp);
+            tmp = tmp - 2.*(p->value)[i](t, (p->parameters)[i], q, n_dim);
 
-    for (j=0; j < (p->n_dim); j++)
-        epsilon[j] = qp[j] - h * qp[j]/r;
-    d2Phi_dr2 = d2Phi_dr2 + c_potential(p, t, epsilon);
+            for (j=0; j < n_dim; j++)
+                epsilon[j] = q[j] - h * u[j];
+            tmp = tmp + (p->value)[i](t, (p->parameters)[i], epsilon, n_dim);
+
+            d2Phi_dr2 = d2Phi_dr2 + tmp / (h*h);
+        }
+    }
 
-    return d2Phi_dr2 / (h*h);
+    return d2Phi_dr2;
 }
 
 
 double c_mass_enclosed(CPotential *p, double t, double *qp, double G,
-                       double *epsilon) {
+                       double *epsilon, double h) {
     double r2, dPhi_dr;
     int j;
 
@@ -195,12 +461,38 @@ double c_mass_enclosed(CPotential *p, double t, double *qp, double G,
     for (j=0; j<p->n_dim; j++) {
         r2 = r2 + qp[j]*qp[j];
     }
-    dPhi_dr = c_d_dr(p, t, qp, epsilon);
+    dPhi_dr = c_d_dr(p, t, qp, epsilon, h);
     return fabs(r2 * dPhi_dr / G);
 }
 
 
 // TODO: This isn't really the right place for this...
+static void shift_body_potential(CPotential *p, double *q0, double **q0_saved,
+                                 int *transform_saved) {
+    /*
+        Temporarily move the origin of all components of a body's potential to
+        the body position q0. The original origins and transformation flags
+        are stored in q0_saved and transform_saved so they can be restored
+        after the force evaluation.
+    */
+    int i;
+    for (i=0; i < p->n_components; i++) {
+        q0_saved[i] = (p->q0)[i];
+        transform_saved[i] = (p->transform)[i];
+        (p->q0)[i] = q0;
+        (p->transform)[i] = (p->transform)[i] | TRANSFORM_SHIFT;
+    }
+}
+
+static void restore_body_potential(CPotential *p, double **q0_saved,
+                                   int *transform_saved) {
+    int i;
+    for (i=0; i < p->n_components; i++) {
+        (p->q0)[i] = q0_saved[i];
+        (p->transform)[i] = transform_saved[i];
+    }
+}
+
 void c_nbody_acceleration(CPotential **pots, double t, double *qp,
                           int norbits, int nbody, int ndim, double *acc) {
     int i, j, k;
@@ -214,8 +506,10 @@ void c_nbody_acceleration(CPotential **pots, double t, double *qp,
         if ((body_pot->null) == 1)
             continue;
 
-        for (i=0; i < body_pot->n_components; i++)
-            (body_pot->q0)[i] = &qp[j * ps_ndim];
+        double *q0_saved[body_pot->n_components];
+        int transform_saved[body_pot->n_components];
+        shift_body_potential(body_pot, &qp[j * ps_ndim], q0_saved,
+                             transform_saved);
 
         for (i=0; i < norbits; i++) {
             if (i != j) {
@@ -224,6 +518,8 @@ void c_nbody_acceleration(CPotential **pots, double t, double *qp,
                    acc[i*ps_ndim + ndim + k] += -f2[k];
             }
         }
+
+        restore_body_potential(body_pot, q0_saved, transform_saved);
     }
 }
 
@@ -243,12 +539,15 @@ void c_nbody_gradient_symplectic(
         if ((body_pot->null == 1) || (j == nbody_i))
             continue;
 
-        for (i=0; i < body_pot->n_components; i++) {
-            (body_pot->q0)[i] = &nbody_w[j * 2 * ndim]; // p-s ndim
-        }
+        double *q0_saved[body_pot->n_components];
+        int transform_saved[body_pot->n_components];
+        shift_body_potential(body_pot, &nbody_w[j * 2 * ndim], q0_saved,
+                             transform_saved); // p-s ndim
 
         c_gradient(body_pot, t, w, &f2[0]);
         for (k=0; k < ndim; k++)
             grad[k] += f2[k];
+
+        restore_body_potential(body_pot, q0_saved, transform_saved);
     }
 }
\ No newline at end of file
@@ -1,9 +1,10 @@
 #include "src/funcdefs.h"
 
-#ifndef MAX_N_COMPONENTS_H
-    #define MAX_N_COMPONENTS_H
-    #define MAX_N_COMPONENTS 16
-#endif
+// Flags for the coordinate transformations that must be applied to each
+// component: both are unset for components with the default origin and
+// rotation, so the transformations can be skipped
+#define TRANSFORM_SHIFT 1
+#define TRANSFORM_ROTATE 2
 
 #ifndef _CPotential_H
 #define _CPotential_H
@@ -14,23 +15,42 @@
         int n_dim; // coordinate system dimensionality
         int null; // a short circuit: if null, can skip evaluation
 
+        // All of the per-component arrays below have length n_components and
+        // are allocated by the owner of the struct (CPotentialWrapper)
+
         // arrays of pointers to each of the function types above
-        densityfunc density[MAX_N_COMPONENTS];
-        energyfunc value[MAX_N_COMPONENTS];
-        gradientfunc gradient[MAX_N_COMPONENTS];
-        hessianfunc hessian[MAX_N_COMPONENTS];
+        densityfunc *density;
+        energyfunc *value;
+        gradientfunc *gradient;
+        hessianfunc *hessian;
+
+        // optional fused value + gradient functions: NULL if not implemented
+        valuegradientfunc *value_gradient;
+
+        // optional functions that evaluate a whole block of N positions,
+        // q[N, n_dim], in one call: NULL if not implemented
+        energybatchfunc *value_batch;
+        gradientbatchfunc *gradient_batch;
 
         // array containing the number of parameters in each component
-        int n_params[MAX_N_COMPONENTS];
+        int *n_params;
 
         // pointer to array of pointers to the parameter arrays
-        double *parameters[MAX_N_COMPONENTS];
+        double **parameters;
 
         // pointer to array of pointers containing the origin coordinates
-        double *q0[MAX_N_COMPONENTS];
+        double **q0;
 
         // pointer to array of pointers containing rotation matrix elements
-        double *R[MAX_N_COMPONENTS];
+        double **R;
+
+        // array of TRANSFORM_* flags for each component
+        int *transform;
+
+        // array of flags for whether each component implements a Hessian: if
+        // not, its Hessian function returns NaN and radial second derivatives
+        // fall back to finite differences
+        int *has_hessian;
     };
 #endif
 
@@ -38,11 +58,19 @@ extern double c_potential(CPotential *p, double t, double *q);
 extern double c_density(CPotential *p, double t, double *q);
 extern void c_gradient(CPotential *p, double t, double *q, double *grad);
 extern void c_hessian(CPotential *p, double t, double *q, double *hess);
+extern double c_value_gradient(CPotential *p, double t, double *q, double *grad);
+extern void c_potential_batch(CPotential *p, double t, double *q, int N, double *pot);
+extern void c_gradient_batch(CPotential *p, double t, double *q, int N, double *grad);
+
+// Default step sizes for finite-difference radial derivatives, only used for
+// components that don't implement a gradient / Hessian
+#define D_DR_STEP 1E-4
+#define D2_DR2_STEP 1E-2
 
 // TODO: err, what about reference frames...
-extern double c_d_dr(CPotential *p, double t, double *q, double *epsilon);
-extern double c_d2_dr2(CPotential *p, double t, double *q, double *epsilon);
-extern double c_mass_enclosed(CPotential *p, double t, double *q, double G, double *epsilon);
+extern double c_d_dr(CPotential *p, double t, double *q, double *epsilon, double h);
+extern double c_d2_dr2(CPotential *p, double t, double *q, double *epsilon, double h);
+extern double c_mass_enclosed(CPotential *p, double t, double *q, double G, double *epsilon, double h);
 
 // TODO: move this elsewhere?
 void c_nbody_acceleration(CPotential **pots, double t, double *qp,
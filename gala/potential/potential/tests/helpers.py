@@ -131,6 +131,35 @@ class PotentialTestBase:
                 arr[: self.ndim], t=t * self.potential.units["time"]
             )
 
+    def test_energy_and_gradient(self):
+        for arr in self.w0s:
+            E, g = self.potential.energy_and_gradient(arr[: self.ndim], t=0.1)
+            assert u.allclose(
+                E, self.potential.energy(arr[: self.ndim], t=0.1), equal_nan=True
+            )
+            assert u.allclose(
+                g, self.potential.gradient(arr[: self.ndim], t=0.1), equal_nan=True
+            )
+
+    def test_raw(self):
+        x = self.w0s[1][: self.ndim]
+        q = np.ascontiguousarray(x.T)
+        n = q.shape[0]
+
+        E = self.potential.energy(x, t=0.1).value
+        grad = self.potential.gradient(x, t=0.1).decompose(self.potential.units).value
+
+        assert np.allclose(self.potential.energy_raw(q, 0.1), E, equal_nan=True)
+        out = np.zeros(n)
+        assert self.potential.energy_raw(q, 0.1, out=out) is out
+        assert np.allclose(out, E, equal_nan=True)
+
+        assert np.allclose(self.potential.gradient_raw(q, 0.1), grad.T,
+                           equal_nan=True)
+        out = np.zeros((n, self.ndim))
+        assert self.potential.gradient_raw(q, 0.1, out=out) is out
+        assert np.allclose(out, grad.T, equal_nan=True)
+
     def test_hessian(self):
         for arr, shp in zip(self.w0s, self._hess_return_shapes):
             g = self.potential.hessian(arr[: self.ndim])
@@ -386,7 +386,29 @@ class TestLongMuraliBar(PotentialTestBase):
     w0 = [19.0, 0.2, -0.9, 0., vc, 0.]
 
 
-class TestLongMuraliBarRotate(PotentialTestBase):
+class RotatedTestBase(PotentialTestBase):
+    def test_hessian_rotated(self):
+        # compare to finite-difference derivatives of the (rotated) gradient
+        x = np.array([1., 2., 3.])
+        H = self.potential.hessian(x).value[..., 0]
+
+        h = 1e-4
+        H_num = np.zeros((3, 3))
+        for i in range(3):
+            dx = np.zeros(3)
+            dx[i] = h
+            H_num[:, i] = (self.potential.gradient(x + dx).value[:, 0] -
+                           self.potential.gradient(x - dx).value[:, 0]) / (2*h)
+
+        assert np.allclose(H, H.T)
+        assert np.allclose(H, H_num, rtol=1e-5, atol=1e-10)
+
+    @pytest.mark.skip(reason="Not implemented for rotated potentials")
+    def test_against_sympy(self):
+        pass
+
+
+class TestLongMuraliBarRotate(RotatedTestBase):
     potential = p.LongMuraliBarPotential(
         units=galactic, m=1E11,
         a=4.*u.kpc, b=1*u.kpc, c=1.*u.kpc,
@@ -396,17 +418,8 @@ class TestLongMuraliBarRotate(PotentialTestBase):
     vc = potential.circular_velocity([19., 0, 0]*u.kpc).decompose(galactic).value[0]
     w0 = [19.0, 0.2, -0.9, 0., vc, 0.]
 
-    def test_hessian(self):
-        # TODO: when hessian for rotated potentials implemented, remove this
-        with pytest.raises(NotImplementedError):
-            self.potential.hessian([1., 2., 3.])
 
-    @pytest.mark.skip(reason="Not implemented for rotated potentials")
-    def test_against_sympy(self):
-        pass
-
-
-class TestLongMuraliBarRotationScipy(PotentialTestBase):
+class TestLongMuraliBarRotationScipy(RotatedTestBase):
     potential = p.LongMuraliBarPotential(
         units=galactic, m=1E11,
         a=4.*u.kpc, b=1*u.kpc, c=1.*u.kpc,
@@ -414,15 +427,104 @@ class TestLongMuraliBarRotationScipy(PotentialTestBase):
     vc = potential.circular_velocity([19., 0, 0]*u.kpc).decompose(galactic).value[0]
     w0 = [19.0, 0.2, -0.9, 0., vc, 0.]
 
-    def test_hessian(self):
-        # TODO: when hessian for rotated potentials implemented, remove this
-        with pytest.raises(NotImplementedError):
-            self.potential.hessian([1., 2., 3.])
 
-    @pytest.mark.skip(reason="Not implemented for rotated potentials")
+class TabulatedTestBase(PotentialTestBase):
+    # the gradient is interpolated separately from the potential, so it only
+    # matches the numerical derivative of the potential to the accuracy of
+    # the interpolation
+    tol = 1e-2
+
+    # the median relative errors expected for the (coarse) test grids
+    energy_rtol = 1e-5
+    gradient_rtol = 1e-4
+
+    @pytest.fixture(autouse=True, scope='class')
+    def tabulated_potential(self, request):
+        # tabulate once per test class, rather than when the module is imported
+        request.cls.potential = request.cls.tabulate()
+
+    def test_save_load(self, tmpdir):
+        # TabulatedPotential can't be written to YAML
+        pass
+
+    @pytest.mark.skip(reason="Not implemented for tabulated potentials")
     def test_against_sympy(self):
         pass
 
+    def test_precision(self):
+        report = self.potential.precision_report(seed=42)
+        assert report['energy_median_rel_err'] < self.energy_rtol
+        assert report['gradient_median_rel_err'] < self.gradient_rtol
+
+    def test_precision_report_time(self, monkeypatch):
+        # by default, compare at the time the potential was tabulated at
+        exact = self.potential.potential
+        times = []
+
+        def energy_and_gradient(q, t=0.):
+            times.append(t)
+            return exact.__class__.energy_and_gradient(exact, q, t=t)
+
+        monkeypatch.setattr(exact, 'energy_and_gradient', energy_and_gradient)
+        monkeypatch.setattr(self.potential, '_t', 5.)
+        self.potential.precision_report(n_samples=16)
+        self.potential.precision_report(n_samples=16, t=1.)
+        assert times == [5., 1.]
+
+    def test_outside_grid(self):
+        exact = self.potential.potential
+        q = np.array([[50., 0., 0.], [10., -20., 50.]]).T
+        assert u.allclose(self.potential.energy(q), exact.energy(q))
+        assert u.allclose(self.potential.gradient(q), exact.gradient(q))
+
+    def test_hessian_exact(self):
+        # the Hessian is not tabulated, and comes from the exact potential
+        exact = self.potential.potential
+        q = np.array([[5., 2., 1.], [50., 0., 0.]]).T
+        assert u.allclose(self.potential.hessian(q), exact.hessian(q))
+
+
+class TestTabulatedCartesian(TabulatedTestBase):
+    w0 = [8., 0., 0.1, 0., 0.22, 0.02]
+
+    @staticmethod
+    def tabulate():
+        return p.TabulatedPotential(
+            p.HernquistPotential(units=galactic, m=1.E11, c=5.),
+            bounds=[(-10, 10)] * 3 * u.kpc, shape=40)
+
+
+class TestTabulatedCylindrical(TabulatedTestBase):
+    w0 = [19.0, 2.7, -6.9, 0.0352238, -0.03579493, 0.075]
+
+    @staticmethod
+    def tabulate():
+        return p.TabulatedPotential(
+            p.LogarithmicPotential(units=galactic, v_c=0.17, r_h=10.,
+                                   q1=1.2, q2=1., q3=0.8),
+            bounds=[(0, 15), (-15, 15)] * u.kpc, shape=(24, 48, 32),
+            coordinates='cylindrical')
+
+
+class TestTabulatedAxisymmetric(TabulatedTestBase):
+    w0 = [8., 0., 0.1, 0., 0.22, 0.02]
+    energy_rtol = 1e-6
+    gradient_rtol = 1e-5
+
+    @staticmethod
+    def tabulate():
+        return p.TabulatedPotential(
+            p.MiyamotoNagaiPotential(units=galactic, m=1.E11, a=6.5, b=1.),
+            bounds=[(0, 15), (-15, 15)] * u.kpc, shape=(48, 96),
+            coordinates='cylindrical', axisymmetric=True)
+
+    def test_rtol(self):
+        with pytest.warns(RuntimeWarning, match="maximum relative error"):
+            p.TabulatedPotential(
+                self.potential.potential,
+                bounds=[(0, 30), (-30, 30)] * u.kpc, shape=(8, 8),
+                coordinates='cylindrical', axisymmetric=True, rtol=1e-8)
+
 
 class TestComposite(CompositePotentialTestBase):
     p1 = p.LogarithmicPotential(units=galactic,
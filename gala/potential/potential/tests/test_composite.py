@@ -170,3 +170,30 @@ def test_add():
     assert isinstance(new_p, CompositePotential)
     assert not isinstance(new_p, CCompositePotential)
     assert len(new_p.keys()) == 3
+
+
+def test_many_components():
+    """ C composites are not limited in the number of components """
+    rng = np.random.default_rng(42)
+    n_sub = 256
+    origins = rng.normal(0, 50., size=(n_sub, 3))
+    masses = 10 ** rng.uniform(7, 9, size=n_sub)
+
+    p = CCompositePotential()
+    p['halo'] = HernquistPotential(m=1e12, c=20., units=galactic)
+    for i in range(n_sub):
+        p[f'sub{i}'] = HernquistPotential(m=masses[i], c=0.5, units=galactic,
+                                          origin=origins[i])
+    assert len(p.keys()) == n_sub + 1
+
+    xyz = rng.normal(0, 30., size=(3, 128))
+    E = np.sum([pp.energy(xyz).value for pp in p.values()], axis=0)
+    grad = np.sum([pp.gradient(xyz).value for pp in p.values()], axis=0)
+    assert np.allclose(p.energy(xyz).value, E)
+    assert np.allclose(p.gradient(xyz).value, grad)
+
+    H = Hamiltonian(p)
+    w0 = [10., 0, 0, 0, 0.2, 0.]
+    orbit = H.integrate_orbit(w0, dt=1., n_steps=100,
+                              Integrator=LeapfrogIntegrator)
+    assert np.all(np.isfinite(orbit.xyz))
@@ -1,5 +1,7 @@
 # Third party
 import astropy.units as u
+import numpy as np
+import pytest
 
 # This package
 from ..builtin import HernquistPotential
@@ -19,3 +21,304 @@ def test_replace_units():
     assert p2.parameters['c'].unit == usys2['length']
     assert p.units == usys1
     assert p2.units == usys2
+
+
+def test_n_threads():
+    from ..builtin import HarmonicOscillatorPotential
+    from ..builtin.special import MilkyWayPotential2022
+    from ....units import galactic
+
+    pot = MilkyWayPotential2022()
+
+    rng = np.random.default_rng(42)
+    xyz = rng.normal(0, 10., size=(3, 1024)) * u.kpc
+    t = rng.uniform(0, 100., size=1024) * u.Myr
+
+    for func_name in ['energy', 'gradient', 'density', 'hessian']:
+        func = getattr(pot, func_name)
+        for tt in [0., t]:
+            serial = func(xyz, t=tt)
+            threaded = func(xyz, t=tt, n_threads=4)
+            assert np.allclose(serial.value, threaded.value, rtol=1e-15, atol=0)
+
+    with pytest.raises(ValueError):
+        pot.energy(xyz, n_threads=0)
+
+    # Python potentials don't support multi-threaded evaluation
+    pot = HarmonicOscillatorPotential(omega=[1., 1., 1.], units=galactic)
+    with pytest.raises(ValueError, match="n_threads"):
+        pot.energy([1., 0, 0], n_threads=2)
+
+
+def test_raw_methods():
+    from ..builtin.special import MilkyWayPotential2022
+
+    pot = MilkyWayPotential2022()
+
+    rng = np.random.default_rng(42)
+    q = rng.normal(0, 10., size=(1024, 3))
+
+    dens = pot.density(q.T).decompose(pot.units).value
+    out = np.empty(1024)
+    assert pot.density_raw(q, 0., out=out) is out
+    assert np.allclose(out, dens)
+
+    # multi-threaded evaluation into a preallocated buffer
+    grad = np.empty((1024, 3))
+    pot.gradient_raw(q, 0., out=grad, n_threads=4)
+    assert np.allclose(grad, pot.gradient_raw(q, 0.), rtol=1e-15, atol=0)
+
+    with pytest.raises(ValueError, match="shape"):
+        pot.energy_raw(q, 0., out=np.empty(1023))
+
+    with pytest.raises(ValueError, match="shape"):
+        pot.gradient_raw(q, 0., out=np.empty((1024, 2)))
+
+    with pytest.raises(ValueError, match="shape"):
+        pot.energy_raw(np.ascontiguousarray(q[:, :2]), 0.)
+
+    with pytest.raises(ValueError, match="n_threads"):
+        pot.energy_raw(q, 0., n_threads=0)
+
+
+def test_batch_kernels():
+    from ..builtin import (
+        LogarithmicPotential,
+        MiyamotoNagaiPotential,
+        NFWPotential,
+        PlummerPotential,
+    )
+    from ..ccompositepotential import CCompositePotential
+    from ....units import galactic
+
+    # mix of components with and without batch kernels, shifted and rotated
+    R = np.array([[0., 1, 0], [-1, 0, 0], [0, 0, 1]])
+    pot = CCompositePotential(
+        halo=NFWPotential(m=6e11, r_s=16., units=galactic, origin=[1., 0, 0.5]),
+        disk=MiyamotoNagaiPotential(m=6e10, a=3., b=0.28, units=galactic, R=R),
+        bulge=PlummerPotential(m=5e9, b=1., units=galactic),
+        bar=LogarithmicPotential(v_c=0.2, r_h=1., q1=1., q2=0.9, q3=0.8, phi=0.3,
+                                 units=galactic),
+        other=HernquistPotential(m=1e9, c=0.5, units=galactic, R=R.T),
+    )
+
+    rng = np.random.default_rng(42)
+    xyz = rng.normal(0, 10., size=(3, 1000))
+
+    # a time array per position goes through the point-by-point path
+    t = np.zeros(xyz.shape[1])
+    for func_name in ['energy', 'gradient']:
+        func = getattr(pot, func_name)
+        batch = func(xyz, t=0.)
+        single = func(xyz, t=t)
+        assert np.allclose(batch.value, single.value, rtol=1e-15, atol=0)
+
+
+def test_radial_derivatives():
+    from ..builtin import LeeSutoTriaxialNFWPotential
+    from ....units import galactic
+
+    m = 1E10
+    c = 0.5
+    p = HernquistPotential(m=m, c=c, units=galactic)
+    G = p.G
+    t = np.zeros(1)
+
+    # Compare to the analytic radial derivatives over a wide range of radii
+    r = np.logspace(-3, 4, 32)
+    xyz = np.zeros((len(r), 3))
+    xyz[:, 0] = r / np.sqrt(2)
+    xyz[:, 2] = r / np.sqrt(2)
+
+    assert np.allclose(p.c_instance.d_dr(xyz, G, t), G * m / (r + c)**2,
+                       rtol=1e-12, atol=0)
+    assert np.allclose(p.c_instance.d2_dr2(xyz, G, t), -2 * G * m / (r + c)**3,
+                       rtol=1e-12, atol=0)
+    assert np.allclose(p.c_instance.mass_enclosed(xyz, G, t),
+                       m * r**2 / (r + c)**2, rtol=1e-12, atol=0)
+
+    # Potentials without a Hessian fall back to finite differences
+    p = LeeSutoTriaxialNFWPotential(v_c=0.2, r_s=20., a=1., b=0.9, c=0.8,
+                                    units=galactic)
+    xyz = np.array([[10., 5., 2.]])
+    r = np.linalg.norm(xyz)
+    h = 1E-2
+    Phi = [p.energy((r + dr) * xyz[0] / r).value[0] for dr in (-h, 0, h)]
+    fd = (Phi[2] - 2*Phi[1] + Phi[0]) / h**2
+    assert np.allclose(p.c_instance.d2_dr2(xyz, G, t), fd, rtol=1e-10)
+    assert np.allclose(p.c_instance.d2_dr2(xyz, G, t, h=1E-3), fd, rtol=1e-3)
+
+
+def _builtin_potentials():
+    from .. import builtin as bp
+    from ....units import galactic
+
+    R = np.array([[0.63302222, 0.75440651, 0.17364818],
+                  [-0.76604444, 0.64278761, 0.],
+                  [-0.1116189, -0.13302222, 0.98480775]])
+    pots = [
+        bp.NullPotential(units=galactic),
+        bp.HenonHeilesPotential(units=galactic),
+        bp.KeplerPotential(m=1E11, units=galactic),
+        bp.IsochronePotential(m=1E11, b=0.5, units=galactic),
+        bp.HernquistPotential(m=1E11, c=0.5, units=galactic),
+        bp.PlummerPotential(m=1E11, b=0.5, units=galactic),
+        bp.JaffePotential(m=1E11, c=0.5, units=galactic),
+        bp.StonePotential(m=1E11, r_c=0.1, r_h=10., units=galactic),
+        bp.SatohPotential(m=1E11, a=6.5, b=0.26, units=galactic),
+        bp.KuzminPotential(m=1E11, a=3.5, units=galactic),
+        bp.MiyamotoNagaiPotential(m=1E11, a=6.5, b=0.26, units=galactic),
+        bp.MN3ExponentialDiskPotential(m=1E11, h_R=3.5, h_z=0.26,
+                                       units=galactic),
+        bp.NFWPotential(m=1E11, r_s=12., units=galactic),
+        bp.NFWPotential(m=1E11, r_s=12., c=0.7, units=galactic),
+        bp.NFWPotential(m=1E11, r_s=12., a=1., b=0.95, c=0.9, units=galactic),
+        bp.LeeSutoTriaxialNFWPotential(v_c=0.35, r_s=12., a=1.3, b=1., c=0.8,
+                                       units=galactic),
+        bp.LogarithmicPotential(v_c=0.17, r_h=10., q1=1.2, q2=1., q3=0.8,
+                                units=galactic),
+        bp.LongMuraliBarPotential(m=1E11, a=4., b=1., c=1., units=galactic),
+        bp.LongMuraliBarPotential(m=1E11, a=4., b=1., c=1., R=R,
+                                  units=galactic),
+        bp.HernquistPotential(m=1E11, c=0.5, origin=[1., -2., 0.5],
+                              units=galactic),
+    ]
+
+    from gala._cconfig import GSL_ENABLED
+    if GSL_ENABLED:
+        pots.append(bp.PowerLawCutoffPotential(m=1E10, r_c=1., alpha=1.8,
+                                               units=galactic))
+
+    return pots
+
+
+@pytest.mark.parametrize('pot', _builtin_potentials(),
+                         ids=lambda pot: pot.__class__.__name__)
+def test_d2_dr2_finite_difference(pot):
+    """
+    The second radial derivative, computed from the Hessian where a potential
+    implements one, must agree with a finite-difference estimate.
+    """
+    xyz = np.array([[10., 5., 2.],
+                    [-3., 1.5, -4.]])[:, :pot.ndim]
+    xyz = np.ascontiguousarray(xyz)
+    t = np.zeros(1)
+
+    r = np.linalg.norm(xyz, axis=1)
+    r_hat = xyz / r[:, None]
+    h = 1E-2
+
+    fd = np.zeros(len(xyz))
+    for dr, fac in zip([-h, 0, h], [1., -2., 1.]):
+        q = np.ascontiguousarray(xyz + dr * r_hat)
+        fd += fac * pot.c_instance.energy(q, t)
+    fd /= h**2
+
+    d2_dr2 = pot.c_instance.d2_dr2(xyz, pot.G, t)
+    assert np.allclose(d2_dr2, fd, rtol=1e-5, atol=1e-10)
+
+
+def test_hessian_not_implemented():
+    from .. import builtin as bp
+    from ....units import galactic
+
+    # potentials without a Hessian return NaN, rather than silently zeros
+    pot = bp.LeeSutoTriaxialNFWPotential(v_c=0.35, r_s=12., a=1.3, b=1., c=0.8,
+                                         units=galactic)
+    assert np.all(np.isnan(pot.hessian([10., 5., 2.]).value))
+
+    pot = pot + bp.HernquistPotential(m=1E11, c=0.5, units=galactic)
+    assert np.all(np.isnan(pot.hessian([10., 5., 2.]).value))
+
+
+def test_identity_transform():
+    """
+    Components with the default origin and rotation skip the coordinate
+    transformations, and must give exactly the same result as the same
+    model with a (negligible) rotation applied to every component.
+    """
+    from ..builtin.special import MilkyWayPotential
+    from ..ccompositepotential import CCompositePotential
+    from ...hamiltonian import Hamiltonian
+    from ....integrate import LeapfrogIntegrator
+
+    pot = MilkyWayPotential()
+
+    eps = 1e-300
+    R = np.array([[1., -eps, 0], [eps, 1., 0], [0, 0, 1.]])
+    rot_pot = CCompositePotential()
+    for k, p in pot.items():
+        rot_pot[k] = p.__class__(**p.parameters, units=p.units, R=R)
+
+    # TRANSFORM_SHIFT = 1, TRANSFORM_ROTATE = 2
+    assert np.all(pot.c_instance._transform_flags() == 0)
+    assert np.all(rot_pot.c_instance._transform_flags() == 2)
+    shifted = HernquistPotential(m=1e10, c=1., units=pot.units,
+                                 origin=[1., 0, 0] * u.kpc)
+    assert np.all(shifted.c_instance._transform_flags() == 1)
+
+    rng = np.random.default_rng(42)
+    xyz = rng.normal(0, 10., size=(3, 1000))
+    w0 = np.vstack((rng.normal(0, 10., size=(3, 16)),
+                    rng.normal(0, 0.15, size=(3, 16))))
+
+    assert np.array_equal(pot.gradient(xyz).value,
+                          rot_pot.gradient(xyz).value)
+
+    orbits = [Hamiltonian(p).integrate_orbit(w0, dt=1., n_steps=100,
+                                             Integrator=LeapfrogIntegrator)
+              for p in (pot, rot_pot)]
+    assert np.array_equal(orbits[0].xyz.value, orbits[1].xyz.value)
+    assert np.array_equal(orbits[0].v_xyz.value, orbits[1].v_xyz.value)
+
+
+@pytest.mark.skipif(True, reason="Slow benchmark - mainly for timing locally")
+def test_identity_transform_benchmark():
+    """
+    Time the gradient evaluation and leapfrog integration of a model whose
+    components skip the coordinate transformations, relative to the same model
+    with a (negligible) rotation applied to every component.
+    """
+    import time
+
+    from ..builtin.special import MilkyWayPotential
+    from ..ccompositepotential import CCompositePotential
+    from ...hamiltonian import Hamiltonian
+    from ....integrate import LeapfrogIntegrator
+
+    pot = MilkyWayPotential()
+
+    eps = 1e-300
+    R = np.array([[1., -eps, 0], [eps, 1., 0], [0, 0, 1.]])
+    rot_pot = CCompositePotential()
+    for k, p in pot.items():
+        rot_pot[k] = p.__class__(**p.parameters, units=p.units, R=R)
+
+    rng = np.random.default_rng(42)
+    xyz = rng.normal(0, 10., size=(3, 100_000))
+    w0 = np.vstack((rng.normal(0, 10., size=(3, 1000)),
+                    rng.normal(0, 0.15, size=(3, 1000))))
+
+    res = {}
+    for name, p in [('identity', pot), ('rotated', rot_pot)]:
+        p.gradient(xyz[:, :10])  # warm up
+
+        t0 = time.time()
+        grad = p.gradient(xyz)
+        t_grad = time.time() - t0
+
+        t0 = time.time()
+        orbits = Hamiltonian(p).integrate_orbit(
+            w0, dt=1., n_steps=100, Integrator=LeapfrogIntegrator)
+        t_orbit = time.time() - t0
+
+        res[name] = (grad, orbits, t_grad, t_orbit)
+
+    assert u.allclose(res['identity'][0], res['rotated'][0])
+    assert u.allclose(res['identity'][1].xyz, res['rotated'][1].xyz)
+
+    print(
+        "gradient: {:.1f}x faster, leapfrog: {:.1f}x faster".format(
+            res['rotated'][2] / res['identity'][2],
+            res['rotated'][3] / res['identity'][3])
+    )
@@ -1,9 +1,18 @@
+# Standard library
+import fnmatch
+import os
+import re
+
+# Third-party
+import numpy as np
 import pytest
 
 # This project
 from ..util import from_equation
+from ..builtin import PlummerPotential
+from ..cpotential import CPotentialBase
 from .helpers import PotentialTestBase
-from gala.tests.optional_deps import HAS_SYMPY
+from gala.tests.optional_deps import HAS_CYTHON, HAS_SYMPY
 
 
 class EquationBase(PotentialTestBase):
@@ -39,6 +48,103 @@ if HAS_SYMPY:
             pass
 
 
+@pytest.mark.skipif(not HAS_SYMPY or not HAS_CYTHON,
+                    reason="requires sympy and cython to run this test")
+def test_from_equation_c_backend(tmpdir, monkeypatch):
+    from .. import util
+    from ...hamiltonian import Hamiltonian
+    from ....dynamics import PhaseSpacePosition
+    from ....integrate import DOPRI853Integrator, LeapfrogIntegrator
+
+    expr = "-G*m/sqrt(x**2+y**2+z**2+b**2)"
+    kw = dict(vars=["x", "y", "z"], pars=["G", "m", "b"], hessian=True,
+              backend='c', cache_dir=str(tmpdir))
+    Potential = from_equation(expr, name='CustomPlummer', **kw)
+    assert issubclass(Potential, CPotentialBase)
+    assert Potential.__name__ == 'CustomPlummerPotential'
+
+    pot = Potential(G=1., m=1., b=0.5)
+    ref = PlummerPotential(m=1., b=0.5, units=None)
+
+    q = np.random.default_rng(42).normal(size=(3, 16))
+    assert np.allclose(pot.energy(q), ref.energy(q))
+    assert np.allclose(pot.gradient(q), ref.gradient(q))
+    assert np.allclose(pot.hessian(q), ref.hessian(q))
+
+    E, grad = pot.energy_and_gradient(q)
+    assert np.allclose(E, ref.energy(q))
+    assert np.allclose(grad, ref.gradient(q))
+
+    w0 = PhaseSpacePosition(pos=q[:, :4], vel=np.full((3, 4), 0.3))
+    for Integrator in [LeapfrogIntegrator, DOPRI853Integrator]:
+        orbit = Hamiltonian(pot).integrate_orbit(
+            w0, dt=0.01, n_steps=100, Integrator=Integrator)
+        ref_orbit = Hamiltonian(ref).integrate_orbit(
+            w0, dt=0.01, n_steps=100, Integrator=Integrator)
+        assert np.allclose(orbit.xyz.value, ref_orbit.xyz.value)
+
+    # the second time, the compiled module is loaded from the cache
+    Potential2 = from_equation(expr, **kw)
+    assert Potential2.Wrapper is Potential.Wrapper
+
+    # cached builds are not reused when the C headers change
+    def build_extension(module_name, *args):
+        raise RuntimeError(module_name)
+
+    monkeypatch.setattr(util, '_c_headers_hash', lambda: 'changed')
+    monkeypatch.setattr(util, '_build_extension', build_extension)
+    with pytest.raises(RuntimeError) as e:
+        from_equation(expr, **kw)
+    assert str(e.value) != Potential.Wrapper.__module__
+
+    with pytest.raises(ValueError, match="not variables or parameters"):
+        from_equation("a*x**2", vars="x", pars="k", backend='c',
+                      cache_dir=str(tmpdir))
+
+
+def test_from_equation_c_headers():
+    # the C backend compiles against gala's headers at runtime, so these have to
+    # be found through gala.get_include() in an installed copy of gala
+    import gala
+    from .. import util
+
+    include_dirs = [os.path.join(gala.get_include(), 'potential'),
+                    gala.get_include()]
+    for filename in util._C_HEADERS:
+        path = os.path.join(gala.get_include(), filename)
+        assert os.path.exists(path)
+
+        with open(path) as f:
+            includes = re.findall(r'^\s*(?:#include|cdef extern from) "(.+)"',
+                                  f.read(), flags=re.MULTILINE)
+        for include in includes:
+            assert any(os.path.exists(os.path.join(d, include))
+                       for d in include_dirs)
+
+
+def test_from_equation_c_headers_package_data():
+    # in the source tree, check that the headers are installed as package data
+    tomllib = pytest.importorskip('tomllib')
+    import gala
+    from .. import util
+
+    pyproject = os.path.join(os.path.dirname(gala.get_include()),
+                             'pyproject.toml')
+    if not os.path.exists(pyproject):
+        pytest.skip("Not running from the source tree")
+
+    with open(pyproject, 'rb') as f:
+        package_data = tomllib.load(f)['tool']['setuptools']['package-data']
+
+    for filename in util._C_HEADERS:
+        path = os.path.join('gala', filename).split(os.sep)
+        assert any(
+            fnmatch.fnmatch('/'.join(path[i:]), pattern)
+            for i in range(1, len(path))
+            for pattern in package_data.get('.'.join(path[:i]), [])
+        ), filename
+
+
 # class TestHarmonicOscillatorFromEquationUnits(EquationBase):
 #     Potential = from_equation("1/2*k*x**2", vars="x", pars="k",
 #                               name='HarmonicOscillator',
@@ -2,6 +2,12 @@
 
 # Standard library
 from functools import wraps
+import hashlib
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
 
 # Third-party
 import numpy as np
@@ -14,7 +20,8 @@ __all__ = ['from_equation']
 __doctest_requires__ = {('from_equation', ): ['sympy']}
 
 
-def from_equation(expr, vars, pars, name=None, hessian=False):
+def from_equation(expr, vars, pars, name=None, hessian=False,
+                  backend='python', cache_dir=None):
     r"""
     Create a potential class from an expression for the potential.
 
@@ -40,6 +47,18 @@ def from_equation(expr, vars, pars, name=None, hessian=False):
         The name of the potential class returned.
     hessian : bool (optional)
         Generate a function to compute the Hessian.
+    backend : str (optional)
+        Either ``'python'`` (the default), to evaluate the expressions with
+        functions generated by ``sympy.lambdify``, or ``'c'``, to generate C
+        source code for the expressions and compile it into an extension
+        module. The ``'c'`` backend requires Cython and a C compiler, and
+        returns a subclass of `~gala.potential.CPotentialBase` that can be
+        used with the C orbit integrators.
+    cache_dir : str (optional)
+        Only used with ``backend='c'``. The directory in which compiled
+        extension modules are cached, keyed by a hash of the expression. By
+        default, this is a ``from_equation`` directory inside of the gala
+        cache directory (usually ``~/.gala/cache``).
 
     Returns
     -------
@@ -66,6 +85,14 @@ def from_equation(expr, vars, pars, name=None, hessian=False):
         >>> H = Hamiltonian(p1)
         >>> orbit = H.integrate_orbit([1., 0], dt=0.01, n_steps=1000)
 
+    With ``backend='c'``, the energy, gradient, and (optionally) Hessian are
+    instead compiled to C, so the same potential can be integrated with the
+    C integrators at the speed of the built-in potentials::
+
+        >>> Potential = from_equation("1/2*k*x**2", vars="x", pars="k",
+        ...                           name='HarmonicOscillator',
+        ...                           backend='c')  # doctest: +SKIP
+
     """
     try:
         import sympy
@@ -82,6 +109,19 @@ def from_equation(expr, vars, pars, name=None, hessian=False):
     par_names = [p.name for p in pars]
     ndim = len(vars)
 
+    if backend not in ['python', 'c']:
+        raise ValueError(f"Invalid backend '{backend}': must be one of "
+                         "'python' or 'c'.")
+
+    parameters = {}
+    for _name in par_names:
+        parameters[_name] = PotentialParameter(_name,
+                                               physical_type='dimensionless')
+
+    if backend == 'c':
+        return _from_equation_c(expr, vars, pars, parameters, name=name,
+                                hessian=hessian, cache_dir=cache_dir)
+
     # Energy / value
     energyfunc = lambdify(vars + pars, expr, dummify=False,
                           modules=['numpy', 'sympy'])
@@ -93,11 +133,6 @@ def from_equation(expr, vars, pars, name=None, hessian=False):
                                   dummify=False,
                                   modules=['numpy', 'sympy']))
 
-    parameters = {}
-    for _name in par_names:
-        parameters[_name] = PotentialParameter(_name,
-                                               physical_type='dimensionless')
-
     class CustomPotential(PotentialBase, parameters=parameters):
         ndim = len(vars)
 
@@ -122,11 +157,7 @@ def from_equation(expr, vars, pars, name=None, hessian=False):
             grad = np.vstack([f(**kw)[np.newaxis] for f in gradfuncs])
             return grad.T
 
-    if name is not None:
-        # name = _classnamify(name)
-        if "potential" not in name.lower():
-            name = name + "Potential"
-        CustomPotential.__name__ = str(name)
+    _set_potential_name(CustomPotential, name)
 
     # Hessian
     if hessian:
@@ -165,6 +196,327 @@ def from_equation(expr, vars, pars, name=None, hessian=False):
     return CustomPotential
 
 
+def _set_potential_name(cls, name):
+    if name is not None:
+        # name = _classnamify(name)
+        if "potential" not in name.lower():
+            name = name + "Potential"
+        cls.__name__ = str(name)
+
+
+# Bump this when the generated code changes, to invalidate cached builds
+_CODEGEN_VERSION = 2
+
+# The headers that define the CPotential struct and function pointer types
+#   that the generated extensions are compiled against, relative to gala/
+_C_HEADERS = [
+    os.path.join('potential', 'potential', 'cpotential.pxd'),
+    os.path.join('potential', 'potential', 'src', 'cpotential.h'),
+    os.path.join('potential', 'src', 'funcdefs.h'),
+    os.path.join('potential', 'potential', 'builtin', 'builtin_potentials.h'),
+]
+
+_c_func_template = """
+double {name}_value(double t, double *pars, double *q, int n_dim) {{
+{value_body}
+}}
+
+void {name}_gradient(double t, double *pars, double *q, int n_dim,
+        double *grad) {{
+{gradient_body}
+}}
+
+double {name}_value_gradient(double t, double *pars, double *q, int n_dim,
+        double *grad) {{
+{value_gradient_body}
+}}
+
+void {name}_hessian(double t, double *pars, double *q, int n_dim,
+        double *hess) {{
+{hessian_body}
+}}
+
+void {name}_value_batch(double t, double *pars, double *q, int n_dim, int N,
+        double *val) {{
+    int n;
+    for (n=0; n < N; n++)
+        val[n] = val[n] + {name}_value(t, pars, &q[n*n_dim], n_dim);
+}}
+
+void {name}_gradient_batch(double t, double *pars, double *q, int n_dim, int N,
+        double *grad) {{
+    int n;
+    for (n=0; n < N; n++)
+        {name}_gradient(t, pars, &q[n*n_dim], n_dim, &grad[n*n_dim]);
+}}
+"""
+
+_pyx_template = """# cython: language_level=3
+# Generated by gala.potential.from_equation() -- do not edit
+
+import numpy as np
+
+from gala.potential.potential.cpotential cimport CPotentialWrapper
+from gala.potential.potential.cpotential cimport (
+    energyfunc, gradientfunc, hessianfunc,
+    valuegradientfunc, energybatchfunc, gradientbatchfunc
+)
+
+cdef extern from "{name}.h":
+    double {name}_value(double t, double *pars, double *q, int n_dim) nogil
+    void {name}_gradient(double t, double *pars, double *q, int n_dim,
+                         double *grad) nogil
+    double {name}_value_gradient(double t, double *pars, double *q, int n_dim,
+                                 double *grad) nogil
+    void {name}_hessian(double t, double *pars, double *q, int n_dim,
+                        double *hess) nogil
+    void {name}_value_batch(double t, double *pars, double *q, int n_dim,
+                            int N, double *val) nogil
+    void {name}_gradient_batch(double t, double *pars, double *q, int n_dim,
+                               int N, double *grad) nogil
+
+cdef class Wrapper(CPotentialWrapper):
+
+    def __init__(self, G, parameters, q0, R):
+        self.init([G] + list(parameters),
+                  np.ascontiguousarray(q0),
+                  np.ascontiguousarray(R),
+                  n_dim={ndim})
+        self.cpotential.value[0] = <energyfunc>({name}_value)
+        self.cpotential.gradient[0] = <gradientfunc>({name}_gradient)
+        self.cpotential.value_gradient[0] = (
+            <valuegradientfunc>({name}_value_gradient))
+        self.cpotential.value_batch[0] = (
+            <energybatchfunc>({name}_value_batch))
+        self.cpotential.gradient_batch[0] = (
+            <gradientbatchfunc>({name}_gradient_batch))
+        if {hessian}:
+            self.cpotential.hessian[0] = <hessianfunc>({name}_hessian)
+            self.cpotential.has_hessian[0] = 1
+"""
+
+
+def _c_function_body(exprs, targets, return_expr=None):
+    """
+    Generate the body of a C function that accumulates the input sympy
+    expressions into the target array elements, after common subexpression
+    elimination. If ``return_expr`` is specified, it is evaluated (sharing
+    the common subexpressions) and returned.
+    """
+    import sympy
+
+    all_exprs = list(exprs)
+    if return_expr is not None:
+        all_exprs = [return_expr] + all_exprs
+
+    replacements, reduced = sympy.cse(
+        all_exprs, symbols=sympy.numbered_symbols('tmp'))
+
+    lines = []
+    for sym, sub_expr in replacements:
+        lines.append(f'    double {sympy.ccode(sym)} = {sympy.ccode(sub_expr)};')
+
+    if return_expr is not None:
+        ret, reduced = reduced[0], reduced[1:]
+
+    for target, reduced_expr in zip(targets, reduced):
+        if reduced_expr == 0:
+            continue
+        lines.append(f'    {target} = {target} + {sympy.ccode(reduced_expr)};')
+
+    if return_expr is not None:
+        lines.append(f'    return {sympy.ccode(ret)};')
+
+    return '\n'.join(lines)
+
+
+def _generate_c_source(func_name, expr, vars, pars, hessian=False):
+    """
+    Generate C source code for the energy, gradient, and Hessian of the input
+    expression, following the calling conventions of the built-in potentials.
+    Variables are read from ``q``, and parameters from ``pars`` (offset by one
+    because the first parameter of all C potentials is G).
+    """
+    import sympy
+
+    ndim = len(vars)
+    q = [sympy.Symbol(f'q[{i}]') for i in range(ndim)]
+    p = [sympy.Symbol(f'pars[{i+1}]') for i in range(len(pars))]
+    expr = expr.xreplace(dict(zip(vars + pars, q + p)))
+
+    unknown = expr.free_symbols - set(q) - set(p)
+    if unknown:
+        raise ValueError(
+            "Expression contains symbols that are not variables or "
+            f"parameters: {', '.join(sorted(str(x) for x in unknown))}")
+
+    grad = [sympy.diff(expr, x) for x in q]
+    grad_targets = [f'grad[{i}]' for i in range(ndim)]
+
+    if hessian:
+        hess = [sympy.diff(expr, x1, x2) for x1 in q for x2 in q]
+    else:
+        hess = []
+    hess_targets = [f'hess[{i}]' for i in range(ndim * ndim)]
+
+    return _c_func_template.format(
+        name=func_name,
+        value_body=_c_function_body([], [], return_expr=expr),
+        gradient_body=_c_function_body(grad, grad_targets),
+        value_gradient_body=_c_function_body(grad, grad_targets,
+                                             return_expr=expr),
+        hessian_body=_c_function_body(hess, hess_targets)
+    )
+
+
+def _c_headers_hash():
+    """
+    Hash the C headers and Cython declarations that the generated extensions
+    are compiled against, so that cached builds are invalidated when the
+    layout of the ``CPotential`` struct changes.
+    """
+    from ... import get_include
+    gala_path = get_include()
+
+    h = hashlib.sha1()
+    for filename in _C_HEADERS:
+        path = os.path.join(gala_path, filename)
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def _default_cache_dir():
+    from astropy.config.paths import get_cache_dir
+    return os.path.join(get_cache_dir('gala'), 'from_equation')
+
+
+def _build_extension(module_name, c_source, pyx_source, cache_dir):
+    """
+    Compile the generated source code into an extension module named
+    ``module_name`` inside of ``cache_dir`` and return the path to the
+    compiled module.
+    """
+    try:
+        from Cython.Build import cythonize
+        from setuptools import Distribution, Extension
+    except ImportError:
+        raise ImportError("Cython and setuptools are required to use "
+                          "from_equation() with backend='c'.")
+
+    import numpy as np
+
+    from ... import get_include
+    gala_path = get_include()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    build_dir = tempfile.mkdtemp(prefix=f'{module_name}_', dir=cache_dir)
+    try:
+        with open(os.path.join(build_dir, f'{module_name}.h'), 'w') as f:
+            f.write('#include <math.h>\n')
+            f.write(c_source)
+
+        pyx_file = os.path.join(build_dir, f'{module_name}.pyx')
+        with open(pyx_file, 'w') as f:
+            f.write(pyx_source)
+
+        ext = Extension(
+            module_name,
+            sources=[pyx_file],
+            include_dirs=[build_dir,
+                          np.get_include(),
+                          os.path.join(gala_path, 'potential'),
+                          gala_path],
+            extra_compile_args=['--std=gnu99'])
+
+        dist = Distribution({
+            'ext_modules': cythonize(
+                [ext], include_path=[os.path.dirname(gala_path)],
+                quiet=True, compiler_directives={'language_level': 3})
+        })
+        cmd = dist.get_command_obj('build_ext')
+        cmd.build_lib = build_dir
+        cmd.build_temp = os.path.join(build_dir, 'tmp')
+        cmd.ensure_finalized()
+        cmd.run()
+
+        built = cmd.get_ext_fullpath(module_name)
+        module_path = os.path.join(cache_dir, os.path.basename(built))
+        # atomic, so concurrent builds of the same expression are safe
+        os.replace(built, module_path)
+
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+    return module_path
+
+
+def _load_extension(module_name, cache_dir):
+    """
+    Import a compiled extension module from the cache, or return None if it
+    has not been built.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    from importlib.machinery import EXTENSION_SUFFIXES
+
+    for suffix in EXTENSION_SUFFIXES:
+        path = os.path.join(cache_dir, module_name + suffix)
+        if os.path.exists(path):
+            break
+    else:
+        return None
+
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    sys.modules[module_name] = module
+    return module
+
+
+def _from_equation_c(expr, vars, pars, parameters, name=None, hessian=False,
+                     cache_dir=None):
+    """
+    Implementation of `from_equation()` for ``backend='c'``.
+    """
+    import sympy
+    from ... import __version__
+    from .cpotential import CPotentialBase
+
+    if cache_dir is None:
+        cache_dir = _default_cache_dir()
+
+    key = '|'.join([
+        sympy.srepr(expr),
+        ','.join(v.name for v in vars),
+        ','.join(p.name for p in pars),
+        str(bool(hessian)),
+        str(_CODEGEN_VERSION),
+        __version__,
+        _c_headers_hash()
+    ])
+    module_name = 'gala_eq_' + hashlib.sha1(key.encode()).hexdigest()[:16]
+
+    module = _load_extension(module_name, cache_dir)
+    if module is None:
+        c_source = _generate_c_source(module_name, expr, vars, pars,
+                                      hessian=hessian)
+        pyx_source = _pyx_template.format(name=module_name, ndim=len(vars),
+                                          hessian=bool(hessian))
+        _build_extension(module_name, c_source, pyx_source, cache_dir)
+        module = _load_extension(module_name, cache_dir)
+
+    class CustomPotential(CPotentialBase, parameters=parameters):
+        ndim = len(vars)
+        Wrapper = module.Wrapper
+
+    _set_potential_name(CustomPotential, name)
+
+    CustomPotential.save = None
+    return CustomPotential
+
+
 def format_doc(*args, **kwargs):
     """
     Replaces the docstring of the decorated object and then formats it.
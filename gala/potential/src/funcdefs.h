@@ -4,6 +4,9 @@
     typedef double (*energyfunc)(double t, double *pars, double *q, int n_dim);
     typedef void (*gradientfunc)(double t, double *pars, double *q, int n_dim, double *grad);
     typedef void (*hessianfunc)(double t, double *pars, double *q, int n_dim, double *hess);
+    typedef double (*valuegradientfunc)(double t, double *pars, double *q, int n_dim, double *grad);
+    typedef void (*energybatchfunc)(double t, double *pars, double *q, int n_dim, int N, double *val);
+    typedef void (*gradientbatchfunc)(double t, double *pars, double *q, int n_dim, int N, double *grad);
 #endif
 
 